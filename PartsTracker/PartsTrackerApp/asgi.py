@@ -3,6 +3,12 @@ ASGI config for PartsTracker project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it (e.g. ``uvicorn PartsTrackerApp.asgi:application``) to keep
+server-sent event streams such as /api/WorkQueue/stream/ open and pushing;
+under the WSGI entry point those streams send one snapshot and close. With
+more than one process, set FANOUT_BACKEND=redis so writes made by other
+workers reach the streams (see Tracker.utils.fanout).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -11,6 +17,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PartsTracker.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PartsTrackerApp.settings')
 
 application = get_asgi_application()
@@ -29,6 +29,19 @@ app.conf.beat_schedule = {
         'task': 'Tracker.tasks.tick_escalations',
         'schedule': crontab(minute='*'),
     },
+    # Send notification emails that are waiting on a retry or a digest
+    # window (Tracker.services.core.notifications.email_batch).
+    'drain-email-outbox': {
+        'task': 'Tracker.tasks.drain_email_outbox',
+        'schedule': crontab(minute='*'),
+    },
+    # Store OEE buckets for shift windows that have ended
+    # (Tracker.services.mes.oee). Must run more often than
+    # OEE_ROLLUP_LAG_MINUTES.
+    'roll-up-oee': {
+        'task': 'Tracker.tasks.roll_up_oee',
+        'schedule': crontab(minute='*/15'),
+    },
     # Check for overdue approvals every hour
     'check-overdue-approvals': {
         'task': 'Tracker.tasks.check_overdue_approvals',
@@ -44,6 +57,19 @@ app.conf.beat_schedule = {
         'task': 'Tracker.tasks.check_overdue_capas',
         'schedule': crontab(hour=8, minute=0),
     },
+    # Re-derive recent days of the quality dashboard rollups and repair
+    # drift from writes that bypassed signals (Tracker.services.qms.quality_rollup).
+    'reconcile-quality-rollups': {
+        'task': 'Tracker.tasks.reconcile_quality_rollups',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    # Repair work-queue projection rows that drifted from writes that
+    # bypassed signals, and push them to the stations
+    # (Tracker.services.mes.work_queue).
+    'reconcile-work-queue': {
+        'task': 'Tracker.tasks.reconcile_work_queue',
+        'schedule': crontab(minute='*/5'),
+    },
 }
 
 app.conf.timezone = 'UTC'
@@ -563,6 +563,18 @@ if os.getenv("AWS_S3_ENDPOINT_URL"):
 NPM_BIN_PATH = os.environ.get("NPM_BIN_PATH")
 
 AUDITLOG_INCLUDE_ALL_MODELS = True
+# Derived index tables: rewritten wholesale on rebuild, nothing to audit.
+AUDITLOG_EXCLUDE_TRACKING_MODELS = (
+    'Tracker.scopeclosure', 'Tracker.spcstatsbucket', 'Tracker.oeebucket',
+    'Tracker.qualitydailyrollup', 'Tracker.defectdailyrollup', 'Tracker.workqueueentry',
+    # Counter rows; the numbered records themselves are audited.
+    'Tracker.sequencecounter',
+    # Delivery log: each row records its own status, attempts and error, and
+    # the dispatcher bulk-inserts them per event fan-out.
+    'Tracker.notificationoutbox',
+    # Content-addressed embedding vectors; a cache, not a record.
+    'Tracker.embeddingcache',
+)
 
 # Password reset URL configuration
 # FRONTEND_URL should be full URL like https://app.example.com
@@ -639,6 +651,34 @@ SERVER_EMAIL = os.environ.get("SERVER_EMAIL", DEFAULT_FROM_EMAIL)
 # Fail fast instead of hanging forever when a mail host is firewalled/blackholed
 # (a blocked outbound SMTP connect with no timeout blocks the request/worker).
 EMAIL_TIMEOUT = int(os.environ.get("EMAIL_TIMEOUT", "10"))
+# Notification emails are sent in batches over one connection
+# (Tracker.services.core.notifications.email_batch): rows claimed per batch,
+# and an opt-in digest window in seconds (0 = off) that merges a recipient's
+# queued notifications into one message.
+NOTIFICATION_EMAIL_BATCH_SIZE = int(os.environ.get("NOTIFICATION_EMAIL_BATCH_SIZE", "200"))
+NOTIFICATION_EMAIL_DIGEST_SECONDS = int(os.environ.get("NOTIFICATION_EMAIL_DIGEST_SECONDS", "0"))
+
+# 3D model processing (Tracker.services.model_processor via process_3d_model).
+# Face budgets for the levels of detail; the largest is the main GLB, the rest
+# are served first by ThreeDModels/{id}/lod/ for progressive loading.
+MODEL_LOD_FACES = [int(n) for n in os.environ.get("MODEL_LOD_FACES", "5000,25000,100000").split(",") if n.strip()]
+# Quantize + meshopt-compress every level (needs the gltfpack binary on PATH).
+MODEL_LOD_COMPRESS = _env_bool("MODEL_LOD_COMPRESS", "False")
+# STEP tessellation runs in a child process with this address-space cap (MB),
+# killed after MODEL_CONVERT_TIMEOUT seconds; keep it under the task time limit.
+MODEL_CONVERT_MEMORY_MB = int(os.environ.get("MODEL_CONVERT_MEMORY_MB", "4096"))
+MODEL_CONVERT_TIMEOUT = int(os.environ.get("MODEL_CONVERT_TIMEOUT", "240"))
+
+# Finite-capacity scheduler (Tracker/services/mes/scheduler.py). The time
+# limit is the default per solve; requests may ask for less or more up to
+# SCHEDULER_MAX_TIME_LIMIT_SECONDS. SCHEDULED slots starting within the
+# frozen fence are left where they are.
+SCHEDULER_TIME_LIMIT_SECONDS = int(os.environ.get("SCHEDULER_TIME_LIMIT_SECONDS", "60"))
+SCHEDULER_MAX_TIME_LIMIT_SECONDS = int(os.environ.get("SCHEDULER_MAX_TIME_LIMIT_SECONDS", "600"))
+SCHEDULER_FROZEN_MINUTES = int(os.environ.get("SCHEDULER_FROZEN_MINUTES", "0"))
+SCHEDULER_DEFAULT_STEP_MINUTES = int(os.environ.get("SCHEDULER_DEFAULT_STEP_MINUTES", "30"))
+SCHEDULER_NUM_WORKERS = int(os.environ.get("SCHEDULER_NUM_WORKERS", "8"))
+SCHEDULER_RELATIVE_GAP = float(os.environ.get("SCHEDULER_RELATIVE_GAP", "0.02"))
 
 # --- AI / RAG minimal settings ---
 AI_EMBED_ENABLED = os.getenv("AI_EMBED_ENABLED", "true").lower() in {"1", "true", "yes"}
@@ -652,7 +692,9 @@ AI_EMBED_DIM = int(os.getenv("AI_EMBED_DIM", "768"))  # nomic-embed-text uses 76
 AI_EMBED_MAX_FILE_BYTES = int(os.getenv("AI_EMBED_MAX_FILE_BYTES", "2000000"))  # ~2MB
 AI_EMBED_CHUNK_CHARS    = int(os.getenv("AI_EMBED_CHUNK_CHARS", "1200"))
 AI_EMBED_MAX_CHUNKS     = int(os.getenv("AI_EMBED_MAX_CHUNKS", "40"))
-AI_EMBED_BATCH_SIZE     = int(os.getenv("AI_EMBED_BATCH_SIZE", "8"))
+AI_EMBED_BATCH_SIZE     = int(os.getenv("AI_EMBED_BATCH_SIZE", "8"))   # texts per /api/embed request
+AI_EMBED_CONCURRENCY    = int(os.getenv("AI_EMBED_CONCURRENCY", "4"))  # requests in flight at once
+AI_EMBED_TIMEOUT        = int(os.getenv("AI_EMBED_TIMEOUT", "60"))     # seconds per request
 
 # Encryption key for sensitive fields (LLM API keys, integration secrets).
 # Required by django-encrypted-model-fields. env, or an ephemeral key for local
@@ -852,6 +894,18 @@ DEDICATED_MODE = DEPLOYMENT_MODE == "dedicated"
 DEFAULT_TENANT_SLUG = os.getenv("DEFAULT_TENANT_SLUG", "default")
 DEFAULT_TENANT_NAME = os.getenv("DEFAULT_TENANT_NAME", "My Company")
 
+# Per-worker cache of tenant rows and memberships used by TenantMiddleware
+# (Tracker.utils.tenant_cache). Invalidated through a version key in CACHES on
+# every Tenant / TenantMembership / UserRole write; TTL bounds staleness for
+# writes that skip signals. Off under the test runner: TestCase rollbacks
+# don't fire signals, so cached rows would outlive the test that made them.
+TENANT_CACHE_ENABLED = (
+    os.getenv("TENANT_CACHE_ENABLED", "true").lower() in ("true", "1", "yes")
+    and 'test' not in _sys.argv
+)
+TENANT_CACHE_SIZE = int(os.getenv("TENANT_CACHE_SIZE", "2048"))
+TENANT_CACHE_TTL = int(os.getenv("TENANT_CACHE_TTL", "300"))  # seconds
+
 # Demo tenant slug (convenience pointer for SaaS mode)
 # The demo tenant is just a regular tenant with is_demo=True
 DEMO_TENANT_SLUG = os.getenv("DEMO_TENANT_SLUG", "demo")
@@ -881,6 +935,57 @@ RESERVED_TENANT_SLUGS = [
 # Set to True once RLS policies are deployed and app_user role is configured
 ENABLE_RLS = os.getenv("ENABLE_RLS", "false").lower() in {"1", "true", "yes"}
 
+# Maintain the ScopeClosure index (order → work order → part → execution/QR)
+# from save/delete signals so scope queries can use strategy='closure'.
+# Run `manage.py rebuild_scope_closure` after turning this on.
+SCOPE_CLOSURE_ENABLED = os.getenv("SCOPE_CLOSURE_ENABLED", "false").lower() in {"1", "true", "yes"}
+
+# Maintain per-day SPC statistics (SPCStatsBucket) from measurement saves and
+# serve chart/capability statistics from them (`?source=raw` recomputes from
+# the rows). Run `manage.py rebuild_spc_stats` after turning this on.
+SPC_STATS_ENABLED = os.getenv("SPC_STATS_ENABLED", "false").lower() in {"1", "true", "yes"}
+
+# Maintain the per-shift-window OEE rollup (OEEBucket) from downtime, time
+# entry, completion and quality report saves plus the roll_up_oee beat tick,
+# and serve the OEE endpoint from it (`?source=raw` recomputes from the
+# events). Windows that ended less than OEE_ROLLUP_LAG_MINUTES ago are always
+# computed live, so the lag must exceed the beat interval. Run
+# `manage.py rebuild_oee` after turning this on.
+OEE_ROLLUP_ENABLED = os.getenv("OEE_ROLLUP_ENABLED", "false").lower() in {"1", "true", "yes"}
+OEE_ROLLUP_LAG_MINUTES = int(os.getenv("OEE_ROLLUP_LAG_MINUTES", "60"))
+
+# Maintain the daily quality dashboard rollups (QualityDailyRollup,
+# DefectDailyRollup) from quality report, defect and disposition saves, and
+# serve the FPY / Pareto / NCR dashboard endpoints from them (`?source=raw`
+# recomputes from the records). The nightly reconcile re-derives the last
+# QUALITY_ROLLUP_RECONCILE_DAYS. Run `manage.py rebuild_quality_rollups`
+# after turning this on.
+QUALITY_ROLLUP_ENABLED = os.getenv("QUALITY_ROLLUP_ENABLED", "false").lower() in {"1", "true", "yes"}
+QUALITY_ROLLUP_RECONCILE_DAYS = int(os.getenv("QUALITY_ROLLUP_RECONCILE_DAYS", "90"))
+
+# Maintain the operator work-queue projection (WorkQueueEntry) from step
+# execution, part, work order and hold saves plus the reconcile_work_queue
+# beat tick, serve the work queue and WIP summary from it (`?source=raw`
+# recomputes from the executions), and push row diffs to
+# /api/WorkQueue/stream/. Run `manage.py rebuild_work_queue` after turning
+# this on.
+WORK_QUEUE_PROJECTION_ENABLED = os.getenv("WORK_QUEUE_PROJECTION_ENABLED", "false").lower() in {"1", "true", "yes"}
+# A stream sends a keep-alive comment after this many idle seconds and closes
+# after WORK_QUEUE_STREAM_MAX_SECONDS, so the client reconnects (and is
+# re-authenticated) with a fresh snapshot. EventSource clients wait
+# WORK_QUEUE_STREAM_RETRY_MS before reconnecting; on a WSGI worker, or with
+# the projection off, the stream is a single snapshot and that retry is the
+# polling interval.
+WORK_QUEUE_STREAM_HEARTBEAT_SECONDS = int(os.getenv("WORK_QUEUE_STREAM_HEARTBEAT_SECONDS", "15"))
+WORK_QUEUE_STREAM_MAX_SECONDS = int(os.getenv("WORK_QUEUE_STREAM_MAX_SECONDS", "300"))
+WORK_QUEUE_STREAM_RETRY_MS = int(os.getenv("WORK_QUEUE_STREAM_RETRY_MS", "5000"))
+
+# Fan-out for server-sent event streams (Tracker.utils.fanout). 'local' only
+# reaches streams in the publishing process; use 'redis' whenever the writers
+# (web workers, Celery) and the ASGI stream server are separate processes.
+FANOUT_BACKEND = os.getenv("FANOUT_BACKEND", "local")
+FANOUT_REDIS_URL = os.getenv("FANOUT_REDIS_URL") or os.getenv("REDIS_URL") or "redis://localhost:6379/0"
+
 # =============================================================================
 # PRODUCTION SECURITY SETTINGS
 # =============================================================================
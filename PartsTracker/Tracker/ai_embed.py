@@ -1,26 +1,105 @@
+"""
+Embedding client for Ollama, and the content-addressed vector cache.
+
+    embed_texts(texts)          vectors in input order. Texts go to
+                                `/api/embed` AI_EMBED_BATCH_SIZE at a time,
+                                with up to AI_EMBED_CONCURRENCY requests in
+                                flight; duplicate texts are embedded once.
+    embed_texts_cached(texts, tenant_id)
+                                the same, but vectors already in the
+                                tenant's EmbeddingCache (model + sha256 of
+                                the text) are reused and new ones are stored.
+    text_hash(text)             the cache key.
+
+Queries use `embed_texts` directly; only document chunks go through the
+cache, since they are what recurs across document versions.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 from typing import List
+
 from django.conf import settings
 import requests
+from requests.adapters import HTTPAdapter
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _embed_model() -> str:
+    return getattr(settings, 'OLLAMA_EMBED_MODEL', 'nomic-embed-text')
 
 
 def embed_texts(texts: List[str]) -> List[List[float]]:
-    """Generate embeddings using Ollama API"""
+    """Generate embeddings using the Ollama API, batched and concurrent."""
+    if not texts:
+        return []
     ollama_url = getattr(settings, 'OLLAMA_URL', 'http://localhost:11434')
-    model_name = getattr(settings, 'OLLAMA_EMBED_MODEL', 'nomic-embed-text')
-
-    embeddings = []
-    for text in texts:
-        response = requests.post(
-            f'{ollama_url}/api/embeddings',
-            json={
-                'model': model_name,
-                'prompt': text
-            }
+    batch_size = max(1, getattr(settings, 'AI_EMBED_BATCH_SIZE', 8))
+    concurrency = max(1, getattr(settings, 'AI_EMBED_CONCURRENCY', 4))
+    timeout = getattr(settings, 'AI_EMBED_TIMEOUT', 60)
+    model_name = _embed_model()
+
+    unique = list(dict.fromkeys(texts))
+    batches = [unique[i:i + batch_size] for i in range(0, len(unique), batch_size)]
+
+    with requests.Session() as session:
+        session.mount(ollama_url, HTTPAdapter(pool_maxsize=concurrency))
+
+        def post(batch):
+            response = session.post(
+                f'{ollama_url}/api/embed',
+                json={'model': model_name, 'input': batch},
+                timeout=timeout,
+            )
+            response.raise_for_status()
+            embeddings = response.json()['embeddings']
+            if len(embeddings) != len(batch):
+                raise ValueError(f'Expected {len(batch)} embeddings, got {len(embeddings)}')
+            return embeddings
+
+        if len(batches) == 1:
+            results = [post(batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as pool:
+                results = list(pool.map(post, batches))
+
+    by_text = {
+        text: vector
+        for batch, vectors in zip(batches, results)
+        for text, vector in zip(batch, vectors)
+    }
+    return [by_text[text] for text in texts]
+
+
+def embed_texts_cached(texts: List[str], tenant_id) -> List[List[float]]:
+    """`embed_texts`, reading and filling the tenant's EmbeddingCache."""
+    from Tracker.models import EmbeddingCache
+
+    model_name = _embed_model()
+    hashes = [text_hash(t) for t in texts]
+    vectors = dict(
+        EmbeddingCache.objects.filter(tenant_id=tenant_id, model=model_name, text_hash__in=set(hashes))
+        .values_list('text_hash', 'embedding')
+    )
+
+    missing = {h: t for h, t in zip(hashes, texts) if h not in vectors}
+    if missing:
+        fresh = embed_texts(list(missing.values()))
+        if any(len(v) != settings.AI_EMBED_DIM for v in fresh):
+            raise ValueError(f'Embedding model returned vectors that are not {settings.AI_EMBED_DIM}-dimensional')
+        vectors.update(zip(missing, fresh))
+        EmbeddingCache.objects.bulk_create(
+            [
+                EmbeddingCache(tenant_id=tenant_id, model=model_name, text_hash=h, embedding=v)
+                for h, v in zip(missing, fresh)
+            ],
+            batch_size=100,
+            ignore_conflicts=True,
         )
-        response.raise_for_status()
-        embeddings.append(response.json()['embedding'])
 
-    return embeddings
+    return [vectors[h] for h in hashes]
 
 
 def chunk_text(s: str, max_chars=1200, max_chunks=40):
@@ -32,4 +111,4 @@ def chunk_text(s: str, max_chars=1200, max_chunks=40):
         cur.append(line); n += len(line) + 1
     if cur and len(out) < max_chunks:
         out.append("\n".join(cur))
-    return out
\ No newline at end of file
+    return out
@@ -1,6 +1,5 @@
 import logging
 from django.db.models import Q
-from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
 from django.contrib.contenttypes.models import ContentType
 from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
@@ -12,11 +11,11 @@ from Tracker.authentication import (
     TenantMembershipTokenAuthentication,
     TenantMembershipSessionAuthentication,
 )
-from pgvector.django import CosineDistance
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes, inline_serializer
 from auditlog.models import LogEntry
 
 from .models import DocChunk, Documents
+from .services.core import doc_search
 from .serializers import DocumentsSerializer
 
 logger = logging.getLogger(__name__)
@@ -172,12 +171,8 @@ class AISearchViewSet(viewsets.GenericViewSet):
         # Filter by specific documents if provided
         if doc_ids:
             chunks = chunks.filter(doc_id__in=doc_ids)
-        
-        chunks = chunks.annotate(
-            similarity=CosineDistance('embedding', query_embedding)
-        ).filter(
-            similarity__gte=threshold
-        ).order_by('-similarity')[:limit]
+
+        chunks = doc_search.vector_search(chunks, query_embedding, limit=limit, threshold=threshold)
 
         results = [{
             'id': chunk.id,
@@ -249,20 +244,14 @@ class AISearchViewSet(viewsets.GenericViewSet):
             return Response({"detail": "query parameter 'q' required"}, status=status.HTTP_400_BAD_REQUEST)
 
         # Filter chunks based on user's document classification permissions
-        chunks = DocChunk.objects.for_user(request.user).select_related('doc')
-        
+        chunks = DocChunk.objects.for_user(request.user)
+
         # Filter by specific documents if provided
         if doc_ids:
             chunks = chunks.filter(doc_id__in=doc_ids)
-        
-        # PostgreSQL full-text search
-        search_query = SearchQuery(query)
-        chunks = chunks.annotate(
-            search_vector=SearchVector('preview_text', 'full_text'),
-            rank=SearchRank(SearchVector('preview_text', 'full_text'), search_query)
-        ).filter(
-            search_vector=search_query
-        ).order_by('-rank')[:limit]
+
+        # PostgreSQL full-text search over the stored search_vector
+        chunks = doc_search.keyword_search(chunks, query, limit=limit)
 
         results = [{
             'id': chunk.id,
@@ -323,7 +312,7 @@ class AISearchViewSet(viewsets.GenericViewSet):
     )
     @action(detail=False, methods=['post'])
     def hybrid_search(self, request):
-        """Combine vector similarity and keyword search results"""
+        """Combine vector similarity and keyword search results by reciprocal rank"""
         query = request.data.get('query', '')
         query_embedding = request.data.get('embedding')
         limit = request.data.get('limit', 10)
@@ -333,62 +322,30 @@ class AISearchViewSet(viewsets.GenericViewSet):
         if not query and not query_embedding:
             return Response({"detail": "Either 'query' or 'embedding' required"}, status=status.HTTP_400_BAD_REQUEST)
         
-        results = []
-        
-        # Vector search if embedding provided
-        if query_embedding:
-            # Filter chunks based on user's document classification permissions
-            vector_chunks = DocChunk.objects.for_user(request.user)
-            if doc_ids:
-                vector_chunks = vector_chunks.filter(doc_id__in=doc_ids)
-            
-            vector_chunks = vector_chunks.annotate(
-                similarity=CosineDistance('embedding', query_embedding)
-            ).filter(
-                similarity__gte=vector_threshold
-            ).order_by('-similarity')[:limit]
-            
-            for chunk in vector_chunks:
-                results.append({
-                    'id': chunk.id,
-                    'score': float(chunk.similarity),
-                    'score_type': 'vector_similarity',
-                    'preview_text': chunk.preview_text,
-                    'full_text': chunk.full_text,
-                    'span_meta': chunk.span_meta,
-                    'doc_id': chunk.doc_id,
-                    'doc_name': chunk.doc.file_name
-                })
-        
-        # Keyword search if query provided
-        if query:
-            # Filter chunks based on user's document classification permissions
-            keyword_chunks = DocChunk.objects.for_user(request.user).select_related('doc')
-            if doc_ids:
-                keyword_chunks = keyword_chunks.filter(doc_id__in=doc_ids)
-            
-            search_query = SearchQuery(query)
-            keyword_chunks = keyword_chunks.annotate(
-                search_vector=SearchVector('preview_text', 'full_text'),
-                rank=SearchRank(SearchVector('preview_text', 'full_text'), search_query)
-            ).filter(
-                search_vector=search_query
-            ).order_by('-rank')[:limit]
-            
-            # Add keyword results, avoiding duplicates
-            existing_ids = {r['id'] for r in results}
-            for chunk in keyword_chunks:
-                if chunk.id not in existing_ids:
-                    results.append({
-                        'id': chunk.id,
-                        'score': float(chunk.rank),
-                        'score_type': 'keyword_rank',
-                        'preview_text': chunk.preview_text,
-                        'full_text': chunk.full_text,
-                        'span_meta': chunk.span_meta,
-                        'doc_id': chunk.doc_id,
-                        'doc_name': chunk.doc.file_name
-                    })
+        # Filter chunks based on user's document classification permissions
+        chunks = DocChunk.objects.for_user(request.user)
+        if doc_ids:
+            chunks = chunks.filter(doc_id__in=doc_ids)
+
+        # Reciprocal-rank fusion of the vector and keyword legs
+        results = [{
+            'id': chunk.id,
+            'score': chunk.score,
+            'score_type': 'rrf',
+            'vector_rank': chunk.vector_rank,
+            'keyword_rank': chunk.keyword_rank,
+            'preview_text': chunk.preview_text,
+            'full_text': chunk.full_text,
+            'span_meta': chunk.span_meta,
+            'doc_id': chunk.doc_id,
+            'doc_name': chunk.doc.file_name
+        } for chunk in doc_search.hybrid_search(
+            chunks,
+            query=query,
+            embedding=query_embedding or None,
+            limit=limit,
+            threshold=vector_threshold,
+        )]
 
         # Log AI hybrid search access
         log_ai_data_access(
@@ -0,0 +1,46 @@
+"""
+Backfill NotificationSchedule.next_fire_at for existing records.
+
+The beat tick only looks at rows whose `next_fire_at` has passed, so rows
+created before the column existed must be filled in once. By default only
+rows with no value are touched; --recompute rewrites every row, e.g. after
+a tenant's default timezone changed.
+
+Usage:
+    python manage.py backfill_schedule_next_fire
+    python manage.py backfill_schedule_next_fire --tenant acme --recompute
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.models import NotificationSchedule, Tenant
+from Tracker.services.core.notifications.schedule import backfill_next_fire
+
+
+class Command(BaseCommand):
+    help = 'Backfill NotificationSchedule.next_fire_at for existing records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='Only this tenant slug (default: all tenants)')
+        parser.add_argument(
+            '--recompute',
+            action='store_true',
+            help='Recompute rows that already have a value too',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per UPDATE (default: 500)')
+
+    def handle(self, *args, **options):
+        schedules = NotificationSchedule.all_tenants.filter(archived=False)
+        if options['tenant']:
+            tenant = Tenant.objects.filter(slug=options['tenant']).first()
+            if tenant is None:
+                raise CommandError(f"Tenant '{options['tenant']}' not found")
+            schedules = schedules.filter(tenant=tenant)
+        if not options['recompute']:
+            schedules = schedules.filter(next_fire_at__isnull=True)
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be >= 1')
+
+        total = schedules.count()
+        self.stdout.write(f"Found {total} schedule(s) to check")
+        written = backfill_next_fire(schedules, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Updated next_fire_at on {written} schedule(s)"))
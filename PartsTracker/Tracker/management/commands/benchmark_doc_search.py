@@ -0,0 +1,134 @@
+"""
+Management command to measure DocChunk vector search: HNSW against an exact
+scan, plus the hybrid (vector + keyword) path the AI search API uses.
+
+Usage:
+    python manage.py benchmark_doc_search                          # 1M chunks
+    python manage.py benchmark_doc_search --chunks 50000 --queries 200
+
+Loads synthetic chunks (clustered random embeddings, short maintenance-style
+text) into doc_chunks inside a transaction that is rolled back at the end,
+rebuilding the HNSW index over them so build time is measured too. It then
+reports p50/p95 latency for:
+
+    ann      ORDER BY embedding <=> q LIMIT k through the HNSW index
+    exact    the same query with index scans disabled
+    hybrid   doc_search.hybrid_search over the synthetic document
+
+and recall@k of the ANN results against the exact ones.
+
+Takes an exclusive lock on doc_chunks while it runs; point it at a dev or
+staging database, not production.
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from Tracker.models import DocChunk, Documents, Tenant
+from Tracker.services.core import doc_search
+
+WORDS = (
+    'torque bolt flange seal gasket bearing spindle coolant calibrate inspect '
+    'weld anneal burr deburr fixture gauge bore thread hone lap polish anodize '
+    'rivet shim bracket housing shaft key spline pump valve hose clamp'
+).split()
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _percentiles(samples):
+    return np.percentile(np.array(samples) * 1000, [50, 95])
+
+
+class Command(BaseCommand):
+    help = 'Benchmark HNSW vs exact DocChunk vector search on synthetic data (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunks', type=int, default=1_000_000, help='Synthetic chunks (default: 1000000)')
+        parser.add_argument('--queries', type=int, default=100, help='Query vectors to time (default: 100)')
+        parser.add_argument('-k', type=int, default=10, help='Results per query (default: 10)')
+        parser.add_argument('--ef-search', type=int, default=40, help='hnsw.ef_search for the ANN run (default: 40)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT (default: 5000)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['chunks'] < options['k'] or options['queries'] < 1:
+            raise CommandError('--chunks must be >= -k and --queries >= 1')
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write('Rolled back synthetic data')
+
+    def _run(self, options):
+        rng = np.random.default_rng(options['seed'])
+        dim, k = settings.AI_EMBED_DIM, options['k']
+        centers = rng.normal(size=(256, dim))
+
+        def vectors(n):
+            v = centers[rng.integers(len(centers), size=n)] + rng.normal(scale=0.35, size=(n, dim))
+            return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+        tenant = Tenant.objects.create(name='Search benchmark', slug=f'search-bench-{time.time_ns()}')
+        doc = Documents.unscoped.create(tenant=tenant, file_name='bench.txt', file='bench/bench.txt')
+
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX IF EXISTS doc_chunks_embedding_hnsw')
+
+        started = time.perf_counter()
+        for offset in range(0, options['chunks'], options['batch_size']):
+            n = min(options['batch_size'], options['chunks'] - offset)
+            words = rng.choice(WORDS, size=(n, 12))
+            DocChunk.objects.bulk_create([
+                DocChunk(doc=doc, embedding=vec, full_text=' '.join(text), preview_text=' '.join(text[:4]))
+                for vec, text in zip(vectors(n), words)
+            ])
+        load = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            # Django's FKs are deferred; CREATE INDEX refuses to run with checks pending.
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(
+                'CREATE INDEX doc_chunks_embedding_hnsw ON doc_chunks '
+                'USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)'
+            )
+            cursor.execute('ANALYZE doc_chunks')
+        build = time.perf_counter() - started
+        self.stdout.write(f"Loaded {options['chunks']} chunks in {load:.1f}s, built HNSW in {build:.1f}s")
+
+        sql = 'SELECT id FROM doc_chunks ORDER BY embedding <=> %s::vector LIMIT %s'
+        ann_times, exact_times, hybrid_times, recall = [], [], [], []
+        chunks = DocChunk.objects.filter(doc=doc)
+        for query in vectors(options['queries']):
+            literal = '[' + ','.join(f'{x:.6f}' for x in query) + ']'
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL hnsw.ef_search = %s', [options['ef_search']])
+                started = time.perf_counter()
+                cursor.execute(sql, [literal, k])
+                ann = {row[0] for row in cursor.fetchall()}
+                ann_times.append(time.perf_counter() - started)
+
+                cursor.execute('SET LOCAL enable_indexscan = off')
+                started = time.perf_counter()
+                cursor.execute(sql, [literal, k])
+                exact = {row[0] for row in cursor.fetchall()}
+                exact_times.append(time.perf_counter() - started)
+                cursor.execute('SET LOCAL enable_indexscan = on')
+            recall.append(len(ann & exact) / k)
+
+            started = time.perf_counter()
+            doc_search.hybrid_search(chunks, query=' '.join(rng.choice(WORDS, size=2)), embedding=query, limit=k)
+            hybrid_times.append(time.perf_counter() - started)
+
+        self.stdout.write(f"{'path':>8}  {'p50 (ms)':>9}  {'p95 (ms)':>9}")
+        for name, samples in (('ann', ann_times), ('exact', exact_times), ('hybrid', hybrid_times)):
+            p50, p95 = _percentiles(samples)
+            self.stdout.write(f'{name:>8}  {p50:>9.2f}  {p95:>9.2f}')
+        self.stdout.write(f'recall@{k}: {np.mean(recall):.3f} (ef_search={options["ef_search"]})')
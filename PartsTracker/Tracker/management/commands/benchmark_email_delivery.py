@@ -0,0 +1,99 @@
+"""
+Management command to time notification email delivery: one message per
+`EmailChannel.send` call (the per-row path) against `send_email_batch`
+(one claim, one connection per batch).
+
+Usage:
+    python manage.py benchmark_email_delivery --tenant acme
+    python manage.py benchmark_email_delivery --tenant acme --messages 2000 --batch-size 500
+    python manage.py benchmark_email_delivery --tenant acme \
+        --backend django.core.mail.backends.smtp.EmailBackend   # against a test relay
+
+Both paths run in this one process, so the figures are messages per second
+per worker. The default locmem backend measures the database and message
+building side only; point --backend at a local SMTP sink to include the
+per-message connection setup that batching saves. Throwaway outbox rows
+addressed to one of the tenant's users are created and deleted afterwards.
+"""
+import time
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from Tracker.models import NotificationOutbox, NotificationStatus, Tenant
+from Tracker.services.core.notifications.channels.email import EmailChannel
+from Tracker.services.core.notifications.email_batch import send_email_batch
+from Tracker.utils.tenant_context import tenant_context
+
+
+class Command(BaseCommand):
+    help = 'Benchmark notification email delivery (per-row send vs batched send)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', required=True, help='Tenant slug whose user receives the messages')
+        parser.add_argument('--messages', type=int, default=500, help='Messages per path (default: 500)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Rows per batch (default: 200)')
+        parser.add_argument(
+            '--backend', default='django.core.mail.backends.locmem.EmailBackend',
+            help='Email backend to send through (default: locmem)',
+        )
+
+    def handle(self, *args, **options):
+        tenant = Tenant.objects.filter(slug=options['tenant']).first()
+        if tenant is None:
+            raise CommandError(f"Tenant '{options['tenant']}' not found")
+        if options['messages'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--messages and --batch-size must be >= 1')
+
+        user = get_user_model().objects.filter(tenant=tenant).exclude(email='').first()
+        if user is None:
+            raise CommandError(f"Tenant '{tenant.slug}' has no user with an email address")
+
+        key = f'bench-{uuid4().hex[:8]}'
+        with tenant_context(tenant.id), override_settings(EMAIL_BACKEND=options['backend']):
+            try:
+                per_row = self._time_per_row(tenant, user, key, options['messages'])
+                batched = self._time_batched(tenant, user, key, options['messages'], options['batch_size'])
+            finally:
+                NotificationOutbox.objects.filter(tenant=tenant, idempotency_key__startswith=key).delete()
+                mail.outbox = []
+
+        n = options['messages']
+        self.stdout.write(f"{'path':>10}  {'msg/s':>8}")
+        self.stdout.write(f"{'per-row':>10}  {n / per_row:>8.0f}")
+        self.stdout.write(f"{'batched':>10}  {n / batched:>8.0f}")
+        self.stdout.write(f"speedup: {per_row / batched:.1f}x")
+
+    def _rows(self, tenant, user, key, label, count):
+        return NotificationOutbox.objects.bulk_create([
+            NotificationOutbox(
+                tenant=tenant, user=user, event_code='benchmark', channel='email',
+                rendered_subject=f'Benchmark {i}', rendered_body_text='Benchmark body',
+                rendered_body_html='<p>Benchmark body</p>', status=NotificationStatus.PENDING,
+                idempotency_key=f'{key}:{label}:{i}',
+            )
+            for i in range(count)
+        ])
+
+    def _time_per_row(self, tenant, user, key, count):
+        rows = self._rows(tenant, user, key, 'row', count)
+        channel = EmailChannel()
+        started = time.perf_counter()
+        for row in rows:
+            channel.send(row)
+            NotificationOutbox.objects.filter(tenant=tenant, pk=row.pk).update(status=NotificationStatus.SENT)
+        return time.perf_counter() - started
+
+    def _time_batched(self, tenant, user, key, count, batch_size):
+        ids = [row.id for row in self._rows(tenant, user, key, 'batch', count)]
+        started = time.perf_counter()
+        sent = 0
+        while sent < count:
+            result = send_email_batch(ids=ids, limit=batch_size, digest=0)
+            if not result.sent:
+                raise CommandError(f'Batch stalled after {sent} message(s): {result}')
+            sent += result.sent
+        return time.perf_counter() - started
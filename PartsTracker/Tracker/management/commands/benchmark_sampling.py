@@ -0,0 +1,119 @@
+"""
+Management command to time sampling evaluation for a batch of new parts:
+SamplingCohortEvaluator against SamplingFallbackApplier part by part.
+
+Usage:
+    python manage.py benchmark_sampling                              # 10k parts
+    python manage.py benchmark_sampling --parts 50000 --legacy-parts 500
+    python manage.py benchmark_sampling --rule PERCENTAGE:10 --rule EVERY_NTH_PART:25
+
+Creates a throwaway tenant, one work order and --parts parts at a single
+step inside a transaction that is rolled back at the end. The batch path
+evaluates every part; the per-part path evaluates the first --legacy-parts
+of them against the same full cohort (each of its evaluations reads the
+whole cohort, so its total is extrapolated linearly). Both paths must
+reach the same decision for every part the per-part path evaluated.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from Tracker.models import (
+    Orders, Parts, PartTypes, SamplingRule, SamplingRuleSet, SamplingRuleType, Steps, Tenant, WorkOrder,
+)
+from Tracker.services.mes.sampling_applier import SamplingCohortEvaluator, SamplingFallbackApplier
+from Tracker.utils.tenant_context import tenant_context
+
+DEFAULT_RULES = ['PERCENTAGE:5', 'EVERY_NTH_PART:10', 'RANDOM:2']
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _decision(result):
+    return result.get('requires_sampling', False), getattr(result.get('rule'), 'pk', None), result.get('context', {})
+
+
+class Command(BaseCommand):
+    help = 'Benchmark batch vs per-part sampling evaluation on synthetic parts (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parts', type=int, default=10_000, help='Parts in the batch (default: 10000)')
+        parser.add_argument(
+            '--legacy-parts', type=int, default=200,
+            help='Parts to evaluate one by one for comparison (default: 200)',
+        )
+        parser.add_argument(
+            '--rule', action='append', metavar='TYPE:VALUE',
+            help=f"Rule in evaluation order, repeatable (default: {' '.join(DEFAULT_RULES)})",
+        )
+
+    def handle(self, *args, **options):
+        if options['parts'] < 1 or not 0 <= options['legacy_parts'] <= options['parts']:
+            raise CommandError('--parts must be >= 1 and --legacy-parts between 0 and --parts')
+        rules = []
+        for spec in options['rule'] or DEFAULT_RULES:
+            rule_type, _, value = spec.partition(':')
+            if rule_type not in SamplingRuleType.values or not value.isdigit():
+                raise CommandError(f'Bad --rule {spec!r}; expected TYPE:VALUE with TYPE one of '
+                                   f'{", ".join(SamplingRuleType.values)}')
+            rules.append((rule_type, int(value)))
+
+        try:
+            with transaction.atomic():
+                tenant = Tenant.objects.create(name='Sampling benchmark', slug=f'sampling-bench-{time.time_ns()}')
+                with tenant_context(tenant.id):
+                    self._run(options, rules)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write('Rolled back synthetic data')
+
+    def _run(self, options, rules):
+        part_type = PartTypes.objects.create(name='Bench Widget', ID_prefix='BW')
+        step = Steps.objects.create(name='Bench Inspect', part_type=part_type)
+        order = Orders.objects.create(name='Bench Order')
+        work_order = WorkOrder.objects.create(ERP_id='WO-BENCH', related_order=order, quantity=options['parts'])
+        ruleset = SamplingRuleSet.objects.create(name='Bench', part_type=part_type, step=step, active=True)
+        for position, (rule_type, value) in enumerate(rules, start=1):
+            SamplingRule.objects.create(ruleset=ruleset, rule_type=rule_type, value=value, order=position)
+
+        started = time.perf_counter()
+        parts = Parts.objects.bulk_create(
+            [
+                Parts(ERP_id=f'BW{i:06d}', part_type=part_type, step=step, work_order=work_order, order=order)
+                for i in range(options['parts'])
+            ],
+            batch_size=2000,
+        )
+        self.stdout.write(f"Created {len(parts)} parts in {time.perf_counter() - started:.1f}s "
+                          f"(rules: {', '.join(f'{t}:{v}' for t, v in rules)})")
+
+        legacy = parts[:options['legacy_parts']]
+        started = time.perf_counter()
+        expected = {part.pk: _decision(SamplingFallbackApplier(part).evaluate()) for part in legacy}
+        legacy_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        SamplingCohortEvaluator(parts).apply()
+        batch_time = time.perf_counter() - started
+
+        mismatched = [
+            part.pk for part in legacy
+            if (part.requires_sampling, part.sampling_rule_id, part.sampling_context) != expected[part.pk]
+        ]
+        if mismatched:
+            raise CommandError(f'{len(mismatched)} parts decided differently by the two paths')
+
+        sampled = Parts.objects.filter(work_order=work_order, requires_sampling=True).count()
+        self.stdout.write(f"{'path':>9}  {'parts':>7}  {'total (s)':>10}  {'per part (ms)':>14}")
+        if legacy:
+            per_part = legacy_time / len(legacy)
+            self.stdout.write(f"{'per-part':>9}  {len(legacy):>7}  {legacy_time:>10.2f}  {per_part * 1000:>14.3f}")
+            self.stdout.write(f"{'':>9}  {len(parts):>7}  {per_part * len(parts):>10.2f}  (extrapolated)")
+        self.stdout.write(
+            f"{'batch':>9}  {len(parts):>7}  {batch_time:>10.2f}  {batch_time / len(parts) * 1000:>14.3f}"
+            f"  (incl. audit rows and part update)"
+        )
+        self.stdout.write(f'{sampled} of {len(parts)} parts sampled; {len(expected)} decisions cross-checked')
@@ -0,0 +1,138 @@
+"""
+Management command to stress the CP-SAT scheduler on a seeded synthetic plant.
+
+Usage:
+    python manage.py benchmark_scheduler                           # 300 WOs, 20 work centers
+    python manage.py benchmark_scheduler --work-orders 800 --work-centers 40 --time-limit 120
+    python manage.py benchmark_scheduler --seed 7
+
+Creates a throwaway tenant with two shifts, --work-centers work centers (some
+with several machines), a handful of routings and --work-orders open work
+orders inside a transaction that is rolled back at the end. Then runs:
+
+    initial       first plan, no hints
+    re-solve      same data again
+    rush order    one priority-1 order due tomorrow added
+    lost machine  one multi-machine work center loses a machine
+
+After the initial plan each event is solved cold (not written) and then
+warm from the previous plan (written, so the next event starts from it),
+which shows what the hints buy.
+"""
+import random
+import time
+from datetime import time as dtime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from Tracker.models import (
+    DowntimeEvent, Equipments, PartTypes, Processes, ProcessStep, Shift, Steps, Tenant, User, WorkCenter,
+    WorkOrder, WorkOrderStatus,
+)
+from Tracker.services.mes.scheduler import solve_schedule
+from Tracker.utils.tenant_context import tenant_context
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the CP-SAT scheduler on a seeded synthetic plant (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--work-orders', type=int, default=300, help='Open work orders (default: 300)')
+        parser.add_argument('--work-centers', type=int, default=20, help='Work centers (default: 20)')
+        parser.add_argument('--routings', type=int, default=12, help='Distinct routings (default: 12)')
+        parser.add_argument('--time-limit', type=int, default=60, help='Seconds per solve (default: 60)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the plant (default: 1)')
+
+    def handle(self, *args, **options):
+        if options['work_orders'] < 1 or options['work_centers'] < 2 or options['routings'] < 1:
+            raise CommandError('Need --work-orders >= 1, --work-centers >= 2 and --routings >= 1')
+
+        try:
+            with transaction.atomic():
+                tenant = Tenant.objects.create(name='Scheduler benchmark', slug=f'sched-bench-{time.time_ns()}')
+                with tenant_context(tenant.id):
+                    self._run(tenant, options)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write('Rolled back synthetic data')
+
+    def _run(self, tenant, options):
+        self.tenant = tenant
+        rng = random.Random(options['seed'])
+        now = timezone.now().replace(second=0, microsecond=0)
+        user = User.objects.create_user(username=f'sched-bench-{time.time_ns()}', password=None)
+
+        Shift.objects.create(name='Early', code='E', start_time=dtime(6), end_time=dtime(14))
+        Shift.objects.create(name='Late', code='L', start_time=dtime(14), end_time=dtime(22))
+
+        work_centers, machines = [], {}
+        for i in range(options['work_centers']):
+            wc = WorkCenter.objects.create(name=f'WC {i:02d}', code=f'WC{i:02d}')
+            count = rng.choice([0, 1, 1, 2, 3])
+            if count:
+                equipment = [Equipments.objects.create(name=f'WC{i:02d}-M{m}') for m in range(count)]
+                wc.equipment.set(equipment)
+                machines[wc.pk] = equipment
+            work_centers.append(wc)
+
+        part_type = PartTypes.objects.create(name='Bench Part', ID_prefix='BP')
+        processes = []
+        for r in range(options['routings']):
+            process = Processes.objects.create(name=f'Routing {r}', part_type=part_type)
+            for order, wc in enumerate(rng.sample(work_centers, rng.randint(2, min(6, len(work_centers)))), 1):
+                step = Steps.objects.create(
+                    name=f'R{r} op{order}', part_type=part_type, work_center=wc,
+                    expected_duration=timedelta(minutes=rng.choice([2, 3, 5, 8, 12])),
+                )
+                ProcessStep.objects.create(process=process, step=step, order=order)
+            processes.append(process)
+
+        today = timezone.localdate(now)
+        WorkOrder.objects.bulk_create([
+            WorkOrder(
+                ERP_id=f'WO-B{i:05d}', process=rng.choice(processes), quantity=rng.randint(1, 40),
+                priority=rng.choice([1, 2, 3, 3, 3, 4]), workorder_status=WorkOrderStatus.PENDING,
+                expected_completion=today + timedelta(days=rng.randint(1, 15)),
+            )
+            for i in range(options['work_orders'])
+        ], batch_size=1000)
+        self.stdout.write(
+            f"Plant: {options['work_orders']} work orders, {len(work_centers)} work centers "
+            f"({sum(len(m) for m in machines.values())} machines), {len(processes)} routings"
+        )
+        self.stdout.write(f"{'event':<13}  {'mode':<5}  {'status':<8}  {'wall (s)':>8}  {'objective':>12}  "
+                          f"{'tasks':>5}  {'hinted':>6}  {'late':>4}")
+
+        limit = options['time_limit']
+        self._solve('initial', now, limit, warm=False, write=True)
+        self._solve('re-solve', now, limit, warm=False, write=False)
+        self._solve('re-solve', now, limit, warm=True, write=True)
+
+        WorkOrder.objects.create(
+            ERP_id='WO-RUSH', process=rng.choice(processes), quantity=20, priority=1,
+            workorder_status=WorkOrderStatus.PENDING, expected_completion=today + timedelta(days=1),
+        )
+        self._solve('rush order', now, limit, warm=False, write=False)
+        self._solve('rush order', now, limit, warm=True, write=True)
+
+        wc_id = max(machines, key=lambda pk: len(machines[pk]))
+        DowntimeEvent.objects.create(
+            equipment=machines[wc_id][0], category='UNPLANNED', reason='Benchmark breakdown',
+            start_time=now, reported_by=user,
+        )
+        self._solve('lost machine', now, limit, warm=False, write=False)
+        self._solve('lost machine', now, limit, warm=True, write=True)
+
+    def _solve(self, event, now, limit, *, warm, write):
+        result = solve_schedule(self.tenant, time_limit=limit, warm_start=warm, now=now, write=write)
+        objective = f'{result.objective:,.0f}' if result.objective is not None else '-'
+        self.stdout.write(
+            f"{event:<13}  {'warm' if warm else 'cold':<5}  {result.status:<8}  {result.wall_time:>8.2f}  "
+            f"{objective:>12}  {result.tasks:>5}  {result.hinted:>6}  {len(result.late_work_orders):>4}"
+        )
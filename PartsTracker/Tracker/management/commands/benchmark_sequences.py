@@ -0,0 +1,125 @@
+"""
+Management command to time concurrent document-number allocation: the
+SequenceCounter allocator against the scan-and-lock allocator it replaced.
+
+Usage:
+    python manage.py benchmark_sequences --tenant acme
+    python manage.py benchmark_sequences --tenant acme --threads 1 8 32 --allocations 500
+
+Each thread runs its allocations in their own transactions, like concurrent
+requests would. The legacy path locks the newest order number under the
+current ORD-YYYY- prefix and reads it back (it writes nothing); the counter
+path allocates under a throwaway prefix whose counter is deleted afterwards,
+and is checked for duplicate numbers across threads.
+"""
+import threading
+import time
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from Tracker.models import Orders, SequenceCounter, Tenant
+from Tracker.utils.sequences import allocate_sequence
+from Tracker.utils.tenant_context import tenant_context
+
+
+def _scan_allocate(queryset, number_field, prefix, tenant):
+    """The pre-counter allocator, kept for comparison."""
+    with transaction.atomic():
+        last = (
+            queryset.filter(**{f'{number_field}__startswith': prefix}, tenant=tenant)
+            .select_for_update()
+            .order_by(f'-{number_field}')
+            .first()
+        )
+        if last is None:
+            return 1
+        try:
+            return int(getattr(last, number_field)[len(prefix):]) + 1
+        except (ValueError, IndexError):
+            return 1
+
+
+def _run(threads, allocations, allocate, tenant):
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def worker():
+        numbers = []
+        try:
+            for _ in range(allocations):
+                with tenant_context(tenant.id), transaction.atomic():
+                    numbers.append(allocate())
+        except Exception as e:      # surfaced after join
+            errors.append(e)
+        finally:
+            connection.close()
+        with lock:
+            results.extend(numbers)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise CommandError(f'Allocation failed: {errors[0]}')
+    return elapsed, results
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent sequence-number allocation (counter table vs scan + row lock)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant', required=True,
+            help='Tenant slug whose Orders back the legacy path',
+        )
+        parser.add_argument(
+            '--threads', type=int, nargs='+', default=[1, 4, 16],
+            help='Concurrent workers to time (default: 1 4 16)',
+        )
+        parser.add_argument(
+            '--allocations', type=int, default=200,
+            help='Allocations per worker (default: 200)',
+        )
+
+    def handle(self, *args, **options):
+        tenant = Tenant.objects.filter(slug=options['tenant']).first()
+        if tenant is None:
+            raise CommandError(f"Tenant '{options['tenant']}' not found")
+        if options['allocations'] < 1 or any(n < 1 for n in options['threads']):
+            raise CommandError('--allocations and every --threads value must be >= 1')
+
+        legacy_prefix = f'ORD-{timezone.now().year}-'
+        bench_prefix = f'BENCH-{uuid4().hex[:8]}-'
+
+        self.stdout.write(
+            f"{'threads':>8}  {'scan (alloc/s)':>15}  {'counter (alloc/s)':>18}  {'speedup':>8}"
+        )
+        try:
+            for threads in options['threads']:
+                total = threads * options['allocations']
+                scan_time, _ = _run(
+                    threads, options['allocations'],
+                    lambda: _scan_allocate(Orders.objects, 'order_number', legacy_prefix, tenant),
+                    tenant,
+                )
+                counter_time, numbers = _run(
+                    threads, options['allocations'],
+                    lambda: allocate_sequence(Orders.objects, 'order_number', bench_prefix, tenant=tenant),
+                    tenant,
+                )
+                if len(set(numbers)) != len(numbers):
+                    raise CommandError(f'Counter handed out duplicate numbers with {threads} thread(s)')
+
+                self.stdout.write(
+                    f'{threads:>8}  {total / scan_time:>15.0f}  {total / counter_time:>18.0f}'
+                    f'  {scan_time / counter_time:>7.1f}x'
+                )
+        finally:
+            SequenceCounter.objects.filter(tenant_id=tenant.id, prefix=bench_prefix).delete()
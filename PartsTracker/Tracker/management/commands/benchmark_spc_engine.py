@@ -0,0 +1,107 @@
+"""
+Management command to time the vectorized SPC engine against the loop code it
+replaced.
+
+Usage:
+    python manage.py benchmark_spc_engine                         # 10k, 100k, 1M points
+    python manage.py benchmark_spc_engine --sizes 50000 --repeat 5
+
+Runs on synthetic readings in memory (no database). Each size times the old
+per-point loops (mean / σ / subgroup ranges / Cp-Cpk / moving ranges) against
+`spc_engine.capability` + `spc_engine.i_mr`, checks the two agree, and prints
+the best-of-N wall time for each. Nelson rule detection had no loop
+predecessor, so its engine time is reported on its own.
+"""
+import math
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.services.qms import spc_engine
+
+
+def _loop_statistics(values, usl, lsl, subgroup_size):
+    """The pre-engine capability and I-MR loops, kept for comparison."""
+    n = len(values)
+    mean = sum(values) / n
+    std_overall = math.sqrt(sum((x - mean) ** 2 for x in values) / (n - 1))
+    ranges = []
+    for i in range(0, n - subgroup_size + 1, subgroup_size):
+        subgroup = values[i:i + subgroup_size]
+        ranges.append(max(subgroup) - min(subgroup))
+    if ranges:
+        std_within = (sum(ranges) / len(ranges)) / spc_engine.D2.get(subgroup_size, spc_engine.DEFAULT_D2)
+    else:
+        std_within = std_overall
+    cp = (usl - lsl) / (6 * std_within) if std_within > 0 else None
+    cpk = min((usl - mean) / (3 * std_within), (mean - lsl) / (3 * std_within)) if std_within > 0 else None
+    moving = [abs(values[i] - values[i - 1]) for i in range(1, n)]
+    mr_bar = sum(moving) / len(moving)
+    return mean, std_overall, std_within, cp, cpk, mr_bar
+
+
+def _engine(values, usl, lsl, subgroup_size):
+    cap = spc_engine.capability(values, usl, lsl, subgroup_size)
+    limits = spc_engine.i_mr(values)
+    return cap.mean, cap.std_dev_overall, cap.std_dev_within, cap.cp, cap.cpk, limits.dispersion_center
+
+
+def _best(fn, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the vectorized SPC engine against the legacy loop implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+            help='Point counts to time (default: 10000 100000 1000000)',
+        )
+        parser.add_argument(
+            '--subgroup-size', type=int, default=5,
+            help='Subgroup size for R-bar (default: 5)',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Runs per size; the best time is reported (default: 3)',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or any(n < 2 for n in options['sizes']):
+            raise CommandError('--repeat must be >= 1 and every size >= 2')
+
+        rng = np.random.default_rng(options['seed'])
+        size = options['subgroup_size']
+        usl, lsl = 25.05, 24.95
+
+        self.stdout.write(
+            f"{'points':>10}  {'loop (s)':>10}  {'engine (s)':>10}  {'speedup':>8}  {'nelson (s)':>10}"
+        )
+        for n in options['sizes']:
+            array = rng.normal(25.0, 0.012, n)
+            values = array.tolist()
+
+            loop_time, expected = _best(lambda: _loop_statistics(values, usl, lsl, size), options['repeat'])
+            engine_time, actual = _best(lambda: _engine(array, usl, lsl, size), options['repeat'])
+            limits = spc_engine.i_mr(array)
+            nelson_time, _ = _best(
+                lambda: spc_engine.nelson_rules(limits.points, limits.center, limits.sigma), options['repeat'],
+            )
+
+            if not np.allclose(expected, actual, rtol=1e-9):
+                raise CommandError(f'Engine and loop disagree at n={n}: {actual} != {expected}')
+
+            self.stdout.write(
+                f'{n:>10}  {loop_time:>10.4f}  {engine_time:>10.4f}  {loop_time / engine_time:>7.1f}x'
+                f'  {nelson_time:>10.4f}'
+            )
@@ -0,0 +1,68 @@
+"""
+Management command to compare the ScopeClosure index against live traversal.
+
+Usage:
+    python manage.py check_scope_closure                  # every tenant
+    python manage.py check_scope_closure --tenant acme    # one tenant (slug)
+    python manage.py check_scope_closure --limit 500      # sample roots per tenant
+    python manage.py check_scope_closure --fix            # rebuild drifted tenants
+
+Each top-level node (an order, or a work order / part with no covered
+parent) is walked with get_descendants() and its subtree compared to the
+stored rows. Exits non-zero when drift is found and not fixed.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.models import Tenant
+from Tracker.services.core import scope_closure
+
+
+class Command(BaseCommand):
+    help = 'Check the scope closure index against live graph traversal'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            help='Tenant slug to check (default: all tenants)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Only check the first N top-level nodes per tenant',
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rebuild tenants where drift is found',
+        )
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('slug')
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' not found")
+
+        drifted = 0
+        for tenant in tenants:
+            mismatches = scope_closure.check_consistency(tenant.id, limit=options['limit'])
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS(f'  {tenant.slug}: consistent'))
+                continue
+
+            self.stdout.write(self.style.ERROR(f'  {tenant.slug}: {len(mismatches)} root(s) drifted'))
+            for mismatch in mismatches[:20]:
+                root = mismatch.root
+                self.stdout.write(
+                    f'   - {root._meta.model_name}:{root.pk} '
+                    f'missing={len(mismatch.missing)} extra={len(mismatch.extra)}'
+                )
+
+            if options['fix']:
+                rows = scope_closure.rebuild(tenant.id)
+                self.stdout.write(self.style.WARNING(f'     rebuilt: {rows} row(s)'))
+            else:
+                drifted += 1
+
+        if drifted:
+            raise CommandError(f'{drifted} tenant(s) have scope closure drift (run with --fix)')
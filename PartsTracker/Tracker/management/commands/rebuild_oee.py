@@ -0,0 +1,87 @@
+"""
+Management command to rebuild (or verify) the per-shift-window OEE rollup.
+
+Usage:
+    python manage.py rebuild_oee                                  # every tenant, full history
+    python manage.py rebuild_oee --tenant acme                    # one tenant (slug)
+    python manage.py rebuild_oee --start 2026-01-01 --end 2026-03-31
+    python manage.py rebuild_oee --check --start 2026-01-01       # compare only, no writes
+
+Run after enabling OEE_ROLLUP_ENABLED, after editing Shift calendars or work
+center equipment, and after data fixes that bypass the save signals
+(queryset .update(), moving a DowntimeEvent's start). --check exits non-zero
+when a stored bucket differs from a recompute over the events.
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from Tracker.models import Tenant
+from Tracker.services.mes import oee
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the per-shift-window OEE rollup'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            help='Tenant slug (default: all tenants)',
+        )
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            help='First shift day, YYYY-MM-DD (default: first event; 90 days ago with --check)',
+        )
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            help='Last shift day, YYYY-MM-DD (default: today)',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare stored buckets against the events without writing',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check'] and not settings.OEE_ROLLUP_ENABLED:
+            self.stdout.write(self.style.WARNING(
+                'OEE_ROLLUP_ENABLED is False: buckets will not be maintained after this rebuild.'
+            ))
+
+        tenants = Tenant.objects.order_by('slug')
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' not found")
+
+        drifted = 0
+        for tenant in tenants:
+            if not options['check']:
+                rows = oee.rebuild(tenant.id, options['start'], options['end'])
+                self.stdout.write(f'  {tenant.slug}: {rows} bucket(s)')
+                continue
+
+            end = options['end'] or timezone.localdate()
+            start = options['start'] or end - timedelta(days=90)
+            mismatches = oee.check_consistency(tenant.id, start, end)
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS(f'  {tenant.slug}: consistent'))
+                continue
+            drifted += 1
+            self.stdout.write(self.style.ERROR(f'  {tenant.slug}: {len(mismatches)} bucket(s) drifted'))
+            for mismatch in mismatches[:20]:
+                work_center, equipment, shift, day = mismatch.key
+                self.stdout.write(
+                    f'   - {day} shift {shift} work center {work_center}'
+                    f"{f' equipment {equipment}' if equipment else ''}: "
+                    f"{'missing' if mismatch.stored is None else 'stale' if mismatch.computed else 'orphaned'}"
+                )
+
+        if drifted:
+            raise CommandError(f'{drifted} tenant(s) have OEE rollup drift (run without --check)')
+        if not options['check']:
+            self.stdout.write(self.style.SUCCESS('OEE rollup rebuilt'))
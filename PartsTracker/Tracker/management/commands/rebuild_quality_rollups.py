@@ -0,0 +1,83 @@
+"""
+Management command to rebuild (or verify) the daily quality dashboard rollups.
+
+Usage:
+    python manage.py rebuild_quality_rollups                              # every tenant, full history
+    python manage.py rebuild_quality_rollups --tenant acme                # one tenant (slug)
+    python manage.py rebuild_quality_rollups --start 2026-01-01 --end 2026-03-31
+    python manage.py rebuild_quality_rollups --check --start 2026-01-01   # compare only, no writes
+
+Run after enabling QUALITY_ROLLUP_ENABLED and after bulk data fixes or
+seeding that bypass the save signals (queryset .update() of report status,
+created_at or disposition state). --check exits non-zero when a stored day
+differs from a recompute over the records.
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from Tracker.models import Tenant
+from Tracker.services.qms import quality_rollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the daily quality dashboard rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            help='Tenant slug (default: all tenants)',
+        )
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            help='First day, YYYY-MM-DD (default: first record; 90 days ago with --check)',
+        )
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            help='Last day, YYYY-MM-DD (default: today)',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare stored days against the records without writing',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check'] and not settings.QUALITY_ROLLUP_ENABLED:
+            self.stdout.write(self.style.WARNING(
+                'QUALITY_ROLLUP_ENABLED is False: rollups will not be maintained after this rebuild.'
+            ))
+
+        tenants = Tenant.objects.order_by('slug')
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' not found")
+
+        drifted = 0
+        for tenant in tenants:
+            if not options['check']:
+                rows = quality_rollup.rebuild(tenant.id, options['start'], options['end'])
+                self.stdout.write(f'  {tenant.slug}: {rows} row(s)')
+                continue
+
+            end = options['end'] or timezone.localdate()
+            start = options['start'] or end - timedelta(days=90)
+            mismatches = quality_rollup.check_consistency(tenant.id, start, end)
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS(f'  {tenant.slug}: consistent'))
+                continue
+            drifted += 1
+            self.stdout.write(self.style.ERROR(f'  {tenant.slug}: {len(mismatches)} day(s) drifted'))
+            for mismatch in mismatches[:20]:
+                state = 'missing' if mismatch.stored is None else 'orphaned' if mismatch.computed is None else 'stale'
+                self.stdout.write(f'   - {mismatch.day}: {state}')
+
+        if drifted:
+            raise CommandError(f'{drifted} tenant(s) have quality rollup drift (run without --check)')
+        if not options['check']:
+            self.stdout.write(self.style.SUCCESS('Quality rollups rebuilt'))
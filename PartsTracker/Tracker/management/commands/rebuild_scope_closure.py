@@ -0,0 +1,43 @@
+"""
+Management command to rebuild the ScopeClosure index from the FK columns.
+
+Usage:
+    python manage.py rebuild_scope_closure                 # every tenant
+    python manage.py rebuild_scope_closure --tenant acme   # one tenant (slug)
+
+Run after enabling SCOPE_CLOSURE_ENABLED, and after data fixes that move
+parent FKs with queryset .update() (which bypasses the maintenance signals).
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.models import Tenant
+from Tracker.services.core import scope_closure
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized order-hierarchy scope closure'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            help='Tenant slug to rebuild (default: all tenants)',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.SCOPE_CLOSURE_ENABLED:
+            self.stdout.write(self.style.WARNING(
+                'SCOPE_CLOSURE_ENABLED is False: the index will not be maintained after this rebuild.'
+            ))
+
+        tenants = Tenant.objects.order_by('slug')
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' not found")
+
+        for tenant in tenants:
+            rows = scope_closure.rebuild(tenant.id)
+            self.stdout.write(f'  {tenant.slug}: {rows} row(s)')
+
+        self.stdout.write(self.style.SUCCESS('Scope closure rebuilt'))
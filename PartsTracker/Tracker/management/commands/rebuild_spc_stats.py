@@ -0,0 +1,75 @@
+"""
+Management command to rebuild (or verify) the per-day SPC statistics store.
+
+Usage:
+    python manage.py rebuild_spc_stats                        # every tenant
+    python manage.py rebuild_spc_stats --tenant acme          # one tenant (slug)
+    python manage.py rebuild_spc_stats --measurement <uuid>   # one definition
+    python manage.py rebuild_spc_stats --check                # compare only, no writes
+
+Run after enabling SPC_STATS_ENABLED, and after data fixes that bypass the
+measurement save signals (queryset .update(), substep is_inspection_point
+changes). --check exits non-zero when a stored bucket differs from a
+recompute over the rows.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.models import Tenant
+from Tracker.services.qms import spc_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the per-day SPC statistics store'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            help='Tenant slug (default: all tenants)',
+        )
+        parser.add_argument(
+            '--measurement',
+            help='MeasurementDefinition id (default: all definitions)',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare stored buckets against the rows without writing',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check'] and not settings.SPC_STATS_ENABLED:
+            self.stdout.write(self.style.WARNING(
+                'SPC_STATS_ENABLED is False: buckets will not be maintained after this rebuild.'
+            ))
+
+        tenants = Tenant.objects.order_by('slug')
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' not found")
+
+        drifted = 0
+        for tenant in tenants:
+            if not options['check']:
+                rows = spc_stats.rebuild(tenant.id, options['measurement'])
+                self.stdout.write(f'  {tenant.slug}: {rows} bucket(s)')
+                continue
+
+            mismatches = spc_stats.check_consistency(tenant.id, options['measurement'])
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS(f'  {tenant.slug}: consistent'))
+                continue
+            drifted += 1
+            self.stdout.write(self.style.ERROR(f'  {tenant.slug}: {len(mismatches)} bucket(s) drifted'))
+            for mismatch in mismatches[:20]:
+                stored = mismatch.stored.count if mismatch.stored else '-'
+                computed = mismatch.computed.count if mismatch.computed else '-'
+                self.stdout.write(
+                    f'   - {mismatch.definition_id} {mismatch.day} stored n={stored} computed n={computed}'
+                )
+
+        if drifted:
+            raise CommandError(f'{drifted} tenant(s) have SPC statistics drift (run without --check)')
+        if not options['check']:
+            self.stdout.write(self.style.SUCCESS('SPC statistics rebuilt'))
@@ -0,0 +1,70 @@
+"""
+Management command to rebuild (or verify) the operator work-queue projection.
+
+Usage:
+    python manage.py rebuild_work_queue                     # every tenant
+    python manage.py rebuild_work_queue --tenant acme       # one tenant (slug)
+    python manage.py rebuild_work_queue --check             # compare only, no writes
+
+Run after enabling WORK_QUEUE_PROJECTION_ENABLED and after bulk data fixes or
+seeding that bypass the save signals (queryset .update() of execution status,
+part work orders or holds). Only drifted rows are written, and they are pushed
+to any open work-queue streams. --check exits non-zero when a stored row
+differs from a recompute over the open executions.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.models import Tenant
+from Tracker.services.mes import work_queue
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the operator work-queue projection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            help='Tenant slug (default: all tenants)',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Compare stored rows against the open executions without writing',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check'] and not settings.WORK_QUEUE_PROJECTION_ENABLED:
+            self.stdout.write(self.style.WARNING(
+                'WORK_QUEUE_PROJECTION_ENABLED is False: the projection will not be maintained after this rebuild.'
+            ))
+
+        tenants = Tenant.objects.order_by('slug')
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' not found")
+
+        drifted = 0
+        for tenant in tenants:
+            if not options['check']:
+                diff = work_queue.rebuild(tenant.id)
+                self.stdout.write(
+                    f'  {tenant.slug}: {len(diff.upserted)} queue row(s) updated, {len(diff.removed)} removed'
+                )
+                continue
+
+            mismatches = work_queue.check_consistency(tenant.id)
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS(f'  {tenant.slug}: consistent'))
+                continue
+            drifted += 1
+            self.stdout.write(self.style.ERROR(f'  {tenant.slug}: {len(mismatches)} row(s) drifted'))
+            for mismatch in mismatches[:20]:
+                state = 'missing' if mismatch.stored is None else 'orphaned' if mismatch.computed is None else 'stale'
+                self.stdout.write(f'   - {mismatch.key}: {state}')
+
+        if drifted:
+            raise CommandError(f'{drifted} tenant(s) have work-queue drift (run without --check)')
+        if not options['check']:
+            self.stdout.write(self.style.SUCCESS('Work queue projection rebuilt'))
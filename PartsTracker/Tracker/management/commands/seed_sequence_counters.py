@@ -0,0 +1,39 @@
+"""
+Management command to seed SequenceCounter rows from existing document numbers.
+
+Usage:
+    python manage.py seed_sequence_counters                 # every tenant
+    python manage.py seed_sequence_counters --tenant acme   # one tenant (slug)
+
+Counters seed themselves the first time a prefix is used, so this only saves
+that one-off scan on a busy table. Run it after loading numbered records with
+their numbers already set (imports, restores), which the counters would
+otherwise not see. Counters are only ever raised.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.models import Tenant
+from Tracker.utils import sequences
+
+
+class Command(BaseCommand):
+    help = 'Seed document-number sequence counters from existing data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            help='Tenant slug to seed (default: all tenants)',
+        )
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('slug')
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' not found")
+
+        for tenant in tenants:
+            changed = sequences.seed_counters(tenant)
+            self.stdout.write(f'  {tenant.slug}: {changed} counter(s) created or raised')
+
+        self.stdout.write(self.style.SUCCESS('Sequence counters seeded'))
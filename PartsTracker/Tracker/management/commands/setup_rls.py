@@ -38,6 +38,8 @@ class Command(BaseCommand):
         'Tracker_documents',
         'Tracker_documenttype',
         'Tracker_documentlink',
+        'Tracker_scopeclosure',
+        'Tracker_sequencecounter',
         'Tracker_generatedreport',
 
         # Equipment
@@ -58,6 +60,7 @@ class Command(BaseCommand):
         'Tracker_processes',
         'Tracker_steps',
         'Tracker_stepexecution',
+        'Tracker_workqueueentry',
         'Tracker_steptransitionlog',
         'Tracker_outsideprocessshipment',
 
@@ -65,6 +68,8 @@ class Command(BaseCommand):
         'Tracker_qualityreports',
         'Tracker_qualityerrorslist',
         'Tracker_quarantinedisposition',
+        'Tracker_qualitydailyrollup',
+        'Tracker_defectdailyrollup',
         'Tracker_qaapproval',
 
         # QMS - Supplier quality / approvals / gates
@@ -98,6 +103,7 @@ class Command(BaseCommand):
 
         # SPC
         'Tracker_spcbaseline',
+        'Tracker_spcstatsbucket',
 
         # DMS
         'Tracker_chatsession',
@@ -176,6 +182,7 @@ class Command(BaseCommand):
         'Tracker_timeentry',
         'Tracker_workcenter',
         'Tracker_downtimeevent',
+        'Tracker_oeebucket',
         'Tracker_workorderhold',
         'Tracker_trainingrequirement',
 
@@ -190,6 +197,7 @@ class Command(BaseCommand):
 
         # DMS
         'chat_sessions',
+        'embedding_cache',
 
         # Integrations
         'integrations_config',
@@ -18,6 +18,8 @@ from django.db import connection
 from django.http import Http404, JsonResponse
 from django.conf import settings
 
+from Tracker.utils import tenant_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -60,6 +62,7 @@ class TenantMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
+        from Tracker.utils.permission_memo import permission_memo
         from Tracker.utils.tenant_context import (
             set_current_tenant_id,
             reset_current_tenant,
@@ -71,6 +74,10 @@ class TenantMiddleware:
             request.tenant_source = None
             return self.get_response(request)
 
+        # Tenant rows and memberships come from a per-worker cache; drop it
+        # if another worker or request changed one (Tracker.utils.tenant_cache).
+        tenant_cache.sync()
+
         # Resolve tenant based on deployment mode
         try:
             tenant, source = self._resolve_tenant(request)
@@ -106,11 +113,22 @@ class TenantMiddleware:
         # symmetric and we never leak context to a subsequent request.
         cv_token = set_current_tenant_id(tenant.id if tenant else None)
 
+        # Permission / export-control answers are memoized for the request
+        # (Tracker.utils.permission_memo); hits are cache-backend round-trips saved.
         try:
-            response = self.get_response(request)
+            with permission_memo() as memo:
+                response = self.get_response(request)
         finally:
             reset_current_tenant(cv_token)
 
+        if memo.hits or memo.misses:
+            logger.debug(
+                "permission memo %s %s: hits=%d misses=%d",
+                request.method, request.path, memo.hits, memo.misses,
+            )
+            if settings.DEBUG and hasattr(response, '__setitem__'):
+                response['X-Permission-Memo'] = f'hits={memo.hits}; misses={memo.misses}'
+
         # Add tenant context headers to response for debugging/transparency
         # Only add headers if response supports it (has __setitem__)
         if tenant and hasattr(response, '__setitem__'):
@@ -192,9 +210,9 @@ class TenantMiddleware:
             return tenant, 'subdomain'
 
         # 4. Fall back to user's tenant (if authenticated)
-        if request.user.is_authenticated and hasattr(request.user, 'tenant'):
-            tenant = request.user.tenant
-            if tenant and tenant.is_active:
+        if request.user.is_authenticated and getattr(request.user, 'tenant_id', None):
+            tenant = tenant_cache.get_tenant(request.user.tenant_id)
+            if tenant:
                 logger.debug(f"Tenant resolved from user: {tenant.slug}")
                 return tenant, 'user'
 
@@ -206,12 +224,12 @@ class TenantMiddleware:
         """
         Resolve the default tenant for dedicated mode.
 
-        Returns a fresh `Tenant` instance per request. We used to cache
-        the model object on the middleware instance, but Django
-        middleware lives for the worker's lifetime — so any mutation
-        to the tenant row (slug rename, branding update, status flip)
-        wouldn't surface until gunicorn cycled. A single indexed
-        lookup on a 1-row table is cheap; not worth the staleness.
+        Returns a fresh `Tenant` instance per request. The answer is
+        kept in the versioned tenant cache rather than on the middleware
+        instance: middleware lives for the worker's lifetime, so a cached
+        object there never saw mutations to the tenant row (slug rename,
+        branding update, status flip) until gunicorn cycled. Tenant saves
+        bump the cache version, so those now surface on the next request.
 
         Resolution order:
         1. By configured `DEFAULT_TENANT_SLUG`.
@@ -222,9 +240,12 @@ class TenantMiddleware:
         3. Otherwise `get_or_create` with the configured slug — the
            cold-start path that auto-bootstraps a brand-new install.
         """
+        slug = getattr(settings, 'DEFAULT_TENANT_SLUG', 'default')
+        return tenant_cache.get_default_tenant(slug, lambda: self._load_default_tenant(slug))
+
+    def _load_default_tenant(self, slug):
         from Tracker.models import Tenant
 
-        slug = getattr(settings, 'DEFAULT_TENANT_SLUG', 'default')
         name = getattr(settings, 'DEFAULT_TENANT_NAME', 'My Company')
 
         tenant = Tenant.objects.filter(slug=slug).first()
@@ -257,17 +278,8 @@ class TenantMiddleware:
         return tenant
 
     def _get_tenant_by_id_or_slug(self, identifier):
-        """Get tenant by ID (UUID) or slug."""
-        from Tracker.models import Tenant
-        import uuid
-
-        try:
-            # Try as UUID first
-            tenant_id = uuid.UUID(identifier)
-            return Tenant.objects.filter(id=tenant_id, is_active=True).first()
-        except (ValueError, TypeError):
-            # Try as slug
-            return Tenant.objects.filter(slug=identifier, is_active=True).first()
+        """Get active tenant by ID (UUID) or slug, through the tenant cache."""
+        return tenant_cache.get_tenant(identifier)
 
     def _user_can_access_tenant(self, user, tenant):
         """
@@ -278,19 +290,24 @@ class TenantMiddleware:
         otherwise an ACTIVE TenantMembership is required. A SUSPENDED membership
         denies access even to the user's home tenant.
 
+        Membership answers are cached per worker; membership and role
+        writes bump the cache version, so a suspension applies on the
+        next request.
+
         Returns True if access is allowed, False otherwise.
         """
         # Anonymous users cannot use header to select tenant
         if not user.is_authenticated:
             return False
 
+        if user.is_superuser or user.is_staff:
+            return True
+
         from Tracker.services.core.tenant_membership import user_is_tenant_member
-        return user_is_tenant_member(user, tenant)
+        return tenant_cache.is_member(user, tenant, lambda: user_is_tenant_member(user, tenant))
 
     def _get_tenant_from_subdomain(self, request):
         """Extract tenant from subdomain."""
-        from Tracker.models import Tenant
-
         host = request.get_host().split(':')[0]  # Remove port if present
 
         # Get base domain from settings (e.g., "example.com")
@@ -303,14 +320,14 @@ class TenantMiddleware:
             # truth with signup validation so the two can't drift.
             from Tracker.services.core.tenant_slug import is_reserved_slug
             if subdomain and not is_reserved_slug(subdomain):
-                return Tenant.objects.filter(slug=subdomain, is_active=True).first()
+                return tenant_cache.get_tenant(subdomain)
 
         # For local development without subdomains
         if settings.DEBUG:
             # In debug mode, check query param for easy testing
             tenant_slug = request.GET.get('_tenant')
             if tenant_slug:
-                return Tenant.objects.filter(slug=tenant_slug, is_active=True).first()
+                return tenant_cache.get_tenant(tenant_slug)
 
         return None
 
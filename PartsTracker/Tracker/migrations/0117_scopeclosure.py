@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-16 19:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0116_quarantinedisposition_decision_authorized_at_and_more'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScopeClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ancestor_id', models.CharField(max_length=36)),
+                ('descendant_id', models.CharField(max_length=36)),
+                ('depth', models.PositiveSmallIntegerField(help_text='Shortest path length from ancestor to descendant (1 = direct child).')),
+                ('ancestor_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+                ('descendant_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scope_closure_rows', to='Tracker.tenant')),
+            ],
+            options={
+                'verbose_name': 'Scope Closure',
+                'verbose_name_plural': 'Scope Closure',
+                'indexes': [models.Index(fields=['descendant_type', 'descendant_id'], name='scopeclosure_descendant_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor_type', 'ancestor_id', 'descendant_type', 'descendant_id'), name='scopeclosure_pair_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-16 19:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0117_scopeclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SPCStatsBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='UTC calendar day the readings fall on')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('within_spec_count', models.PositiveIntegerField(default=0)),
+                ('mean', models.FloatField(default=0.0)),
+                ('m2', models.FloatField(default=0.0, help_text='Sum of squared deviations from the mean (variance = m2 / (count - 1))')),
+                ('min_value', models.FloatField(blank=True, null=True)),
+                ('max_value', models.FloatField(blank=True, null=True)),
+                ('subgroups', models.JSONField(blank=True, default=dict, help_text='{size: [ranges, range_sum, open_n, open_min, open_max]} for consecutive subgroups within the day; the open subgroup is the incomplete tail')),
+                ('last_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('last_rank', models.PositiveSmallIntegerField(default=0)),
+                ('last_reading_id', models.UUIDField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('measurement_definition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spc_stats_buckets', to='Tracker.measurementdefinition')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spc_stats_buckets', to='Tracker.tenant')),
+            ],
+            options={
+                'verbose_name': 'SPC Stats Bucket',
+                'verbose_name_plural': 'SPC Stats Buckets',
+                'constraints': [models.UniqueConstraint(fields=('measurement_definition', 'day'), name='spcstatsbucket_definition_day_unique')],
+            },
+        ),
+    ]
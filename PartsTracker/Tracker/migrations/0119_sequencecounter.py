@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-16 19:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0118_spcstatsbucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.CharField(help_text="'<app_label>.<model>.<field>' the numbers are written to", max_length=100)),
+                ('prefix', models.CharField(max_length=100)),
+                ('value', models.BigIntegerField(default=0, help_text='Last number allocated (0 = none yet)')),
+                ('tenant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sequence_counters', to='Tracker.tenant')),
+            ],
+            options={
+                'verbose_name': 'Sequence Counter',
+                'verbose_name_plural': 'Sequence Counters',
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'sequence', 'prefix'), name='sequencecounter_tenant_sequence_prefix_unique', nulls_distinct=False)],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-16 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0119_sequencecounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationschedule',
+            name='next_fire_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='compute_next_fire() after last_fired_at (or created_at). Maintained by save(); null only for rows not yet backfilled.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notificationschedule',
+            index=models.Index(condition=models.Q(('archived', False), ('enabled', True)), fields=['next_fire_at'], name='notif_schedule_due_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.6 on 2026-10-16 20:28
+"""
+Add DocChunk.content_hash and the shared EmbeddingCache.
+
+Existing chunks get their sha256 filled in, and their vectors seed the
+cache under the configured OLLAMA_EMBED_MODEL (the model that produced
+them), so the first re-embed after this migration reuses them instead of
+calling the model again. Idempotent: hashes are recomputed identically and
+cache inserts ignore existing keys.
+"""
+import hashlib
+
+import django.utils.timezone
+import pgvector.django.vector
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_hashes(apps, schema_editor):
+    DocChunk = apps.get_model('Tracker', 'DocChunk')
+    EmbeddingCache = apps.get_model('Tracker', 'EmbeddingCache')
+    model_name = getattr(settings, 'OLLAMA_EMBED_MODEL', 'nomic-embed-text')
+
+    batch, seen = [], set()
+    for chunk in DocChunk.objects.filter(content_hash='').only('id', 'full_text', 'embedding').iterator(chunk_size=500):
+        chunk.content_hash = hashlib.sha256(chunk.full_text.encode('utf-8')).hexdigest()
+        batch.append(chunk)
+        if len(batch) >= 500:
+            _flush(DocChunk, EmbeddingCache, model_name, batch, seen)
+            batch = []
+    if batch:
+        _flush(DocChunk, EmbeddingCache, model_name, batch, seen)
+
+
+def _flush(DocChunk, EmbeddingCache, model_name, batch, seen):
+    DocChunk.objects.bulk_update(batch, ['content_hash'])
+    entries = []
+    for chunk in batch:
+        if chunk.content_hash not in seen:
+            seen.add(chunk.content_hash)
+            entries.append(EmbeddingCache(model=model_name, text_hash=chunk.content_hash, embedding=chunk.embedding))
+    EmbeddingCache.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0120_notificationschedule_next_fire_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='docchunk',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='EmbeddingCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('text_hash', models.CharField(max_length=64)),
+                ('embedding', pgvector.django.vector.VectorField(dimensions=768)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'embedding_cache',
+                'constraints': [models.UniqueConstraint(fields=('model', 'text_hash'), name='embedding_cache_model_hash_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_hashes, migrations.RunPython.noop),
+    ]
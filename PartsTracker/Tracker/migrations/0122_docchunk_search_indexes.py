@@ -0,0 +1,66 @@
+# Generated by Django 5.1.6 on 2026-10-16 20:31
+"""
+Index DocChunk for search.
+
+- HNSW (cosine) on `embedding` so nearest-neighbour queries stop scanning
+  every chunk.
+- `search_vector`: a stored tsvector of preview_text + full_text, kept up to
+  date by a BEFORE INSERT/UPDATE trigger, with a GIN index. Existing rows
+  are filled by the trigger when the backfill UPDATE touches them.
+
+The tsvector uses the 'english' configuration explicitly; the search code
+builds its tsquery with the same one.
+"""
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import pgvector.django.indexes
+from django.db import migrations
+
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE OR REPLACE FUNCTION doc_chunks_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := to_tsvector(
+        'english'::regconfig,
+        coalesce(NEW.preview_text, '') || ' ' || coalesce(NEW.full_text, '')
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER doc_chunks_search_vector
+    BEFORE INSERT OR UPDATE OF preview_text, full_text, search_vector ON doc_chunks
+    FOR EACH ROW EXECUTE FUNCTION doc_chunks_search_vector_update();
+
+UPDATE doc_chunks SET full_text = full_text;
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER IF EXISTS doc_chunks_search_vector ON doc_chunks;
+DROP FUNCTION IF EXISTS doc_chunks_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0121_embedding_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='docchunk',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(sql=SEARCH_VECTOR_TRIGGER, reverse_sql=DROP_SEARCH_VECTOR_TRIGGER),
+        migrations.AddIndex(
+            model_name='docchunk',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='doc_chunks_embedding_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='docchunk',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='doc_chunks_search_gin'),
+        ),
+    ]
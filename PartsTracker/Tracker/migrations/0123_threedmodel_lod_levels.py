@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-16 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0122_docchunk_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='threedmodel',
+            name='lod_levels',
+            field=models.JSONField(blank=True, default=list, help_text='Levels of detail, coarsest first: [{file, face_count, vertex_count, size_bytes}]. The last level is `file` itself.'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-16 21:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0123_threedmodel_lod_levels'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduleslot',
+            name='step',
+            field=models.ForeignKey(blank=True, help_text='Process step this slot runs. Set by the scheduler; blank on hand-placed slots.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='schedule_slots', to='Tracker.steps'),
+        ),
+    ]
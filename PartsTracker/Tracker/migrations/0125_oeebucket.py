@@ -0,0 +1,45 @@
+# Generated by Django 5.1.6 on 2026-10-16 21:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0124_scheduleslot_step'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OEEBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Local date the shift window starts on')),
+                ('window_start', models.DateTimeField()),
+                ('window_end', models.DateTimeField()),
+                ('machines', models.PositiveIntegerField(default=1)),
+                ('planned_seconds', models.FloatField(default=0.0, help_text='Shift time × machines')),
+                ('planned_stop_seconds', models.FloatField(default=0.0, help_text='Planned maintenance / no-work time, excluded from availability')),
+                ('downtime_seconds', models.FloatField(default=0.0, help_text='Unplanned stops, changeovers and logged downtime not already planned')),
+                ('ideal_seconds', models.FloatField(default=0.0, help_text='Sum of Steps.expected_duration over the units completed')),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('reject_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('equipment', models.ForeignKey(blank=True, help_text='Machine this row covers; blank for the work center as a whole', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='oee_buckets', to='Tracker.equipments')),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='oee_buckets', to='Tracker.shift')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='oee_buckets', to='Tracker.tenant')),
+                ('work_center', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='oee_buckets', to='Tracker.workcenter')),
+            ],
+            options={
+                'verbose_name': 'OEE Bucket',
+                'verbose_name_plural': 'OEE Buckets',
+                'indexes': [models.Index(fields=['tenant', 'day'], name='oeebucket_tenant_day_idx'), models.Index(fields=['tenant', 'window_end'], name='oeebucket_tenant_end_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('equipment__isnull', False)), fields=('work_center', 'equipment', 'shift', 'day'), name='oeebucket_equipment_window_uniq'), models.UniqueConstraint(condition=models.Q(('equipment__isnull', True)), fields=('work_center', 'shift', 'day'), name='oeebucket_work_center_window_uniq')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stepexecution',
+            index=models.Index(fields=['tenant', 'exited_at'], name='stepexec_tenant_exited_idx'),
+        ),
+    ]
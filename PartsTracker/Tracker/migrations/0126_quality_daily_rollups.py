@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-16 23:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0125_oeebucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QualityDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('inspections', models.PositiveIntegerField(default=0, help_text='Active quality reports created')),
+                ('passed', models.PositiveIntegerField(default=0, help_text='Of which PASS (the FPY numerator)')),
+                ('failed', models.PositiveIntegerField(default=0, help_text='Of which FAIL (NCRs opened)')),
+                ('ncrs_closed', models.PositiveIntegerField(default=0)),
+                ('ncrs_open', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quality_daily_rollups', to='Tracker.tenant')),
+            ],
+            options={
+                'verbose_name': 'Quality Daily Rollup',
+                'verbose_name_plural': 'Quality Daily Rollups',
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'day'), name='qualityrollup_tenant_day_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DefectDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('defects', models.PositiveIntegerField(default=0)),
+                ('active_defects', models.PositiveIntegerField(default=0)),
+                ('error_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='Tracker.qualityerrorslist')),
+                ('part_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='defect_daily_rollups', to='Tracker.parttypes')),
+                ('step', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='defect_daily_rollups', to='Tracker.steps')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='defect_daily_rollups', to='Tracker.tenant')),
+            ],
+            options={
+                'verbose_name': 'Defect Daily Rollup',
+                'verbose_name_plural': 'Defect Daily Rollups',
+                'indexes': [models.Index(fields=['tenant', 'day'], name='defectrollup_tenant_day_idx')],
+            },
+        ),
+    ]
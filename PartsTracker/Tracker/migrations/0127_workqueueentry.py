@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-16 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0126_quality_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkQueueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='work_order:step:part_type, or other:step for rows without a part', max_length=120)),
+                ('is_part_work', models.BooleanField(default=True)),
+                ('work_order_erp_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('step_name', models.CharField(blank=True, max_length=50, null=True)),
+                ('part_type_name', models.CharField(blank=True, max_length=50, null=True)),
+                ('work_center_kind', models.CharField(blank=True, max_length=20, null=True)),
+                ('priority', models.IntegerField(blank=True, null=True)),
+                ('expected_completion', models.DateField(blank=True, null=True)),
+                ('search_text', models.TextField(blank=True, default='', help_text='Lower-cased work order ERP id and step name')),
+                ('qty_ready', models.PositiveIntegerField(default=0, help_text='Distinct parts with open executions')),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('in_progress_count', models.PositiveIntegerField(default=0)),
+                ('earliest_entered_at', models.DateTimeField(blank=True, null=True)),
+                ('is_held', models.BooleanField(default=False, help_text='The work order has an active hold')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('part_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='work_queue_entries', to='Tracker.parttypes')),
+                ('step', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_queue_entries', to='Tracker.steps')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_queue_entries', to='Tracker.tenant')),
+                ('work_center', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='work_queue_entries', to='Tracker.workcenter')),
+                ('work_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='work_queue_entries', to='Tracker.workorder')),
+            ],
+            options={
+                'verbose_name': 'Work Queue Entry',
+                'verbose_name_plural': 'Work Queue Entries',
+                'indexes': [models.Index(fields=['tenant', 'is_held', 'priority', 'expected_completion', 'earliest_entered_at'], name='workqueue_tenant_rank_idx'), models.Index(fields=['tenant', 'work_order'], name='workqueue_tenant_wo_idx'), models.Index(fields=['tenant', 'step'], name='workqueue_tenant_step_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'key'), name='workqueue_tenant_key_uniq')],
+            },
+        ),
+    ]
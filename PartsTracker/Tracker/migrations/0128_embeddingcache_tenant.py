@@ -0,0 +1,70 @@
+# Generated by Django 5.1.6 on 2026-10-17 09:10
+"""
+Scope EmbeddingCache entries to a tenant.
+
+Existing entries can't be attributed to a tenant, so they are dropped and
+the cache is re-seeded from each tenant's own DocChunk vectors under the
+configured OLLAMA_EMBED_MODEL, as 0121 did. The column is made NOT NULL
+while the table is empty, before the re-seed writes to it.
+"""
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def clear_cache(apps, schema_editor):
+    apps.get_model('Tracker', 'EmbeddingCache').objects.all().delete()
+
+
+def reseed_cache(apps, schema_editor):
+    DocChunk = apps.get_model('Tracker', 'DocChunk')
+    EmbeddingCache = apps.get_model('Tracker', 'EmbeddingCache')
+    model_name = getattr(settings, 'OLLAMA_EMBED_MODEL', 'nomic-embed-text')
+
+    rows = (
+        DocChunk.objects.exclude(content_hash='').filter(doc__tenant__isnull=False)
+        .values_list('doc__tenant_id', 'content_hash', 'embedding')
+        .iterator(chunk_size=500)
+    )
+    batch, seen = [], set()
+    for tenant_id, content_hash, embedding in rows:
+        if (tenant_id, content_hash) in seen:
+            continue
+        seen.add((tenant_id, content_hash))
+        batch.append(EmbeddingCache(
+            tenant_id=tenant_id, model=model_name, text_hash=content_hash, embedding=embedding,
+        ))
+        if len(batch) >= 500:
+            EmbeddingCache.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    EmbeddingCache.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0127_workqueueentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_cache, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='embeddingcache',
+            name='embedding_cache_model_hash_uniq',
+        ),
+        migrations.AddField(
+            model_name='embeddingcache',
+            name='tenant',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='embedding_cache_entries', to='Tracker.tenant'),
+        ),
+        migrations.AlterField(
+            model_name='embeddingcache',
+            name='tenant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='embedding_cache_entries', to='Tracker.tenant'),
+        ),
+        migrations.AddConstraint(
+            model_name='embeddingcache',
+            constraint=models.UniqueConstraint(fields=('tenant', 'model', 'text_hash'), name='embedding_cache_tenant_model_hash_uniq'),
+        ),
+        migrations.RunPython(reseed_cache, migrations.RunPython.noop),
+    ]
@@ -14,7 +14,7 @@ organized into logical groups:
        equipment usage, dispositions, step transitions, CAPA, RCA, 3D models,
        and heatmap annotations for quality visualization
 - REMAN: Remanufacturing add-on (Core, HarvestedComponent, DisassemblyBOMLine)
-- SPC: Statistical Process Control (SPCBaseline)
+- SPC: Statistical Process Control (SPCBaseline, SPCStatsBucket)
 - DMS: Optional AI/LLM module for document intelligence (vector embeddings,
        semantic search, RAG support)
 
@@ -83,6 +83,12 @@ from .core import (
     Documents,
     DocumentLink,
 
+    # Materialized scope index (order hierarchy)
+    ScopeClosure,
+
+    # Document-number counters (utils.sequences)
+    SequenceCounter,
+
     # Permission audit logging
     PermissionChangeLog,
 )
@@ -122,6 +128,7 @@ from .mes_lite import (
 
     # Step execution (workflow tracking)
     StepExecution,
+    WorkQueueEntry,
 
     # Outside processing (subcontract ops — Flow B)
     OutsideProcessShipment,
@@ -174,6 +181,7 @@ from .mes_standard import (
     Shift,
     ScheduleSlot,
     DowntimeEvent,
+    OEEBucket,
 )
 
 # Remanufacturing add-on
@@ -229,6 +237,8 @@ from .qms import (
     EquipmentUsage,
     QaApproval,
     QuarantineDisposition,
+    QualityDailyRollup,
+    DefectDailyRollup,
     SupplierQualification,
     PartApproval,
 
@@ -297,6 +307,7 @@ from .qms import (
 # SPC models - Statistical Process Control
 from .spc import (
     SPCBaseline,
+    SPCStatsBucket,
     ChartType,
     BaselineStatus,
 )
@@ -346,6 +357,7 @@ from .notification_settings import (
 # DMS models - AI/LLM document intelligence (optional module)
 from .dms import (
     DocChunk,
+    EmbeddingCache,
     ChatSession,
 )
 
@@ -416,6 +428,8 @@ __all__ = [
     'DocumentType',
     'Documents',
     'DocumentLink',
+    'ScopeClosure',
+    'SequenceCounter',
     'PermissionChangeLog',
 
     # MES Lite (Core Manufacturing)
@@ -441,6 +455,7 @@ __all__ = [
     'WorkOrderStatus',
     'ProcessStatus',
     'StepExecution',
+    'WorkQueueEntry',
     'OutsideProcessShipment',
     'RequirementType',
     'StepRequirement',
@@ -476,6 +491,7 @@ __all__ = [
     'Shift',
     'ScheduleSlot',
     'DowntimeEvent',
+    'OEEBucket',
 
     # Remanufacturing Add-on
     'Core',
@@ -499,6 +515,8 @@ __all__ = [
     'EquipmentUsage',
     'QaApproval',
     'QuarantineDisposition',
+    'QualityDailyRollup',
+    'DefectDailyRollup',
     'SupplierQualification',
     'PartApproval',
     'StepTransitionLog',
@@ -558,11 +576,13 @@ __all__ = [
 
     # SPC (Statistical Process Control)
     'SPCBaseline',
+    'SPCStatsBucket',
     'ChartType',
     'BaselineStatus',
 
     # DMS (Optional AI/LLM Module - Document Intelligence)
     'DocChunk',
+    'EmbeddingCache',
     'ChatSession',
 
     # Phase 3 notification rules (three-scope routing + CEL)
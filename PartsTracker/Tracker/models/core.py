@@ -732,6 +732,7 @@ class SecureQuerySet(models.QuerySet):
         access. Child models derive access via FK joins to Order.
         """
         from django.db.models import Q
+        from django.db.models.functions import Cast
         from django.contrib.contenttypes.models import ContentType
 
         # Models that support relationship-based filtering
@@ -767,54 +768,70 @@ class SecureQuerySet(models.QuerySet):
             ).distinct()
 
         elif model_name == 'documents':
-            from Tracker.models import Orders, WorkOrder, Parts, PartTypes
+            from Tracker.models import Orders, WorkOrder, Parts, PartTypes, DocumentLink
 
+            # Everything below stays a subquery: the accessible order set is
+            # never materialized in Python, so the SQL text is the same size
+            # for a customer with ten orders or ten thousand parts.
             accessible_order_ids = get_accessible_order_ids()
 
-            order_ct = ContentType.objects.get_for_model(Orders)
-            workorder_ct = ContentType.objects.get_for_model(WorkOrder)
-            part_ct = ContentType.objects.get_for_model(Parts)
-            parttype_ct = ContentType.objects.get_for_model(PartTypes)
-
             # tenant-safe: filtering by accessible_order_ids (already derived from RLS-scoped query)
-            accessible_workorder_ids = WorkOrder.objects.filter(
+            accessible_workorders = WorkOrder.objects.filter(
                 related_order_id__in=accessible_order_ids
-            ).values_list('id', flat=True)
+            )
 
             # tenant-safe: filtering by accessible_order_ids
-            accessible_part_ids = Parts.objects.filter(
+            accessible_parts = Parts.objects.filter(
                 order_id__in=accessible_order_ids
-            ).values_list('id', flat=True)
+            )
 
             # tenant-safe: filtering by accessible_order_ids
-            accessible_parttype_ids = PartTypes.objects.filter(
+            accessible_parttypes = PartTypes.objects.filter(
                 parts__order_id__in=accessible_order_ids
-            ).values_list('id', flat=True)
+            )
+
+            # tenant-safe: Orders.objects auto-scopes; same set as accessible_order_ids
+            accessible_orders = Orders.objects.filter(id__in=accessible_order_ids)
+
+            targets = [
+                (ContentType.objects.get_for_model(Orders), accessible_orders),
+                (ContentType.objects.get_for_model(WorkOrder), accessible_workorders),
+                (ContentType.objects.get_for_model(Parts), accessible_parts),
+                (ContentType.objects.get_for_model(PartTypes), accessible_parttypes),
+            ]
+
+            def attached_to_accessible(type_field, id_field):
+                # object_id is a varchar holding str(uuid); compare against the
+                # pk cast to text so the column is never cast (a malformed
+                # object_id on another content type can't raise).
+                q = Q()
+                for ct, targets_qs in targets:
+                    q |= Q(**{
+                        type_field: ct,
+                        f'{id_field}__in': targets_qs.annotate(
+                            pk_text=Cast('pk', output_field=models.CharField())
+                        ).values('pk_text'),
+                    })
+                return q
 
             # Additive: documents reachable via a secondary DocumentLink to any
             # accessible order/work-order/part/part-type. Mirrors the primary
             # GFK branches below so a *linked* doc is as visible as a
             # primary-attached one. tenant-safe: `.objects` auto-scopes, so a
             # link can never surface a document across tenants.
-            from Tracker.models import DocumentLink
             linked_doc_ids = DocumentLink.objects.filter(  # tenant-safe: .objects auto-scopes; a link can't surface a cross-tenant doc
+                attached_to_accessible('content_type', 'object_id'),
                 archived=False,
-            ).filter(
-                Q(content_type=order_ct, object_id__in=[str(id) for id in accessible_order_ids]) |
-                Q(content_type=workorder_ct, object_id__in=[str(id) for id in accessible_workorder_ids]) |
-                Q(content_type=part_ct, object_id__in=[str(id) for id in accessible_part_ids]) |
-                Q(content_type=parttype_ct, object_id__in=[str(id) for id in accessible_parttype_ids])
-            ).values_list('document_id', flat=True)
+            ).values('document_id')
 
+            # Every condition is on a Documents column or an IN (subquery), so
+            # no join fans rows out and no DISTINCT is needed.
             return queryset.filter(
                 classification='PUBLIC'
             ).filter(
-                Q(content_type=order_ct, object_id__in=[str(id) for id in accessible_order_ids]) |
-                Q(content_type=workorder_ct, object_id__in=[str(id) for id in accessible_workorder_ids]) |
-                Q(content_type=part_ct, object_id__in=[str(id) for id in accessible_part_ids]) |
-                Q(content_type=parttype_ct, object_id__in=[str(id) for id in accessible_parttype_ids]) |
-                Q(id__in=list(linked_doc_ids))
-            ).distinct()
+                attached_to_accessible('content_type', 'object_id') |
+                Q(id__in=linked_doc_ids)
+            )
 
         elif model_name == 'docchunk':
             from Tracker.models import Documents
@@ -833,6 +850,10 @@ class SecureQuerySet(models.QuerySet):
 
     def delete(self):
         """Soft delete all objects in queryset"""
+        # Some models (like DocChunk) have no soft-delete fields; their rows
+        # are derived data and are deleted outright.
+        if not any(f.name == 'archived' for f in self.model._meta.get_fields()):
+            return super().delete()
         deleted_count = 0
         for obj in self:
             if not obj.archived:
@@ -875,8 +896,10 @@ class SecureQuerySet(models.QuerySet):
         log_entries = []
 
         for obj_data in object_list:
+            # object_id is a bigint; like auditlog itself, leave it empty for UUID keys.
+            object_id = obj_data['id'] if isinstance(obj_data['id'], int) else None
             log_entries.append(
-                LogEntry(content_type=content_type, object_pk=str(obj_data['pk']), object_id=obj_data['id'],
+                LogEntry(content_type=content_type, object_pk=str(obj_data['pk']), object_id=object_id,
                          object_repr=f"{self.model.__name__} (id={obj_data['id']})", action=LogEntry.Action.UPDATE,
                          changes=json.dumps({'archived': [False, True] if 'delete' in action else [True, False],
                                              'bulk_operation': action, 'reason': reason}), actor=actor,
@@ -2010,12 +2033,28 @@ class User(AbstractUser):
 
         Returns a set of permission codenames like {'add_orders', 'view_parts', ...}
         """
-        from django.core.cache import cache
-        from django.contrib.auth.models import Permission
-
         tenant = self._resolve_tenant(tenant)
         if not tenant:
             return set()
+        return set(self._tenant_permission_set(tenant))
+
+    def _tenant_permission_set(self, tenant):
+        """
+        Shared, read-only codename set for a resolved tenant.
+
+        Memoized for the current request (see Tracker.utils.permission_memo)
+        on top of the 5-minute cache backend entry, so repeated has_tenant_perm
+        checks in one request cost one backend round-trip.
+        """
+        from Tracker.utils.permission_memo import memoized
+        return memoized(
+            ('perms', self.id, tenant.id),
+            lambda: frozenset(self._load_tenant_permissions(tenant)),
+        )
+
+    def _load_tenant_permissions(self, tenant):
+        from django.core.cache import cache
+        from django.contrib.auth.models import Permission
 
         cache_key = f'user_{self.id}_tenant_{tenant.id}_perms'
         perms = cache.get(cache_key)
@@ -2078,7 +2117,7 @@ class User(AbstractUser):
         if not tenant:
             return False
 
-        return perm in self.get_tenant_permissions(tenant)
+        return perm in self._tenant_permission_set(tenant)
 
     def has_tenant_perms(self, perms, tenant=None):
         """
@@ -2098,7 +2137,7 @@ class User(AbstractUser):
         if not tenant:
             return False
 
-        user_perms = self.get_tenant_permissions(tenant)
+        user_perms = self._tenant_permission_set(tenant)
         return all(perm in user_perms for perm in perms)
 
     def clear_permission_cache(self, tenant=None):
@@ -2699,10 +2738,7 @@ class ApprovalRequest(SecureModel):
 
     @classmethod
     def generate_approval_number(cls, tenant=None):
-        """Auto-generate approval number: APR-YYYY-####
-
-        Uses SELECT FOR UPDATE to prevent race conditions under concurrent load.
-        """
+        """Auto-generate approval number: APR-YYYY-####"""
         from datetime import datetime
         from Tracker.utils.sequences import generate_next_sequence
 
@@ -3418,6 +3454,96 @@ class DocumentLink(SecureModel):
         return f"{self.document.file_name} → {self.content_object}"
 
 
+# =============================================================================
+# SCOPE CLOSURE INDEX
+# =============================================================================
+
+class ScopeClosure(models.Model):
+    """Materialized ancestor → descendant pairs for the order hierarchy.
+
+    One row per (ancestor, descendant) pair across Orders → WorkOrder →
+    Parts → StepExecution / QualityReports (see
+    `Tracker.services.core.scope_closure.CLOSURE_MODELS`), so "everything
+    under this order" is one indexed lookup instead of a graph walk. The
+    node itself is not stored as its own descendant.
+
+    Derived data: maintained from post_save / post_delete receivers when
+    `SCOPE_CLOSURE_ENABLED` is on, rebuilt with `manage.py
+    rebuild_scope_closure`, and never edited by hand. Ids are stored as
+    strings to match the generic `object_id` columns it is joined against.
+    """
+
+    tenant = models.ForeignKey(
+        'Tenant', on_delete=models.CASCADE, related_name='scope_closure_rows',
+    )
+    ancestor_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name='+',
+    )
+    ancestor_id = models.CharField(max_length=36)
+    descendant_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name='+',
+    )
+    descendant_id = models.CharField(max_length=36)
+    depth = models.PositiveSmallIntegerField(
+        help_text="Shortest path length from ancestor to descendant (1 = direct child).",
+    )
+
+    class Meta:
+        verbose_name = 'Scope Closure'
+        verbose_name_plural = 'Scope Closure'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ancestor_type', 'ancestor_id', 'descendant_type', 'descendant_id'],
+                name='scopeclosure_pair_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['descendant_type', 'descendant_id'], name='scopeclosure_descendant_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_type_id}:{self.ancestor_id} → {self.descendant_type_id}:{self.descendant_id} ({self.depth})"
+
+
+# =============================================================================
+# SEQUENCE COUNTERS
+# =============================================================================
+
+class SequenceCounter(models.Model):
+    """Last number handed out for one document-number sequence and prefix.
+
+    One row per (tenant, sequence, prefix), e.g. (tenant, 'Tracker.orders.order_number',
+    'ORD-2026-'). `Tracker.utils.sequences` advances `value` with a single
+    `UPDATE ... RETURNING`, so allocating a number never scans or locks the
+    numbered table itself. A counter is seeded from the existing numbers the
+    first time its prefix is used; `manage.py seed_sequence_counters` seeds
+    them all up front. Tenant is null for allocations made outside any tenant.
+    """
+
+    tenant = models.ForeignKey(
+        'Tenant', on_delete=models.CASCADE, null=True, blank=True, related_name='sequence_counters',
+    )
+    sequence = models.CharField(
+        max_length=100, help_text="'<app_label>.<model>.<field>' the numbers are written to",
+    )
+    prefix = models.CharField(max_length=100)
+    value = models.BigIntegerField(default=0, help_text="Last number allocated (0 = none yet)")
+
+    class Meta:
+        verbose_name = 'Sequence Counter'
+        verbose_name_plural = 'Sequence Counters'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'sequence', 'prefix'],
+                nulls_distinct=False,
+                name='sequencecounter_tenant_sequence_prefix_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.sequence} {self.prefix}{self.value}"
+
+
 # =============================================================================
 # PERMISSION AUDIT TRAIL
 # =============================================================================
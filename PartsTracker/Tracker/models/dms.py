@@ -12,6 +12,7 @@ The core Documents model is in core.py and is always available.
 
 Models:
     - DocChunk: Text chunks extracted from documents with AI embeddings
+    - EmbeddingCache: Per-tenant content-addressed text-hash -> vector cache
     - ChatSession: User chat session history for AI conversations
 
 Dependencies:
@@ -23,9 +24,11 @@ Note: SecureManager and Documents are in core.py
 """
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils import timezone
-from pgvector.django import VectorField
+from pgvector.django import HnswIndex, VectorField
 
 from .core import SecureManager
 
@@ -47,18 +50,72 @@ class DocChunk(models.Model):
         preview_text (str): First 300 chars of the chunk for display
         full_text (str): Complete text of the chunk
         span_meta (JSONField): Metadata about the chunk's position/span
+        content_hash (str): sha256 of full_text; re-embedding keeps rows whose
+            hash is unchanged
+        search_vector (tsvector): to_tsvector over preview_text + full_text,
+            maintained by the doc_chunks_search_vector trigger (migration 0122)
     """
     doc = models.ForeignKey('Tracker.Documents', on_delete=models.CASCADE, related_name='chunks')
     embedding = VectorField(dimensions=settings.AI_EMBED_DIM)  # uses settings
     preview_text = models.TextField(blank=True)
     full_text = models.TextField(blank=True)
     span_meta = models.JSONField(default=dict, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+    # Written by a BEFORE INSERT/UPDATE trigger; never set from Python.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     objects = SecureManager()
 
     class Meta:
         db_table = 'doc_chunks'
-        indexes = [models.Index(fields=['doc'])]
+        indexes = [
+            models.Index(fields=['doc']),
+            # Approximate nearest neighbour for `embedding <=> q` ORDER BY ... LIMIT k
+            # (services.core.doc_search). pgvector's defaults for m / ef_construction.
+            HnswIndex(
+                name='doc_chunks_embedding_hnsw',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+            ),
+            GinIndex(fields=['search_vector'], name='doc_chunks_search_gin'),
+        ]
+
+
+class EmbeddingCache(models.Model):
+    """
+    Content-addressed vector cache shared by a tenant's documents.
+
+    Keyed by tenant, embedding model and the sha256 of the embedded text, so
+    a chunk that reappears in a new document version (or in another of the
+    tenant's documents) is never sent to the embedding server twice. Entries
+    are per tenant: they fall under RLS with the rest of the tenant's data,
+    go away with it, and a hit says nothing about other tenants' documents.
+
+    Fields:
+        tenant (ForeignKey): Tenant whose documents produced the text
+        model (str): Embedding model name (OLLAMA_EMBED_MODEL at write time)
+        text_hash (str): sha256 hex digest of the text
+        embedding (VectorField): The model's vector for that text
+        created_at (datetime): When the vector was computed
+    """
+    tenant = models.ForeignKey('Tracker.Tenant', on_delete=models.CASCADE, related_name='embedding_cache_entries')
+    model = models.CharField(max_length=100)
+    text_hash = models.CharField(max_length=64)
+    embedding = VectorField(dimensions=settings.AI_EMBED_DIM)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'embedding_cache'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'model', 'text_hash'], name='embedding_cache_tenant_model_hash_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model}:{self.text_hash[:12]}"
 
 
 class ChatSession(models.Model):
@@ -24,7 +24,7 @@ from django.db import models
 from django.utils import timezone
 
 from PartsTrackerApp import settings
-from Tracker.services.mes.sampling_applier import SamplingFallbackApplier
+from Tracker.services.mes.sampling_applier import SamplingCohortEvaluator, SamplingFallbackApplier
 
 from .core import SecureModel, User, Companies, ClassificationLevel, ExternalAPIOrderIdentifier
 from .qms import VoidableModel
@@ -1144,10 +1144,9 @@ class Steps(SecureModel):
                 status='APPROVED',
                 used=False
             )
-            # Check each blocker against overrides
             # `block_type` is a TextChoices field storing UPPERCASE enum
             # values (QA_SIGNOFF, QUARANTINE, …) — lower-case the set so
-            # the human-readable blocker-message matching below works.
+            # the human-readable blocker-message matching works.
             # (Prior to this fix the comparison always failed and approved
             # overrides never cleared blockers.)
             override_types = {
@@ -1155,29 +1154,190 @@ class Steps(SecureModel):
                 for bt in valid_overrides.values_list('block_type', flat=True)
                 if bt
             }
-            remaining_blockers = []
-
-            for blocker in blockers:
-                # Map blocker message to block type
-                can_override = False
-                if 'quarantine' in blocker.lower() and 'quarantine' in override_types:
-                    can_override = True
-                elif 'qa signoff' in blocker.lower() and 'qa_signoff' in override_types:
-                    can_override = True
-                elif 'first piece' in blocker.lower() and 'fpi_required' in override_types:
-                    can_override = True
-                elif 'sampling' in blocker.lower() and 'sampling_required' in override_types:
-                    can_override = True
-                elif 'measurement' in blocker.lower() and 'measurement_failed' in override_types:
-                    can_override = True
-
-                if not can_override:
-                    remaining_blockers.append(blocker)
-
-            blockers = remaining_blockers
+            blockers = _clear_overridden_blockers(blockers, override_types)
 
         return (len(blockers) == 0, blockers)
 
+    def can_advance_cohort_from_step(self, step_executions, work_order):
+        """
+        Set-based variant of `can_advance_from_step` for a whole lot.
+
+        Evaluates the same gates, in the same order, with the same blocker
+        strings — but loads each blocker source once for the whole cohort
+        with `__in` queries instead of once per part. The advancement engine
+        calls this while it holds SELECT FOR UPDATE on the cohort's part rows,
+        so the query count here is what bounds lock hold time on large lots.
+
+        Callers may pre-attach the (already locked) Part instance to each
+        execution to avoid re-reading it; `execution.part` is used as-is.
+        Executions without a part (Core teardown) fall back to the per-row
+        requirement check, mirroring the single-part path.
+
+        Args:
+            step_executions: iterable of StepExecution for parts at this step
+            work_order: WorkOrder instance shared by the cohort
+
+        Returns:
+            dict: {step_execution.id: (can_advance: bool, blockers: list of str)}
+        """
+        from .qms import QaApproval, QualityReports, StepOverride
+
+        executions = list(step_executions)
+        if not executions:
+            return {}
+
+        blockers_by_exec = {se.id: [] for se in executions}
+        part_execs = [se for se in executions if se.part_id is not None]
+
+        # 1. Quarantine — read straight off the (locked) part rows.
+        if self.block_on_quarantine:
+            for se in part_execs:
+                if se.part.part_status == PartsStatus.QUARANTINED:
+                    blockers_by_exec[se.id].append("Part is quarantined and step blocks on quarantine")
+
+        # 2. QA signoff is per (step, work_order) — one lookup for the lot.
+        if self.requires_qa_signoff:
+            if not QaApproval.objects.filter(step=self, work_order=work_order).exists():
+                for se in executions:
+                    blockers_by_exec[se.id].append("QA signoff required but not received")
+
+        # 3. FPI status is per (step, work_order) — one lookup for the lot.
+        if part_execs and self.requires_first_piece_inspection:
+            fpi_status = self.get_fpi_status(work_order)
+            if fpi_status['status'] not in ('PASSED', 'WAIVED', 'NOT_REQUIRED'):
+                for se in part_execs:
+                    blockers_by_exec[se.id].append(f"First Piece Inspection required: {fpi_status['status']}")
+
+        # 4. Sampling — the per-part path takes `.first()` (pk order), so keep
+        # the lowest-pk report per part.
+        if self.sampling_required:
+            sampled = [se for se in part_execs if se.part.requires_sampling]
+            if sampled:
+                first_status_by_part = {}
+                for part_id, status in (
+                    QualityReports.objects.filter(
+                        part_id__in=[se.part_id for se in sampled],
+                        step=self,
+                        archived=False,
+                    ).order_by('pk').values_list('part_id', 'status')
+                ):
+                    first_status_by_part.setdefault(part_id, status)
+                for se in sampled:
+                    status = first_status_by_part.get(se.part_id)
+                    if status is None:
+                        blockers_by_exec[se.id].append("Sampling inspection required but not completed")
+                    elif status == 'FAIL':
+                        blockers_by_exec[se.id].append("Sampling inspection failed - disposition required")
+
+        # 5. Mandatory measurements — one read of every measurement row for the lot.
+        if getattr(self, 'block_on_measurement_failure', False):
+            from .qms import StepExecutionMeasurement
+            failed_exec_ids = set()
+            recorded_by_exec = {}
+            for exec_id, definition_id, within_spec in StepExecutionMeasurement.objects.filter(  # tenant-safe: lot's executions
+                step_execution__in=executions
+            ).values_list('step_execution_id', 'measurement_definition_id', 'is_within_spec'):
+                recorded_by_exec.setdefault(exec_id, set()).add(definition_id)
+                if within_spec is False:
+                    failed_exec_ids.add(exec_id)
+            required_measurement_ids = set(
+                self.required_measurements.values_list('id', flat=True)
+            )
+            for se in executions:
+                if se.id in failed_exec_ids:
+                    blockers_by_exec[se.id].append("One or more measurements are out of specification")
+                if required_measurement_ids:
+                    missing = required_measurement_ids - recorded_by_exec.get(se.id, set())
+                    if missing:
+                        blockers_by_exec[se.id].append(f"Missing {len(missing)} required measurement(s)")
+
+        # 6. StepRequirement entries — each requirement resolved for the lot at once.
+        for req in self.requirements.filter(is_mandatory=True, archived=False):
+            satisfied = req.satisfied_executions(executions)
+            for se in executions:
+                if se.id not in satisfied:
+                    blockers_by_exec[se.id].append(f"Requirement not met: {req.name}")
+
+        # 7. Substep completion (Parts-only).
+        if part_execs:
+            from Tracker.services.dwi.advancement_gate import cohort_substep_completion_blockers
+            for exec_id, substep_blockers in cohort_substep_completion_blockers(
+                self, part_execs, work_order
+            ).items():
+                blockers_by_exec[exec_id].extend(substep_blockers)
+
+        # 7.5. Competence gate — requirements are per (step, process), and the
+        # authorization result is per worker, so both are resolved once.
+        unauthorized = [se for se in executions if se.training_authorization is None]
+        if unauthorized:
+            from Tracker.services.training import (
+                get_required_training, check_training_authorization,
+            )
+            process = getattr(work_order, 'process', None)
+            if get_required_training(self, process):
+                authorized_by_worker = {}
+                for se in unauthorized:
+                    worker = se.assigned_to
+                    if worker is None:
+                        blockers_by_exec[se.id].append(
+                            "No qualified operator recorded for a step that requires training"
+                        )
+                        continue
+                    if worker.pk not in authorized_by_worker:
+                        authorized_by_worker[worker.pk] = check_training_authorization(
+                            worker, self, process=process
+                        ).authorized
+                    if not authorized_by_worker[worker.pk]:
+                        who = worker.get_full_name() or worker.get_username()
+                        blockers_by_exec[se.id].append(f"Operator {who} is not qualified for this step")
+
+        # 8. Overrides — one read covering every blocked execution.
+        blocked_ids = [exec_id for exec_id, blockers in blockers_by_exec.items() if blockers]
+        if blocked_ids:
+            override_types_by_exec = {}
+            for exec_id, block_type in StepOverride.objects.filter(  # tenant-safe: lot's executions
+                step_execution_id__in=blocked_ids,
+                status='APPROVED',
+                used=False
+            ).values_list('step_execution_id', 'block_type'):
+                if block_type:
+                    override_types_by_exec.setdefault(exec_id, set()).add(block_type.lower())
+            for exec_id in blocked_ids:
+                blockers_by_exec[exec_id] = _clear_overridden_blockers(
+                    blockers_by_exec[exec_id], override_types_by_exec.get(exec_id, set())
+                )
+
+        return {
+            exec_id: (len(blockers) == 0, blockers)
+            for exec_id, blockers in blockers_by_exec.items()
+        }
+
+
+def _clear_overridden_blockers(blockers, override_types):
+    """Drop blockers cleared by an approved, unused StepOverride.
+
+    `override_types` is the lower-cased set of `block_type` values. Blockers
+    are matched to block types by their human-readable message.
+    """
+    remaining_blockers = []
+    for blocker in blockers:
+        # Map blocker message to block type
+        can_override = False
+        if 'quarantine' in blocker.lower() and 'quarantine' in override_types:
+            can_override = True
+        elif 'qa signoff' in blocker.lower() and 'qa_signoff' in override_types:
+            can_override = True
+        elif 'first piece' in blocker.lower() and 'fpi_required' in override_types:
+            can_override = True
+        elif 'sampling' in blocker.lower() and 'sampling_required' in override_types:
+            can_override = True
+        elif 'measurement' in blocker.lower() and 'measurement_failed' in override_types:
+            can_override = True
+
+        if not can_override:
+            remaining_blockers.append(blocker)
+    return remaining_blockers
+
 
 class DecisionDataMissing(ValueError):
     """Raised when required data for a decision point is missing."""
@@ -1324,6 +1484,70 @@ class StepRequirement(SecureModel):
         # Default: assume satisfied for unhandled types
         return True
 
+    def satisfied_executions(self, step_executions):
+        """
+        Set-based `is_satisfied`: return the ids of the executions that satisfy
+        this requirement, resolving each requirement type with one query for
+        the whole batch. Executions without a part fall back to `is_satisfied`.
+
+        Args:
+            step_executions: list of StepExecution instances to check
+
+        Returns:
+            set: ids of the satisfying StepExecutions
+        """
+        from .qms import QaApproval, FPIRecord, StepExecutionMeasurement
+
+        part_execs = [se for se in step_executions if se.part_id is not None]
+        satisfied = {
+            se.id for se in step_executions
+            if se.part_id is None and self.is_satisfied(se)
+        }
+
+        if self.requirement_type == RequirementType.MEASUREMENT:
+            measurement_ids = self.config.get('measurement_ids', [])
+            if not measurement_ids:
+                return satisfied | {se.id for se in part_execs}
+            recorded_by_exec = {}
+            for exec_id, definition_id in StepExecutionMeasurement.objects.filter(  # tenant-safe: batch's executions
+                step_execution__in=part_execs,
+                measurement_definition_id__in=measurement_ids,
+                is_within_spec=True
+            ).values_list('step_execution_id', 'measurement_definition_id'):
+                recorded_by_exec.setdefault(exec_id, set()).add(definition_id)
+            return satisfied | {
+                se.id for se in part_execs
+                if set(measurement_ids) == recorded_by_exec.get(se.id, set())
+            }
+
+        elif self.requirement_type in (RequirementType.QA_APPROVAL, RequirementType.FPI_PASSED):
+            # Both are keyed by (step, the part's work order); resolve each
+            # distinct pair once.
+            passed_by_key = {}
+            for se in part_execs:
+                key = (se.step_id, se.part.work_order_id)
+                if key not in passed_by_key:
+                    if self.requirement_type == RequirementType.QA_APPROVAL:
+                        passed_by_key[key] = key[1] is not None and QaApproval.objects.filter(
+                            step_id=key[0],
+                            work_order_id=key[1]
+                        ).exists()
+                    else:
+                        passed_by_key[key] = FPIRecord.objects.filter(
+                            work_order_id=key[1],
+                            step_id=key[0],
+                            status='PASSED'
+                        ).exists()
+                if passed_by_key[key]:
+                    satisfied.add(se.id)
+            return satisfied
+
+        elif self.requirement_type == RequirementType.SIGNOFF:
+            return satisfied | {se.id for se in part_execs if se.completed_by_id is not None}
+
+        # Default: assume satisfied for unhandled types
+        return satisfied | {se.id for se in part_execs}
+
 
 # ===== GRAPH STRUCTURE (Process-Step relationships) =====
 
@@ -1623,6 +1847,8 @@ class StepExecution(SecureModel):
             models.Index(fields=['core', 'step']),
             models.Index(fields=['status', 'entered_at']),
             models.Index(fields=['assigned_to', 'status']),
+            # OEE output counts: completions per shift window.
+            models.Index(fields=['tenant', 'exited_at'], name='stepexec_tenant_exited_idx'),
         ]
         constraints = [
             # A part and a core are mutually exclusive. A third subject kind
@@ -2272,11 +2498,21 @@ class Orders(SecureModel):
 
     def bulk_add_parts(self, part_type, step, quantity, part_status=PartsStatus.PENDING, work_order=None,
                        erp_id_start=1):
-        """Add multiple parts to this order efficiently"""
+        """Add multiple parts to this order efficiently.
+
+        ERP_ids count up from `erp_id_start`; pass None to continue from the
+        tenant's counter for the part type's prefix instead, claiming the
+        whole block in one round-trip.
+        """
+        prefix = part_type.ID_prefix or 'P'
+        if erp_id_start is None:
+            from Tracker.utils.sequences import allocate_sequence
+            erp_id_start = allocate_sequence(Parts.objects, 'ERP_id', prefix, count=quantity, tenant=self.tenant)
+
         # Create parts without sampling evaluation
         parts = []
         for i in range(quantity):
-            erp_id = f"{part_type.ID_prefix or 'P'}{erp_id_start + i:04d}"
+            erp_id = f"{prefix}{erp_id_start + i:04d}"
             part = Parts(part_status=part_status, order=self, part_type=part_type, step=step, work_order=work_order,
                          archived=False, ERP_id=erp_id)
             parts.append(part)
@@ -2284,28 +2520,25 @@ class Orders(SecureModel):
         # Bulk create for efficiency
         created_parts = Parts.objects.bulk_create(parts)
 
-        # Evaluate sampling for all new parts
-        updates = []
-        for part in created_parts:
-            evaluator = SamplingFallbackApplier(part=part)
-            result = evaluator.evaluate()
+        from Tracker.services.core import scope_closure
+        if scope_closure.closure_enabled():
+            scope_closure.add_nodes(created_parts)
 
-            part.requires_sampling = result.get("requires_sampling", False)
-            part.sampling_rule = result.get("rule")
-            part.sampling_ruleset = result.get("ruleset")
-            part.sampling_context = result.get("context", {})
-            updates.append(part)
-
-        # Bulk update sampling fields
-        Parts.objects.bulk_update(updates,
-                                  ["requires_sampling", "sampling_rule", "sampling_ruleset", "sampling_context"])
+        # Evaluate sampling for all new parts in one pass and bulk update
+        SamplingCohortEvaluator(created_parts).apply()
 
         return {"created": len(created_parts), "parts": created_parts}
 
     def bulk_remove_parts(self, part_ids):
         """Remove parts from this order by setting order to None"""
         parts = Parts.objects.filter(id__in=part_ids, order=self)
+        part_pks = list(parts.values_list('pk', flat=True))
         count = parts.update(order=None)
+
+        # .update() skips the save signal that keeps the scope closure current.
+        from Tracker.services.core import scope_closure
+        if scope_closure.closure_enabled():
+            scope_closure.refresh_moved(Parts, self.tenant_id, part_pks)
         return {"removed": count}
 
     def get_process_stages(self):
@@ -2673,20 +2906,7 @@ class WorkOrder(SecureModel):
 
     def _bulk_evaluate_sampling(self, parts_list):
         """Evaluate sampling for multiple parts efficiently"""
-        updates = []
-        for part in parts_list:
-            evaluator = SamplingFallbackApplier(part=part)
-            result = evaluator.evaluate()
-
-            part.requires_sampling = result.get("requires_sampling", False)
-            part.sampling_rule = result.get("rule")
-            part.sampling_ruleset = result.get("ruleset")
-            part.sampling_context = result.get("context", {})
-            updates.append(part)
-
-        # Bulk update sampling fields
-        Parts.objects.bulk_update(updates,
-                                  ["requires_sampling", "sampling_rule", "sampling_ruleset", "sampling_context"])
+        SamplingCohortEvaluator(parts_list).apply()
 
     def _generate_final_sampling_report(self):
         """Generate comprehensive sampling report for completed work order"""
@@ -3381,5 +3601,82 @@ class Parts(SecureModel):
         return f"{self.ERP_id} {deal_name} {part_type_name}"
 
 
+class WorkQueueEntry(models.Model):
+    """
+    Open work at one step for one work order and part type: a row of the
+    operator work queue.
+
+    Counts open (PENDING / IN_PROGRESS, not exited) StepExecutions. Rows with
+    `is_part_work` False gather the open executions at a step that have no
+    part (receiving and OSP-return inspections, cores); they feed the WIP
+    summary but are not on the operator queue. The work order, step and part
+    type columns are copied so the queue is ranked and filtered from this
+    table alone.
+
+    Derived data: maintained by `Tracker.services.mes.work_queue` from the
+    StepExecution / Parts / WorkOrder / WorkOrderHold save receivers when
+    `WORK_QUEUE_PROJECTION_ENABLED` is on, reconciled by the
+    reconcile_work_queue beat task, rebuilt with `manage.py rebuild_work_queue`,
+    and never edited by hand.
+    """
+
+    tenant = models.ForeignKey(
+        'Tracker.Tenant', on_delete=models.CASCADE, related_name='work_queue_entries',
+    )
+    key = models.CharField(
+        max_length=120, help_text="work_order:step:part_type, or other:step for rows without a part",
+    )
+    work_order = models.ForeignKey(
+        WorkOrder, on_delete=models.CASCADE, null=True, blank=True, related_name='work_queue_entries',
+    )
+    step = models.ForeignKey(
+        Steps, on_delete=models.CASCADE, related_name='work_queue_entries',
+    )
+    part_type = models.ForeignKey(
+        PartTypes, on_delete=models.CASCADE, null=True, blank=True, related_name='work_queue_entries',
+    )
+    is_part_work = models.BooleanField(default=True)
+    work_center = models.ForeignKey(
+        'Tracker.WorkCenter', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='work_queue_entries',
+    )
+
+    work_order_erp_id = models.CharField(max_length=50, null=True, blank=True)
+    step_name = models.CharField(max_length=50, null=True, blank=True)
+    part_type_name = models.CharField(max_length=50, null=True, blank=True)
+    work_center_kind = models.CharField(max_length=20, null=True, blank=True)
+    priority = models.IntegerField(null=True, blank=True)
+    expected_completion = models.DateField(null=True, blank=True)
+    search_text = models.TextField(
+        blank=True, default='', help_text="Lower-cased work order ERP id and step name",
+    )
+
+    qty_ready = models.PositiveIntegerField(default=0, help_text="Distinct parts with open executions")
+    pending_count = models.PositiveIntegerField(default=0)
+    in_progress_count = models.PositiveIntegerField(default=0)
+    earliest_entered_at = models.DateTimeField(null=True, blank=True)
+    is_held = models.BooleanField(default=False, help_text="The work order has an active hold")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Work Queue Entry'
+        verbose_name_plural = 'Work Queue Entries'
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'key'], name='workqueue_tenant_key_uniq'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['tenant', 'is_held', 'priority', 'expected_completion', 'earliest_entered_at'],
+                name='workqueue_tenant_rank_idx',
+            ),
+            models.Index(fields=['tenant', 'work_order'], name='workqueue_tenant_wo_idx'),
+            models.Index(fields=['tenant', 'step'], name='workqueue_tenant_step_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.work_order_erp_id or '-'} @ {self.step_name}: {self.qty_ready}"
+
+
 # Note: Equipment and Sampling models have been moved to mes_standard.py
 # Note: ExternalAPIOrderIdentifier and HubSpotSyncLog are in integrations/hubspot.py
@@ -13,6 +13,7 @@ Contains full traceability and compliance features:
 - WorkCenter: Equipment grouping
 - Shift/ScheduleSlot: Scheduling infrastructure
 - DowntimeEvent: Equipment downtime logging
+- OEEBucket: Per-shift-window OEE rollup (derived from downtime, time entries, completions)
 """
 
 
@@ -986,6 +987,14 @@ class ScheduleSlot(SecureModel):
         on_delete=models.CASCADE,
         related_name='schedule_slots'
     )
+    step = models.ForeignKey(
+        'Tracker.Steps',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='schedule_slots',
+        help_text="Process step this slot runs. Set by the scheduler; blank on hand-placed slots."
+    )
 
     scheduled_date = models.DateField()
     scheduled_start = models.DateTimeField()
@@ -1119,6 +1128,81 @@ class DowntimeEvent(SecureModel):
         return None
 
 
+class OEEBucket(models.Model):
+    """
+    OEE inputs for one work center (or one of its machines) over one shift window.
+
+    Rows with `equipment` set cover a single machine; rows without it cover the
+    whole work center, with the time columns summed over its machines
+    (`machines` of them, 1 for a manual station) and output counted from
+    StepExecution completions at its steps. Ratios are derived at read time
+    from the summed columns, so any grouping (machine, work center, shift,
+    day, plant) aggregates exactly.
+
+    Derived data: written by `Tracker.services.mes.oee` for shift windows that
+    have ended, refreshed when downtime, time entries, completions or quality
+    reports touching a window are saved (when `OEE_ROLLUP_ENABLED` is on),
+    rebuilt with `manage.py rebuild_oee`, and never edited by hand.
+    """
+
+    tenant = models.ForeignKey(
+        'Tracker.Tenant', on_delete=models.CASCADE, related_name='oee_buckets',
+    )
+    work_center = models.ForeignKey(
+        WorkCenter, on_delete=models.CASCADE, related_name='oee_buckets',
+    )
+    equipment = models.ForeignKey(
+        Equipments, on_delete=models.CASCADE, null=True, blank=True, related_name='oee_buckets',
+        help_text="Machine this row covers; blank for the work center as a whole",
+    )
+    shift = models.ForeignKey(
+        Shift, on_delete=models.CASCADE, related_name='oee_buckets',
+    )
+    day = models.DateField(help_text="Local date the shift window starts on")
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField()
+
+    machines = models.PositiveIntegerField(default=1)
+    planned_seconds = models.FloatField(default=0.0, help_text="Shift time × machines")
+    planned_stop_seconds = models.FloatField(
+        default=0.0, help_text="Planned maintenance / no-work time, excluded from availability",
+    )
+    downtime_seconds = models.FloatField(
+        default=0.0, help_text="Unplanned stops, changeovers and logged downtime not already planned",
+    )
+    ideal_seconds = models.FloatField(
+        default=0.0, help_text="Sum of Steps.expected_duration over the units completed",
+    )
+    total_count = models.PositiveIntegerField(default=0)
+    reject_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'OEE Bucket'
+        verbose_name_plural = 'OEE Buckets'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['work_center', 'equipment', 'shift', 'day'],
+                condition=models.Q(equipment__isnull=False),
+                name='oeebucket_equipment_window_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['work_center', 'shift', 'day'],
+                condition=models.Q(equipment__isnull=True),
+                name='oeebucket_work_center_window_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tenant', 'day'], name='oeebucket_tenant_day_idx'),
+            models.Index(fields=['tenant', 'window_end'], name='oeebucket_tenant_end_idx'),
+        ]
+
+    def __str__(self):
+        target = self.equipment_id or self.work_center_id
+        return f"{target} {self.day} shift {self.shift_id}"
+
+
 class MaterialLot(SecureModel):
     """
     Tracks a lot of material received from a supplier.
@@ -19,7 +19,10 @@ the DB layer so malformed rows from raw SQL, fixtures, or buggy bulk writes
 can't slip past serializer validation.
 
 Beat coordination uses `last_fired_at` as the lock anchor — see
-`Tracker.services.core.notifications.schedule.fire_schedule()`.
+`Tracker.services.core.notifications.schedule.fire_schedule()`. The next
+fire moment derived from it is persisted in `next_fire_at` (recomputed on
+every save that touches cadence or `last_fired_at`) so the beat tick can
+find due rows with an indexed range query.
 """
 from __future__ import annotations
 
@@ -45,6 +48,13 @@ CADENCE_CHOICES = [
     (CADENCE_MONTHLY, "Monthly"),
 ]
 
+# Fields `next_fire_at` is derived from. A save(update_fields=...) touching
+# any of them recomputes it.
+FIRE_TIME_FIELDS = frozenset({
+    "cadence", "day_of_week", "day_of_month", "time_of_day", "timezone",
+    "last_fired_at",
+})
+
 # Scope choices for schedules: tenant, customer, or personal.
 # - tenant   = admin-authored, internal recipients (e.g. weekly CAPA digest to QA Manager)
 # - customer = admin-authored, customer-org recipients (e.g. weekly orders to Acme's buyer)
@@ -90,7 +100,7 @@ class NotificationScheduleManager(SecureManager):
         """Schedules where the next fire moment has passed, used by the
         beat tick task. Caller still re-checks under SELECT FOR UPDATE.
         """
-        return self.filter(enabled=True, archived=False)
+        return self.filter(enabled=True, archived=False, next_fire_at__lte=now)
 
 
 # =============================================================================
@@ -103,14 +113,13 @@ class NotificationSchedule(SecureModel):
     The fire flow at a high level:
 
       tick_notification_schedules (every 5 min)
-        for each enabled schedule:
-          if compute_next_fire(schedule, after=last_fired_at) <= now:
-            fire_one_schedule.delay(schedule.id)
+        for each enabled schedule with next_fire_at <= now:
+          fire_schedule_batch.delay([schedule.id, ...])
 
       fire_one_schedule(id):
         SELECT FOR UPDATE SKIP LOCKED on the schedule row
         if still due:
-          mark last_fired_at = now (atomic)
+          mark last_fired_at = now, advance next_fire_at (atomic)
           render content via ScheduledContentProvider
           write outbox rows with idempotency keyed on (schedule, fire_window_start)
 
@@ -237,6 +246,15 @@ class NotificationSchedule(SecureModel):
         db_index=True,
         help_text="Set to now() inside the fire transaction, before rendering.",
     )
+    next_fire_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=(
+            "compute_next_fire() after last_fired_at (or created_at). "
+            "Maintained by save(); null only for rows not yet backfilled."
+        ),
+    )
 
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -252,6 +270,13 @@ class NotificationSchedule(SecureModel):
         indexes = [
             models.Index(fields=["tenant", "enabled", "cadence"]),
             models.Index(fields=["tenant", "scope_kind", "scope_customer"]),
+            # The beat tick's range scan. Partial: disabled and archived
+            # schedules never fire, so they stay out of the index.
+            models.Index(
+                fields=["next_fire_at"],
+                condition=Q(enabled=True, archived=False),
+                name="notif_schedule_due_idx",
+            ),
         ]
         constraints = [
             # Scope-shape: tenant has neither extra FK; customer has scope_customer;
@@ -423,7 +448,25 @@ class NotificationSchedule(SecureModel):
         self.full_clean(
             exclude=["recipient_users", "recipient_groups", "recipient_external"]
         )
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or FIRE_TIME_FIELDS.intersection(update_fields):
+            self.next_fire_at = self.compute_next_fire_at()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "next_fire_at"}
         super().save(*args, **kwargs)
 
+    def compute_next_fire_at(self):
+        """Next fire moment strictly after the last fire (or creation).
+
+        Imported lazily for the same reason as the registry lookup in
+        clean(). An unsaved row anchors on now, as created_at will.
+        """
+        from django.utils import timezone as dj_timezone
+
+        from Tracker.services.core.notifications.schedule import compute_next_fire
+
+        anchor = self.last_fired_at or self.created_at or dj_timezone.now()
+        return compute_next_fire(self, after=anchor)
+
     def __str__(self) -> str:
         return f"{self.name} [{self.provider_kind}/{self.cadence}]"
@@ -5,6 +5,7 @@ This module contains all Quality Management System related models including:
 - Quality reports and error tracking
 - Measurement results
 - Quarantine disposition workflows
+- Daily quality dashboard rollups (derived)
 - Equipment usage tracking
 - Step transitions and QA approvals
 - CAPA (Corrective and Preventive Actions)
@@ -507,10 +508,7 @@ class QualityReports(SecureModel):
 
     @classmethod
     def generate_report_number(cls, tenant=None):
-        """Auto-generate report number: QR-YYYY-######
-
-        Uses SELECT FOR UPDATE to prevent race conditions under concurrent load.
-        """
+        """Auto-generate report number: QR-YYYY-######"""
         from Tracker.utils.sequences import generate_next_sequence
 
         year = timezone.now().year
@@ -918,10 +916,7 @@ class QuarantineDisposition(SecureModel):
             apply_disposition_to_part(self)
 
     def _generate_disposition_number(self):
-        """Generate disposition number with race condition protection.
-
-        Uses SELECT FOR UPDATE to prevent duplicates under concurrent load.
-        """
+        """Generate the next disposition number (see Tracker.utils.sequences)."""
         from Tracker.utils.sequences import generate_next_sequence
 
         year = timezone.now().year
@@ -1028,6 +1023,85 @@ class QuarantineDisposition(SecureModel):
         return existing_rework_count + 1
 
 
+# ===== DASHBOARD ROLLUPS =====
+
+class QualityDailyRollup(models.Model):
+    """
+    Quality dashboard counts for one tenant over one calendar day.
+
+    Inspection counts are for reports created that day; `ncrs_closed` counts
+    closed dispositions last updated that day and `ncrs_open` dispositions
+    created that day that are still open, matching how the dashboard has
+    always dated them.
+
+    Derived data: maintained by `Tracker.services.qms.quality_rollup` from the
+    QualityReports / QuarantineDisposition save receivers when
+    `QUALITY_ROLLUP_ENABLED` is on, reconciled nightly, rebuilt with
+    `manage.py rebuild_quality_rollups`, and never edited by hand.
+    """
+
+    tenant = models.ForeignKey(
+        'Tenant', on_delete=models.CASCADE, related_name='quality_daily_rollups',
+    )
+    day = models.DateField()
+
+    inspections = models.PositiveIntegerField(default=0, help_text="Active quality reports created")
+    passed = models.PositiveIntegerField(default=0, help_text="Of which PASS (the FPY numerator)")
+    failed = models.PositiveIntegerField(default=0, help_text="Of which FAIL (NCRs opened)")
+    ncrs_closed = models.PositiveIntegerField(default=0)
+    ncrs_open = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Quality Daily Rollup"
+        verbose_name_plural = "Quality Daily Rollups"
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'day'], name='qualityrollup_tenant_day_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.day}: {self.passed}/{self.inspections} passed"
+
+
+class DefectDailyRollup(models.Model):
+    """
+    Defect counts on failed reports for one tenant, day, error type, part type and step.
+
+    `defects` counts QualityReportDefect rows whatever the report's archived
+    state (the Pareto has always done so); `active_defects` only those on
+    active reports, which is what "part types / processes affected" list.
+    Maintained alongside QualityDailyRollup.
+    """
+
+    tenant = models.ForeignKey(
+        'Tenant', on_delete=models.CASCADE, related_name='defect_daily_rollups',
+    )
+    day = models.DateField()
+    error_type = models.ForeignKey(
+        QualityErrorsList, on_delete=models.CASCADE, related_name='daily_rollups',
+    )
+    part_type = models.ForeignKey(
+        'PartTypes', on_delete=models.CASCADE, null=True, blank=True, related_name='defect_daily_rollups',
+    )
+    step = models.ForeignKey(
+        'Steps', on_delete=models.CASCADE, null=True, blank=True, related_name='defect_daily_rollups',
+    )
+
+    defects = models.PositiveIntegerField(default=0)
+    active_defects = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Defect Daily Rollup"
+        verbose_name_plural = "Defect Daily Rollups"
+        indexes = [
+            models.Index(fields=['tenant', 'day'], name='defectrollup_tenant_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day}: {self.defects}x {self.error_type_id}"
+
+
 # ============================================================================
 # 3D MODELS AND HEATMAP ANNOTATIONS
 # ============================================================================
@@ -1364,8 +1438,6 @@ class CAPA(SecureModel):
     def generate_capa_number(cls, capa_type, initiated_date, tenant=None):
         """Auto-generate CAPA number: CAPA-{type_code}-{year}-{sequence}
 
-        Uses SELECT FOR UPDATE to prevent race conditions under concurrent load.
-
         Examples:
         - CAPA-CA-2025-001 (Corrective Action)
         - CAPA-PA-2025-002 (Preventive Action)
@@ -1691,10 +1763,7 @@ class CapaTasks(SecureModel):
         return f"{self.task_number} - {self.description[:50]}"
 
     def save(self, *args, **kwargs):
-        """Auto-generate task number if not set.
-
-        Uses SELECT FOR UPDATE to prevent race conditions under concurrent load.
-        """
+        """Auto-generate task number if not set."""
         if not self.task_number:
             from Tracker.utils.sequences import generate_next_child_sequence
 
@@ -2001,7 +2070,8 @@ class ThreeDModel(SecureModel):
 
     All uploads are processed asynchronously:
         1. File uploaded with processing_status='PENDING'
-        2. Celery task converts/optimizes to GLB
+        2. Celery task converts/optimizes to GLB, plus coarser levels of
+           detail (settings.MODEL_LOD_FACES) listed in `lod_levels`
         3. Status updated to 'COMPLETED' or 'FAILED'
     """
 
@@ -2061,6 +2131,11 @@ class ThreeDModel(SecureModel):
         null=True, blank=True,
         help_text="Final GLB file size in bytes"
     )
+    lod_levels = models.JSONField(
+        default=list, blank=True,
+        help_text="Levels of detail, coarsest first: [{file, face_count, vertex_count, size_bytes}]. "
+                  "The last level is `file` itself."
+    )
 
     class Meta:
         verbose_name = '3D Model'
@@ -2074,6 +2149,19 @@ class ThreeDModel(SecureModel):
         """True if model is processed and ready for viewing."""
         return self.processing_status == ModelProcessingStatus.COMPLETED
 
+    def get_lod_levels(self) -> list:
+        """`lod_levels`, or the single full-detail level for models processed before LODs."""
+        if self.lod_levels:
+            return self.lod_levels
+        if not self.file:
+            return []
+        return [{
+            'file': self.file.name,
+            'face_count': self.face_count,
+            'vertex_count': self.vertex_count,
+            'size_bytes': self.final_size_bytes,
+        }]
+
     @property
     def compression_ratio(self) -> float | None:
         """Calculate size reduction from original to final."""
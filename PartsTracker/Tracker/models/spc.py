@@ -3,6 +3,7 @@ SPC (Statistical Process Control) Models
 
 Contains:
 - SPCBaseline: Frozen control limits for a measurement definition
+- SPCStatsBucket: Per-day running statistics behind the chart/capability endpoints
 - ChartType: Enum for SPC chart types (X-bar R, X-bar S, I-MR)
 - BaselineStatus: Enum for baseline status (Active, Superseded)
 """
@@ -206,23 +207,93 @@ class SPCBaseline(SecureModel):
             archived=False
         ).first()
 
+    @property
+    def limits(self):
+        """Frozen limits as an `spc_engine.ControlLimits` (no plotted points).
+
+        Zero-valued limits read as unset, as they always have for the
+        frontend (`control_limits`).
+        """
+        from Tracker.services.qms.spc_engine import ControlLimits
+
+        def num(v):
+            return float(v) if v else None
+
+        if self.chart_type == ChartType.I_MR.value:
+            return ControlLimits(
+                self.chart_type, 1,
+                center=num(self.individual_cl), ucl=num(self.individual_ucl), lcl=num(self.individual_lcl),
+                dispersion_center=num(self.mr_cl), dispersion_ucl=num(self.mr_ucl),
+            )
+        return ControlLimits(
+            self.chart_type, self.subgroup_size,
+            center=num(self.xbar_cl), ucl=num(self.xbar_ucl), lcl=num(self.xbar_lcl),
+            dispersion_center=num(self.range_cl), dispersion_ucl=num(self.range_ucl),
+            dispersion_lcl=num(self.range_lcl),
+        )
+
     @property
     def control_limits(self):
         """Return control limits as a dictionary matching frontend types."""
-        if self.chart_type == ChartType.I_MR.value:
-            return {
-                'individualUCL': float(self.individual_ucl) if self.individual_ucl else None,
-                'individualLCL': float(self.individual_lcl) if self.individual_lcl else None,
-                'individualCL': float(self.individual_cl) if self.individual_cl else None,
-                'mrUCL': float(self.mr_ucl) if self.mr_ucl else None,
-                'mrCL': float(self.mr_cl) if self.mr_cl else None,
-            }
-        else:
-            return {
-                'xBarUCL': float(self.xbar_ucl) if self.xbar_ucl else None,
-                'xBarLCL': float(self.xbar_lcl) if self.xbar_lcl else None,
-                'xBarCL': float(self.xbar_cl) if self.xbar_cl else None,
-                'rangeUCL': float(self.range_ucl) if self.range_ucl else None,
-                'rangeLCL': float(self.range_lcl) if self.range_lcl else None,
-                'rangeCL': float(self.range_cl) if self.range_cl else None,
-            }
+        return self.limits.as_dict()
+
+
+class SPCStatsBucket(models.Model):
+    """
+    Running statistics for one measurement definition over one UTC day.
+
+    Holds what the SPC chart and capability endpoints need without reading
+    the points: count, mean and M2 (Welford's sum of squared deviations),
+    min/max, in-spec count, and per-subgroup-size range sums. Days combine
+    with Chan's parallel merge, so a 90-day window is ~90 rows whatever the
+    sampling rate.
+
+    Derived data: maintained by `Tracker.services.qms.spc_stats` from the
+    MeasurementResult / StepExecutionMeasurement save receivers when
+    `SPC_STATS_ENABLED` is on, rebuilt with `manage.py rebuild_spc_stats`,
+    and never edited by hand.
+    """
+
+    tenant = models.ForeignKey(
+        'Tenant', on_delete=models.CASCADE, related_name='spc_stats_buckets',
+    )
+    measurement_definition = models.ForeignKey(
+        'MeasurementDefinition', on_delete=models.CASCADE, related_name='spc_stats_buckets',
+    )
+    day = models.DateField(help_text="UTC calendar day the readings fall on")
+
+    count = models.PositiveIntegerField(default=0)
+    within_spec_count = models.PositiveIntegerField(default=0)
+    mean = models.FloatField(default=0.0)
+    m2 = models.FloatField(
+        default=0.0,
+        help_text="Sum of squared deviations from the mean (variance = m2 / (count - 1))",
+    )
+    min_value = models.FloatField(null=True, blank=True)
+    max_value = models.FloatField(null=True, blank=True)
+    subgroups = models.JSONField(
+        default=dict, blank=True,
+        help_text="{size: [ranges, range_sum, open_n, open_min, open_max]} for consecutive "
+                  "subgroups within the day; the open subgroup is the incomplete tail",
+    )
+
+    # Series position of the last reading folded in. A new reading after it
+    # is appended in O(1); anything else recomputes the day from the rows.
+    last_timestamp = models.DateTimeField(null=True, blank=True)
+    last_rank = models.PositiveSmallIntegerField(default=0)
+    last_reading_id = models.UUIDField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "SPC Stats Bucket"
+        verbose_name_plural = "SPC Stats Buckets"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['measurement_definition', 'day'],
+                name='spcstatsbucket_definition_day_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.measurement_definition_id} {self.day} (n={self.count})"
@@ -22,7 +22,6 @@ explicitly, in addition to the param serializer's upstream check.
 """
 from __future__ import annotations
 
-import math
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -33,13 +32,6 @@ from rest_framework import serializers
 from Tracker.reports.adapters.base import ReportAdapter
 
 
-# Subgroup-size → d2 factor for within-subgroup σ estimation (AIAG SPC).
-_D2_FACTORS: dict[int, float] = {
-    2: 1.128, 3: 1.693, 4: 2.059, 5: 2.326, 6: 2.534,
-    7: 2.704, 8: 2.847, 9: 2.970, 10: 3.078,
-}
-
-
 # ---------------------------------------------------------------------------
 # Pydantic context models
 # ---------------------------------------------------------------------------
@@ -184,22 +176,6 @@ def _user_name(user) -> Optional[str]:
     return full.strip() or getattr(user, "email", None) or getattr(user, "username", None)
 
 
-def _interpret_cpk(cp: Optional[float], cpk: Optional[float]) -> str:
-    if cpk is None:
-        return "Insufficient data for capability analysis."
-    if cpk >= 1.33:
-        text = "Process is capable and well-centered."
-    elif cpk >= 1.0:
-        text = "Process is marginally capable - monitor closely."
-    elif cpk >= 0.67:
-        text = "Process needs improvement - high defect risk."
-    else:
-        text = "Process is not capable - immediate action required."
-    if cp is not None and cp > cpk + 0.2:
-        text += " Process is not centered (Cp > Cpk)."
-    return text
-
-
 # ---------------------------------------------------------------------------
 # Adapter
 # ---------------------------------------------------------------------------
@@ -220,7 +196,8 @@ class SpcAdapter(ReportAdapter):
             ProcessStep,
         )
         from Tracker.models.spc import SPCBaseline
-        from Tracker.services.qms.spc_ingest import collect_spc_rows
+        from Tracker.services.qms import spc_engine
+        from Tracker.services.qms.spc_ingest import reading_series, spc_columns
 
         measurement_id = validated_params["measurement_id"]
         days = validated_params.get("days", 90)
@@ -239,11 +216,18 @@ class SpcAdapter(ReportAdapter):
         start = end - timedelta(days=days)
 
         # Two-tier read, deduped and merged by the shared collector
-        # (services/qms/spc_ingest.collect_spc_rows). The live chart endpoints
-        # read the same source, so PDF and screen agree.
-        results = collect_spc_rows(
+        # (services/qms/spc_ingest). The live chart endpoints read the same
+        # source, so PDF and screen agree. Statistics need every value in the
+        # window; the table only the first max_rows points (+1 to detect
+        # truncation), so only those carry part/operator columns.
+        max_rows = 500
+        series = reading_series(
             tenant=tenant, measurement_id=measurement_id, start=start, end=end,
         )
+        columns = spc_columns(
+            tenant=tenant, measurement_id=measurement_id, start=start, end=end,
+            limit=max_rows + 1,
+        )
 
         # Spec limits
         nominal = float(definition.nominal) if definition.nominal is not None else None
@@ -260,60 +244,37 @@ class SpcAdapter(ReportAdapter):
             unit=definition.unit or "",
         )
 
-        # Statistics
-        values = [r.value for r in results]
+        # Statistics + capability: vectorized engine over the window's columns.
+        # Subgroups restart each UTC day, as on the capability endpoint.
+        summary = spc_engine.describe(series)
         stats = SpcStatistics()
-        if values:
-            n = len(values)
-            mean = sum(values) / n
-            variance = sum((v - mean) ** 2 for v in values) / (n - 1) if n > 1 else 0.0
-            std_dev = math.sqrt(variance)
-            within = sum(1 for r in results if r.is_within_spec)
+        if summary.count:
             stats = SpcStatistics(
-                count=n,
-                mean=round(mean, 6),
-                std_dev=round(std_dev, 6),
-                min=round(min(values), 6),
-                max=round(max(values), 6),
-                within_spec_count=within,
-                out_of_spec_count=n - within,
+                count=summary.count,
+                mean=round(summary.mean, 6),
+                std_dev=round(summary.std_dev, 6),
+                min=round(summary.min, 6),
+                max=round(summary.max, 6),
+                within_spec_count=summary.within_spec,
+                out_of_spec_count=summary.out_of_spec,
             )
 
-        # Capability
         capability = SpcCapability(
-            sample_size=len(values), subgroup_size=subgroup_size,
+            sample_size=len(series), subgroup_size=subgroup_size,
         )
-        if len(values) >= 2 and usl is not None and lsl is not None:
-            n = len(values)
-            mean = sum(values) / n
-            std_overall = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1))
-            d2 = _D2_FACTORS.get(subgroup_size, 2.326)
-            ranges: list[float] = []
-            for i in range(0, n - subgroup_size + 1, subgroup_size):
-                sub = values[i:i + subgroup_size]
-                if len(sub) == subgroup_size:
-                    ranges.append(max(sub) - min(sub))
-            std_within = (sum(ranges) / len(ranges)) / d2 if ranges else std_overall
-
-            cp = cpk = pp = ppk = None
-            if std_within > 0:
-                cp = (usl - lsl) / (6 * std_within)
-                cpk = min((usl - mean) / (3 * std_within), (mean - lsl) / (3 * std_within))
-            if std_overall > 0:
-                pp = (usl - lsl) / (6 * std_overall)
-                ppk = min((usl - mean) / (3 * std_overall), (mean - lsl) / (3 * std_overall))
-
+        if len(series) >= 2 and usl is not None and lsl is not None:
+            cap = spc_engine.capability(series.values, usl, lsl, subgroup_size, segments=series.days)
             capability = SpcCapability(
-                sample_size=n,
+                sample_size=cap.sample_size,
                 subgroup_size=subgroup_size,
-                num_subgroups=len(ranges),
-                std_dev_within=round(std_within, 6),
-                std_dev_overall=round(std_overall, 6),
-                cp=round(cp, 3) if cp is not None else None,
-                cpk=round(cpk, 3) if cpk is not None else None,
-                pp=round(pp, 3) if pp is not None else None,
-                ppk=round(ppk, 3) if ppk is not None else None,
-                interpretation=_interpret_cpk(cp, cpk),
+                num_subgroups=cap.num_subgroups,
+                std_dev_within=round(cap.std_dev_within, 6),
+                std_dev_overall=round(cap.std_dev_overall, 6),
+                cp=round(cap.cp, 3) if cap.cp is not None else None,
+                cpk=round(cap.cpk, 3) if cap.cpk is not None else None,
+                pp=round(cap.pp, 3) if cap.pp is not None else None,
+                ppk=round(cap.ppk, 3) if cap.ppk is not None else None,
+                interpretation=spc_engine.interpret(cap.cp, cap.cpk),
             )
 
         # Active baseline (optional)
@@ -360,9 +321,8 @@ class SpcAdapter(ReportAdapter):
                 process_name = ps.process.name
 
         # Cap data points to keep PDF size reasonable
-        max_rows = 500
-        truncated = len(results) > max_rows
-        rows = results[:max_rows]
+        truncated = len(columns) > max_rows
+        rows = list(columns.rows())[:max_rows]
         data_points = [
             SpcDataPoint(
                 timestamp=r.timestamp,
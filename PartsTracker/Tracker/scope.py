@@ -15,6 +15,23 @@ Filtering:
     include_types           - Only traverse these model types
     exclude_types           - Skip these model types
 
+Strategies (flat results only; preserve_structure/stop_condition always
+hydrate instances):
+    'columns' (default)     - Walk (content_type_id, pk) sets with values_list
+                              on the FK columns; no model rows are built
+    'cte'                   - One recursive CTE per call; used when no user is
+                              given, otherwise falls back to 'columns'
+    'instances'             - Legacy walk that loads full rows at every depth
+    'closure'               - Read the materialized ScopeClosure index
+                              (services/core/scope_closure.py). With no user
+                              and include_types=closure_models() it is the
+                              whole answer. Otherwise, for an unbounded
+                              'down' walk from a covered root, the stored
+                              subtree (filtered by for_user()) seeds a column
+                              walk of the models outside the index. Anything
+                              else, or SCOPE_CLOSURE_ENABLED off, falls back
+                              to 'columns'
+
 Utilities:
     find_in_graph()         - Find first object matching a condition
     count_descendants()     - Count objects by type
@@ -59,13 +76,31 @@ Usage Examples:
     # Returns: [(order, 'parts'), (part, 'part_type'), (process, 'steps'), (step, None)]
 """
 
+from collections import namedtuple
+
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import UUIDField
 from django.db.models.fields.related import ForeignObjectRel
 
 
 # Cache for ContentType lookups
 _content_type_cache = {}
 
+# Cache for per-model relation maps: {(model_class, direction): (_Relation, ...)}
+_relation_map_cache = {}
+
+TRAVERSAL_STRATEGIES = ('columns', 'cte', 'instances', 'closure')
+
+# One traversable edge out of a model.
+#   model:      the related SecureModel class
+#   field_name: 'down' -> FK/M2M field name on the child pointing back at us
+#               'up'   -> forward FK field name on us
+#   accessor:   attribute used to reach the related object(s) from an instance
+#   attname:    'up' only - FK column attribute on us (e.g. 'order_id')
+#   m2m:        True for reverse many-to-many relations
+_Relation = namedtuple('_Relation', 'model model_name field_name accessor attname m2m')
+
 
 def _get_content_type(model_or_obj):
     """Get ContentType for a model or instance, with caching."""
@@ -80,9 +115,78 @@ def _get_content_type(model_or_obj):
     return _content_type_cache[key]
 
 
+def _relation_map(model, direction):
+    """
+    Relations from `model` to other SecureModels in one direction, cached per
+    model class so traversal never calls `_meta.get_fields()` per instance.
+
+    'down' yields reverse relations (children), 'up' yields forward FK and
+    one-to-one fields (parents). Type filters are applied by the caller.
+    """
+    key = (model, direction)
+    if key in _relation_map_cache:
+        return _relation_map_cache[key]
+
+    from .models.core import SecureModel
+
+    relations = []
+    for field in model._meta.get_fields():
+        if not field.is_relation:
+            continue
+        if not field.related_model:
+            continue
+        if not issubclass(field.related_model, SecureModel):
+            continue
+
+        is_reverse = isinstance(field, ForeignObjectRel)
+        if direction == 'down':
+            if not is_reverse:
+                continue
+            relations.append(_Relation(
+                model=field.related_model,
+                model_name=field.related_model._meta.model_name,
+                field_name=field.field.name,
+                accessor=field.get_accessor_name(),
+                attname=None,
+                m2m=field.many_to_many,
+            ))
+        else:
+            if is_reverse or field.many_to_many:
+                continue
+            if not (field.concrete and (field.many_to_one or field.one_to_one)):
+                continue
+            relations.append(_Relation(
+                model=field.related_model,
+                model_name=field.related_model._meta.model_name,
+                field_name=field.name,
+                accessor=field.name,
+                attname=field.attname,
+                m2m=False,
+            ))
+
+    _relation_map_cache[key] = tuple(relations)
+    return _relation_map_cache[key]
+
+
+def _filtered_relations(model, direction, allowed_types, excluded_types):
+    """`_relation_map` narrowed to the include/exclude type filters."""
+    return [
+        rel for rel in _relation_map(model, direction)
+        if not (allowed_types and rel.model_name not in allowed_types)
+        and not (excluded_types and rel.model_name in excluded_types)
+    ]
+
+
+def _scoped_queryset(model_class, user):
+    """Base queryset for a traversal fetch, permission-filtered when a user is given."""
+    if user and hasattr(model_class.objects, 'for_user'):
+        return model_class.objects.for_user(user)
+    return model_class.objects.all()
+
+
 def _traverse(obj, direction='down', max_depth=None, include_types=None,
               exclude_types=None, stop_condition=None, preserve_structure=False,
-              user=None):
+              user=None, strategy='columns'):
     """
     Core graph traversal logic with batched queries.
 
@@ -96,13 +200,16 @@ def _traverse(obj, direction='down', max_depth=None, include_types=None,
         stop_condition: Callable(obj) that returns True to stop and return that object
         preserve_structure: If True, return nested dict structure instead of flat
         user: Optional user for permission filtering via for_user()
+        strategy: 'columns', 'cte', 'instances' or 'closure' (see module docstring).
+                  Ignored when stop_condition or preserve_structure need instances.
 
     Returns:
         If stop_condition triggers: the matching object
         If preserve_structure: nested dict {obj: {child_obj: {...}, ...}}
         Otherwise: dict of {content_type_id: set(object_ids)}
     """
-    from .models.core import SecureModel
+    if strategy not in TRAVERSAL_STRATEGIES:
+        raise ValueError(f"Unknown traversal strategy {strategy!r}; expected one of {TRAVERSAL_STRATEGIES}")
 
     # Convert type filters to sets of model names for fast lookup
     allowed_types = None
@@ -113,6 +220,21 @@ def _traverse(obj, direction='down', max_depth=None, include_types=None,
     if exclude_types:
         excluded_types = {m._meta.model_name for m in exclude_types}
 
+    # Flat results only need (content_type_id, pk) sets - never build rows.
+    if stop_condition is None and not preserve_structure and strategy != 'instances':
+        if strategy == 'cte' and not user:
+            result = _traverse_ids_cte(obj, direction, max_depth, allowed_types, excluded_types)
+            if result is not None:
+                return result
+        if strategy == 'closure':
+            from Tracker.services.core import scope_closure
+            if not user and scope_closure.answers(obj, direction, include_types, exclude_types):
+                return scope_closure.descendants(obj, max_depth=max_depth)
+            if scope_closure.can_seed(obj, direction, max_depth, include_types, exclude_types):
+                return _traverse_ids(obj, direction, max_depth, allowed_types, excluded_types, user,
+                                     seed=_closure_seed(obj, user))
+        return _traverse_ids(obj, direction, max_depth, allowed_types, excluded_types, user)
+
     visited = {}  # {content_type_id: set(object_ids)}
     structure = {} if preserve_structure else None
     obj_cache = {}  # {(content_type_id, pk): object} - for structure building
@@ -169,34 +291,14 @@ def _traverse(obj, direction='down', max_depth=None, include_types=None,
                 current._traverse_node = current_node
 
             # Discover related objects to fetch
-            for field in current._meta.get_fields():
-                if not field.is_relation:
-                    continue
-                if not field.related_model:
-                    continue
-                if not issubclass(field.related_model, SecureModel):
-                    continue
-
-                related_model_name = field.related_model._meta.model_name
-
-                # Type filtering - include
-                if allowed_types and related_model_name not in allowed_types:
-                    continue
-
-                # Type filtering - exclude
-                if excluded_types and related_model_name in excluded_types:
-                    continue
-
-                is_reverse = isinstance(field, ForeignObjectRel)
+            for rel in _filtered_relations(current._meta.model, direction,
+                                           allowed_types, excluded_types):
+                related_model = rel.model
 
                 if direction == 'down':
-                    if not is_reverse:
-                        continue
                     # Reverse relation - need to query by the FK field
-                    related_model = field.related_model
-                    # Get the field name on the related model that points to us
-                    remote_field_name = field.field.name
-                    filter_field = f'{remote_field_name}__in'
+                    # that points to us on the related model
+                    filter_field = f'{rel.field_name}__in'
 
                     # Key by (parent_model, related_model, filter_field) to prevent mixing parent IDs.
                     # IMPORTANT: Previously keyed by just (related_model, filter_field), which caused
@@ -214,23 +316,16 @@ def _traverse(obj, direction='down', max_depth=None, include_types=None,
                         }
 
                     to_fetch[fetch_key]['parent_ids'].add(current.pk)
-                    field_accessor = field.get_accessor_name()
                     if current.pk not in to_fetch[fetch_key]['parents_map']:
                         to_fetch[fetch_key]['parents_map'][current.pk] = []
-                    to_fetch[fetch_key]['parents_map'][current.pk].append((current, field_accessor))
+                    to_fetch[fetch_key]['parents_map'][current.pk].append((current, rel.accessor))
 
                 else:  # direction == 'up'
-                    if is_reverse:
-                        continue
-                    if field.many_to_many:
-                        continue
-
                     # Forward FK - get the ID directly without fetching
-                    fk_id = getattr(current, f'{field.name}_id', None)
+                    fk_id = getattr(current, rel.attname, None)
                     if fk_id is None:
                         continue
 
-                    related_model = field.related_model
                     filter_field = 'pk__in'
 
                     # Key by (parent_model, related_model, filter_field) for consistency with 'down' direction
@@ -247,7 +342,7 @@ def _traverse(obj, direction='down', max_depth=None, include_types=None,
                     to_fetch[fetch_key]['parent_ids'].add(fk_id)
                     if fk_id not in to_fetch[fetch_key]['parents_map']:
                         to_fetch[fetch_key]['parents_map'][fk_id] = []
-                    to_fetch[fetch_key]['parents_map'][fk_id].append((current, field.name))
+                    to_fetch[fetch_key]['parents_map'][fk_id].append((current, rel.field_name))
 
         # Batch fetch all related objects for next depth
         next_depth_objects = []
@@ -266,10 +361,7 @@ def _traverse(obj, direction='down', max_depth=None, include_types=None,
 
             # Single query for all objects of this type
             # Use for_user() if available for permission filtering
-            if user and hasattr(model_class.objects, 'for_user'):
-                queryset = model_class.objects.for_user(user)
-            else:
-                queryset = model_class.objects.all()
+            queryset = _scoped_queryset(model_class, user)
             related_objects = list(queryset.filter(**{filter_field: parent_ids}))
 
             # DEBUG: Uncomment to trace large fetches
@@ -312,6 +404,228 @@ def _traverse(obj, direction='down', max_depth=None, include_types=None,
     return visited
 
 
+def _closure_seed(obj, user):
+    """
+    {model: pks} stored under `obj` in the ScopeClosure index, root included,
+    narrowed to what `user` can see. As in the live walk, a hidden node cuts
+    off everything that only hangs under it.
+    """
+    from Tracker.services.core import scope_closure
+
+    stored = scope_closure.descendants(obj)
+    if user:
+        visible = {}
+        for ct_id, pks in stored.items():
+            model = ContentType.objects.get_for_id(ct_id).model_class()
+            visible[ct_id] = set(_scoped_queryset(model, user).filter(pk__in=pks).values_list('pk', flat=True))
+        stored = scope_closure.reachable(obj, visible)
+
+    seed = {}
+    for ct_id, pks in stored.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        seed.setdefault(model, set()).update(pks)
+    seed.setdefault(obj._meta.model, set()).add(obj.pk)
+    return seed
+
+
+def _traverse_ids(obj, direction, max_depth, allowed_types, excluded_types, user, seed=None):
+    """
+    Column-only traversal: same result as the instance walk for flat scopes,
+    but each depth is answered with `values_list` on the id/FK columns.
+
+    'down' fetches child pks per (parent model, relation) with the parent ids
+    as an `__in` filter. 'up' reads the frontier's FK columns in one query per
+    model, which doubles as the visibility/tenant check for those parents.
+
+    seed: {model: pks} already known to be in scope (from `_closure_seed`).
+    The walk starts from all of them and skips the FK edges between covered
+    models for seeded nodes, since the closure has already followed those.
+
+    Returns:
+        dict of {content_type_id: set(object_ids)}
+    """
+    from Tracker.services.core.scope_closure import is_covered
+
+    visited = {}  # {content_type_id: set(object_ids)}
+    root_model = obj._meta.model
+    frontier = {model: set(pks) for model, pks in seed.items()} if seed else {root_model: {obj.pk}}
+    depth = 0
+
+    while frontier:
+        expand = max_depth is None or depth < max_depth
+        next_frontier = {}
+
+        for model, pks in frontier.items():
+            if not pks:
+                continue
+            seen = visited.setdefault(_get_content_type(model).id, set())
+            pks = pks - seen
+            if not pks:
+                continue
+
+            relations = (
+                _filtered_relations(model, direction, allowed_types, excluded_types)
+                if expand else []
+            )
+
+            if direction == 'down':
+                seen.update(pks)
+                for rel in relations:
+                    parent_ids = pks
+                    if seed and model in seed and is_covered(rel.model) and not rel.m2m:
+                        parent_ids = pks - seed[model]
+                        if not parent_ids:
+                            continue
+                    child_ids = _scoped_queryset(rel.model, user).filter(
+                        **{f'{rel.field_name}__in': parent_ids}
+                    ).values_list('pk', flat=True)
+                    next_frontier.setdefault(rel.model, set()).update(child_ids)
+                continue
+
+            # direction == 'up'
+            attnames = [rel.attname for rel in relations]
+            if depth == 0 and model is root_model:
+                # The root is already in memory and is not permission-checked.
+                rows = [(obj.pk, *(getattr(obj, a, None) for a in attnames))]
+            else:
+                rows = _scoped_queryset(model, user).filter(pk__in=pks).values_list('pk', *attnames)
+            for row in rows:
+                seen.add(row[0])
+                for rel, fk_id in zip(relations, row[1:]):
+                    if fk_id is not None:
+                        next_frontier.setdefault(rel.model, set()).add(fk_id)
+
+        frontier = next_frontier
+        depth += 1
+
+    # Match the instance walk's shape: only types that were actually visited.
+    return {ct_id: ids for ct_id, ids in visited.items() if ids}
+
+
+class _CteUnsupported(Exception):
+    """An edge in the reachable graph can't be expressed as a uuid column join."""
+
+
+def _is_uuid_pk(model):
+    return isinstance(model._meta.pk, UUIDField)
+
+
+def _cte_branch(parent_model, rel, direction):
+    """
+    SQL for one recursive edge, evaluated laterally against a walk row `w`.
+
+    Yields (child content type, child pk) when `w` is a `parent_model` row.
+    Returns (sql, params) with the tenant id left as the last placeholder.
+    """
+    qn = connection.ops.quote_name
+    parent_ct = _get_content_type(parent_model).id
+    child_model = rel.model
+    child_ct = _get_content_type(child_model).id
+    if not (_is_uuid_pk(parent_model) and _is_uuid_pk(child_model)):
+        raise _CteUnsupported(f"{parent_model.__name__} -> {child_model.__name__}")
+
+    child_table = qn(child_model._meta.db_table)
+    child_pk = qn(child_model._meta.pk.column)
+
+    if direction == 'down' and rel.m2m:
+        m2m_field = child_model._meta.get_field(rel.field_name)
+        through = m2m_field.remote_field.through._meta
+        sql = (
+            f"SELECT %s, c.{child_pk} FROM {qn(through.db_table)} t "
+            f"JOIN {child_table} c ON c.{child_pk} = t.{qn(m2m_field.m2m_column_name())} "
+            f"WHERE w.ct = %s AND t.{qn(m2m_field.m2m_reverse_name())} = w.id "
+            f"AND c.tenant_id = %s"
+        )
+    elif direction == 'down':
+        fk = child_model._meta.get_field(rel.field_name)
+        if fk.target_field != parent_model._meta.pk:
+            raise _CteUnsupported(f"{child_model.__name__}.{fk.name} targets a non-pk column")
+        sql = (
+            f"SELECT %s, c.{child_pk} FROM {child_table} c "
+            f"WHERE w.ct = %s AND c.{qn(fk.column)} = w.id AND c.tenant_id = %s"
+        )
+    else:
+        fk = parent_model._meta.get_field(rel.field_name)
+        if fk.target_field != child_model._meta.pk:
+            raise _CteUnsupported(f"{parent_model.__name__}.{fk.name} targets a non-pk column")
+        parent_table = qn(parent_model._meta.db_table)
+        parent_pk = qn(parent_model._meta.pk.column)
+        sql = (
+            f"SELECT %s, c.{child_pk} FROM {parent_table} p "
+            f"JOIN {child_table} c ON c.{child_pk} = p.{qn(fk.column)} "
+            f"WHERE w.ct = %s AND p.{parent_pk} = w.id AND c.tenant_id = %s"
+        )
+    return sql, [child_ct, parent_ct]
+
+
+def _traverse_ids_cte(obj, direction, max_depth, allowed_types, excluded_types):
+    """
+    Single recursive CTE over every edge reachable from `obj`'s model.
+
+    `UNION` (not `UNION ALL`) discards rows already produced, which gives the
+    same visit-once semantics as the breadth-first walk and terminates on
+    cycles. With max_depth the depth column is carried and bounded instead.
+
+    Only used without a user (for_user() filters can't be inlined) and inside
+    a tenant context. Returns None when the graph can't be expressed as uuid
+    joins, so the caller falls back to the column walk.
+    """
+    from Tracker.utils.tenant_context import current_tenant_var
+
+    tenant_id = current_tenant_var.get()
+    root_model = obj._meta.model
+    if tenant_id is None or not _is_uuid_pk(root_model):
+        return None
+
+    # Collect edges between reachable model types.
+    branches, params = [], []
+    models_by_ct = {_get_content_type(root_model).id: root_model}
+    pending, seen_models = [root_model], {root_model}
+    try:
+        while pending:
+            model = pending.pop()
+            for rel in _filtered_relations(model, direction, allowed_types, excluded_types):
+                sql, branch_params = _cte_branch(model, rel, direction)
+                branches.append(sql)
+                params.extend(branch_params + [tenant_id])
+                models_by_ct[_get_content_type(rel.model).id] = rel.model
+                if rel.model not in seen_models:
+                    seen_models.add(rel.model)
+                    pending.append(rel.model)
+    except _CteUnsupported:
+        return None
+
+    root_ct = _get_content_type(root_model).id
+    if not branches or max_depth == 0:
+        return {root_ct: {obj.pk}}
+
+    edges = ' UNION ALL '.join(f'({b})' for b in branches)
+    if max_depth is None:
+        sql = (
+            "WITH RECURSIVE w(ct, id) AS ("
+            "SELECT %s, %s::uuid "
+            f"UNION SELECT e.ct, e.id FROM w CROSS JOIN LATERAL ({edges}) e(ct, id)"
+            ") SELECT ct, id FROM w"
+        )
+        all_params = [root_ct, str(obj.pk)] + params
+    else:
+        sql = (
+            "WITH RECURSIVE w(ct, id, depth) AS ("
+            "SELECT %s, %s::uuid, 0 "
+            f"UNION SELECT e.ct, e.id, w.depth + 1 FROM w CROSS JOIN LATERAL ({edges}) e(ct, id) "
+            "WHERE w.depth < %s"
+            ") SELECT DISTINCT ct, id FROM w"
+        )
+        all_params = [root_ct, str(obj.pk)] + params + [max_depth]
+
+    visited = {}
+    with connection.cursor() as cursor:
+        cursor.execute(sql, all_params)
+        for ct_id, pk in cursor.fetchall():
+            visited.setdefault(ct_id, set()).add(models_by_ct[ct_id]._meta.pk.to_python(pk))
+    return visited
+
+
 def _add_to_structure(structure, parent_obj, child_obj, child_node):
     """Helper to add child to nested structure by finding parent's node."""
     for root, root_node in structure.items():
@@ -333,7 +647,7 @@ def _find_and_add(node, parent_obj, child_obj, child_node):
 
 
 def get_descendants(obj, max_depth=None, include_types=None, exclude_types=None,
-                    preserve_structure=False, user=None):
+                    preserve_structure=False, user=None, strategy='columns'):
     """
     Get all objects below this node in the hierarchy.
 
@@ -344,6 +658,7 @@ def get_descendants(obj, max_depth=None, include_types=None, exclude_types=None,
         exclude_types: List of model classes to exclude
         preserve_structure: If True, return nested dict instead of flat
         user: Optional user for permission filtering via for_user()
+        strategy: 'columns' (default), 'cte', 'instances' or 'closure'
 
     Returns:
         dict of {content_type_id: set(object_ids)} including the root,
@@ -351,11 +666,12 @@ def get_descendants(obj, max_depth=None, include_types=None, exclude_types=None,
     """
     return _traverse(obj, direction='down', max_depth=max_depth,
                      include_types=include_types, exclude_types=exclude_types,
-                     preserve_structure=preserve_structure, user=user)
+                     preserve_structure=preserve_structure, user=user,
+                     strategy=strategy)
 
 
 def get_ancestors(obj, max_depth=None, include_types=None, exclude_types=None,
-                  preserve_structure=False, user=None):
+                  preserve_structure=False, user=None, strategy='columns'):
     """
     Get all objects above this node in the hierarchy.
 
@@ -366,6 +682,7 @@ def get_ancestors(obj, max_depth=None, include_types=None, exclude_types=None,
         exclude_types: List of model classes to exclude
         preserve_structure: If True, return nested dict instead of flat
         user: Optional user for permission filtering via for_user()
+        strategy: 'columns' (default), 'cte', 'instances' or 'closure'
 
     Returns:
         dict of {content_type_id: set(object_ids)} including the object,
@@ -373,7 +690,8 @@ def get_ancestors(obj, max_depth=None, include_types=None, exclude_types=None,
     """
     return _traverse(obj, direction='up', max_depth=max_depth,
                      include_types=include_types, exclude_types=exclude_types,
-                     preserve_structure=preserve_structure, user=user)
+                     preserve_structure=preserve_structure, user=user,
+                     strategy=strategy)
 
 
 def find_in_graph(obj, condition, direction='down', max_depth=None, exclude_types=None,
@@ -402,7 +720,7 @@ def find_in_graph(obj, condition, direction='down', max_depth=None, exclude_type
 
 
 def count_descendants(obj, max_depth=None, include_types=None, exclude_types=None,
-                      user=None):
+                      user=None, strategy='columns'):
     """
     Count objects below this node, grouped by type.
 
@@ -412,12 +730,13 @@ def count_descendants(obj, max_depth=None, include_types=None, exclude_types=Non
         include_types: List of model classes to include
         exclude_types: List of model classes to exclude
         user: Optional user for permission filtering via for_user()
+        strategy: 'columns' (default), 'cte', 'instances' or 'closure'
 
     Returns:
         dict of {model_name: count} e.g. {'parts': 5, 'workorder': 2}
     """
     scope = get_descendants(obj, max_depth=max_depth, include_types=include_types,
-                            exclude_types=exclude_types, user=user)
+                            exclude_types=exclude_types, user=user, strategy=strategy)
     counts = {}
     for ct_id, obj_ids in scope.items():
         ct = ContentType.objects.get_for_id(ct_id)
@@ -590,7 +909,7 @@ def _build_generic_filter(objects_by_type):
 
 
 def related_to(model_class, root_obj, user=None, direction='down',
-               include_types=None, exclude_types=None):
+               include_types=None, exclude_types=None, strategy='columns'):
     """
     Get all instances of model_class related to root_obj's graph.
 
@@ -601,20 +920,40 @@ def related_to(model_class, root_obj, user=None, direction='down',
         direction: 'down' for descendants, 'up' for ancestors
         include_types: Optional list of model classes to include in traversal
         exclude_types: Optional list of model classes to exclude from traversal
+        strategy: 'columns' (default), 'cte', 'instances' or 'closure'
 
     Returns:
         QuerySet of model_class instances related to the graph
     """
+    from Tracker.models import Documents
+
+    if strategy == 'closure' and not user:
+        from Tracker.services.core import scope_closure
+        # With a user (or a wider walk) the closure still seeds
+        # get_descendants below.
+        if scope_closure.answers(root_obj, direction, include_types, exclude_types):
+            # One indexed EXISTS instead of materialized id lists.
+            q_filter = scope_closure.generic_filter(root_obj)
+            if model_class is Documents:
+                from django.db.models import Q
+                from Tracker.models import DocumentLink
+                # tenant-safe: `.objects` auto-scopes to the current tenant.
+                linked = DocumentLink.objects.filter(archived=False).filter(q_filter)
+                q_filter = q_filter | Q(id__in=linked.values('document_id'))
+            return model_class.objects.filter(q_filter)
+
     # Pass user to traversal for secure graph walking
     if direction == 'down':
         objects_by_type = get_descendants(
             root_obj, user=user,
-            include_types=include_types, exclude_types=exclude_types
+            include_types=include_types, exclude_types=exclude_types,
+            strategy=strategy
         )
     else:
         objects_by_type = get_ancestors(
             root_obj, user=user,
-            include_types=include_types, exclude_types=exclude_types
+            include_types=include_types, exclude_types=exclude_types,
+            strategy=strategy
         )
 
     q_filter = _build_generic_filter(objects_by_type)
@@ -625,7 +964,6 @@ def related_to(model_class, root_obj, user=None, direction='down',
     # by the documents list endpoint and `documents_attached_to`. DocumentLink
     # shares the (content_type_id, object_id) shape, so the same generic filter
     # selects the relevant links.
-    from Tracker.models import Documents
     if model_class is Documents and objects_by_type:
         from django.db.models import Q
         from Tracker.models import DocumentLink
@@ -7,13 +7,23 @@ data from CSV/Excel files with foreign key resolution and validation.
 Supports automatic model introspection for zero-config usage.
 """
 
-from typing import Any, Dict, List, Optional, Tuple, Type
+import copy
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Type
 from uuid import UUID
 
-from django.db import models, transaction
-from django.db.models import Q
+from auditlog.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldError, ValidationError
+from django.db import DatabaseError, models, transaction
+from django.db.models import Q, TextField
+from django.db.models.functions import Cast, Upper
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 
+from Tracker.models.core import SecureModel
+
 from Tracker.services.csv_utils import (
     ImportResult,
     parse_date,
@@ -43,6 +53,283 @@ class ImportMode:
     ]
 
 
+# Rows written per bulk_create / bulk_update round trip.
+IMPORT_BATCH_SIZE = 500
+
+# Values per `__in` query when priming lookups.
+LOOKUP_CHUNK_SIZE = 5000
+
+
+def _lookup_key(field: str, value: Any) -> Any:
+    """
+    Normalize a CSV value the way the per-row lookup on `field` compares it.
+
+    'id' matches UUIDs, 'pk' integers, anything else case-insensitively.
+    Returns None when the value can never match the field.
+    """
+    if field == 'id':
+        try:
+            return UUID(str(value))
+        except (ValueError, AttributeError):
+            return None
+    if field == 'pk':
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            return None
+    return str(value).upper()
+
+
+class ImportLookupCache:
+    """
+    Lookup results shared by every row of one import.
+
+    `prime` resolves all distinct values of a column with one query per
+    lookup field, so per-row FK resolution and existing-record matching
+    become dictionary reads. A value that was never primed costs a single
+    query the first time and is remembered after that.
+
+    Where several records match, the first in the model's default ordering
+    wins, as `.first()` did in the per-row lookups.
+    """
+
+    def __init__(self, tenant=None):
+        self.tenant = tenant
+        self._found = {}    # (model, field) -> {key: instance}
+        self._known = {}    # (model, field) -> keys already looked up
+        self._filed = {}    # (model, pk) -> {(field, key)} the record is filed under
+
+    def queryset(self, model: Type[models.Model]) -> models.QuerySet:
+        qs = model.objects.all()  # tenant-safe: filtered on the next line when the model is tenant-scoped
+        if self.tenant and hasattr(model, 'tenant'):
+            qs = qs.filter(tenant=self.tenant)
+        return qs
+
+    def prime(self, model: Type[models.Model], fields: List[str], values: Iterable[Any]):
+        """Resolve `values` against `fields` in order, one query per field."""
+        pending = {
+            v for v in values
+            if v is not None and v != '' and not isinstance(v, models.Model)
+        }
+        for field in fields:
+            if not pending:
+                break
+            keys = {v: _lookup_key(field, v) for v in pending}
+            self._fetch(model, field, {k for k in keys.values() if k is not None})
+            found = self._found[(model, field)]
+            pending = {v for v, k in keys.items() if k not in found}
+
+    def get(self, model: Type[models.Model], field: str, value: Any) -> Optional[models.Model]:
+        key = _lookup_key(field, value)
+        if key is None:
+            return None
+        self._fetch(model, field, {key})
+        return self._found[(model, field)].get(key)
+
+    def remember(self, instance: models.Model, fields: List[str]):
+        """File `instance` under its current `fields` values, replacing older entries."""
+        model = type(instance)
+        self.forget(instance, fields)
+        filed = self._filed.setdefault((model, instance.pk), set())
+        for field, key in self._current_keys(instance, fields):
+            self._found.setdefault((model, field), {})[key] = instance
+            self._known.setdefault((model, field), set()).add(key)
+            filed.add((field, key))
+
+    def forget(self, instance: models.Model, fields: List[str]):
+        """Drop every entry for `instance` so the next lookup reads the database."""
+        model = type(instance)
+        stale = self._filed.pop((model, instance.pk), set())
+        for field, key in stale | self._current_keys(instance, fields):
+            self._found.get((model, field), {}).pop(key, None)
+            self._known.get((model, field), set()).discard(key)
+
+    @staticmethod
+    def _current_keys(instance, fields):
+        keys = set()
+        for field in fields:
+            value = instance.pk if field == 'pk' else getattr(instance, field, None)
+            if value is None or value == '':
+                continue
+            key = _lookup_key(field, value)
+            if key is not None:
+                keys.add((field, key))
+        return keys
+
+    def _fetch(self, model, field, keys):
+        found = self._found.setdefault((model, field), {})
+        known = self._known.setdefault((model, field), set())
+        keys = [k for k in keys if k not in known]
+        if not keys:
+            return
+        known.update(keys)
+
+        qs = self.queryset(model).order_by(*(model._meta.ordering or ['pk']))
+        try:
+            for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+                chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+                if field in ('id', 'pk'):
+                    matches = ((getattr(obj, field), obj) for obj in qs.filter(**{f'{field}__in': chunk}))
+                else:
+                    annotated = qs.annotate(_import_key=Upper(Cast(field, TextField())))
+                    matches = ((obj._import_key, obj) for obj in annotated.filter(_import_key__in=chunk))
+                for key, obj in matches:
+                    if key not in found:
+                        found[key] = obj
+                        self._filed.setdefault((model, obj.pk), set()).add((field, key))
+        except (FieldError, ValidationError, ValueError, TypeError):
+            # Not a usable lookup on this model; every key stays a miss.
+            return
+
+
+def model_supports_bulk_write(model: Type[models.Model]) -> bool:
+    """
+    True if import rows for `model` can go through bulk_create/bulk_update.
+
+    Bulk writes skip save() and the save signals, so they are only used when
+    neither does anything the bulk path doesn't reproduce: SecureModel's
+    tenant stamping (SecureQuerySet.bulk_create does the same) and the
+    auditlog entries (written by BulkImportWriter).
+    """
+    for klass in model.__mro__:
+        if klass in (SecureModel, models.Model):
+            break
+        if 'save' in vars(klass):
+            return False
+    for signal in (pre_save, post_save):
+        sync_receivers, async_receivers = signal._live_receivers(model)
+        if any(r.__module__ != 'auditlog.receivers' for r in (*sync_receivers, *async_receivers)):
+            return False
+    return True
+
+
+class BulkImportWriter:
+    """
+    Buffers an import's creates and updates for one model and writes them
+    with bulk_create / bulk_update, together with the audit entries the
+    save signals would have produced.
+
+    If a batch hits a database error it is rolled back and replayed row by
+    row with save(), so the failure is reported against the rows that
+    caused it.
+    """
+
+    def __init__(self, model: Type[models.Model], user=None, batch_size: int = IMPORT_BATCH_SIZE):
+        self.model = model
+        self.user = user
+        self.batch_size = batch_size
+        self._creates = {}      # id(instance) -> instance
+        self._updates = {}      # id(instance) -> (instance, state before the update, field names)
+
+    def __len__(self):
+        return len(self._creates) + len(self._updates)
+
+    def create(self, instance: models.Model):
+        self._creates[id(instance)] = instance
+
+    def update(self, instance: models.Model, before: models.Model, fields: Iterable[str]):
+        if id(instance) in self._creates:
+            return      # not written yet; the insert carries the new values
+        if id(instance) in self._updates:
+            self._updates[id(instance)][2].update(fields)
+        else:
+            self._updates[id(instance)] = (instance, before, set(fields))
+
+    def flush(self) -> Dict[int, str]:
+        """Write everything buffered. Returns {id(instance): error} for rows that failed."""
+        creates = list(self._creates.values())
+        updates = list(self._updates.values())
+        self._creates.clear()
+        self._updates.clear()
+        if not creates and not updates:
+            return {}
+
+        now = timezone.now()
+        update_fields = set()
+        for instance, _, fields in updates:
+            update_fields |= fields
+        for field in self.model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) and updates:
+                for instance, _, _ in updates:
+                    field.pre_save(instance, add=False)
+                update_fields.add(field.name)
+        concrete = {f.name for f in self.model._meta.concrete_fields if not f.primary_key}
+        update_fields = sorted(update_fields & concrete)
+
+        try:
+            with transaction.atomic():
+                if creates:
+                    # tenant-safe: SecureQuerySet.bulk_create stamps the current tenant
+                    self.model.objects.bulk_create(creates, batch_size=self.batch_size)
+                if updates and update_fields:
+                    # tenant-safe: instances were loaded through the tenant-filtered lookups
+                    self.model.objects.bulk_update(
+                        [u[0] for u in updates], update_fields, batch_size=self.batch_size,
+                    )
+                self._write_audit_entries(creates, updates, now)
+            return {}
+        except DatabaseError:
+            return self._replay(creates, [u[0] for u in updates])
+
+    def _replay(self, creates, updates):
+        failed = {}
+        for instance in creates:
+            instance._state.adding = True
+            instance._state.db = None
+        for instance in creates + updates:
+            try:
+                with transaction.atomic():
+                    instance.save(force_insert=instance._state.adding)
+            except DatabaseError as e:
+                failed[id(instance)] = str(e)
+        return failed
+
+    def _write_audit_entries(self, creates, updates, timestamp):
+        from auditlog.cid import get_cid
+        from auditlog.context import auditlog_disabled
+        from auditlog.diff import model_instance_diff
+        from auditlog.registry import auditlog
+
+        if auditlog_disabled.get() or not auditlog.contains(self.model):
+            return
+
+        content_type = ContentType.objects.get_for_model(self.model)
+        cid = get_cid()
+        changes = [(LogEntry.Action.CREATE, None, instance) for instance in creates]
+        changes += [(LogEntry.Action.UPDATE, before, instance) for instance, before, _ in updates]
+
+        entries = []
+        for action, old, new in changes:
+            diff = model_instance_diff(old, new)
+            if not diff:
+                continue
+            get_additional_data = getattr(new, 'get_additional_data', None)
+            entries.append(LogEntry(
+                content_type=content_type,
+                object_pk=str(new.pk),
+                object_id=new.pk if isinstance(new.pk, int) else None,
+                object_repr=smart_str(new),
+                serialized_data=LogEntry.objects._get_serialized_data_or_none(new),
+                additional_data=get_additional_data() if callable(get_additional_data) else None,
+                action=action,
+                changes=diff,
+                actor=self.user,
+                actor_email=getattr(self.user, 'email', None) or None,
+                cid=cid,
+                timestamp=timestamp,
+            ))
+        LogEntry.objects.bulk_create(entries)
+
+
+class RowOutcome(NamedTuple):
+    """Result of importing one row: the instance on success, the errors otherwise."""
+    row: int
+    instance: Optional[models.Model]
+    created: bool
+    warnings: List[str]
+    errors: Any = None
+
+
 class BaseCSVImportSerializer(serializers.Serializer):
     """
     Base serializer for CSV imports with FK resolution and upsert support.
@@ -75,13 +362,100 @@ class BaseCSVImportSerializer(serializers.Serializer):
         fk_fields = {}
         required_fields = []
 
-    def __init__(self, *args, tenant=None, user=None, mode=ImportMode.UPSERT, **kwargs):
+    def __init__(self, *args, tenant=None, user=None, mode=ImportMode.UPSERT, lookups=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.tenant = tenant
         self.user = user
         self.mode = mode
+        self.lookups = lookups
+        self.writer = None
         self.warnings = []
 
+    @classmethod
+    def import_rows(
+        cls,
+        rows: List[Dict[str, Any]],
+        *,
+        tenant=None,
+        user=None,
+        mode: str = ImportMode.UPSERT,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ) -> Iterator[RowOutcome]:
+        """
+        Import `rows` in order, yielding one RowOutcome per row.
+
+        FK columns and lookup fields are resolved for the whole file up front
+        (see ImportLookupCache). When the serializer and model allow it (see
+        supports_bulk_write) rows are written in batches of `batch_size`, and
+        a batch's outcomes are yielded once it has been written; otherwise
+        each row is saved as it is imported.
+
+        Callers own the transaction.
+        """
+        serializer = cls(tenant=tenant, user=user, mode=mode, lookups=ImportLookupCache(tenant))
+        serializer.prime_lookups(rows)
+        if serializer.supports_bulk_write():
+            serializer.writer = BulkImportWriter(serializer.Meta.model, user=user, batch_size=batch_size)
+
+        pending = []
+        for row_num, row in enumerate(rows, start=1):
+            try:
+                instance, created, warnings = serializer.import_row(row)
+                outcome = RowOutcome(row_num, instance, created, warnings)
+            except Exception as e:
+                errors = e.detail if hasattr(e, 'detail') else str(e)
+                outcome = RowOutcome(row_num, None, False, [], errors)
+
+            if serializer.writer is None:
+                yield outcome
+                continue
+            pending.append(outcome)
+            if len(serializer.writer) >= batch_size:
+                yield from cls._flush(serializer.writer, pending)
+                pending = []
+
+        if serializer.writer is not None:
+            yield from cls._flush(serializer.writer, pending)
+
+    @staticmethod
+    def _flush(writer: BulkImportWriter, outcomes: List[RowOutcome]) -> Iterator[RowOutcome]:
+        failed = writer.flush()
+        for outcome in outcomes:
+            error = failed.get(id(outcome.instance)) if outcome.instance is not None else None
+            if error:
+                yield RowOutcome(outcome.row, None, False, [], error)
+            else:
+                yield outcome
+
+    def prime_lookups(self, rows: List[Dict[str, Any]]):
+        """Bulk-resolve every FK column and lookup field value in `rows`."""
+        if self.lookups is None:
+            return
+        meta = getattr(self, 'Meta', None)
+        model = getattr(meta, 'model', None)
+
+        for field_name, (fk_model, fk_lookups) in getattr(meta, 'fk_fields', {}).items():
+            self.lookups.prime(fk_model, fk_lookups, (row.get(field_name) for row in rows))
+        if model:
+            for field in getattr(meta, 'lookup_fields', ['id']):
+                self.lookups.prime(model, [field], (row.get(field) for row in rows))
+
+    def supports_bulk_write(self) -> bool:
+        """
+        True if created/updated rows may be buffered for BulkImportWriter.
+
+        Requires the stock create_instance/update_instance and a model whose
+        save has no side effects beyond tenant stamping and auditing.
+        """
+        model = getattr(getattr(self, 'Meta', None), 'model', None)
+        cls = type(self)
+        return (
+            model is not None
+            and cls.create_instance is BaseCSVImportSerializer.create_instance
+            and cls.update_instance is BaseCSVImportSerializer.update_instance
+            and model_supports_bulk_write(model)
+        )
+
     def resolve_fk(
         self,
         field_name: str,
@@ -111,6 +485,13 @@ class BaseCSVImportSerializer(serializers.Serializer):
         if isinstance(value, model):
             return value
 
+        if self.lookups is not None:
+            for lookup_field in lookup_fields:
+                obj = self.lookups.get(model, lookup_field, value)
+                if obj is not None:
+                    return obj
+            return None
+
         # Build queryset with tenant filter if applicable
         qs = model.objects.all()
         if self.tenant and hasattr(model, 'tenant'):
@@ -180,6 +561,16 @@ class BaseCSVImportSerializer(serializers.Serializer):
         if not model:
             return None
 
+        if self.lookups is not None:
+            for field in lookup_fields:
+                value = data.get(field)
+                if value is None or value == '':
+                    continue
+                obj = self.lookups.get(model, field, value)
+                if obj is not None:
+                    return obj
+            return None
+
         qs = model.objects.all()
         if self.tenant and hasattr(model, 'tenant'):
             qs = qs.filter(tenant=self.tenant)
@@ -300,18 +691,29 @@ class BaseCSVImportSerializer(serializers.Serializer):
         if self.user and hasattr(model, 'created_by'):
             data['created_by'] = self.user
 
+        if self.writer is not None:
+            instance = model(**data)
+            self.writer.create(instance)
+            return instance
+
         return model.objects.create(**data)
 
     def update_instance(self, instance: models.Model, data: Dict[str, Any]) -> models.Model:
         """Update an existing model instance."""
+        before = copy.copy(instance) if self.writer is not None else None
         for field_name, value in data.items():
             setattr(instance, field_name, value)
 
         # Update modified_by if applicable
+        fields = list(data)
         if self.user and hasattr(instance, 'modified_by'):
             instance.modified_by = self.user
+            fields.append('modified_by')
 
-        instance.save()
+        if self.writer is not None:
+            self.writer.update(instance, before, fields)
+        else:
+            instance.save()
         return instance
 
     def import_row(self, row_data: Dict[str, Any]) -> Tuple[Optional[models.Model], bool, List[str]]:
@@ -346,6 +748,7 @@ class BaseCSVImportSerializer(serializers.Serializer):
                     f"Record already exists (matched by lookup fields)"
                 )
             instance = self.create_instance(transformed)
+            self._refile(instance)
             return instance, True, self.warnings
 
         elif self.mode == ImportMode.UPDATE:
@@ -354,15 +757,34 @@ class BaseCSVImportSerializer(serializers.Serializer):
                     f"Record not found (no match for lookup fields)"
                 )
             instance = self.update_instance(existing, transformed)
+            self._refile(instance)
             return instance, False, self.warnings
 
         else:  # UPSERT
             if existing:
                 instance = self.update_instance(existing, transformed)
-                return instance, False, self.warnings
+                created = False
             else:
                 instance = self.create_instance(transformed)
-                return instance, True, self.warnings
+                created = True
+            self._refile(instance)
+            return instance, created, self.warnings
+
+    def _refile(self, instance: models.Model):
+        """
+        Keep the lookup cache in step with a row just written.
+
+        Buffered rows are not in the database yet, so later rows must match
+        them from the cache; rows saved one by one are re-read instead, since
+        save() side effects may have changed them.
+        """
+        if self.lookups is None:
+            return
+        lookup_fields = getattr(self.Meta, 'lookup_fields', ['id'])
+        if self.writer is not None:
+            self.lookups.remember(instance, lookup_fields)
+        else:
+            self.lookups.forget(instance, lookup_fields)
 
 
 # ===== Model-specific CSV Import Serializers =====
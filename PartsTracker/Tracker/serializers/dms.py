@@ -314,7 +314,7 @@ class ThreeDModelSerializer(SecureModelMixin):
         'processing_status', 'processing_error', 'processed_at',
         'face_count', 'vertex_count', 'final_size_bytes',
         'original_filename', 'original_format', 'original_size_bytes',
-        'file_type',
+        'file_type', 'lod_levels',
     })
     part_type_display = serializers.CharField(source='part_type.__str__', read_only=True)
     step_display = serializers.CharField(source='step.__str__', read_only=True)
@@ -333,6 +333,7 @@ class ThreeDModelSerializer(SecureModelMixin):
     # Processing status fields
     is_ready = serializers.SerializerMethodField()
     processing_metrics = serializers.SerializerMethodField()
+    lod_levels = serializers.SerializerMethodField()
 
     def to_internal_value(self, data):
         """Handle FormData sending 'null' as string for optional ForeignKey fields"""
@@ -356,7 +357,7 @@ class ThreeDModelSerializer(SecureModelMixin):
             'uploaded_at', 'file_type', 'annotation_count',
             # Processing status
             'processing_status', 'processing_error', 'processed_at',
-            'is_ready', 'processing_metrics',
+            'is_ready', 'processing_metrics', 'lod_levels',
             # Original file info
             'original_filename', 'original_format', 'original_size_bytes',
             # Timestamps
@@ -396,6 +397,21 @@ class ThreeDModelSerializer(SecureModelMixin):
             'compression_ratio': obj.compression_ratio,
         }
 
+    @extend_schema_field(serializers.ListField(child=serializers.DictField()))
+    def get_lod_levels(self, obj) -> list:
+        """Levels of detail, coarsest first; fetch each from the `lod` action by index."""
+        if obj.processing_status != 'COMPLETED':
+            return []
+        return [
+            {
+                'level': index,
+                'face_count': level['face_count'],
+                'vertex_count': level['vertex_count'],
+                'size_bytes': level['size_bytes'],
+            }
+            for index, level in enumerate(obj.get_lod_levels())
+        ]
+
     def update(self, instance, validated_data):
         """Route content edits through `create_new_version`; let
         archive and operational-state updates through as a plain save."""
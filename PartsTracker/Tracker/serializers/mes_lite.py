@@ -1072,6 +1072,8 @@ class StepExecutionListSerializer(SecureModelMixin):
     @extend_schema_field(serializers.IntegerField(allow_null=True))
     def get_step_order(self, obj):
         """Get step order from ProcessStep using part's work_order process context."""
+        if hasattr(obj, 'process_step_order'):
+            return obj.process_step_order
         if obj.step and obj.part and obj.part.work_order and obj.part.work_order.process:
             ps = ProcessStep.objects.filter(
                 process=obj.part.work_order.process,
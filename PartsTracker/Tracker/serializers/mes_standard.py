@@ -137,7 +137,7 @@ class ScheduleSlotSerializer(SecureModelMixin):
         model = ScheduleSlot
         fields = (
             'id', 'work_center', 'work_center_name', 'shift', 'shift_name',
-            'work_order', 'work_order_erp_id', 'scheduled_date',
+            'work_order', 'work_order_erp_id', 'step', 'scheduled_date',
             'scheduled_start', 'scheduled_end', 'actual_start', 'actual_end',
             'status', 'notes',
             'created_at', 'updated_at', 'archived'
@@ -2,7 +2,8 @@
 
 Ranked, aggregate view built for the operator home's UP NEXT / THEN tiles and
 the shop's queue page. Not tied to a model — the row is computed by
-WorkQueueViewSet from the StepExecution grain.
+WorkQueueViewSet from the StepExecution grain, or read from the WorkQueueEntry
+projection when it is enabled.
 """
 from rest_framework import serializers
 
@@ -10,6 +11,9 @@ from rest_framework import serializers
 class WorkQueueRowSerializer(serializers.Serializer):
     """One ready-or-blocked row on the floor. All fields are read-only projections."""
 
+    # Stable row identity (work order, step, part type); the stream's diffs
+    # refer to rows by it.
+    key = serializers.CharField()
     work_order = serializers.UUIDField()
     work_order_erp_id = serializers.CharField(allow_null=True)
     step = serializers.UUIDField()
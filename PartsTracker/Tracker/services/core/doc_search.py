@@ -0,0 +1,212 @@
+"""
+Search over DocChunk: nearest-neighbour, keyword, and hybrid.
+
+Every entry point takes `chunks`, a DocChunk queryset already narrowed by
+`DocChunk.objects.for_user(user)` (plus any doc filter). That scoping lands
+in each leg's WHERE clause, so it applies before the LIMIT: the top k are
+the top k the user can see.
+
+Vector leg:
+  * `ORDER BY embedding <=> q LIMIT n` is served by the HNSW index on
+    DocChunk.embedding.
+  * pgvector filters the index's candidates after the fact. A user who can
+    see only a small share of the chunks could therefore get fewer than n
+    rows back.
+  * When the visible set is at most EXACT_SEARCH_MAX_CHUNKS rows, the leg
+    orders by an expression the index can't serve. Postgres then ranks
+    those rows exactly, which is cheap at that size.
+  * For larger visible sets, `hnsw.ef_search` is raised to the candidate
+    count scaled by indexed / visible chunks, so about n candidates survive
+    the filter however small the user's share is. The indexed count is the
+    planner's estimate; the visible count is cached per visible set for
+    VISIBLE_COUNT_TTL seconds, so a full count runs at most once per TTL.
+  * When that would pass HNSW_EF_SEARCH_MAX, the leg ranks exactly too.
+
+Keyword leg:
+  * Uses the stored, trigger-maintained `search_vector` column with its GIN
+    index. Queries use the same 'english' configuration as the trigger.
+
+Hybrid:
+  * Both legs are built by the ORM and fused by reciprocal rank in one SQL
+    statement: score = sum over legs of 1 / (RRF_K + rank).
+  * A chunk found by both legs outranks one found by only one.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from pgvector.django import CosineDistance
+
+from Tracker.utils.tenant_context import get_current_tenant_id
+
+logger = logging.getLogger(__name__)
+
+# Rank offset from the original RRF paper; damps the head of each list.
+RRF_K = 60
+# Rows each hybrid leg contributes to the fusion.
+HYBRID_CANDIDATES = 50
+# Visible sets up to this size are ranked exactly instead of via HNSW.
+EXACT_SEARCH_MAX_CHUNKS = 20_000
+# pgvector's upper bound for hnsw.ef_search.
+HNSW_EF_SEARCH_MAX = 1000
+# How long a visible-chunk count is reused. ef_search only needs the ratio of
+# indexed to visible chunks roughly right.
+VISIBLE_COUNT_TTL = 600
+
+
+def vector_search(chunks, embedding, *, limit, threshold=None) -> list:
+    """Up to `limit` chunks nearest to `embedding`, closest first.
+
+    Each chunk carries `distance` (cosine distance) and `similarity`
+    (1 - distance). `threshold` drops chunks less similar than it.
+    """
+    with transaction.atomic():
+        rows = list(_vector_leg(chunks, embedding, limit, threshold).select_related('doc'))
+    for row in rows:
+        row.similarity = 1 - row.distance
+    return rows
+
+
+def keyword_search(chunks, query, *, limit) -> list:
+    """Up to `limit` chunks matching `query`, best `rank` first."""
+    return list(_keyword_leg(chunks, query, limit).select_related('doc'))
+
+
+def hybrid_search(chunks, *, query='', embedding=None, limit, threshold=None) -> list:
+    """Reciprocal-rank fusion of the vector and keyword legs.
+
+    Returns up to `limit` chunks, best first. Each carries `score` (the RRF
+    score) and `vector_rank` / `keyword_rank` (1-based, None when that leg
+    didn't return it).
+    """
+    depth = max(limit, HYBRID_CANDIDATES)
+    legs, params = [], []
+    with transaction.atomic():
+        if embedding is not None:
+            sql, leg_params = (
+                _vector_leg(chunks, embedding, depth, threshold)
+                .values_list('id', 'distance').query.sql_with_params()
+            )
+            legs.append(
+                f"SELECT id, 1.0 / (%s + r) AS s, r AS vector_rank, NULL::bigint AS keyword_rank "
+                f"FROM (SELECT v.id, row_number() OVER (ORDER BY v.distance) AS r FROM ({sql}) v) ranked"
+            )
+            params += [RRF_K, *leg_params]
+        if query:
+            sql, leg_params = (
+                _keyword_leg(chunks, query, depth)
+                .values_list('id', 'rank').query.sql_with_params()
+            )
+            legs.append(
+                f"SELECT id, 1.0 / (%s + r) AS s, NULL::bigint AS vector_rank, r AS keyword_rank "
+                f"FROM (SELECT k.id, row_number() OVER (ORDER BY k.rank DESC) AS r FROM ({sql}) k) ranked"
+            )
+            params += [RRF_K, *leg_params]
+        if not legs:
+            return []
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id, SUM(s) AS score, MIN(vector_rank), MIN(keyword_rank) "
+                f"FROM ({' UNION ALL '.join(legs)}) fused "
+                f"GROUP BY id ORDER BY score DESC, id LIMIT %s",
+                [*params, limit],
+            )
+            fused = cursor.fetchall()
+
+    by_id = {c.id: c for c in chunks.model.objects.filter(id__in=[r[0] for r in fused]).select_related('doc')}
+    results = []
+    for chunk_id, score, vector_rank, keyword_rank in fused:
+        chunk = by_id[chunk_id]
+        chunk.score = float(score)
+        chunk.vector_rank = vector_rank
+        chunk.keyword_rank = keyword_rank
+        results.append(chunk)
+    return results
+
+
+def _vector_leg(chunks, embedding, n, threshold=None):
+    """The n nearest visible chunks, annotated with `distance`.
+
+    Must be evaluated inside the caller's transaction; the ef_search
+    setting is transaction-local.
+    """
+    ef_search = None if _visible_count_at_most(chunks, EXACT_SEARCH_MAX_CHUNKS) else _ef_search(chunks, n)
+    distance = CosineDistance('embedding', embedding)
+    chunks = chunks.annotate(distance=distance)
+    if threshold is not None:
+        chunks = chunks.filter(distance__lte=1 - threshold)
+
+    if ef_search is None:
+        # `+ 0` hides the operator from the planner: rank the visible rows
+        # exactly rather than post-filter an index scan.
+        return chunks.order_by(F('distance') + 0)[:n]
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('hnsw.ef_search', %s, true)", [str(ef_search)])
+    return chunks.order_by(distance)[:n]
+
+
+def _keyword_leg(chunks, query, n):
+    search_query = SearchQuery(query, config='english')
+    return (
+        chunks.filter(search_vector=search_query)
+        .annotate(rank=SearchRank(F('search_vector'), search_query))
+        .order_by('-rank', 'id')[:n]
+    )
+
+
+def _visible_count_at_most(chunks, limit) -> bool:
+    return chunks.values('pk')[:limit + 1].count() <= limit
+
+
+def _ef_search(chunks, n):
+    """HNSW candidate count that leaves ~n visible rows after the filter.
+
+    None when the visible share is too small for HNSW_EF_SEARCH_MAX to
+    reach n; the leg then ranks the visible rows exactly.
+    """
+    visible = _visible_chunks(chunks)
+    indexed = max(_indexed_chunks(chunks.model), visible)
+    ef_search = math.ceil(max(n * 4, 40) * indexed / max(visible, 1))
+    return ef_search if ef_search <= HNSW_EF_SEARCH_MAX else None
+
+
+def _visible_chunks(chunks) -> int:
+    """Rows in `chunks`, counted once per VISIBLE_COUNT_TTL per visible set.
+
+    The key is the tenant and the scoped query's SQL, so two users with the
+    same visibility share a count.
+    """
+    sql, params = chunks.values('pk').query.sql_with_params()
+    digest = hashlib.sha256(f'{get_current_tenant_id()}:{sql}:{params!r}'.encode()).hexdigest()
+    key = f'doc_search:visible:{digest}'
+    try:
+        visible = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Visible chunk count cache read failed: {e}")
+        return chunks.count()
+    if visible is None:
+        visible = chunks.count()
+        try:
+            cache.set(key, visible, timeout=VISIBLE_COUNT_TTL)
+        except Exception as e:
+            logger.warning(f"Visible chunk count cache write failed: {e}")
+    return visible
+
+
+def _indexed_chunks(model) -> int:
+    """Rows under the HNSW index, from the planner's estimate (no table scan)."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    if row and row[0] > 0:
+        return row[0]
+    # Never analyzed: count instead.
+    return model._base_manager.count()
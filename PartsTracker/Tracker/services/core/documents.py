@@ -17,6 +17,8 @@ from datetime import date
 
 from django.utils import timezone
 
+logger = logging.getLogger(__name__)
+
 
 # =========================================================================
 # Release / lifecycle transitions
@@ -378,12 +380,18 @@ def embed_document_async(document):
 def embed_document_inline(document) -> bool:
     """Synchronously embed a document's text content.
 
+    Chunks are matched to the document's existing DocChunk rows by content
+    hash: unchanged chunks keep their rows and vectors, removed ones are
+    deleted, and only new text is embedded (through the tenant's
+    EmbeddingCache, so text seen in an earlier version or another of the
+    tenant's documents is not sent to the model again).
+
     Returns True if chunks were embedded, False if skipped.
     Prefer `embed_document_async` to avoid blocking requests.
     """
     from django.conf import settings
     from django.db import transaction
-    from Tracker.ai_embed import embed_texts, chunk_text
+    from Tracker.ai_embed import chunk_text, embed_texts_cached, text_hash
     from Tracker.models.dms import DocChunk
 
     if not settings.AI_EMBED_ENABLED:
@@ -406,25 +414,48 @@ def embed_document_inline(document) -> bool:
     if not chunks:
         return False
 
-    vecs = embed_texts(chunks)
-    assert len(vecs[0]) == settings.AI_EMBED_DIM
-
+    hashes = [text_hash(t) for t in chunks]
+
+    # Existing rows by hash; a chunk repeated within the document has one
+    # row per occurrence.
+    existing: dict[str, list] = {}
+    for row in DocChunk.objects.filter(doc=document).only('id', 'content_hash', 'span_meta'):
+        existing.setdefault(row.content_hash, []).append(row)
+
+    kept, moved, new = [], [], []
+    for i, (t, h) in enumerate(zip(chunks, hashes)):
+        if existing.get(h):
+            row = existing[h].pop()
+            kept.append(row.id)
+            if row.span_meta != {"i": i}:
+                row.span_meta = {"i": i}
+                moved.append(row)
+        else:
+            new.append((i, t, h))
+
+    vecs = embed_texts_cached([t for _, t, _ in new], document.tenant_id)
     rows = [
         DocChunk(
             doc=document,
             preview_text=t[:300],
             full_text=t,
             span_meta={"i": i},
+            content_hash=h,
             embedding=v,
         )
-        for i, (t, v) in enumerate(zip(chunks, vecs))
+        for (i, t, h), v in zip(new, vecs)
     ]
     with transaction.atomic():
-        DocChunk.objects.filter(doc=document).delete()
+        DocChunk.objects.filter(doc=document).exclude(id__in=kept).delete()
+        DocChunk.objects.bulk_update(moved, ["span_meta"], batch_size=50)
         DocChunk.objects.bulk_create(rows, batch_size=50)
         document.ai_readable = True
         document.save(update_fields=["ai_readable"])
 
+    logger.info(
+        "embed_document_inline: doc=%s chunks=%d reused=%d embedded=%d",
+        document.id, len(chunks), len(kept), len(rows),
+    )
     return True
 
 
@@ -4,6 +4,7 @@ Public entry points:
     register_event(event_type)              — registry.py
     emit(event_code, tenant, payload, ...)  — emit.py
     compile_condition(source)               — cel.py
+    compiled_rule_condition(rule)           — cel.py (cached per rule version)
     validate_against_event(source, code)    — cel.py
     evaluate(program, payload, owner_user)  — cel.py
 """
@@ -12,6 +13,7 @@ from .emit import emit, notification_event
 from .cel import (
     CelValidationError,
     compile_condition,
+    compiled_rule_condition,
     evaluate,
     validate_against_event,
 )
@@ -25,6 +27,7 @@ __all__ = [
     'notification_event',
     'CelValidationError',
     'compile_condition',
+    'compiled_rule_condition',
     'evaluate',
     'validate_against_event',
 ]
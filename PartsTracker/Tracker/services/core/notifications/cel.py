@@ -27,6 +27,7 @@ import difflib
 import logging
 import re
 from dataclasses import fields, is_dataclass
+from functools import lru_cache
 from typing import Any
 
 import celpy
@@ -79,6 +80,21 @@ def compile_condition(source: str):
     return _ENV.program(ast)
 
 
+def compiled_rule_condition(rule):
+    """Compiled program for `rule.conditions_source`, cached per process.
+
+    Keyed by `(rule.id, rule.updated_at)`, so an edited rule recompiles on
+    its next event and the stale program ages out of the LRU. Raises like
+    `compile_condition`; failures are not cached.
+    """
+    return _compile_cached(rule.id, rule.updated_at, rule.conditions_source)
+
+
+@lru_cache(maxsize=1024)
+def _compile_cached(rule_id, updated_at, source: str):
+    return compile_condition(source)
+
+
 def validate_against_event(source: str, event_code: str) -> None:
     """Validate a CEL expression against an event's payload schema.
 
@@ -13,6 +13,9 @@ Phase 2 scope:
       as their events ship)
     - No unsubscribe header in Phase 2 — added in Phase 4 alongside the
       signed-token unsubscribe page
+
+`build_message` / `build_digest` are also used by the batched sender
+(`notifications/email_batch.py`), which sends many rows over one connection.
 """
 from __future__ import annotations
 
@@ -21,6 +24,7 @@ from typing import TYPE_CHECKING
 
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
+from django.utils.html import escape
 
 if TYPE_CHECKING:
     from Tracker.models import NotificationOutbox
@@ -28,6 +32,15 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+def branding_from_address(branding) -> str:
+    """From-address for a tenant: branding display name + DEFAULT_FROM_EMAIL."""
+    from_name = (branding.email_from_name if branding else None) or 'UQMES'
+    from_email = settings.DEFAULT_FROM_EMAIL
+    if from_name and not from_email.startswith(from_name):
+        return f'{from_name} <{from_email}>'
+    return from_email
+
+
 class EmailChannel:
     code = 'email'
 
@@ -40,19 +53,17 @@ class EmailChannel:
 
         from Tracker.models import TenantNotificationBranding
 
-        user = outbox_row.user
-        to_addr = user.email
-        if not to_addr:
-            raise ValueError(f'user {user.id} has no email address')
-
         # From-name from tenant branding, fall back to the registered Django default.
         branding = TenantNotificationBranding.objects.filter(tenant_id=outbox_row.tenant_id).first()
-        from_name = (branding.email_from_name if branding else None) or 'UQMES'
-        from_email = settings.DEFAULT_FROM_EMAIL
-        if from_name and not from_email.startswith(from_name):
-            from_address = f'{from_name} <{from_email}>'
-        else:
-            from_address = from_email
+        msg = self.build_message(outbox_row, from_address=branding_from_address(branding))
+
+        # send() raises on transport failure — propagate so the celery task retries.
+        msg.send(fail_silently=False)
+
+    def build_message(self, outbox_row: 'NotificationOutbox', *, from_address: str,
+                      connection=None) -> EmailMultiAlternatives:
+        """The message for one row. Raises ValueError if the user has no address."""
+        to_addr = self._recipient_address(outbox_row)
 
         subject = outbox_row.rendered_subject or '(no subject)'
         body_text = outbox_row.rendered_body_text or ''
@@ -63,20 +74,51 @@ class EmailChannel:
             body=body_text,
             from_email=from_address,
             to=[to_addr],
+            connection=connection,
         )
         if body_html:
             msg.attach_alternative(body_html, 'text/html')
+        self._attach_all(msg, [outbox_row])
+        return msg
 
-        for attachment_ref in (outbox_row.attachments or []):
-            try:
-                self._attach_artifact(msg, attachment_ref, outbox_row)
-            except Exception:
-                logger.exception('email channel: failed to attach %s on outbox %s', attachment_ref, outbox_row.id)
-                # Don't fail the send for a missing attachment — the body
-                # may still be useful. Surface in logs.
+    def build_digest(self, outbox_rows: list, *, from_address: str,
+                     connection=None) -> EmailMultiAlternatives:
+        """One message carrying several rows for the same user, oldest first."""
+        rows = sorted(outbox_rows, key=lambda r: r.created_at)
+        to_addr = self._recipient_address(rows[0])
 
-        # send() raises on transport failure — propagate so the celery task retries.
-        msg.send(fail_silently=False)
+        texts, htmls = [], []
+        for row in rows:
+            subject = row.rendered_subject or '(no subject)'
+            texts.append(f'{subject}\n{"-" * len(subject)}\n{row.rendered_body_text or ""}')
+            htmls.append(row.rendered_body_html or f'<h3>{escape(subject)}</h3><pre>{escape(row.rendered_body_text or "")}</pre>')
+
+        msg = EmailMultiAlternatives(
+            subject=f'{len(rows)} notifications: {rows[0].rendered_subject or "(no subject)"}',
+            body='\n\n'.join(texts),
+            from_email=from_address,
+            to=[to_addr],
+            connection=connection,
+        )
+        msg.attach_alternative('<hr>'.join(htmls), 'text/html')
+        self._attach_all(msg, rows)
+        return msg
+
+    def _recipient_address(self, outbox_row) -> str:
+        user = outbox_row.user
+        if not user.email:
+            raise ValueError(f'user {user.id} has no email address')
+        return user.email
+
+    def _attach_all(self, msg: EmailMultiAlternatives, rows: list) -> None:
+        for row in rows:
+            for attachment_ref in (row.attachments or []):
+                try:
+                    self._attach_artifact(msg, attachment_ref, row)
+                except Exception:
+                    logger.exception('email channel: failed to attach %s on outbox %s', attachment_ref, row.id)
+                    # Don't fail the send for a missing attachment — the body
+                    # may still be useful. Surface in logs.
 
     def supports_attachments(self) -> bool:
         return True
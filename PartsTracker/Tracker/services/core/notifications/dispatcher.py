@@ -9,15 +9,18 @@ Replaces the Phase 2 `default_recipient_groups`-based stub. On each
          (only when the payload carries a customer_id)
        - personal rules for the tenant + event_code
     2. Evaluate each rule's compiled CEL condition against the payload
-       (with `owner_user` context for personal rules).
+       (with `owner_user` context for personal rules). Programs are cached
+       per (rule id, updated_at), so a rule compiles once per edit.
     3. Union recipients across matched rules:
        - tenant/customer rules: recipient_users + groups expanded to users
          + (customer only) recipient_external contacts
        - personal rules: owner_user only
     4. For each (recipient, channel) pair: check the per-rule
-       `min_gap_seconds` cooldown against `NotificationOutbox` history.
-       Intersect with the user's channel preferences (Phase 2 resolver).
-    5. Render and write outbox rows, queue Celery dispatch on commit.
+       `min_gap_seconds` cooldown against `NotificationOutbox` history
+       (one query for all matched rules). Intersect with the user's channel
+       preferences (Phase 2 resolver).
+    5. Render the rows (once per channel), `bulk_create` them, and queue
+       one batched Celery dispatch per event on commit.
 
 Outbox rows reference both `rule` (the firing rule) and exactly one of
 `user` or `external_contact` (mutually exclusive).
@@ -27,7 +30,6 @@ from __future__ import annotations
 import logging
 from datetime import timedelta
 
-from django.db import transaction
 from django.db.models import Case, IntegerField, Q, Value, When
 from django.dispatch import receiver
 from django.utils import timezone
@@ -53,11 +55,11 @@ def on_notification_event(
     **kwargs,
 ) -> None:
     """Fan out a single event to its rule × recipient × channel matrix."""
-    from Tracker.models import NotificationOutbox, NotificationStatus, NotificationRule
-    from .cel import compile_condition, evaluate
-    from .render import render_outbox_row
-    from .resolver import resolve_default_channels
-    from .tasks import dispatch_outbox_row
+    from Tracker.models import NotificationOutbox, NotificationRule
+    from .cel import compiled_rule_condition, evaluate
+    from .render import render_outbox_rows
+    from .resolver import resolve_channels_for_users
+    from .tasks import queue_outbox_dispatch
 
     if tenant is None:
         logger.info("dispatcher: event %s has no tenant; skipping", event_code)
@@ -111,7 +113,7 @@ def on_notification_event(
             {"id": rule.owner_user_id} if rule.is_personal and rule.owner_user_id else {}
         )
         try:
-            program = compile_condition(rule.conditions_source)
+            program = compiled_rule_condition(rule)
         except Exception:
             logger.exception(
                 "dispatcher: rule %s has invalid CEL; skipping",
@@ -138,18 +140,20 @@ def on_notification_event(
     # source — those tend not to need PII redaction anyway.
     source_ct_id, source_oid = _resolve_source_gfk(event_code, payload_dict)
 
+    # (rule, recipient, channel) triples still inside their rule's cooldown.
+    recent = _recent_fires(matched, now)
+
     # Dedup pairs across rules so two rules targeting the same recipient
     # via the same channel produce one outbox row, not two.
     written_pairs: set = set()
-    rows_to_queue: list[str] = []
+    rows: list = []
 
+    # ---- User recipients --------------------------------------------
+    # Pass payload_dict so rules with `recipient_strategy='from_payload'`
+    # or 'union' can resolve domain-driven recipients. Static-strategy
+    # rules ignore the payload and behave as before.
+    users_by_rule: dict = {}
     for rule in matched:
-        rule_channels = rule.channels or list(sender.default_channels)
-
-        # ---- User recipients --------------------------------------------
-        # Pass payload_dict so rules with `recipient_strategy='from_payload'`
-        # or 'union' can resolve domain-driven recipients. Static-strategy
-        # rules ignore the payload and behave as before.
         resolved_users = rule.effective_user_recipients(payload_dict)
         if (
             rule.recipient_strategy in ("from_payload", "union")
@@ -162,10 +166,20 @@ def on_notification_event(
                 rule.id, rule.recipient_strategy, event_code,
                 list(payload_dict.keys()),
             )
-        for user in resolved_users:
-            # Apply the user's channel preferences once per user; this is
-            # the Phase 2 cascade (user → role → tenant → registry).
-            per_channel = resolve_default_channels(user, event_code)
+        users_by_rule[rule.id] = resolved_users
+
+    # The user's channel preferences (user → role → tenant → registry),
+    # resolved once for every recipient of every matched rule.
+    channels_by_user = resolve_channels_for_users(
+        [user for users in users_by_rule.values() for user in users],
+        event_code,
+    )
+
+    for rule in matched:
+        rule_channels = rule.channels or list(sender.default_channels)
+
+        for user in users_by_rule[rule.id]:
+            per_channel = channels_by_user[user.id]
 
             for channel in rule_channels:
                 pair = ("user", user.id, channel)
@@ -173,13 +187,10 @@ def on_notification_event(
                     continue
                 if not per_channel.get(channel, False):
                     continue
-                if _within_cooldown(
-                    rule=rule, user_id=user.id, external_id=None,
-                    channel=channel, now=now,
-                ):
+                if (rule.id, "user", user.id, channel) in recent:
                     continue
 
-                row = _build_user_row(
+                rows.append(_build_user_row(
                     tenant=tenant,
                     rule=rule,
                     user=user,
@@ -191,10 +202,7 @@ def on_notification_event(
                     idempotency_key=idempotency_key,
                     source_ct_id=source_ct_id,
                     source_oid=source_oid,
-                )
-                render_outbox_row(row, payload_dict, language="en")
-                row.save()
-                rows_to_queue.append(str(row.id))
+                ))
                 written_pairs.add(pair)
 
         # ---- External contact recipients (customer-scoped rules only) ----
@@ -203,13 +211,10 @@ def on_notification_event(
                 pair = ("contact", contact.id, channel)
                 if pair in written_pairs:
                     continue
-                if _within_cooldown(
-                    rule=rule, user_id=None, external_id=contact.id,
-                    channel=channel, now=now,
-                ):
+                if (rule.id, "contact", contact.id, channel) in recent:
                     continue
 
-                row = _build_external_row(
+                rows.append(_build_external_row(
                     tenant=tenant,
                     rule=rule,
                     contact=contact,
@@ -221,10 +226,7 @@ def on_notification_event(
                     idempotency_key=idempotency_key,
                     source_ct_id=source_ct_id,
                     source_oid=source_oid,
-                )
-                render_outbox_row(row, payload_dict, language="en")
-                row.save()
-                rows_to_queue.append(str(row.id))
+                ))
                 written_pairs.add(pair)
 
         # ---- Escalation instance (Phase 4) ------------------------------
@@ -243,56 +245,55 @@ def on_notification_event(
             now=now,
         )
 
-    if not rows_to_queue:
+    if not rows:
         return
 
-    # Defer Celery dispatch until commit so a rolled-back originating
-    # transaction doesn't fire notifications.
-    def _queue_all(ids: list[str] = rows_to_queue) -> None:
-        for outbox_id in ids:
-            dispatch_outbox_row.delay(outbox_id)
+    # Every row shares the payload, so content differs only by channel.
+    render_outbox_rows(rows, payload_dict, language="en")
+    NotificationOutbox.objects.bulk_create(rows)  # tenant-safe: every row carries tenant=tenant
 
-    transaction.on_commit(_queue_all)
+    # Dispatch is deferred until commit so a rolled-back originating
+    # transaction doesn't fire notifications.
+    queue_outbox_dispatch([str(row.id) for row in rows])
 
 
 # =============================================================================
 # Cooldown lookup
 # =============================================================================
 
-def _within_cooldown(
-    *,
-    rule,
-    user_id,
-    external_id,
-    channel: str,
-    now,
-) -> bool:
-    """Was a notification from this rule to this recipient fired recently?
+def _recent_fires(rules, now) -> set:
+    """Which (rule, recipient, channel) triples fired within the rule's cooldown?
 
-    Uses the `(rule, user, created_at)` index on `NotificationOutbox`.
-    The external-contact variant uses a (rule, external_contact, created_at)
-    scan; not indexed (lower volume).
+    One query across every rule with a `min_gap_seconds` window, using the
+    `(rule, user, created_at)` index on `NotificationOutbox`. Returns
+    `(rule_id, "user" | "contact", recipient_id, channel)` tuples.
 
-    A `min_gap_seconds` of 0 disables cooldown entirely.
+    A `min_gap_seconds` of 0 disables cooldown for that rule.
     """
-    if rule.min_gap_seconds <= 0:
-        return False
-
     from Tracker.models import NotificationOutbox
 
-    cutoff = now - timedelta(seconds=rule.min_gap_seconds)
-    qs = NotificationOutbox.objects.filter(  # tenant-safe: dispatcher runs in emit-site tenant_context
-        rule=rule,
-        channel=channel,
-        created_at__gte=cutoff,
+    windows = Q()
+    for rule in rules:
+        if rule.min_gap_seconds > 0:
+            windows |= Q(
+                rule_id=rule.id,
+                created_at__gte=now - timedelta(seconds=rule.min_gap_seconds),
+            )
+    if not windows:
+        return set()
+
+    fired = (
+        NotificationOutbox.objects.filter(windows)  # tenant-safe: dispatcher runs in emit-site tenant_context
+        .values_list("rule_id", "user_id", "external_contact_id", "channel")
+        .distinct()
     )
-    if user_id is not None:
-        qs = qs.filter(user_id=user_id)
-    elif external_id is not None:
-        qs = qs.filter(external_contact_id=external_id)
-    else:
-        return False
-    return qs.exists()
+    recent = set()
+    for rule_id, user_id, contact_id, channel in fired:
+        if user_id is not None:
+            recent.add((rule_id, "user", user_id, channel))
+        elif contact_id is not None:
+            recent.add((rule_id, "contact", contact_id, channel))
+    return recent
 
 
 # =============================================================================
@@ -0,0 +1,178 @@
+"""
+Batched email delivery for NotificationOutbox.
+
+`send_email_batch()` claims up to `limit` queued email rows with
+SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers take disjoint
+batches. It looks up branding once per tenant, builds the messages, and
+sends them all over one backend connection. Outcomes are recorded per row:
+a message the backend rejects marks only its own rows RETRYING (FAILED
+after MAX_EMAIL_ATTEMPTS), and they are picked up again by a later batch
+once EMAIL_RETRY_DELAY has passed.
+
+Digest mode is opt-in via NOTIFICATION_EMAIL_DIGEST_SECONDS. Every queued
+row for a recipient is merged into one message. A recipient's rows are
+held until the oldest has waited the whole window, so a burst of events
+reaches them as a single email.
+
+Callers:
+    - `dispatch_outbox_batch` sends the email rows of one event fan-out
+      straight away (digest mode leaves them queued instead).
+    - `drain()` (the `drain_email_outbox` beat task) calls it with no ids,
+      batch after batch, to sweep retries and flush digests.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from Tracker.utils.tenant_context import tenant_context
+
+logger = logging.getLogger(__name__)
+
+# Same budget as dispatch_outbox_row's Celery retries.
+MAX_EMAIL_ATTEMPTS = 5
+# Seconds a RETRYING row waits before a batch claims it again.
+EMAIL_RETRY_DELAY = 30
+
+
+class EmailBatchResult(NamedTuple):
+    """Row counts for one batch. `held` rows wait for their digest window."""
+    sent: int = 0
+    retrying: int = 0
+    failed: int = 0
+    held: int = 0
+
+
+def digest_seconds() -> int:
+    return getattr(settings, 'NOTIFICATION_EMAIL_DIGEST_SECONDS', 0)
+
+
+def send_email_batch(ids=None, *, limit=None, digest=None, now=None, backend=None) -> EmailBatchResult:
+    """Claim, send and settle one batch of queued email rows.
+
+    Args:
+        ids: restrict the claim to these outbox ids (default: any queued row)
+        limit: rows to claim (default NOTIFICATION_EMAIL_BATCH_SIZE)
+        digest: digest window in seconds; 0 sends every row on its own
+            (default NOTIFICATION_EMAIL_DIGEST_SECONDS)
+        now: clock override for tests
+        backend: email backend path (default EMAIL_BACKEND)
+    """
+    from Tracker.models import NotificationOutbox, NotificationStatus, TenantNotificationBranding
+    from .channels.email import EmailChannel, branding_from_address
+
+    now = now or timezone.now()
+    limit = limit or getattr(settings, 'NOTIFICATION_EMAIL_BATCH_SIZE', 200)
+    window = digest_seconds() if digest is None else digest
+
+    queued = Q(status=NotificationStatus.PENDING) | Q(
+        status=NotificationStatus.RETRYING,
+        updated_at__lte=now - timedelta(seconds=EMAIL_RETRY_DELAY),
+    )
+
+    with transaction.atomic():
+        claim = (
+            NotificationOutbox.all_tenants  # tenant-safe: cross-tenant claim; rows are grouped by tenant below
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('user')
+            .filter(queued, channel='email')
+            .order_by('created_at')
+        )
+        if ids is not None:
+            claim = claim.filter(id__in=list(ids))
+        rows = list(claim[:limit])
+        if not rows:
+            return EmailBatchResult()
+
+        brandings = {
+            b.tenant_id: b
+            for b in TenantNotificationBranding.all_tenants.filter(  # tenant-safe: one lookup per claimed tenant
+                tenant_id__in={row.tenant_id for row in rows},
+            )
+        }
+
+        # Rows without a user have no address to send to; like
+        # EmailChannel.send, they count as delivered.
+        no_recipient = [row for row in rows if not row.user_id]
+        groups: dict = {}
+        for row in rows:
+            if row.user_id:
+                key = (row.tenant_id, row.user_id) if window else (row.tenant_id, row.id)
+                groups.setdefault(key, []).append(row)
+
+        held = 0
+        if window:
+            cutoff = now - timedelta(seconds=window)
+            for key in [k for k, g in groups.items() if min(r.created_at for r in g) > cutoff]:
+                held += len(groups.pop(key))
+
+        channel = EmailChannel()
+        connection = get_connection(backend, fail_silently=False)
+        sent, failed = list(no_recipient), []
+
+        try:
+            connection.open()
+        except Exception as exc:   # noqa: BLE001 — nothing can be sent this round
+            logger.warning("send_email_batch: backend unavailable: %s", exc)
+            failed = [(row, str(exc)) for group in groups.values() for row in group]
+            groups = {}
+
+        try:
+            for (tenant_id, _), group in groups.items():
+                from_address = branding_from_address(brandings.get(tenant_id))
+                try:
+                    with tenant_context(tenant_id):
+                        if len(group) > 1:
+                            msg = channel.build_digest(group, from_address=from_address, connection=connection)
+                        else:
+                            msg = channel.build_message(group[0], from_address=from_address, connection=connection)
+                    connection.send_messages([msg])
+                except Exception as exc:   # noqa: BLE001 — settle the row, keep sending
+                    failed.extend((row, str(exc)) for row in group)
+                else:
+                    sent.extend(group)
+        finally:
+            connection.close()
+
+        if sent:
+            NotificationOutbox.all_tenants.filter(  # tenant-safe: ids claimed above
+                id__in=[row.id for row in sent],
+            ).update(status=NotificationStatus.SENT, sent_at=now, error='', updated_at=now)
+
+        gave_up = 0
+        for row, error in failed:
+            row.retry_count = (row.retry_count or 0) + 1
+            row.error = error
+            if row.retry_count >= MAX_EMAIL_ATTEMPTS:
+                row.status = NotificationStatus.FAILED
+                gave_up += 1
+            else:
+                row.status = NotificationStatus.RETRYING
+            row.save(update_fields=['status', 'retry_count', 'error', 'updated_at'])
+
+    result = EmailBatchResult(
+        sent=len(sent), retrying=len(failed) - gave_up, failed=gave_up, held=held,
+    )
+    logger.info("send_email_batch: %s", result)
+    return result
+
+
+def drain() -> dict:
+    """Send queued email rows batch by batch until a batch settles nothing.
+
+    Returns row counts summed over the batches.
+    """
+    totals: dict[str, int] = {}
+    while True:
+        result = send_email_batch()
+        for status, n in result._asdict().items():
+            totals[status] = totals.get(status, 0) + n
+        if not (result.sent or result.retrying or result.failed):
+            return totals
@@ -199,7 +199,7 @@ def _fire_step(*, inst, rule, step, tenant, now) -> tuple[int, list[str]]:
     """
     from Tracker.models import NotificationOutbox, NotificationStatus
     from ..render import render_outbox_row
-    from ..resolver import resolve_default_channels
+    from ..resolver import resolve_channels_for_users
 
     channels = rule.channels or []
     if not channels:
@@ -248,8 +248,9 @@ def _fire_step(*, inst, rule, step, tenant, now) -> tuple[int, list[str]]:
     written = 0
     outbox_ids: list[str] = []
 
+    channels_by_user = resolve_channels_for_users(distinct_users, rule.event_code)
     for user in distinct_users:
-        per_channel = resolve_default_channels(user, rule.event_code)
+        per_channel = channels_by_user[user.id]
         for channel in channels:
             if not per_channel.get(channel, False):
                 continue
@@ -302,13 +303,6 @@ def _step_extra_users(step):
 
 def _queue_outbox(outbox_ids: list[str]) -> None:
     """Queue Celery dispatch for the written outbox rows, on commit."""
-    if not outbox_ids:
-        return
+    from ..tasks import queue_outbox_dispatch
 
-    from ..tasks import dispatch_outbox_row
-
-    def _do_queue(ids: list[str] = outbox_ids) -> None:
-        for oid in ids:
-            dispatch_outbox_row.delay(oid)
-
-    transaction.on_commit(_do_queue)
+    queue_outbox_dispatch(outbox_ids)
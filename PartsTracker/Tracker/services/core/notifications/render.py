@@ -9,6 +9,9 @@ Pipeline:
        `footer_disclaimer`) before they're interpolated into `body_html`.
     4. Write the rendered values onto the outbox row.
 
+`render_outbox_rows` does the same for every row of one event fan-out,
+rendering each (tenant, event, channel, language) combination once.
+
 If no template exists for the (event, channel) pair, the row gets a
 minimal fallback render (subject = event label, body = payload dump) so
 the pipeline doesn't break — templates are added incrementally as events
@@ -119,9 +122,41 @@ def render_outbox_row(row, payload_dict: dict, *, language: str = 'en') -> None:
         payload_dict: serialized payload dict (already JSON-safe).
         language: recipient's preferred language; falls through to English.
     """
-    event = get_event(row.event_code)
-    template = _resolve_template(row.tenant_id, row.event_code, row.channel, language)
-    branding = _get_branding(row.tenant_id)
+    rendered = _render(
+        row.tenant_id, row.event_code, row.channel, language,
+        payload_dict, _get_branding(row.tenant_id),
+    )
+    _apply(row, rendered)
+
+
+def render_outbox_rows(rows, payload_dict: dict, *, language: str = 'en') -> None:
+    """`render_outbox_row` for a batch of rows built from one event payload.
+
+    Rows for the same (tenant, event, channel, language) render to the same
+    content, so the template lookup and render run once per combination and
+    the branding lookup once per tenant; each row gets a copy of the result.
+    """
+    branding: dict = {}
+    rendered: dict = {}
+    for row in rows:
+        key = (row.tenant_id, row.event_code, row.channel, language)
+        if key not in rendered:
+            if row.tenant_id not in branding:
+                branding[row.tenant_id] = _get_branding(row.tenant_id)
+            rendered[key] = _render(*key, payload_dict, branding[row.tenant_id])
+        _apply(row, rendered[key])
+
+
+def _apply(row, rendered: dict) -> None:
+    for field, value in rendered.items():
+        setattr(row, field, value)
+
+
+def _render(tenant_id, event_code: str, channel: str, language: str,
+            payload_dict: dict, branding) -> dict:
+    """Rendered field values for one (tenant, event, channel, language)."""
+    event = get_event(event_code)
+    template = _resolve_template(tenant_id, event_code, channel, language)
 
     # Branding context. None-tolerant — if no branding row, every field is empty
     # and the template's default-handling shows defaults.
@@ -151,20 +186,24 @@ def render_outbox_row(row, payload_dict: dict, *, language: str = 'en') -> None:
         )
         ctx = Context({**context_dict, 'action_url': action_url})
 
-        row.rendered_subject = Template(template.subject).render(ctx)
-        row.rendered_body_text = Template(template.body_text).render(ctx) if template.body_text else ''
-        row.rendered_body_html = Template(template.body_html).render(ctx) if template.body_html else ''
-        row.rendered_action_url = action_url
-    else:
-        # No template authored AND no wildcard fallback row exists.
-        # Subject = event label; body = payload key=value dump. With the
-        # wildcard template loaded by `setup_system_templates`, this branch
-        # only fires before the post_migrate setup runs (e.g., fresh test DB
-        # for a non-templates test).
-        row.rendered_subject = event.label
-        row.rendered_body_text = _payload_summary(payload_dict)
-        row.rendered_body_html = ''
-        row.rendered_action_url = ''
+        return {
+            'rendered_subject': Template(template.subject).render(ctx),
+            'rendered_body_text': Template(template.body_text).render(ctx) if template.body_text else '',
+            'rendered_body_html': Template(template.body_html).render(ctx) if template.body_html else '',
+            'rendered_action_url': action_url,
+        }
+
+    # No template authored AND no wildcard fallback row exists.
+    # Subject = event label; body = payload key=value dump. With the
+    # wildcard template loaded by `setup_system_templates`, this branch
+    # only fires before the post_migrate setup runs (e.g., fresh test DB
+    # for a non-templates test).
+    return {
+        'rendered_subject': event.label,
+        'rendered_body_text': _payload_summary(payload_dict),
+        'rendered_body_html': '',
+        'rendered_action_url': '',
+    }
 
 
 def _payload_summary(payload_dict: dict) -> str:
@@ -10,23 +10,45 @@ applicable layer (first match short-circuits further lookup):
     3. TenantNotificationDefault   — tenant-wide row (role IS NULL)
     4. EVENT_REGISTRY[event_code].default_channels
 
-A short-lived cache shaves the per-emit DB cost for hot events; cache
-invalidation is wired via `post_save` signals on the three preference
-models (see signals.py).
+`resolve_channels_for_users(users, event_code)` answers the same question
+for a whole recipient set: cached answers come back in one `get_many`, and
+the misses are resolved with one query per layer (role assignments, user
+preferences, tenant defaults) regardless of how many users missed.
+
+Cache entries are keyed on a per-tenant and a per-user version. The
+`post_save`/`post_delete` receivers in signals.py bump the tenant version
+on TenantNotificationDefault edits and the user version on
+UserNotificationPreference and UserRole edits, so the next resolve misses
+and reads the new state. Stale entries are never deleted; they simply stop
+being addressed and age out.
 """
 from __future__ import annotations
 
+import logging
+
 from django.core.cache import cache
 
+from Tracker.utils import cache_versions
+
 from .registry import get_event
 
-# Cache lifetime is bounded by signal-based invalidation; the TTL is a
+logger = logging.getLogger(__name__)
+
+# Cache lifetime is bounded by version-key invalidation; the TTL is a
 # defense-in-depth backstop, not the primary correctness mechanism.
 CACHE_TTL_SECONDS = 5 * 60
 
 
-def _cache_key(tenant_id, user_id: int, event_code: str) -> str:
-    return f'notif:resolved:{tenant_id}:{user_id}:{event_code}'
+def _tenant_version_key(tenant_id) -> str:
+    return f'notif:resolved:v:t:{tenant_id}'
+
+
+def _user_version_key(user_id) -> str:
+    return f'notif:resolved:v:u:{user_id}'
+
+
+def _cache_key(tenant_id, tenant_version, user_id, user_version, event_code: str) -> str:
+    return f'notif:resolved:{tenant_id}.{tenant_version}:{user_id}.{user_version}:{event_code}'
 
 
 def resolve_default_channels(user, event_code: str) -> dict[str, bool]:
@@ -36,47 +58,108 @@ def resolve_default_channels(user, event_code: str) -> dict[str, bool]:
     intersect this with the event's registered `default_channels` to decide
     what to write to the outbox.
     """
-    cache_key = _cache_key(user.tenant_id, user.id, event_code)
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
+    return resolve_channels_for_users([user], event_code)[user.id]
+
+
+def resolve_channels_for_users(users, event_code: str) -> dict[int, dict[str, bool]]:
+    """Return {user_id: {channel: enabled}} for every user in `users`.
+
+    Two cache round trips (versions, then entries) plus, when anything
+    missed, three queries and one `set_many` — independent of len(users).
+    Defaults are read from each user's home tenant, as in the single-user
+    path.
+    """
+    users = {user.id: user for user in users}
+    if not users:
+        return {}
 
+    versions = cache_versions.versions(
+        {_tenant_version_key(u.tenant_id) for u in users.values()}
+        | {_user_version_key(user_id) for user_id in users}
+    )
+    keys = {
+        user_id: _cache_key(
+            user.tenant_id, versions[_tenant_version_key(user.tenant_id)],
+            user_id, versions[_user_version_key(user_id)], event_code,
+        )
+        for user_id, user in users.items()
+    }
+    cached = cache.get_many(list(keys.values()))
+
+    resolved = {
+        user_id: cached[key] for user_id, key in keys.items() if key in cached
+    }
+    missing = [user for user_id, user in users.items() if user_id not in resolved]
+    if missing:
+        fresh = _resolve_uncached(missing, event_code)
+        cache.set_many(
+            {keys[user_id]: channels for user_id, channels in fresh.items()},
+            timeout=CACHE_TTL_SECONDS,
+        )
+        resolved.update(fresh)
+    return resolved
+
+
+def _resolve_uncached(users, event_code: str) -> dict[int, dict[str, bool]]:
+    """Run the 4-layer cascade for `users` with one query per layer."""
     # Local imports to avoid app-loading cycles.
     from Tracker.models import (
         TenantNotificationDefault,
         UserNotificationPreference,
+        UserRole,
     )
 
     event = get_event(event_code)
     registry_channels = list(event.default_channels)
-
-    # Pre-fetch the user's role ids once (User.get_tenant_groups() walks via UserRole).
-    if hasattr(user, 'get_tenant_groups'):
-        user_role_ids = list(user.get_tenant_groups().values_list('id', flat=True))
-    else:
-        user_role_ids = []
-
-    # Pre-fetch the user preference row once (one row per user; JSONField).
-    try:
-        pref_row = UserNotificationPreference.objects.get(user=user)
-        user_prefs = pref_row.preferences or {}
-    except UserNotificationPreference.DoesNotExist:
-        user_prefs = {}
-
-    # Pre-fetch all default rows for this (tenant, event) — small set.
-    default_rows = list(
-        TenantNotificationDefault.objects
-        .filter(tenant_id=user.tenant_id, event_code=event_code)
-        .values('channel', 'role_id', 'enabled')
-    )
-
-    # Bucket defaults by channel and by role-scope.
-    tenant_wide: dict[str, bool] = {}
-    role_scoped: dict[str, list[bool]] = {}
-    for row in default_rows:
+    user_ids = [user.id for user in users]
+    tenant_ids = {user.tenant_id for user in users if user.tenant_id}
+
+    # Role ids per user, limited to groups of the user's home tenant
+    # (what User.get_tenant_groups() returns).
+    home_tenant = {user.id: user.tenant_id for user in users}
+    role_ids: dict[int, set] = {user_id: set() for user_id in user_ids}
+    for user_id, group_id, group_tenant_id in UserRole.objects.filter(
+        user_id__in=user_ids, group__tenant_id__in=tenant_ids,
+    ).values_list('user_id', 'group_id', 'group__tenant_id'):
+        if group_tenant_id == home_tenant[user_id]:
+            role_ids[user_id].add(group_id)
+
+    # One preference row per user (JSONField).
+    user_prefs = {
+        user_id: prefs or {}
+        for user_id, prefs in UserNotificationPreference.objects.filter(  # tenant-safe: tenant_id__in below
+            tenant_id__in=tenant_ids, user_id__in=user_ids,
+        ).values_list('user_id', 'preferences')
+    }
+
+    # All default rows for these tenants on this event — small set.
+    tenant_wide: dict = {tenant_id: {} for tenant_id in tenant_ids}
+    role_rows: dict = {tenant_id: [] for tenant_id in tenant_ids}
+    for row in TenantNotificationDefault.objects.filter(  # tenant-safe: tenant_id__in below
+        tenant_id__in=tenant_ids, event_code=event_code,
+    ).values('tenant_id', 'channel', 'role_id', 'enabled'):
         if row['role_id'] is None:
-            tenant_wide[row['channel']] = row['enabled']
-        elif row['role_id'] in user_role_ids:
+            tenant_wide[row['tenant_id']][row['channel']] = row['enabled']
+        else:
+            role_rows[row['tenant_id']].append(row)
+
+    return {
+        user.id: _cascade(
+            registry_channels,
+            event_overrides=user_prefs.get(user.id, {}).get(event_code) or {},
+            tenant_wide=tenant_wide.get(user.tenant_id, {}),
+            role_rows=role_rows.get(user.tenant_id, []),
+            user_role_ids=role_ids[user.id],
+        )
+        for user in users
+    }
+
+
+def _cascade(registry_channels, *, event_overrides, tenant_wide, role_rows, user_role_ids) -> dict[str, bool]:
+    """Resolve each channel against the four layers for one user."""
+    role_scoped: dict[str, list[bool]] = {}
+    for row in role_rows:
+        if row['role_id'] in user_role_ids:
             role_scoped.setdefault(row['channel'], []).append(row['enabled'])
 
     # All channels we may need to resolve: union of registry defaults +
@@ -87,7 +170,6 @@ def resolve_default_channels(user, event_code: str) -> dict[str, bool]:
     resolved: dict[str, bool] = {}
     for channel in all_channels:
         # Layer 1: user preference (always-write — explicit row wins).
-        event_overrides = user_prefs.get(event_code) or {}
         if channel in event_overrides:
             resolved[channel] = bool(event_overrides[channel])
             continue
@@ -105,27 +187,15 @@ def resolve_default_channels(user, event_code: str) -> dict[str, bool]:
         # Layer 4: registry default.
         resolved[channel] = channel in registry_channels
 
-    cache.set(cache_key, resolved, timeout=CACHE_TTL_SECONDS)
     return resolved
 
 
 def invalidate_for_user(user) -> None:
-    """Drop cache entries for this user across all events.
-
-    `cache.delete_pattern` is Redis-specific; the Django cache API doesn't
-    expose pattern delete portably. We use a versioning key instead: bump
-    a per-user version on every preference change; the `_cache_key()`
-    function can include the version to make stale entries naturally
-    miss. For Phase 2 we keep the simple TTL-based approach and accept
-    up to CACHE_TTL_SECONDS of staleness on user-preference changes —
-    revisit when this measurably hurts.
-    """
-    # Intentional no-op for v1. TTL bounds staleness; explicit per-event
-    # invalidation requires either pattern delete (Redis-only) or a
-    # version-key scheme. See docstring.
-    return
+    """Drop this user's cached resolutions across all events by bumping
+    their version key."""
+    cache_versions.bump(_user_version_key(user.pk))
 
 
 def invalidate_for_tenant(tenant) -> None:
     """Same shape as `invalidate_for_user`, for tenant-wide changes."""
-    return
+    cache_versions.bump(_tenant_version_key(tenant.pk))
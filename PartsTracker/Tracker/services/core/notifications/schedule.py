@@ -1,18 +1,23 @@
 """
 NotificationSchedule dispatcher — fires scheduled rows on cadence.
 
-Two entry points:
+Entry points:
   * `compute_next_fire(schedule, *, after)` — pure function returning the next
     UTC datetime when this schedule should fire. TZ-aware via zoneinfo.
   * `fire_schedule(schedule_id)` — the worker-side fire operation.
-    Acquires a row lock, re-validates due, atomically marks `last_fired_at`,
-    then renders content and writes outbox rows.
+    Acquires a row lock, re-validates due, atomically marks `last_fired_at`
+    (which advances the persisted `next_fire_at`), then renders content and
+    writes outbox rows.
+  * `due_schedule_ids(now)` — one indexed range query over `next_fire_at`.
+  * `backfill_next_fire(queryset)` — fills `next_fire_at` for rows that
+    predate the column (or recomputes it after a tenant timezone change).
 
 Concurrency model:
   * The celery-beat tick task (`Tracker.tasks.tick_notification_schedules`)
-    runs every 5 min, scans all enabled schedules cross-tenant, and queues
-    `fire_one_schedule.delay(id)` for any that are due.
-  * `fire_one_schedule` calls into this module's `fire_schedule()`.
+    runs every 5 min, reads the due ids cross-tenant, and queues them in
+    chunks on `fire_schedule_batch`.
+  * `fire_schedule_batch` / `fire_one_schedule` call into this module's
+    `fire_schedule()`.
   * `SELECT FOR UPDATE SKIP LOCKED` on the schedule row prevents two workers
     from firing the same schedule simultaneously — a second worker that
     races sees `DoesNotExist` (the row was either locked or already fired)
@@ -146,6 +151,7 @@ def fire_schedule(schedule_id) -> None:
                 sched, after=sched.last_fired_at or sched.created_at,
             )
             # Atomic with the lock: write last_fired_at before rendering.
+            # save() advances next_fire_at from the new anchor.
             sched.last_fired_at = timezone.now()
             sched.save(update_fields=["last_fired_at"])
 
@@ -154,10 +160,56 @@ def fire_schedule(schedule_id) -> None:
         _render_and_deliver(sched, fire_window_start=fire_window_start)
 
 
+def due_schedule_ids(now: datetime, *, limit: int | None = None) -> list:
+    """IDs of enabled schedules whose `next_fire_at` has passed, oldest first.
+
+    Cross-tenant; each fire re-enters its own tenant_context.
+    """
+    qs = (
+        NotificationSchedule.all_tenants  # tenant-safe: beat tick spans every tenant
+        .filter(enabled=True, archived=False, next_fire_at__lte=now)
+        .order_by("next_fire_at")
+        .values_list("id", flat=True)
+    )
+    return list(qs[:limit] if limit else qs)
+
+
+def backfill_next_fire(queryset, *, batch_size: int = 500) -> int:
+    """Recompute `next_fire_at` for every row in `queryset`; returns the
+    number of rows written. Rows whose cadence can't be computed are logged
+    and left as they are."""
+    written = 0
+    batch: list[NotificationSchedule] = []
+    for sched in queryset.select_related("tenant").iterator(chunk_size=batch_size):
+        try:
+            next_fire = sched.compute_next_fire_at()
+        except Exception:
+            logger.exception("backfill_next_fire: cannot compute for %s", sched.id)
+            continue
+        if next_fire == sched.next_fire_at:
+            continue
+        sched.next_fire_at = next_fire
+        batch.append(sched)
+        if len(batch) >= batch_size:
+            written += _write_next_fire(batch)
+            batch = []
+    if batch:
+        written += _write_next_fire(batch)
+    return written
+
+
 # =============================================================================
 # Internal helpers
 # =============================================================================
 
+def _write_next_fire(batch: list[NotificationSchedule]) -> int:
+    # bulk_update skips save(), which would recompute what we just computed.
+    NotificationSchedule.all_tenants.bulk_update(  # tenant-safe: rows carry their own tenant
+        batch, ["next_fire_at"],
+    )
+    return len(batch)
+
+
 def _lock_and_validate_due(schedule_id) -> NotificationSchedule | None:
     """Acquire SELECT FOR UPDATE on the row and confirm it's still due.
 
@@ -181,7 +233,13 @@ def _lock_and_validate_due(schedule_id) -> NotificationSchedule | None:
     anchor = sched.last_fired_at or sched.created_at
     next_fire = compute_next_fire(sched, after=anchor)
     if next_fire > timezone.now():
-        # Stale beat tick or sibling worker fired it first.
+        # Stale beat tick or sibling worker fired it first. If the stored
+        # due time drifted (tenant timezone change, direct UPDATE), correct
+        # it so the tick stops selecting this row.
+        if sched.next_fire_at != next_fire:
+            NotificationSchedule.objects.filter(pk=sched.pk).update(  # tenant-safe: inside the schedule's tenant_context
+                next_fire_at=next_fire,
+            )
         return None
     return sched
 
@@ -3,6 +3,7 @@
 - `post_save` on Tenant → seed tenant-wide notification defaults
 - `post_save` / `post_delete` on TenantNotificationDefault → invalidate resolver cache
 - `post_save` / `post_delete` on UserNotificationPreference → invalidate resolver cache
+- `post_save` / `post_delete` on UserRole → invalidate resolver cache (role-scoped defaults)
 - `post_save` on TenantNotificationBranding → no cache impact (read at render time)
 
 Imported by `Tracker.services.core.notifications.dispatcher` so registration
@@ -22,16 +23,20 @@ def _connect():
     """Late binding — connect signals after models are loaded.
 
     Called from `apps.ready()` via the dispatcher module import chain.
+    The receivers are closures local to this function, so they are
+    connected with `weak=False`; a weak reference would be collected as
+    soon as `_connect()` returns and the signal would never fire.
     """
     from Tracker.models import (
         Tenant,
         TenantNotificationDefault,
         UserNotificationPreference,
+        UserRole,
     )
     from .seeder import seed_tenant_notification_defaults
     from .resolver import invalidate_for_tenant, invalidate_for_user
 
-    @receiver(post_save, sender=Tenant)
+    @receiver(post_save, sender=Tenant, weak=False)
     def _seed_on_tenant_create(sender, instance, created, **kwargs):
         if not created:
             return
@@ -44,13 +49,17 @@ def _connect():
         except Exception:
             logger.exception('notification seeder failed for tenant %s', instance.id)
 
-    @receiver([post_save, post_delete], sender=TenantNotificationDefault)
+    @receiver([post_save, post_delete], sender=TenantNotificationDefault, weak=False)
     def _invalidate_on_tenant_default_change(sender, instance, **kwargs):
         invalidate_for_tenant(instance.tenant)
 
-    @receiver([post_save, post_delete], sender=UserNotificationPreference)
+    @receiver([post_save, post_delete], sender=UserNotificationPreference, weak=False)
     def _invalidate_on_user_preference_change(sender, instance, **kwargs):
         invalidate_for_user(instance.user)
 
+    @receiver([post_save, post_delete], sender=UserRole, weak=False)
+    def _invalidate_on_role_assignment_change(sender, instance, **kwargs):
+        invalidate_for_user(instance.user)
+
 
 _connect()
@@ -1,9 +1,14 @@
 """Celery tasks for the notification system.
 
-Phase 1: a single `dispatch_outbox_row(outbox_id)` task that locks the
-row, calls the channel adapter, and updates `status`/`sent_at`/`error`.
+`dispatch_outbox_row(outbox_id)` locks one row, calls the channel adapter,
+and updates `status`/`sent_at`/`error`. `dispatch_outbox_batch(outbox_ids)`
+does the same for every row of one event fan-out in a single task (split
+every DISPATCH_BATCH_SIZE rows), handing rows whose channel raised back to
+`dispatch_outbox_row` for its retries. Email rows are sent together over
+one connection by `email_batch.send_email_batch`; the `drain_email_outbox`
+beat task sweeps email retries and digests.
 
-The dispatcher queues this task via `transaction.on_commit()` so a rollback
+The dispatcher queues these via `transaction.on_commit()` so a rollback
 prevents downstream side-effects (the codebase convention; see
 `tests/test_celery_dispatch.py`).
 """
@@ -19,6 +24,13 @@ from Tracker.utils.tenant_context import tenant_context
 
 logger = logging.getLogger(__name__)
 
+# Rows per `dispatch_outbox_batch` task; a larger fan-out is split.
+DISPATCH_BATCH_SIZE = 500
+
+
+class DeliveryFailed(Exception):
+    """The channel raised; the delivery should be retried."""
+
 
 @shared_task(bind=True, max_retries=5, default_retry_delay=30)
 def dispatch_outbox_row(self, outbox_id: str) -> dict:
@@ -28,6 +40,67 @@ def dispatch_outbox_row(self, outbox_id: str) -> dict:
     transient-vs-permanent classification beyond "exception → retry".
     Refinement lands when real channels (email, in-app) ship.
     """
+    try:
+        return _deliver(outbox_id)
+    except DeliveryFailed as exc:
+        raise self.retry(exc=exc.__cause__) from exc
+
+
+@shared_task
+def dispatch_outbox_batch(outbox_ids: list[str]) -> dict:
+    """Deliver a batch of outbox rows.
+
+    Email rows go out together through `send_email_batch` over one
+    connection (or stay queued for the digest sweep). Every other row is
+    delivered in its own transaction; one whose channel raises is re-queued
+    on `dispatch_outbox_row`, which owns the retry schedule, and the rest of
+    the batch carries on.
+    """
+    from Tracker.models import NotificationOutbox
+    from .email_batch import digest_seconds, send_email_batch
+
+    counts: dict[str, int] = {}
+    email_ids = {
+        str(pk) for pk in NotificationOutbox.unscoped.filter(  # tenant-safe: ids come from one event's fan-out
+            id__in=outbox_ids, channel='email',
+        ).values_list('id', flat=True)
+    }
+    if email_ids and digest_seconds():
+        counts['held'] = len(email_ids)
+    elif email_ids:
+        result = send_email_batch(ids=email_ids, limit=len(email_ids))
+        for status, n in result._asdict().items():
+            if n:
+                counts[status] = counts.get(status, 0) + n
+
+    for outbox_id in outbox_ids:
+        if outbox_id in email_ids:
+            continue
+        try:
+            status = _deliver(outbox_id)['status']
+        except DeliveryFailed:
+            dispatch_outbox_row.apply_async(
+                (outbox_id,), countdown=dispatch_outbox_row.default_retry_delay,
+            )
+            status = 'retrying'
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def queue_outbox_dispatch(outbox_ids: list[str]) -> None:
+    """Queue delivery of `outbox_ids` when the current transaction commits."""
+    if not outbox_ids:
+        return
+
+    def _queue(ids: list[str] = list(outbox_ids)) -> None:
+        for start in range(0, len(ids), DISPATCH_BATCH_SIZE):
+            dispatch_outbox_batch.delay(ids[start:start + DISPATCH_BATCH_SIZE])
+
+    transaction.on_commit(_queue)
+
+
+def _deliver(outbox_id: str) -> dict:
+    """Deliver one row under its tenant context. Raises DeliveryFailed to retry."""
     from Tracker.models import NotificationOutbox, NotificationStatus
     from Tracker.services.core.notifications.channels import get_channel
 
@@ -70,7 +143,7 @@ def dispatch_outbox_row(self, outbox_id: str) -> dict:
                     "dispatch_outbox_row: channel %s raised; retrying (attempt %d)",
                     row.channel, row.retry_count,
                 )
-                raise self.retry(exc=exc) from exc
+                raise DeliveryFailed(str(exc)) from exc
 
             row.status = NotificationStatus.SENT
             row.sent_at = timezone.now()
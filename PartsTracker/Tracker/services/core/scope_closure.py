@@ -0,0 +1,471 @@
+"""
+ScopeClosure maintenance and lookups.
+
+The closure table materializes every (ancestor, descendant) pair reachable
+over the FK edges between `CLOSURE_MODELS` - exactly what
+`get_descendants(root, include_types=closure_models())` walks - so "everything
+under this order" becomes one indexed lookup (`strategy='closure'` in
+`Tracker.scope`).
+
+Maintenance (wired from `Tracker/signals.py` when SCOPE_CLOSURE_ENABLED):
+
+- `refresh_node(instance, created)`  post_save. New nodes get their ancestor
+                                     rows; a moved parent FK recomputes the
+                                     node's stored subtree.
+- `add_nodes(instances)`             batched form of the create path, for
+                                     `bulk_create` call sites (no signals).
+- `refresh_moved(model, tenant_id, pks)`
+                                     batched form of the moved-parent path,
+                                     for `.update()` call sites that
+                                     reassign a parent FK.
+- `remove_node(instance)`            post_delete. Drops the node and
+                                     recomputes whatever hung under it.
+- `rebuild(tenant_id)`               recompute a tenant from the FK columns.
+- `check_consistency(tenant_id)`     compare stored rows against live traversal.
+
+Queryset `.update()` calls outside those call sites that move a parent FK
+bypass signals; rebuild after such data fixes. `check_scope_closure` reports any drift.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict, namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+logger = logging.getLogger(__name__)
+
+# Order hierarchy covered by the closure. Edges are every FK / one-to-one
+# between these models (including previous_version chains).
+CLOSURE_MODELS = ('Orders', 'WorkOrder', 'Parts', 'StepExecution', 'QualityReports')
+
+BATCH_SIZE = 5000
+
+# missing / extra are sets of (content_type_id, object_id) for one root.
+ClosureMismatch = namedtuple('ClosureMismatch', 'root missing extra')
+
+
+def closure_enabled():
+    return getattr(settings, 'SCOPE_CLOSURE_ENABLED', False)
+
+
+def closure_models():
+    """Model classes covered by the closure, in `CLOSURE_MODELS` order."""
+    return [apps.get_model('Tracker', name) for name in CLOSURE_MODELS]
+
+
+def is_covered(model):
+    return model._meta.app_label == 'Tracker' and model._meta.object_name in CLOSURE_MODELS
+
+
+def answers(root, direction='down', include_types=None, exclude_types=None):
+    """
+    True when the closure returns exactly what live traversal would.
+
+    Only downward walks from a covered root, restricted to precisely the
+    covered types, qualify - any wider `include_types` (or None) reaches
+    models the closure doesn't store.
+    """
+    if not closure_enabled() or direction != 'down':
+        return False
+    if not is_covered(root._meta.model) or root.tenant_id is None:
+        return False
+    if include_types is None or set(include_types) != set(closure_models()):
+        return False
+    return not (exclude_types and set(exclude_types) & set(closure_models()))
+
+
+def can_seed(root, direction='down', max_depth=None, include_types=None, exclude_types=None):
+    """
+    True when the stored subtree can stand in for the covered part of a
+    wider walk: every covered model is walked, so the live walk would reach
+    each stored node too. Depth limits need the live path lengths through
+    uncovered models, so only unbounded walks qualify.
+    """
+    if not closure_enabled() or direction != 'down' or max_depth is not None:
+        return False
+    if not is_covered(root._meta.model) or root.tenant_id is None:
+        return False
+    covered = set(closure_models())
+    if include_types is not None and not covered <= set(include_types):
+        return False
+    return not (exclude_types and set(exclude_types) & covered)
+
+
+# -----------------------------------------------------------------------------
+# Nodes and edges
+# -----------------------------------------------------------------------------
+
+def _ct_id(model):
+    return ContentType.objects.get_for_model(model).id
+
+
+def _node(obj):
+    return (_ct_id(obj._meta.model), str(obj.pk))
+
+
+def _parent_fields(model):
+    """Forward FK / one-to-one fields from `model` to other covered models."""
+    return [
+        f for f in model._meta.concrete_fields
+        if f.is_relation and (f.many_to_one or f.one_to_one) and is_covered(f.related_model)
+    ]
+
+
+def _direct_parents(obj):
+    parents = set()
+    for f in _parent_fields(obj._meta.model):
+        fk_id = getattr(obj, f.attname)
+        if fk_id is not None:
+            parents.add((_ct_id(f.related_model), str(fk_id)))
+    return parents
+
+
+def _node_q(prefix, nodes):
+    """Q matching rows whose `<prefix>_type` / `<prefix>_id` is in `nodes` (non-empty)."""
+    by_type = defaultdict(list)
+    for ct_id, obj_id in nodes:
+        by_type[ct_id].append(obj_id)
+    q = Q()
+    for ct_id, ids in by_type.items():
+        q |= Q(**{f'{prefix}_type_id': ct_id, f'{prefix}_id__in': ids})
+    return q
+
+
+def _load_parents(tenant_id, model, queryset_filter):
+    """{node: parent nodes} for `model` rows matching `queryset_filter`, from the FK columns."""
+    ct_id = _ct_id(model)
+    fields = _parent_fields(model)
+    parent_cts = [_ct_id(f.related_model) for f in fields]
+    rows = (
+        model.unscoped.filter(queryset_filter, tenant_id=tenant_id)
+        .values_list('pk', *[f.attname for f in fields])
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    parents = {}
+    for pk, *fk_ids in rows:
+        parents[(ct_id, str(pk))] = {
+            (parent_ct, str(fk_id))
+            for parent_ct, fk_id in zip(parent_cts, fk_ids) if fk_id is not None
+        }
+    return parents
+
+
+def _stored_ancestors(tenant_id, nodes):
+    """{node: {ancestor: depth}} as currently stored."""
+    result = {node: {} for node in nodes}
+    if not nodes:
+        return result
+    from Tracker.models import ScopeClosure
+    rows = ScopeClosure.objects.filter(_node_q('descendant', nodes), tenant_id=tenant_id).values_list(
+        'descendant_type_id', 'descendant_id', 'ancestor_type_id', 'ancestor_id', 'depth',
+    )
+    for desc_ct, desc_id, anc_ct, anc_id, depth in rows:
+        result[(desc_ct, desc_id)][(anc_ct, anc_id)] = depth
+    return result
+
+
+def _stored_descendants(tenant_id, nodes):
+    """Every node stored under any of `nodes` (non-empty)."""
+    from Tracker.models import ScopeClosure
+    return set(
+        ScopeClosure.objects.filter(_node_q('ancestor', nodes), tenant_id=tenant_id)
+        .values_list('descendant_type_id', 'descendant_id')
+    )
+
+
+def _ancestor_depths(parents, external):
+    """
+    Shortest-path ancestor depths for every node in `parents`.
+
+    Args:
+        parents: {node: set(parent nodes)} for the nodes being computed
+        external: {node: {ancestor: depth}} stored ancestry of parents that
+                  are not themselves being computed
+
+    Parents are resolved before children with an explicit stack, so deep
+    version chains don't recurse. A cycle (never produced by real FK data)
+    is cut where it closes rather than looping.
+    """
+    memo = {}
+
+    def merge(depths, node, depth):
+        if depth < depths.get(node, depth + 1):
+            depths[node] = depth
+
+    for start in parents:
+        if start in memo:
+            continue
+        stack = [(start, False)]
+        on_path = set()
+        while stack:
+            node, ready = stack.pop()
+            if node in memo:
+                continue
+            if not ready:
+                on_path.add(node)
+                stack.append((node, True))
+                for parent in parents[node]:
+                    if parent in parents and parent not in memo and parent not in on_path:
+                        stack.append((parent, False))
+                continue
+
+            on_path.discard(node)
+            depths = {}
+            for parent in parents[node]:
+                merge(depths, parent, 1)
+                above = memo[parent] if parent in memo else external.get(parent, {})
+                for ancestor, depth in above.items():
+                    merge(depths, ancestor, depth + 1)
+            depths.pop(node, None)
+            memo[node] = depths
+    return memo
+
+
+def _insert(tenant_id, depths):
+    from Tracker.models import ScopeClosure
+    rows = [
+        ScopeClosure(
+            tenant_id=tenant_id,
+            ancestor_type_id=anc_ct, ancestor_id=anc_id,
+            descendant_type_id=desc_ct, descendant_id=desc_id,
+            depth=depth,
+        )
+        for (desc_ct, desc_id), ancestors in depths.items()
+        for (anc_ct, anc_id), depth in ancestors.items()
+    ]
+    # tenant-safe: every row carries tenant_id explicitly (set above).
+    ScopeClosure.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(rows)
+
+
+def _recompute(tenant_id, nodes):
+    """Replace the stored ancestry of `nodes` from their current FK columns."""
+    from Tracker.models import ScopeClosure
+    if not nodes:
+        return 0
+
+    ScopeClosure.objects.filter(_node_q('descendant', nodes), tenant_id=tenant_id).delete()
+
+    parents = {}
+    by_type = defaultdict(list)
+    for ct_id, obj_id in nodes:
+        by_type[ct_id].append(obj_id)
+    for ct_id, ids in by_type.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        parents.update(_load_parents(tenant_id, model, Q(pk__in=ids)))
+
+    # Nodes that no longer exist drop out, along with any edge into them.
+    gone = set(nodes) - parents.keys()
+    for node_parents in parents.values():
+        node_parents -= gone
+
+    outside = {p for node_parents in parents.values() for p in node_parents} - parents.keys()
+    return _insert(tenant_id, _ancestor_depths(parents, _stored_ancestors(tenant_id, outside)))
+
+
+# -----------------------------------------------------------------------------
+# Maintenance
+# -----------------------------------------------------------------------------
+
+def add_nodes(instances):
+    """Index freshly created nodes (which have no descendants yet)."""
+    by_tenant = defaultdict(dict)
+    for obj in instances:
+        if obj.pk is None or obj.tenant_id is None:
+            continue
+        by_tenant[obj.tenant_id][_node(obj)] = _direct_parents(obj)
+
+    for tenant_id, parents in by_tenant.items():
+        outside = {p for node_parents in parents.values() for p in node_parents} - parents.keys()
+        _insert(tenant_id, _ancestor_depths(parents, _stored_ancestors(tenant_id, outside)))
+
+
+def refresh_node(instance, created=False):
+    """Bring the closure in line with `instance` after a save."""
+    if created:
+        add_nodes([instance])
+        return
+    if instance.tenant_id is None:
+        return
+
+    from Tracker.models import ScopeClosure
+    node = _node(instance)
+    stored_parents = set(
+        ScopeClosure.objects.filter(
+            tenant_id=instance.tenant_id, descendant_type_id=node[0], descendant_id=node[1], depth=1,
+        ).values_list('ancestor_type_id', 'ancestor_id')
+    )
+    if stored_parents == _direct_parents(instance):
+        return
+
+    # A parent FK moved: everything stored under this node inherits the change.
+    _recompute(instance.tenant_id, {node} | _stored_descendants(instance.tenant_id, {node}))
+
+
+def refresh_moved(model, tenant_id, pks):
+    """
+    Batched form of the moved-parent path, for queryset `.update()` call
+    sites (no signals) that reassign a parent FK on `model` rows `pks`.
+    """
+    nodes = {(_ct_id(model), str(pk)) for pk in pks}
+    if tenant_id is None or not nodes:
+        return
+    _recompute(tenant_id, nodes | _stored_descendants(tenant_id, nodes))
+
+
+def remove_node(instance):
+    """Drop a hard-deleted node and re-derive the ancestry of what was under it."""
+    if instance.tenant_id is None:
+        return
+    node = _node(instance)
+    _recompute(instance.tenant_id, {node} | _stored_descendants(instance.tenant_id, {node}))
+
+
+@transaction.atomic
+def rebuild(tenant_id):
+    """Recompute a tenant's closure from scratch. Returns the number of rows written."""
+    from Tracker.models import ScopeClosure
+    ScopeClosure.objects.filter(tenant_id=tenant_id).delete()
+
+    parents = {}
+    for model in closure_models():
+        parents.update(_load_parents(tenant_id, model, Q()))
+
+    written = _insert(tenant_id, _ancestor_depths(parents, {}))
+    logger.info("Rebuilt scope closure for tenant %s: %d nodes, %d rows", tenant_id, len(parents), written)
+    return written
+
+
+# -----------------------------------------------------------------------------
+# Lookups
+# -----------------------------------------------------------------------------
+
+def descendants(root, max_depth=None):
+    """
+    Stored descendants of `root` in `get_descendants` shape:
+    {content_type_id: set(pks)}, root included.
+    """
+    from Tracker.models import ScopeClosure
+    ct_id, obj_id = _node(root)
+    rows = ScopeClosure.objects.filter(tenant_id=root.tenant_id, ancestor_type_id=ct_id, ancestor_id=obj_id)
+    if max_depth is not None:
+        rows = rows.filter(depth__lte=max_depth)
+
+    result = {ct_id: {root.pk}}
+    pk_fields = {}
+    for desc_ct, desc_id in rows.values_list('descendant_type_id', 'descendant_id'):
+        if desc_ct not in pk_fields:
+            pk_fields[desc_ct] = ContentType.objects.get_for_id(desc_ct).model_class()._meta.pk
+        result.setdefault(desc_ct, set()).add(pk_fields[desc_ct].to_python(desc_id))
+    return result
+
+
+def reachable(root, nodes):
+    """
+    The part of `nodes` ({content_type_id: pks}, as from `descendants`) that
+    hangs under `root` through members of `nodes` only - what a walk that
+    stops at every node outside `nodes` would reach over the stored edges.
+    Root included.
+    """
+    from Tracker.models import ScopeClosure
+    root_node = _node(root)
+    under_root = ScopeClosure.objects.filter(
+        tenant_id=root.tenant_id,
+        ancestor_type_id=root_node[0],
+        ancestor_id=root_node[1],
+        descendant_type_id=OuterRef('descendant_type_id'),
+        descendant_id=OuterRef('descendant_id'),
+    )
+    edges = ScopeClosure.objects.filter(Exists(under_root), tenant_id=root.tenant_id, depth=1).values_list(
+        'ancestor_type_id', 'ancestor_id', 'descendant_type_id', 'descendant_id',
+    )
+    children = defaultdict(set)
+    for anc_ct, anc_id, desc_ct, desc_id in edges:
+        children[(anc_ct, anc_id)].add((desc_ct, desc_id))
+
+    keep = {(ct_id, str(pk)) for ct_id, pks in nodes.items() for pk in pks}
+    reached = {root_node}
+    frontier = [root_node]
+    while frontier:
+        for child in children[frontier.pop()]:
+            if child in keep and child not in reached:
+                reached.add(child)
+                frontier.append(child)
+
+    result = {root_node[0]: {root.pk}}
+    for ct_id, pks in nodes.items():
+        kept = {pk for pk in pks if (ct_id, str(pk)) in reached}
+        if kept:
+            result.setdefault(ct_id, set()).update(kept)
+    return result
+
+
+def generic_filter(root, type_field='content_type_id', id_field='object_id'):
+    """
+    Q selecting generic-FK rows attached to `root` or anything stored under
+    it - one EXISTS against the ancestor index instead of per-type id lists.
+    """
+    from Tracker.models import ScopeClosure
+    ct_id, obj_id = _node(root)
+    below = ScopeClosure.objects.filter(
+        tenant_id=root.tenant_id,
+        ancestor_type_id=ct_id,
+        ancestor_id=obj_id,
+        descendant_type_id=OuterRef(type_field),
+        descendant_id=OuterRef(id_field),
+    )
+    return Q(**{type_field: ct_id, id_field: obj_id}) | Exists(below)
+
+
+# -----------------------------------------------------------------------------
+# Consistency
+# -----------------------------------------------------------------------------
+
+def top_level_nodes(tenant_id):
+    """Covered rows with no covered parent - the roots of the stored forest."""
+    for model in closure_models():
+        orphan = Q(**{f'{f.name}__isnull': True for f in _parent_fields(model)})
+        yield from model.unscoped.filter(orphan, tenant_id=tenant_id).iterator(chunk_size=BATCH_SIZE)
+
+
+def check_consistency(tenant_id, roots=None, limit=None):
+    """
+    Compare stored descendants against live traversal.
+
+    Args:
+        tenant_id: Tenant to check
+        roots: Covered instances to check; defaults to `top_level_nodes`,
+               whose subtrees together cover every stored node
+        limit: Stop after this many roots
+
+    Returns:
+        list of ClosureMismatch for roots whose stored subtree differs
+    """
+    from Tracker.scope import get_descendants
+    from Tracker.utils.tenant_context import tenant_context
+
+    covered = closure_models()
+    if roots is None:
+        roots = top_level_nodes(tenant_id)
+
+    mismatches = []
+    with tenant_context(tenant_id):
+        for checked, root in enumerate(roots):
+            if limit is not None and checked >= limit:
+                break
+            live = get_descendants(root, include_types=covered, strategy='columns')
+            stored = descendants(root)
+            live_nodes = {(ct_id, str(pk)) for ct_id, pks in live.items() for pk in pks}
+            stored_nodes = {(ct_id, str(pk)) for ct_id, pks in stored.items() for pk in pks}
+            if live_nodes != stored_nodes:
+                mismatches.append(ClosureMismatch(
+                    root=root,
+                    missing=live_nodes - stored_nodes,
+                    extra=stored_nodes - live_nodes,
+                ))
+    return mismatches
@@ -26,11 +26,15 @@ def reactivate_user(user) -> None:
 def clear_user_permission_cache(user, tenant=None) -> None:
     """Delete the cached permission set for this user in the given tenant.
 
-    Call after any role or group-permission change.
+    Call after any role or group-permission change. Also drops the
+    request-scoped memo so the rest of the current request sees the change.
     """
+    from Tracker.utils.permission_memo import invalidate
+
     tenant = tenant or user.tenant
     if tenant:
         cache.delete(f'user_{user.id}_tenant_{tenant.id}_perms')
+        invalidate(user_id=user.id, tenant_id=tenant.id)
 
 
 def add_user_to_tenant_group(user, group_or_name, tenant=None, granted_by=None):
@@ -31,6 +31,8 @@ from __future__ import annotations
 import logging
 from typing import TYPE_CHECKING
 
+from django.db.models import F
+
 if TYPE_CHECKING:
     from Tracker.models import StepExecution, Steps, WorkOrder
 
@@ -44,71 +46,115 @@ def substep_completion_blockers(step: "Steps", step_execution: "StepExecution",
 
     Empty list means the substep-completion gate passes for this part.
     """
+    part = getattr(step_execution, 'part', None)
+    if part is None:
+        # Cores don't carry per-part substep completions yet; defer to the
+        # reman-specific gate. Substep gate is part-only for now.
+        return []
+
+    return cohort_substep_completion_blockers(
+        step, [step_execution], work_order,
+    )[step_execution.id]
+
+
+def cohort_substep_completion_blockers(step: "Steps", step_executions: list["StepExecution"],
+                                       work_order: "WorkOrder") -> dict:
+    """Set-based `substep_completion_blockers` for a lot of part executions.
+
+    Loads substeps, completions, sampling decisions and sealed-batch coverage
+    once for the whole cohort, then applies the per-part rules. Returns
+    `{step_execution.id: [blocker, ...]}`; executions without a part map to
+    an empty list.
+    """
     from Tracker.models import (
         BatchExecution,
         SamplingDecision,
-        SamplingOutcome,
         Substep,
         SubstepCompletion,
-        SubstepScope,
     )
 
-    part = getattr(step_execution, 'part', None)
-    if part is None:
-        # Cores don't carry per-part substep completions yet; defer to the
-        # reman-specific gate. Substep gate is part-only for now.
-        return []
+    blockers_by_exec: dict = {se.id: [] for se in step_executions}
+    part_execs = [se for se in step_executions if se.part_id is not None]
+    if not part_execs:
+        return blockers_by_exec
 
     # Exclude archived (soft-deleted) substeps — a voided substep definition
     # must not gate advancement.
     substeps = list(Substep.objects.filter(step=step, archived=False))
     if not substeps:
-        return []
+        return blockers_by_exec
 
     substep_ids = [s.id for s in substeps]
 
-    # Pre-fetch live completions for this StepExecution.
-    completions_by_substep: dict[int, SubstepCompletion] = {
-        c.substep_id: c
-        for c in SubstepCompletion.objects.filter(
-            step_execution=step_execution,
+    # Pre-fetch live completions for every StepExecution in the lot.
+    completions: dict[tuple, SubstepCompletion] = {
+        (c.step_execution_id, c.substep_id): c
+        for c in SubstepCompletion.objects.filter(  # tenant-safe: keyed by the lot's tenant-scoped executions
+            step_execution__in=part_execs,
             substep_id__in=substep_ids,
             is_voided=False,
         )
     }
 
     # Pre-fetch live SamplingDecisions.
-    decisions_by_substep: dict[int, SamplingDecision] = {
-        d.substep_id: d
-        for d in SamplingDecision.objects.filter(
-            step_execution=step_execution,
+    decisions: dict[tuple, SamplingDecision] = {
+        (d.step_execution_id, d.substep_id): d
+        for d in SamplingDecision.objects.filter(  # tenant-safe: keyed by the lot's tenant-scoped executions
+            step_execution__in=part_execs,
             substep_id__in=substep_ids,
             superseded_by__isnull=True,
         )
     }
 
-    # Pre-fetch sealed batches that cover this part for this step
+    # Pre-fetch sealed batches that cover each part for this step
     # (regardless of current cohort-split status — see Case 19 in the
-    # sandbox).
-    sealed_batches_for_part = list(
-        BatchExecution.objects.filter(
-            step=step,
-            parts=part,
-            sealed_at__isnull=False,
+    # sandbox). One row per (batch, member part), in the batch ordering.
+    sealed_batches_by_part: dict = {}
+    sealed_batches: dict = {}
+    for b in BatchExecution.objects.filter(
+        step=step,
+        parts__in=[se.part_id for se in part_execs],
+        sealed_at__isnull=False,
+    ).annotate(member_part_id=F('parts')):
+        sealed_batches_by_part.setdefault(b.member_part_id, []).append(b)
+        sealed_batches.setdefault(b.id, b)
+    cohort_completions_index: set[tuple] = set()
+    if sealed_batches:
+        # batch_execution and substep are both tenant-scoped FKs; the __in
+        # lookup passes tenant-scoped ids from the same context.
+        cohort_completions_index = set(
+            SubstepCompletion.objects.filter(  # tenant-safe: tenant-scoped batch ids
+                batch_execution_id__in=list(sealed_batches),
+                substep__in=substep_ids,
+                is_voided=False,
+            ).values_list('batch_execution_id', 'substep_id')
         )
-    )
-    cohort_completions_index: dict[tuple[int, int], SubstepCompletion] = {}
-    if sealed_batches_for_part:
-        # tenant-safe: batch_execution and substep are both tenant-scoped FKs;
-        # __in lookup passes tenant-scoped instances/ids from the same context.
-        for c in SubstepCompletion.objects.filter(
-            batch_execution__in=sealed_batches_for_part,
-            substep__in=substep_ids,
-            is_voided=False,
-        ):
-            cohort_completions_index[(c.batch_execution_id, c.substep_id)] = c
 
-    def _sealed_batch_with_completion(substep: Substep) -> tuple[BatchExecution | None, bool]:
+    # Terminal-step reconciliation gate is per work order — count once.
+    terminal_blocker = _terminal_pending_blocker(step, work_order)
+
+    for se in part_execs:
+        blockers = _execution_blockers(
+            se,
+            substeps,
+            completions,
+            decisions,
+            sealed_batches_by_part.get(se.part_id, []),
+            cohort_completions_index,
+        )
+        if terminal_blocker:
+            blockers.append(terminal_blocker)
+        blockers_by_exec[se.id] = blockers
+
+    return blockers_by_exec
+
+
+def _execution_blockers(step_execution, substeps, completions, decisions,
+                        sealed_batches_for_part, cohort_completions_index) -> list[str]:
+    """Apply the per-substep rules to one execution using pre-fetched rows."""
+    from Tracker.models import SamplingOutcome, SubstepScope
+
+    def _sealed_batch_with_completion(substep):
         """Return (covering batch, has_completion). batch=None means no
         sealed batch covers this part."""
         for b in sealed_batches_for_part:
@@ -122,12 +168,12 @@ def substep_completion_blockers(step: "Steps", step_execution: "StepExecution",
         # Optional substeps with no completion are skipped (operator
         # explicitly declined). Completions on optional substeps still
         # get re-validated below.
-        completion = completions_by_substep.get(substep.id)
+        completion = completions.get((step_execution.id, substep.id))
         if substep.is_optional and completion is None:
             continue
 
         if substep.scope == SubstepScope.SAMPLED:
-            decision = decisions_by_substep.get(substep.id)
+            decision = decisions.get((step_execution.id, substep.id))
             if decision is None:
                 # No persisted decision — either the entry hook hasn't
                 # run for this StepExecution (Phase 3 backfill pending)
@@ -184,12 +230,18 @@ def substep_completion_blockers(step: "Steps", step_execution: "StepExecution",
                     f"on sealed batch #{batch.id}"
                 )
 
-    # Terminal-step reconciliation gate. Flow #9 blocker #8: if this is
-    # a terminal step (shipment / finished goods), refuse to advance any
-    # part whose WO has live PENDING SamplingDecisions upstream. Forces
-    # supervisor reconciliation before product leaves the system —
-    # prevents shipping unverified parts when rules like LAST_N_PARTS
-    # couldn't decide at step entry.
+    return blockers
+
+
+def _terminal_pending_blocker(step, work_order) -> str | None:
+    """Terminal-step reconciliation gate. Flow #9 blocker #8: if this is
+    a terminal step (shipment / finished goods), refuse to advance any
+    part whose WO has live PENDING SamplingDecisions upstream. Forces
+    supervisor reconciliation before product leaves the system —
+    prevents shipping unverified parts when rules like LAST_N_PARTS
+    couldn't decide at step entry."""
+    from Tracker.models import SamplingDecision, SamplingOutcome
+
     if getattr(step, 'is_terminal', False) and work_order is not None:
         pending_count = SamplingDecision.objects.filter(
             step_execution__part__work_order=work_order,
@@ -197,12 +249,11 @@ def substep_completion_blockers(step: "Steps", step_execution: "StepExecution",
             superseded_by__isnull=True,
         ).count()
         if pending_count:
-            blockers.append(
+            return (
                 f"Terminal step: {pending_count} PENDING sampling "
                 "decision(s) require reconciliation before shipment."
             )
-
-    return blockers
+    return None
 
 
 def _na_problems(substep, completion) -> list[str]:
@@ -91,6 +91,7 @@ from Tracker.models import (
     SubstepResponse,
     SubstepResponseKind,
 )
+from Tracker.services.qms import quality_rollup
 from Tracker.services.qms.inline_capture import record_dwi_measurement
 
 
@@ -273,6 +274,7 @@ def submit_substep(
             QualityReports.objects.filter(pk=report.pk).update(
                 status="FAIL" if has_findings else "PASS",
             )
+            _status_changed(report)
 
         completion = _record_completion(
             substep=substep,
@@ -499,7 +501,15 @@ def _write_substep_response(*, substep, step_execution=None, batch_execution=Non
 def _apply_status(report: QualityReports, cap) -> None:
     raw = (cap.get("status") or "").upper()
     if raw in {"PASS", "FAIL", "PENDING"}:
-        QualityReports.objects.filter(pk=report.pk).update(status=raw)
+        QualityReports.objects.filter(pk=report.pk).update(status=raw)  # tenant-safe: the report being captured
+        _status_changed(report)
+
+
+def _status_changed(report: QualityReports) -> None:
+    # Status is written with queryset updates, which skip the save signals
+    # that keep the dashboard rollup current.
+    if quality_rollup.rollup_enabled():
+        quality_rollup.record_event(report)
 
 
 def _apply_equipment_roles(report: QualityReports, cap) -> None:
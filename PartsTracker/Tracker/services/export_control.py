@@ -80,6 +80,11 @@ class ExportControlService:
         Returns:
             tuple: (allowed: bool, denial_reason: Optional[str])
         """
+        from Tracker.utils.permission_memo import memoized
+        return memoized(('itar', user.id), lambda: cls._itar_decision(user))
+
+    @classmethod
+    def _itar_decision(cls, user: 'User') -> tuple[bool, Optional[str]]:
         # Superusers still need to be US persons for ITAR
         # This is a legal requirement, not a software permission
 
@@ -157,10 +162,23 @@ class ExportControlService:
             list: Classification level values user can access
         """
         from Tracker.models import ClassificationLevel
+        from Tracker.utils.permission_memo import memoized
 
         if user.is_superuser:
             return [level.value for level in ClassificationLevel]
 
+        # Clearance is tenant-scoped, so memoize per resolved tenant.
+        tenant = user._resolve_tenant() if hasattr(user, '_resolve_tenant') else None
+        levels = memoized(
+            ('classification', user.id, getattr(tenant, 'id', None)),
+            lambda: tuple(cls._classification_levels(user)),
+        )
+        return list(levels)
+
+    @classmethod
+    def _classification_levels(cls, user: 'User') -> list[str]:
+        from Tracker.models import ClassificationLevel
+
         # Tenant-scoped permission check (falls back to global perms if the
         # user model predates tenant perms).
         def _can(perm: str) -> bool:
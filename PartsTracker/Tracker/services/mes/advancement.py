@@ -218,8 +218,8 @@ def _evaluate_and_advance(
             },
         )
 
-    # First Piece Inspection is enforced per-part by Steps.can_advance_from_step
-    # (via get_fpi_status) in the cohort / batch / split paths below — that is
+    # First Piece Inspection is enforced per-part by the step gate (via
+    # get_fpi_status) in the cohort / batch / split paths below — that is
     # the single source of truth, so no separate FPI gate is needed here.
 
     cohort = [p for p in parts_at_step if not p.split_from_cohort]
@@ -227,7 +227,7 @@ def _evaluate_and_advance(
 
     result = LotAdvanceResult(status='noop')
 
-    from Tracker.models import StepExecution, Substep, SubstepScope
+    from Tracker.models import Substep, SubstepScope
 
     # On a batch step the cohesion unit is the *batch* (a furnace/wash/
     # autoclave load), not the whole (WO, step) lot. Each load is captured and
@@ -251,13 +251,10 @@ def _evaluate_and_advance(
         # independently. A failed part doesn't hold up passing parts — the
         # failed one is dispositioned (routed to Rework) or held in
         # quarantine; the rest of the cohort moves on.
+        gate = _gate_parts(step=step, wo=wo, parts=cohort)
         for p in cohort:
-            se = StepExecution.get_current_execution(p)
-            if se is None:
-                result.blockers_by_part[str(p.id)] = ['No active StepExecution']
-                continue
-            can_advance, blockers = step.can_advance_from_step(se, wo)
-            if not can_advance:
+            blockers = gate[str(p.id)]
+            if blockers:
                 result.blockers_by_part[str(p.id)] = blockers
                 continue
             try:
@@ -278,15 +275,11 @@ def _evaluate_and_advance(
         # together (a chemical bath cycle, a shared fixture setup). For
         # individually-inspected QA steps, set part_advancement_mode to
         # PER_PART on the Step definition instead.
-        per_part_blockers: dict[str, list[str]] = {}
-        for p in cohort:
-            se = StepExecution.get_current_execution(p)
-            if se is None:
-                per_part_blockers[str(p.id)] = ['No active StepExecution']
-                continue
-            can_advance, blockers = step.can_advance_from_step(se, wo)
-            if not can_advance:
-                per_part_blockers[str(p.id)] = blockers
+        per_part_blockers: dict[str, list[str]] = {
+            part_id: blockers
+            for part_id, blockers in _gate_parts(step=step, wo=wo, parts=cohort).items()
+            if blockers
+        }
 
         if per_part_blockers:
             result.status = 'blocked'
@@ -302,13 +295,10 @@ def _evaluate_and_advance(
             result.status = 'advanced'
 
     # ----- Split path: each part evaluated solo -----
+    split_gate = _gate_parts(step=step, wo=wo, parts=split_parts)
     for p in split_parts:
-        se = StepExecution.get_current_execution(p)
-        if se is None:
-            result.split_parts_blocked[str(p.id)] = ['No active StepExecution']
-            continue
-        can_advance, blockers = step.can_advance_from_step(se, wo)
-        if not can_advance:
+        blockers = split_gate[str(p.id)]
+        if blockers:
             result.split_parts_blocked[str(p.id)] = blockers
             continue
         try:
@@ -333,3 +323,46 @@ def _evaluate_and_advance(
         result.status = 'noop'
 
     return result
+
+
+def _gate_parts(*, step: "Steps", wo: "WorkOrder", parts: list["Parts"]) -> dict[str, list[str]]:
+    """Run the step gate for a set of parts in a fixed number of queries.
+
+    Returns `{part_id: blockers}`; an empty list means the part may advance.
+    Equivalent to calling `Steps.can_advance_from_step` on each part's
+    current StepExecution, but every blocker source is loaded once for the
+    whole set via `Steps.can_advance_cohort_from_step`. That matters because
+    the caller holds SELECT FOR UPDATE on these part rows for the duration.
+    """
+    from Tracker.models import StepExecution
+
+    if not parts:
+        return {}
+
+    # Same pick as StepExecution.get_current_execution: the first open
+    # execution per part in the model's default ordering.
+    current_by_part = {}
+    for se in (
+        StepExecution.objects.filter(part__in=parts, exited_at__isnull=True)  # tenant-safe: locked parts
+        .select_related('assigned_to')
+    ):
+        current_by_part.setdefault(se.part_id, se)
+
+    executions = []
+    for p in parts:
+        se = current_by_part.get(p.id)
+        if se is not None:
+            # Reuse the locked Part row rather than re-reading it per execution.
+            se.part = p
+            executions.append(se)
+
+    gate = step.can_advance_cohort_from_step(executions, wo)
+
+    gated: dict[str, list[str]] = {}
+    for p in parts:
+        se = current_by_part.get(p.id)
+        if se is None:
+            gated[str(p.id)] = ['No active StepExecution']
+        else:
+            gated[str(p.id)] = gate[se.id][1]
+    return gated
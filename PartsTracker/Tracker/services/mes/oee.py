@@ -0,0 +1,655 @@
+"""
+OEE (availability × performance × quality) per machine, work center and shift.
+
+The unit of account is a *shift window*: one occurrence of an active Shift on
+one local day (overnight shifts belong to the day they start). For every
+window and every machine of every work center, one SQL statement
+(`_ENGINE_SQL`) works out:
+
+    planned      window length (clipped to now for a window in progress)
+    planned stop DowntimeEvent time in PLANNED_STOP_CATEGORIES
+    downtime     every other DowntimeEvent, plus DOWNTIME / SETUP TimeEntries,
+                 minus what is already planned stop
+    output       completed StepExecutions exiting in the window at the work
+                 center's steps (EquipmentUsage rows on machine rows), each
+                 worth Steps.expected_duration of ideal time
+    rejects      those units with a FAIL QualityReport on the same visit (its
+                 step_execution, or part and step while the visit was open)
+
+Stops are Postgres ranges intersected with the window and merged with
+`range_agg`, so overlapping events (a breakdown logged as a DowntimeEvent and
+as a TimeEntry) count once. A work center-wide event stops every machine in
+it. Work centers without machines count as one manual station.
+
+    availability = (planned - planned stop - downtime) / (planned - planned stop)
+    performance  = ideal / (planned - planned stop - downtime)
+    quality      = (total - rejects) / total
+
+Ratios are computed from summed seconds and counts, never averaged.
+
+Rollup: with OEE_ROLLUP_ENABLED, windows that have ended are stored as
+OEEBucket rows. Saves of the source events refresh the windows they touch
+once the transaction commits (coalesced per transaction), and the
+roll_up_oee beat task writes windows that ended without any event. Reads take
+buckets for windows older than OEE_ROLLUP_LAG_MINUTES and compute the newer
+ones live, so a 90-day query reads ~one row per machine per shift per day.
+An edit refreshes the windows the row left as well as the ones it entered.
+Rewrites of one tenant's buckets hold a per-tenant lock and run one at a time.
+
+Limitations: buckets key on the current Shift / WorkCenter rows and are not
+refreshed when those change, so editing a shift calendar, a work center's
+equipment, or a step's expected_duration needs a rebuild_oee run over the
+affected days.
+"""
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from Tracker.utils.locks import tenant_xact_lock
+from Tracker.utils.tenant_context import tenant_context
+
+# DowntimeEvent categories that are not availability losses: the machine was
+# not meant to run, so the time leaves the availability denominator.
+PLANNED_STOP_CATEGORIES = ('PLANNED', 'NO_WORK')
+# TimeEntry types that mean the machine or station was stopped.
+LOSS_TIME_ENTRY_TYPES = ('DOWNTIME', 'SETUP')
+
+# Rewrites of a tenant's buckets (event flushes, the beat tick, rebuild) queue
+# on this lock, so their delete / insert can't interleave.
+LOCK_NAME = 'oee_rollup'
+
+GROUP_FIELDS = ('work_center', 'equipment', 'shift', 'day')
+
+SOURCE_STORE = 'store'
+SOURCE_RAW = 'raw'
+
+_TOTAL_FIELDS = (
+    'machines', 'planned_seconds', 'planned_stop_seconds', 'downtime_seconds',
+    'ideal_seconds', 'total_count', 'reject_count',
+)
+
+
+def rollup_enabled() -> bool:
+    return getattr(settings, 'OEE_ROLLUP_ENABLED', False)
+
+
+def settled_before(now: datetime) -> datetime:
+    """Windows ending at or before this are read from the rollup."""
+    return now - timedelta(minutes=settings.OEE_ROLLUP_LAG_MINUTES)
+
+
+# -----------------------------------------------------------------------------
+# Totals
+# -----------------------------------------------------------------------------
+
+@dataclass
+class OEETotals:
+    """Summed OEE inputs for any set of windows; ratios derive from these."""
+    machines: int = 0
+    planned_seconds: float = 0.0
+    planned_stop_seconds: float = 0.0
+    downtime_seconds: float = 0.0
+    ideal_seconds: float = 0.0
+    total_count: int = 0
+    reject_count: int = 0
+
+    def add(self, row: dict) -> None:
+        for name in _TOTAL_FIELDS:
+            setattr(self, name, getattr(self, name) + (row.get(name) or 0))
+
+    @property
+    def loading_seconds(self) -> float:
+        return max(self.planned_seconds - self.planned_stop_seconds, 0.0)
+
+    @property
+    def operating_seconds(self) -> float:
+        return max(self.loading_seconds - self.downtime_seconds, 0.0)
+
+    @property
+    def good_count(self) -> int:
+        return max(self.total_count - self.reject_count, 0)
+
+    @property
+    def availability(self):
+        return self.operating_seconds / self.loading_seconds if self.loading_seconds else None
+
+    @property
+    def performance(self):
+        if not self.operating_seconds or not self.ideal_seconds:
+            return None
+        return self.ideal_seconds / self.operating_seconds
+
+    @property
+    def quality(self):
+        return self.good_count / self.total_count if self.total_count else None
+
+    @property
+    def oee(self):
+        parts = (self.availability, self.performance, self.quality)
+        if any(p is None for p in parts):
+            return None
+        return parts[0] * parts[1] * parts[2]
+
+    def to_dict(self) -> dict:
+        ratio = lambda v: None if v is None else round(v, 4)  # noqa: E731
+        return {
+            'planned_seconds': round(self.planned_seconds, 1),
+            'planned_stop_seconds': round(self.planned_stop_seconds, 1),
+            'downtime_seconds': round(self.downtime_seconds, 1),
+            'operating_seconds': round(self.operating_seconds, 1),
+            'ideal_seconds': round(self.ideal_seconds, 1),
+            'total_count': self.total_count,
+            'good_count': self.good_count,
+            'reject_count': self.reject_count,
+            'availability': ratio(self.availability),
+            'performance': ratio(self.performance),
+            'quality': ratio(self.quality),
+            'oee': ratio(self.oee),
+        }
+
+
+# -----------------------------------------------------------------------------
+# Engine
+# -----------------------------------------------------------------------------
+
+def _seconds(multirange: str) -> str:
+    """SQL for the total length in seconds of a (possibly NULL) tstzmultirange."""
+    return (
+        f"(SELECT COALESCE(SUM(EXTRACT(EPOCH FROM upper(r) - lower(r))), 0) "
+        f"FROM unnest({multirange}) r)"
+    )
+
+
+def _tables() -> dict:
+    from Tracker.models import (
+        DowntimeEvent, EquipmentType, EquipmentUsage, Equipments, QualityReports, Shift, StepExecution,
+        Steps, TimeEntry, WorkCenter,
+    )
+    q = connection.ops.quote_name
+    field = WorkCenter.equipment.field
+    return {
+        'shift': q(Shift._meta.db_table),
+        'work_center': q(WorkCenter._meta.db_table),
+        'wc_equipment': q(field.remote_field.through._meta.db_table),
+        'wc_col': q(field.m2m_column_name()),
+        'eq_col': q(field.m2m_reverse_name()),
+        'equipment': q(Equipments._meta.db_table),
+        'equipment_type': q(EquipmentType._meta.db_table),
+        'downtime': q(DowntimeEvent._meta.db_table),
+        'time_entry': q(TimeEntry._meta.db_table),
+        'execution': q(StepExecution._meta.db_table),
+        'steps': q(Steps._meta.db_table),
+        'usage': q(EquipmentUsage._meta.db_table),
+        'report': q(QualityReports._meta.db_table),
+        'report_equipment': q(QualityReports.equipments.through._meta.db_table),
+    }
+
+
+_ENGINE_SQL = """
+WITH windows AS (
+    SELECT shift_id, day, lo AS window_start, hi AS window_end, tstzrange(lo, LEAST(hi, %(now)s)) AS win
+    FROM (
+        SELECT s.id AS shift_id, d::date AS day,
+               (d::date + s.start_time) AT TIME ZONE %(tz)s AS lo,
+               (d::date + s.end_time
+                + CASE WHEN s.end_time <= s.start_time THEN interval '1 day' ELSE interval '0' END
+               ) AT TIME ZONE %(tz)s AS hi
+        FROM {shift} s
+        CROSS JOIN generate_series(%(first_day)s::timestamp, %(last_day)s::timestamp, interval '1 day') d
+        WHERE s.tenant_id = %(tenant)s AND s.is_active AND s.is_current_version AND NOT s.archived
+          AND (EXTRACT(ISODOW FROM d)::int - 1)::text
+              = ANY(string_to_array(replace(s.days_of_week, ' ', ''), ','))
+    ) w
+    WHERE lo < %(now)s AND lo < %(span_end)s AND hi > %(span_start)s AND {window_filter}
+),
+work_centers AS (
+    SELECT wc.id FROM {work_center} wc
+    WHERE wc.tenant_id = %(tenant)s AND wc.is_current_version AND NOT wc.archived {work_center_filter}
+),
+machines AS (
+    SELECT DISTINCT we.{wc_col} AS work_center_id, e.id AS equipment_id
+    FROM {wc_equipment} we
+    JOIN work_centers wc ON wc.id = we.{wc_col}
+    JOIN {equipment} e ON e.id = we.{eq_col}
+    LEFT JOIN {equipment_type} et ON et.id = e.equipment_type_id
+    WHERE e.is_current_version AND NOT e.archived AND e.status <> 'RETIRED'
+      AND COALESCE(et.track_downtime, TRUE)
+),
+assets AS (
+    SELECT work_center_id, equipment_id FROM machines
+    UNION ALL
+    SELECT wc.id, NULL FROM work_centers wc
+    WHERE NOT EXISTS (SELECT 1 FROM machines m WHERE m.work_center_id = wc.id)
+),
+stops AS (
+    SELECT a.work_center_id, a.equipment_id, d.category = ANY(%(planned_categories)s) AS planned,
+           tstzrange(d.start_time, COALESCE(d.end_time, %(now)s)) AS span
+    FROM {downtime} d
+    JOIN assets a ON d.equipment_id = a.equipment_id
+                  OR (d.equipment_id IS NULL AND d.work_center_id = a.work_center_id)
+    WHERE d.tenant_id = %(tenant)s AND NOT d.archived
+      AND d.start_time < COALESCE(d.end_time, %(now)s)
+      AND d.start_time < %(range_end)s AND COALESCE(d.end_time, %(now)s) > %(range_start)s
+    UNION ALL
+    SELECT a.work_center_id, a.equipment_id, FALSE, tstzrange(t.start_time, t.end_time)
+    FROM {time_entry} t
+    JOIN assets a ON t.equipment_id = a.equipment_id
+                  OR (t.equipment_id IS NULL AND t.work_center_id = a.work_center_id)
+    WHERE t.tenant_id = %(tenant)s AND NOT t.archived AND t.entry_type = ANY(%(loss_entry_types)s)
+      AND t.start_time < t.end_time
+      AND t.start_time < %(range_end)s AND t.end_time > %(range_start)s
+),
+losses AS (
+    SELECT w.shift_id, w.day, s.work_center_id, s.equipment_id,
+           range_agg(s.span * w.win) FILTER (WHERE s.planned) AS planned_mr,
+           range_agg(s.span * w.win) FILTER (WHERE NOT s.planned) AS down_mr
+    FROM windows w JOIN stops s ON s.span && w.win
+    GROUP BY 1, 2, 3, 4
+),
+asset_time AS (
+    SELECT w.shift_id, w.day, w.window_start, w.window_end, a.work_center_id, a.equipment_id,
+           EXTRACT(EPOCH FROM upper(w.win) - lower(w.win)) AS planned_seconds,
+           {planned_stop_seconds} AS planned_stop_seconds,
+           {downtime_seconds} AS downtime_seconds
+    FROM windows w CROSS JOIN assets a
+    LEFT JOIN losses l ON l.shift_id = w.shift_id AND l.day = w.day
+                      AND l.work_center_id = a.work_center_id
+                      AND l.equipment_id IS NOT DISTINCT FROM a.equipment_id
+),
+work_center_output AS (
+    SELECT w.shift_id, w.day, st.work_center_id, COUNT(*) AS total_count,
+           COALESCE(SUM(EXTRACT(EPOCH FROM st.expected_duration)), 0) AS ideal_seconds,
+           COUNT(*) FILTER (WHERE EXISTS (
+               SELECT 1 FROM {report} q
+               WHERE q.status = 'FAIL' AND NOT q.archived
+                 AND (q.step_execution_id = se.id OR (
+                      -- Hand-logged reports: same part and step, during this visit.
+                      q.step_execution_id IS NULL AND q.part_id = se.part_id AND q.step_id = se.step_id
+                      AND q.created_at >= se.entered_at
+                      AND q.created_at < COALESCE((
+                          SELECT MIN(n.entered_at) FROM {execution} n
+                          WHERE n.part_id = se.part_id AND n.step_id = se.step_id
+                            AND n.visit_number > se.visit_number
+                      ), 'infinity')))
+           )) AS reject_count
+    FROM windows w
+    JOIN {execution} se ON se.exited_at >= lower(w.win) AND se.exited_at < upper(w.win)
+    JOIN {steps} st ON st.id = se.step_id
+    WHERE se.tenant_id = %(tenant)s AND NOT se.archived AND se.status = 'COMPLETED'
+      AND se.exited_at >= %(range_start)s AND se.exited_at < %(range_end)s
+      AND st.work_center_id IN (SELECT id FROM work_centers)
+    GROUP BY 1, 2, 3
+),
+machine_output AS (
+    SELECT w.shift_id, w.day, u.equipment_id, COUNT(*) AS total_count,
+           COALESCE(SUM(EXTRACT(EPOCH FROM st.expected_duration)), 0) AS ideal_seconds,
+           COUNT(*) FILTER (WHERE EXISTS (
+               SELECT 1 FROM {report} q
+               WHERE q.status = 'FAIL' AND NOT q.archived
+                 AND (q.id = u.error_report_id OR (
+                      q.part_id = u.part_id AND q.step_id = u.step_id
+                      AND EXISTS (SELECT 1 FROM {report_equipment} qe
+                                  WHERE qe.quality_report_id = q.id AND qe.equipment_id = u.equipment_id)))
+           )) AS reject_count
+    FROM windows w
+    JOIN {usage} u ON u.used_at >= lower(w.win) AND u.used_at < upper(w.win)
+    LEFT JOIN {steps} st ON st.id = u.step_id
+    WHERE u.tenant_id = %(tenant)s AND NOT u.archived
+      AND u.used_at >= %(range_start)s AND u.used_at < %(range_end)s
+      AND u.equipment_id IN (SELECT equipment_id FROM machines)
+    GROUP BY 1, 2, 3
+)
+SELECT t.shift_id, t.day, t.window_start, t.window_end, t.work_center_id, t.equipment_id, 1 AS machines,
+       t.planned_seconds, t.planned_stop_seconds, t.downtime_seconds,
+       COALESCE(o.ideal_seconds, 0), COALESCE(o.total_count, 0), COALESCE(o.reject_count, 0)
+FROM asset_time t
+LEFT JOIN machine_output o ON o.shift_id = t.shift_id AND o.day = t.day AND o.equipment_id = t.equipment_id
+WHERE t.equipment_id IS NOT NULL {machine_rows}
+UNION ALL
+SELECT t.shift_id, t.day, t.window_start, t.window_end, t.work_center_id, NULL, COUNT(*),
+       SUM(t.planned_seconds), SUM(t.planned_stop_seconds), SUM(t.downtime_seconds),
+       COALESCE(MAX(o.ideal_seconds), 0), COALESCE(MAX(o.total_count), 0), COALESCE(MAX(o.reject_count), 0)
+FROM asset_time t
+LEFT JOIN work_center_output o ON o.shift_id = t.shift_id AND o.day = t.day
+                              AND o.work_center_id = t.work_center_id
+GROUP BY t.shift_id, t.day, t.window_start, t.window_end, t.work_center_id
+"""
+
+_ROW_COLUMNS = (
+    'shift_id', 'day', 'window_start', 'window_end', 'work_center_id', 'equipment_id', 'machines',
+    'planned_seconds', 'planned_stop_seconds', 'downtime_seconds',
+    'ideal_seconds', 'total_count', 'reject_count',
+)
+
+
+def _engine_query(tenant_id, *, first_day, last_day, span_start, span_end, now, window_filter='TRUE',
+                  work_center_ids=None, machine_rows=True, range_start=None, extra_params=None):
+    """The engine SQL and its params for windows starting on [first_day, last_day].
+
+    `range_start` narrows the events read when the caller knows no wanted
+    window starts before it.
+    """
+    tables = _tables()
+    sql = _ENGINE_SQL.format(
+        **tables,
+        window_filter=window_filter,
+        work_center_filter='AND wc.id = ANY(%(work_center_ids)s)' if work_center_ids else '',
+        machine_rows='' if machine_rows else 'AND FALSE',
+        planned_stop_seconds=_seconds('l.planned_mr'),
+        downtime_seconds=_seconds("l.down_mr - COALESCE(l.planned_mr, '{}'::tstzmultirange)"),
+    )
+    tz = timezone.get_current_timezone()
+    first_instant = timezone.make_aware(datetime.combine(first_day, time.min), tz)
+    params = {
+        'tenant': tenant_id,
+        'tz': timezone.get_current_timezone_name(),
+        'first_day': first_day,
+        'last_day': last_day,
+        'span_start': span_start,
+        'span_end': span_end,
+        # Stops and output can't reach outside the windows' own bounds.
+        'range_start': max(range_start, first_instant) if range_start else first_instant,
+        'range_end': min(now, timezone.make_aware(datetime.combine(last_day + timedelta(days=2), time.min), tz)),
+        'now': now,
+        'planned_categories': list(PLANNED_STOP_CATEGORIES),
+        'loss_entry_types': list(LOSS_TIME_ENTRY_TYPES),
+        'work_center_ids': list(work_center_ids or []),
+        **(extra_params or {}),
+    }
+    return sql, params
+
+
+def compute_windows(tenant_id, first_day: date, last_day: date, *, now=None, after=None,
+                    work_center_ids=None, machine_rows=True) -> list[dict]:
+    """OEE inputs straight from the events for windows starting on [first_day, last_day].
+
+    `after` keeps only windows ending after that instant (the live tail of a
+    rollup read). Rows have the OEEBucket columns, with `_id` foreign keys.
+    """
+    now = now or timezone.now()
+    # A window is at most 24h, so one ending after `after` started after
+    # `after - 1 day`: the live tail never reads further back than that.
+    earliest = after - timedelta(days=1) if after else None
+    if earliest:
+        first_day = max(first_day, timezone.localtime(earliest).date())
+        if first_day > last_day:
+            return []
+    far_past = timezone.make_aware(datetime.combine(first_day - timedelta(days=1), time.min))
+    sql, params = _engine_query(
+        tenant_id, first_day=first_day, last_day=last_day, span_start=far_past, span_end=now, now=now,
+        window_filter='hi > %(after)s' if after else 'TRUE', work_center_ids=work_center_ids,
+        machine_rows=machine_rows, range_start=earliest, extra_params={'after': after},
+    )
+    with tenant_context(tenant_id), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [dict(zip(_ROW_COLUMNS, row)) for row in cursor.fetchall()]
+
+
+# -----------------------------------------------------------------------------
+# Rollup maintenance
+# -----------------------------------------------------------------------------
+
+def refresh(tenant_id, start: datetime, end: datetime, *, now=None) -> int:
+    """Rewrite the buckets of every ended window overlapping [start, end]. Returns rows written."""
+    from Tracker.models import OEEBucket
+
+    now = now or timezone.now()
+    start, end = min(start, now), min(max(end, start), now)
+    # Overnight windows started the local day before.
+    first_day = timezone.localtime(start).date() - timedelta(days=1)
+    last_day = timezone.localtime(end).date()
+    # A window ending exactly at `start` doesn't overlap, so widen by a second
+    # to catch an instant event (a completion) on a window boundary.
+    span_start, span_end = start, end + timedelta(seconds=1)
+    sql, params = _engine_query(
+        tenant_id, first_day=first_day, last_day=last_day, span_start=span_start, span_end=span_end,
+        now=now, window_filter='hi <= %(now)s',
+    )
+    columns = ', '.join(name for name in _ROW_COLUMNS)
+    with tenant_context(tenant_id), transaction.atomic():
+        tenant_xact_lock(LOCK_NAME, tenant_id)
+        OEEBucket.objects.filter(
+            tenant_id=tenant_id, day__gte=first_day, day__lte=last_day,
+            window_start__lt=span_end, window_end__gt=span_start, window_end__lte=now,
+        ).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {connection.ops.quote_name(OEEBucket._meta.db_table)} "
+                f"(tenant_id, {columns}, updated_at) "
+                f"SELECT %(tenant)s, e.*, %(now)s FROM ({sql}) e",
+                params,
+            )
+            return cursor.rowcount
+
+
+def rebuild(tenant_id, first_day: date = None, last_day: date = None, *, now=None) -> int:
+    """Recompute every bucket for a tenant (from its first event when `first_day` is None)."""
+    from Tracker.models import DowntimeEvent, OEEBucket, StepExecution
+
+    now = now or timezone.now()
+    last = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min)) if last_day else now
+    if first_day is None:
+        with tenant_context(tenant_id):
+            earliest = [
+                DowntimeEvent.objects.filter(tenant_id=tenant_id).order_by('start_time')
+                .values_list('start_time', flat=True).first(),
+                StepExecution.objects.filter(tenant_id=tenant_id, exited_at__isnull=False)
+                .order_by('exited_at').values_list('exited_at', flat=True).first(),
+            ]
+        earliest = [e for e in earliest if e is not None]
+        if not earliest:
+            with tenant_context(tenant_id):
+                OEEBucket.objects.filter(tenant_id=tenant_id).delete()
+            return 0
+        first = min(earliest)
+    else:
+        first = timezone.make_aware(datetime.combine(first_day, time.min))
+
+    written = 0
+    with transaction.atomic():
+        tenant_xact_lock(LOCK_NAME, tenant_id)
+        if first_day is None and last_day is None:
+            with tenant_context(tenant_id):
+                OEEBucket.objects.filter(tenant_id=tenant_id).delete()
+        # A month at a time keeps each statement's window set small.
+        chunk_start = first
+        while chunk_start < last:
+            chunk_end = min(chunk_start + timedelta(days=31), last)
+            written += refresh(tenant_id, chunk_start, chunk_end, now=now)
+            chunk_start = chunk_end
+    return written
+
+
+@dataclass(frozen=True)
+class BucketMismatch:
+    key: tuple
+    stored: dict | None
+    computed: dict | None
+
+
+def check_consistency(tenant_id, first_day: date, last_day: date, *, now=None) -> list[BucketMismatch]:
+    """Compare stored buckets for settled windows against a recompute from the events."""
+    from Tracker.models import OEEBucket
+
+    now = now or timezone.now()
+    settled = settled_before(now)
+    key = lambda r: (r['work_center_id'], r['equipment_id'], r['shift_id'], r['day'])  # noqa: E731
+    computed = {
+        key(r): r for r in compute_windows(tenant_id, first_day, last_day, now=now)
+        if r['window_end'] <= settled
+    }
+    with tenant_context(tenant_id):
+        stored = {
+            key(r): r for r in OEEBucket.objects.filter(
+                tenant_id=tenant_id, day__gte=first_day, day__lte=last_day, window_end__lte=settled,
+            ).values(*_ROW_COLUMNS)
+        }
+
+    def same(a, b):
+        return all(abs((a[f] or 0) - (b[f] or 0)) <= 1e-6 for f in _TOTAL_FIELDS)
+
+    return [
+        BucketMismatch(k, stored.get(k), computed.get(k))
+        for k in sorted(stored.keys() | computed.keys(), key=str)
+        if k not in stored or k not in computed or not same(stored[k], computed[k])
+    ]
+
+
+# Spans touched in the current transaction, refreshed once on commit. A
+# rolled-back transaction leaves its spans here; they're refreshed with the
+# next commit, which only costs a recompute.
+_pending = threading.local()
+
+
+def schedule_refresh(tenant_id, start: datetime, end: datetime = None) -> None:
+    """Refresh the windows overlapping [start, end] after the current transaction commits."""
+    if tenant_id is None or start is None:
+        return
+    end = end or start
+    spans = getattr(_pending, 'spans', None)
+    if spans is None:
+        spans = _pending.spans = {}
+    if tenant_id in spans:
+        lo, hi = spans[tenant_id]
+        spans[tenant_id] = (min(lo, start), max(hi, end))
+    else:
+        spans[tenant_id] = (start, end)
+    transaction.on_commit(_flush, robust=True)
+
+
+def _flush() -> None:
+    spans, _pending.spans = getattr(_pending, 'spans', None) or {}, {}
+    now = timezone.now()
+    for tenant_id, (start, end) in spans.items():
+        # Nothing in a window that hasn't ended yet is stored.
+        if start < now:
+            refresh(tenant_id, start, end, now=now)
+
+
+def _span(instance):
+    """(start, end) of the windows a DowntimeEvent / TimeEntry / StepExecution /
+    EquipmentUsage row counts in, or None when it counts nowhere."""
+    from Tracker.models import DowntimeEvent, EquipmentUsage, StepExecution, TimeEntry
+
+    if isinstance(instance, DowntimeEvent):
+        return instance.start_time, instance.end_time or timezone.now()
+    if isinstance(instance, TimeEntry):
+        if instance.entry_type in LOSS_TIME_ENTRY_TYPES and instance.end_time:
+            return instance.start_time, instance.end_time
+        return None
+    if isinstance(instance, StepExecution):
+        return (instance.exited_at, instance.exited_at) if instance.exited_at else None
+    if isinstance(instance, EquipmentUsage):
+        return instance.used_at, instance.used_at
+    return None
+
+
+def remember_previous(instance) -> None:
+    """Before a source row save: keep the span it counts in now, so the
+    windows it leaves are refreshed along with the ones it moves into."""
+    if instance._state.adding:
+        return
+    # tenant-safe: re-reads the row being saved
+    previous = type(instance).unscoped.filter(pk=instance.pk).first()
+    instance._oee_previous_span = _span(previous) if previous else None
+
+
+def record_event(instance) -> None:
+    """Schedule a refresh for a saved or deleted source row (see Tracker/signals.py)."""
+    from Tracker.models import EquipmentUsage, QualityReports, StepExecution
+
+    tenant_id = instance.tenant_id
+    if not isinstance(instance, QualityReports):
+        for span in (_span(instance), getattr(instance, '_oee_previous_span', None)):
+            if span:
+                schedule_refresh(tenant_id, *span)
+        return
+
+    # A reject counts in the window its unit left the step.
+    if instance.step_execution_id:
+        with tenant_context(tenant_id):
+            exited_at = (StepExecution.objects.filter(pk=instance.step_execution_id)
+                         .values_list('exited_at', flat=True).first())
+        schedule_refresh(tenant_id, exited_at)
+        return
+    if not (instance.part_id and instance.step_id):
+        return
+    with tenant_context(tenant_id):
+        exits = list(
+            StepExecution.objects.filter(
+                part_id=instance.part_id, step_id=instance.step_id, exited_at__isnull=False,
+            ).values_list('exited_at', flat=True)
+        ) + list(
+            EquipmentUsage.objects.filter(
+                part_id=instance.part_id, step_id=instance.step_id,
+            ).values_list('used_at', flat=True)
+        )
+    if exits:
+        schedule_refresh(tenant_id, min(exits), max(exits))
+
+
+# -----------------------------------------------------------------------------
+# Queries
+# -----------------------------------------------------------------------------
+
+def summarize(tenant_id, first_day: date, last_day: date, *, group_by=('work_center',),
+              work_center_ids=None, equipment_ids=None, shift_ids=None, source=SOURCE_STORE,
+              now=None) -> list[dict]:
+    """OEE per group over windows starting on [first_day, last_day].
+
+    `group_by` is a subset of GROUP_FIELDS (empty for one plant-wide row).
+    Grouping or filtering by equipment reads machine rows; otherwise work
+    center rows. Groups come back sorted by their key.
+    """
+    from Tracker.models import OEEBucket
+
+    now = now or timezone.now()
+    machine_level = 'equipment' in group_by or bool(equipment_ids)
+    group_by = tuple(f for f in GROUP_FIELDS if f in group_by)
+    keys = tuple('day' if f == 'day' else f'{f}_id' for f in group_by)
+
+    def wanted(row):
+        return (
+            (row['equipment_id'] is not None) == machine_level
+            and (not equipment_ids or row['equipment_id'] in equipment_ids)
+            and (not shift_ids or row['shift_id'] in shift_ids)
+        )
+
+    totals = defaultdict(OEETotals)
+    live_after = None
+    if source == SOURCE_STORE:
+        settled = settled_before(now)
+        buckets = OEEBucket.objects.filter(
+            tenant_id=tenant_id, day__gte=first_day, day__lte=last_day, window_end__lte=settled,
+            equipment__isnull=not machine_level,
+        )
+        if work_center_ids:
+            buckets = buckets.filter(work_center_id__in=work_center_ids)
+        if equipment_ids:
+            buckets = buckets.filter(equipment_id__in=equipment_ids)
+        if shift_ids:
+            buckets = buckets.filter(shift_id__in=shift_ids)
+        with tenant_context(tenant_id):
+            for row in buckets.values(*keys).annotate(**{f: Sum(f) for f in _TOTAL_FIELDS}).order_by():
+                totals[tuple(row[k] for k in keys)].add(row)
+        live_after = settled
+
+    for row in compute_windows(
+        tenant_id, first_day, last_day, now=now, after=live_after,
+        work_center_ids=work_center_ids, machine_rows=machine_level,
+    ):
+        if wanted(row):
+            totals[tuple(row[k] for k in keys)].add(row)
+
+    return [
+        {**dict(zip(group_by, key)), **total.to_dict()}
+        for key, total in sorted(totals.items(), key=lambda kv: tuple(str(v) for v in kv[0]))
+    ]
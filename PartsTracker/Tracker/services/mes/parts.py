@@ -23,7 +23,13 @@ from Tracker.models.mes_lite import (
     StepExecution,
     WorkOrderStatus,
 )
-from Tracker.services.mes.sampling_applier import SamplingFallbackApplier
+from Tracker.services.core import scope_closure
+from Tracker.services.mes import work_queue
+from Tracker.services.mes.sampling_applier import (
+    SamplingCohortEvaluator,
+    SamplingFallbackApplier,
+    assign_sampling_result,
+)
 
 
 @dataclass(frozen=True)
@@ -274,12 +280,10 @@ def advance_part_step(
         for p in ready_parts:
             p.step = next_step
             p.part_status = PartsStatus.IN_PROGRESS
-            evaluator = SamplingFallbackApplier(part=p)
-            result = evaluator.evaluate()
-            p.requires_sampling = result.get("requires_sampling", False)
-            p.sampling_rule = result.get("rule")
-            p.sampling_ruleset = result.get("ruleset")
-            p.sampling_context = result.get("context", {})
+        sampling = SamplingCohortEvaluator(ready_parts).evaluate()
+
+        for p in ready_parts:
+            assign_sampling_result(p, sampling[p.pk])
 
             transition_logs.append(StepTransitionLog(part=p, step=next_step, operator=operator, authorized_by=authorizer))
 
@@ -306,6 +310,11 @@ def advance_part_step(
         # tenant-safe: each row's part / step FKs constrain it to the same tenant
         StepTransitionLog.objects.bulk_create(transition_logs)
         created_execs = StepExecution.objects.bulk_create(step_executions)
+        if scope_closure.closure_enabled():
+            scope_closure.add_nodes(created_execs)
+        # bulk_create skips the save signals that keep the queue current.
+        if work_queue.projection_enabled():
+            work_queue.schedule_refresh(part.tenant_id, part.work_order_id)
 
         # Phase 3: write per-substep SamplingDecision rows for each new exec.
         from Tracker.services.dwi.sampling_decisions import evaluate_substep_sampling
@@ -2,9 +2,21 @@
 Sampling rule evaluation. Given a Part, resolves which ruleset applies
 (primary or fallback trigger), picks a matching rule, logs the decision.
 Re-evaluation of remaining parts in a work order also lives here.
+
+`SamplingCohortEvaluator` makes the same decisions for many parts at once:
+one ruleset lookup and one ordered cohort read per (work order, step, part
+type), then bulk writes. Use it wherever parts are evaluated in a loop.
 """
 from __future__ import annotations
 
+import json
+import random
+from bisect import bisect_right
+from collections import defaultdict
+
+# Primary keys per UPDATE in SamplingCohortEvaluator.apply.
+UPDATE_BATCH_SIZE = 5000
+
 
 class SamplingFallbackApplier:
     """
@@ -162,18 +174,204 @@ class SamplingFallbackApplier:
             id__gt=self.part.id
         )
 
-        updates = []
-        for part in remaining_parts:
-            evaluator = SamplingFallbackApplier(part)
-            result = evaluator.evaluate()
+        SamplingCohortEvaluator(remaining_parts).apply()
+
+
+def assign_sampling_result(part, result):
+    """Copy an evaluation result onto the part's sampling fields (unsaved)."""
+    part.requires_sampling = result.get("requires_sampling", False)
+    part.sampling_rule = result.get("rule")
+    part.sampling_ruleset = result.get("ruleset")
+    part.sampling_context = result.get("context", {})
+
+
+class SamplingCohortEvaluator:
+    """
+    Set-based SamplingFallbackApplier for a batch of parts.
+
+    Parts are grouped by (work_order, step, part_type). Each group resolves
+    its ruleset once and reads its cohort once, ordered by (created_at, id);
+    every rule is then decided for every part from that one list. Decisions
+    and audit rows are the ones `SamplingFallbackApplier(part).evaluate()`
+    would produce part by part, without its per-part cohort reads.
+    """
+
+    def __init__(self, parts):
+        self.parts = list(parts)
+
+    def evaluate(self):
+        """Return {part.pk: result} and bulk-write the audit rows."""
+        from Tracker.models import SamplingAuditLog
 
-            part.requires_sampling = result.get("requires_sampling", False)
-            part.sampling_rule = result.get("rule")
-            part.sampling_ruleset = result.get("ruleset")
-            part.sampling_context = result.get("context", {})
-            updates.append(part)
+        groups = defaultdict(list)
+        for part in self.parts:
+            groups[(part.work_order_id, part.step_id, part.part_type_id)].append(part)
+
+        results, audit_rows = {}, []
+        for (work_order_id, step_id, part_type_id), parts in groups.items():
+            if not step_id or not part_type_id:
+                for part in parts:
+                    results[part.pk] = {"requires_sampling": False}
+                continue
+            self._evaluate_group(work_order_id, step_id, part_type_id, parts, results, audit_rows)
+
+        # Audit rows in input order, like the per-part path writes them.
+        order = {part.pk: i for i, part in enumerate(self.parts)}
+        audit_rows.sort(key=lambda row: order[row.part_id])
+        # tenant-safe: each row carries its part's tenant_id
+        SamplingAuditLog.objects.bulk_create(audit_rows, batch_size=1000)
+        return results
+
+    def apply(self):
+        """Evaluate, then write the parts' sampling fields.
 
-        Parts.objects.bulk_update(
-            updates,
-            ["requires_sampling", "sampling_rule", "sampling_ruleset", "sampling_context"]
+        A batch only reaches a handful of distinct outcomes (one per rule and
+        reason), so parts are written with one UPDATE per outcome rather
+        than a per-row CASE from bulk_update.
+        """
+        from Tracker.models import Parts
+
+        results = self.evaluate()
+        outcomes = defaultdict(list)
+        for part in self.parts:
+            assign_sampling_result(part, results[part.pk])
+            key = (
+                part.requires_sampling,
+                part.sampling_rule_id,
+                part.sampling_ruleset_id,
+                json.dumps(part.sampling_context, sort_keys=True),
+            )
+            outcomes[key].append(part.pk)
+
+        for (requires_sampling, rule_id, ruleset_id, _), pks in outcomes.items():
+            context = results[pks[0]].get("context", {})
+            for start in range(0, len(pks), UPDATE_BATCH_SIZE):
+                # tenant-safe: pks come from parts the caller already scoped
+                Parts.objects.filter(pk__in=pks[start:start + UPDATE_BATCH_SIZE]).update(
+                    requires_sampling=requires_sampling,
+                    sampling_rule_id=rule_id,
+                    sampling_ruleset_id=ruleset_id,
+                    sampling_context=context,
+                )
+        return self.parts
+
+    def _evaluate_group(self, work_order_id, step_id, part_type_id, parts, results, audit_rows):
+        from Tracker.models import Parts, SamplingAuditLog, SamplingRuleSet, SamplingTriggerState
+
+        active_fallback = SamplingTriggerState.objects.filter(
+            step_id=step_id,
+            work_order_id=work_order_id,
+            active=True
+        ).first()
+
+        if active_fallback:
+            ruleset = active_fallback.ruleset
+            context_info = "Using fallback ruleset"
+            ruleset_type = "FALLBACK"
+        else:
+            ruleset = SamplingRuleSet.objects.filter(
+                step_id=step_id,
+                part_type_id=part_type_id,
+                active=True,
+                is_fallback=False
+            ).order_by("version").last()
+            context_info = "Using primary ruleset"
+            ruleset_type = "PRIMARY"
+
+        if not ruleset:
+            for part in parts:
+                results[part.pk] = {"requires_sampling": False}
+            return
+
+        rules = list(ruleset.rules.order_by("order"))
+        cohort = list(
+            Parts.objects.filter(
+                work_order_id=work_order_id,
+                part_type_id=part_type_id,
+                step_id=step_id
+            ).order_by('created_at', 'id').values_list('id', 'created_at')
         )
+        cohort_ids = [part_id for part_id, _ in cohort]
+        cohort_created = [created_at for _, created_at in cohort]
+        position = {part_id: i for i, part_id in enumerate(cohort_ids)}
+
+        def log(part, rule, decision):
+            audit_rows.append(SamplingAuditLog(
+                tenant_id=part.tenant_id,
+                part=part,
+                rule=rule,
+                sampling_decision=decision,
+                ruleset_type=ruleset_type
+            ))
+
+        for part in parts:
+            index = position.get(part.pk)
+            # Cohort parts created at or before this one, ties included.
+            created_upto = bisect_right(cohort_created, part.created_at)
+
+            for rule in rules:
+                if self._should_sample(rule, part, index, created_upto, len(cohort)):
+                    log(part, rule, True)
+                    results[part.pk] = {
+                        "requires_sampling": True,
+                        "rule": rule,
+                        "ruleset": ruleset,
+                        "context": {"reason": f"{context_info} - matched {rule.rule_type}"}
+                    }
+                    break
+
+                if rule.rule_type in ["FIRST_N_PARTS", "LAST_N_PARTS"]:
+                    log(part, rule, False)
+                    results[part.pk] = {
+                        "requires_sampling": False,
+                        "rule": None,
+                        "ruleset": ruleset,
+                        "context": {"reason": f"{context_info} - excluded by {rule.rule_type}"}
+                    }
+                    break
+            else:
+                if rules:
+                    log(part, rules[0], False)
+                results[part.pk] = {
+                    "requires_sampling": False,
+                    "rule": None,
+                    "ruleset": ruleset,
+                    "context": {"reason": f"{context_info} - no rules triggered"}
+                }
+
+    @staticmethod
+    def _should_sample(rule, part, index, created_upto, total):
+        """SamplingFallbackApplier._should_sample against a pre-read cohort.
+
+        `index` is the part's 0-based position in the cohort (None if it
+        isn't in it), `created_upto` the number of cohort parts created at
+        or before it, `total` the cohort size.
+        """
+        if not rule.value:
+            return False
+
+        if rule.rule_type == "EVERY_NTH_PART":
+            return index is not None and (index + 1) % rule.value == 0
+
+        elif rule.rule_type == "PERCENTAGE":
+            threshold = int(total * (rule.value / 100))
+            return index is not None and index < threshold
+
+        elif rule.rule_type == "RANDOM":
+            # Same seed and draw as the per-part path, on a private generator.
+            return random.Random(part.created_at.timestamp()).random() < (rule.value / 100.0)
+
+        elif rule.rule_type == "FIRST_N_PARTS":
+            return created_upto <= rule.value
+
+        elif rule.rule_type == "LAST_N_PARTS":
+            return created_upto > (total - rule.value)
+
+        elif rule.rule_type == "EXACT_COUNT":
+            if rule.value <= 0:
+                return False
+            if rule.value >= total:
+                return True
+            return index is not None and index < rule.value
+
+        return False
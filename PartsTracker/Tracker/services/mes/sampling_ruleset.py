@@ -23,7 +23,7 @@ from Tracker.models.mes_standard import SamplingRuleSet, SamplingTriggerState
 def _reevaluate_active_parts_for_ruleset(ruleset: SamplingRuleSet, user=None) -> None:
     """Re-evaluate sampling assignment for parts currently at the ruleset's step."""
     from Tracker.models.mes_lite import Parts, PartsStatus
-    from Tracker.services.mes.sampling_applier import SamplingFallbackApplier
+    from Tracker.services.mes.sampling_applier import SamplingCohortEvaluator
 
     active_parts = Parts.objects.filter(
         step=ruleset.step,
@@ -31,21 +31,7 @@ def _reevaluate_active_parts_for_ruleset(ruleset: SamplingRuleSet, user=None) ->
         part_status__in=[PartsStatus.PENDING, PartsStatus.IN_PROGRESS],
     )
 
-    updates = []
-    for part in active_parts:
-        evaluator = SamplingFallbackApplier(part=part)
-        result = evaluator.evaluate()
-
-        part.requires_sampling = result.get("requires_sampling", False)
-        part.sampling_rule = result.get("rule")
-        part.sampling_ruleset = result.get("ruleset")
-        part.sampling_context = result.get("context", {})
-        updates.append(part)
-
-    Parts.objects.bulk_update(
-        updates,
-        ["requires_sampling", "sampling_rule", "sampling_ruleset", "sampling_context"],
-    )
+    SamplingCohortEvaluator(active_parts).apply()
 
 
 def _apply_fallback_to_remaining_parts_for_ruleset(
@@ -53,7 +39,7 @@ def _apply_fallback_to_remaining_parts_for_ruleset(
 ) -> None:
     """Apply fallback sampling to parts in the same work order that follow the triggering part."""
     from Tracker.models.mes_lite import Parts, PartsStatus
-    from Tracker.services.mes.sampling_applier import SamplingFallbackApplier
+    from Tracker.services.mes.sampling_applier import SamplingCohortEvaluator
 
     remaining_parts = Parts.objects.filter(
         work_order=triggering_part.work_order,
@@ -63,21 +49,7 @@ def _apply_fallback_to_remaining_parts_for_ruleset(
         id__gt=triggering_part.id,
     )
 
-    updates = []
-    for part in remaining_parts:
-        evaluator = SamplingFallbackApplier(part=part)
-        result = evaluator.evaluate()
-
-        part.requires_sampling = result.get("requires_sampling", False)
-        part.sampling_rule = result.get("rule")
-        part.sampling_ruleset = result.get("ruleset")
-        part.sampling_context = result.get("context", {})
-        updates.append(part)
-
-    Parts.objects.bulk_update(
-        updates,
-        ["requires_sampling", "sampling_rule", "sampling_ruleset", "sampling_context"],
-    )
+    SamplingCohortEvaluator(remaining_parts).apply()
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,551 @@
+"""
+Finite-capacity scheduling of open WorkOrders onto ScheduleSlots (CP-SAT).
+
+`solve_schedule(tenant)` turns every open WorkOrder into one task per
+remaining process step that has a WorkCenter, places the tasks with OR-Tools
+CP-SAT and writes the result back as ScheduleSlot rows, one per shift window
+a task spans.
+
+Time model. The solver works in *working minutes*: minutes inside an active
+Shift, counted from the solve start. `ShiftCalendar` maps between that axis
+and wall-clock time, so a task never runs outside a shift and a task longer
+than a shift simply continues in the next one. Slots are cut at shift
+boundaries on the way back.
+
+Tasks. Duration is `Steps.expected_duration` (per part, SCHEDULER_DEFAULT_
+STEP_MINUTES when unset) times the WorkOrder's open parts (its quantity if it
+has none yet), divided by the WorkCenter's `default_efficiency`. Remaining
+steps start at the earliest step any open part is currently at. Steps follow
+ProcessStep order within a WorkOrder; a step may start only when the step
+before it has finished.
+
+Capacity. A WorkCenter runs as many tasks at once as it has IN_SERVICE
+equipment without open downtime (1 when it has no equipment at all, i.e. a
+manual station; 0 makes its WorkOrders unschedulable). Downtime that ends
+inside the horizon and slots of WorkOrders not being scheduled occupy the
+capacity they use.
+
+Warm start. Existing slots are used as solution hints: by step where the
+solver wrote them, by (WorkOrder, WorkCenter) for hand-placed ones. IN_PROGRESS
+slots, and SCHEDULED ones starting inside the frozen fence and not yet over,
+are pinned and left in place; SCHEDULED slots that ended without starting are
+re-planned. After one rush order or one lost machine most hints are still
+valid, so CP-SAT repairs the previous plan instead of searching from scratch.
+
+Objective. Minimise priority-weighted lateness against `expected_completion`
+(end of that day), then the sum of WorkOrder finish times.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+try:
+    from ortools.sat.python import cp_model
+    ORTOOLS_AVAILABLE = True
+except ImportError:
+    ORTOOLS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+OPEN_WORK_ORDER_STATUSES = ('PENDING', 'IN_PROGRESS', 'WAITING_FOR_OPERATOR')
+OPEN_SLOT_STATUSES = ('SCHEDULED', 'IN_PROGRESS')
+
+# Objective weight per minute late, by WorkOrderPriority. Finish times
+# weigh 1, so lateness dominates at every priority.
+LATENESS_WEIGHTS = {1: 1000, 2: 100, 3: 10, 4: 2}
+
+# Give up extending the calendar after this many days without finding
+# enough shift time (e.g. every shift inactive or with no weekdays).
+MAX_CALENDAR_DAYS = 3 * 366
+
+
+class SchedulingError(Exception):
+    """The schedule can't be built (no solver, no shifts, no feasible plan)."""
+
+
+class ShiftCalendar:
+    """Working-minute axis over the active shifts, starting at `start`.
+
+    Windows are generated a day at a time as far as they're needed.
+    Overlapping shifts are merged; the earlier shift owns the overlap.
+    """
+
+    def __init__(self, shifts, start: datetime):
+        self.start = start
+        self._shifts = []
+        for shift in shifts:
+            days = {int(d) for d in (shift.days_of_week or '').split(',') if d.strip().isdigit()}
+            if days:
+                self._shifts.append((shift, days))
+        if not self._shifts:
+            raise SchedulingError("No active shifts with working days to schedule into")
+        self._tz = timezone.get_current_timezone()
+        # Overnight shifts that began the day before can still be running.
+        self._next_day = timezone.localtime(start, self._tz).date() - timedelta(days=1)
+        self._starts, self._ends, self._owners, self._cum = [], [], [], []
+        self._total = 0
+
+    @property
+    def generated_until(self):
+        return self._ends[-1] if self._ends else self.start
+
+    def _extend(self, *, minutes=None, until=None):
+        days = 0
+        while (minutes is not None and self._total < minutes) or (until is not None and self.generated_until < until):
+            if days > MAX_CALENDAR_DAYS:
+                raise SchedulingError("Shift calendar has too little working time to fit the schedule")
+            day, self._next_day = self._next_day, self._next_day + timedelta(days=1)
+            days += 1
+            windows = []
+            for shift, weekdays in self._shifts:
+                if day.weekday() not in weekdays:
+                    continue
+                begin = timezone.make_aware(datetime.combine(day, shift.start_time), self._tz)
+                end = timezone.make_aware(datetime.combine(day, shift.end_time), self._tz)
+                if end <= begin:
+                    end += timedelta(days=1)
+                windows.append((begin, end, shift))
+            for begin, end, shift in sorted(windows, key=lambda w: w[0]):
+                begin = max(begin, self.generated_until)
+                if end <= begin:
+                    continue
+                length = int((end - begin).total_seconds() // 60)
+                if length <= 0:
+                    continue
+                self._starts.append(begin)
+                self._ends.append(begin + timedelta(minutes=length))
+                self._owners.append(shift)
+                self._cum.append(self._total)
+                self._total += length
+
+    def to_work(self, when: datetime) -> int:
+        """Working minutes between the calendar start and `when` (>= 0)."""
+        if when <= self.start:
+            return 0
+        when = min(when, self.start + timedelta(days=MAX_CALENDAR_DAYS))
+        self._extend(until=when)
+        i = bisect_right(self._starts, when) - 1
+        if i < 0:
+            return 0
+        inside = min(when, self._ends[i]) - self._starts[i]
+        return self._cum[i] + int(inside.total_seconds() // 60)
+
+    def segments(self, start: int, end: int):
+        """(wall start, wall end, shift) pieces covering working minutes [start, end)."""
+        self._extend(minutes=end)
+        i = max(0, bisect_right(self._cum, start) - 1)
+        pieces = []
+        while i < len(self._cum) and self._cum[i] < end:
+            lo = max(start, self._cum[i]) - self._cum[i]
+            hi = min(end, self._cum[i] + self._length(i)) - self._cum[i]
+            if hi > lo:
+                pieces.append((
+                    self._starts[i] + timedelta(minutes=lo),
+                    self._starts[i] + timedelta(minutes=hi),
+                    self._owners[i],
+                ))
+            i += 1
+        return pieces
+
+    def _length(self, i):
+        return int((self._ends[i] - self._starts[i]).total_seconds() // 60)
+
+
+@dataclass
+class _Task:
+    work_order: object
+    step: object
+    work_center_id: object
+    duration: int
+    pinned: tuple | None = None     # (start, end) in working minutes
+    hint: int | None = None
+
+    @property
+    def key(self):
+        return self.work_order.pk, self.step.pk
+
+
+@dataclass
+class ScheduleResult:
+    status: str
+    wall_time: float = 0.0
+    objective: float | None = None
+    work_orders: int = 0
+    tasks: int = 0
+    pinned: int = 0
+    hinted: int = 0
+    slots_written: int = 0
+    late_work_orders: list = field(default_factory=list)
+    unschedulable: list = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            'status': self.status,
+            'wall_time': round(self.wall_time, 3),
+            'objective': self.objective,
+            'work_orders': self.work_orders,
+            'tasks': self.tasks,
+            'pinned': self.pinned,
+            'hinted': self.hinted,
+            'slots_written': self.slots_written,
+            'late_work_orders': self.late_work_orders,
+            'unschedulable': self.unschedulable,
+        }
+
+
+def solve_schedule(tenant, *, time_limit=None, warm_start=True, frozen_minutes=None, now=None,
+                   write=True, actor=None) -> ScheduleResult:
+    """Schedule the tenant's open WorkOrders and (if `write`) replace their slots.
+
+    Must run inside the tenant's context; every query goes through the
+    auto-scoped managers.
+    """
+    if not ORTOOLS_AVAILABLE:
+        raise SchedulingError("ortools is not installed; the scheduler is unavailable")
+
+    time_limit = settings.SCHEDULER_TIME_LIMIT_SECONDS if time_limit is None else time_limit
+    frozen_minutes = settings.SCHEDULER_FROZEN_MINUTES if frozen_minutes is None else frozen_minutes
+    now = (now or timezone.now()).replace(second=0, microsecond=0)
+
+    problem = _load(tenant, now, frozen_minutes, warm_start)
+    result = ScheduleResult(
+        status='EMPTY',
+        work_orders=len({t.work_order.pk for t in problem.tasks}),
+        tasks=len(problem.tasks),
+        pinned=sum(1 for t in problem.tasks if t.pinned),
+        hinted=sum(1 for t in problem.tasks if t.hint is not None and not t.pinned),
+        unschedulable=problem.unschedulable,
+    )
+    if not problem.tasks:
+        return result
+
+    solved = _solve(problem, time_limit)
+    result.status, result.wall_time, result.objective = solved.status, solved.wall_time, solved.objective
+    if solved.starts is None:
+        raise SchedulingError(f"No schedule found ({solved.status}) within {time_limit}s")
+    result.late_work_orders = solved.late
+
+    if write:
+        result.slots_written = _write_slots(tenant, problem, solved.starts, actor)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Problem:
+    calendar: ShiftCalendar
+    tasks: list
+    capacity: dict
+    busy: dict                       # work_center_id -> [(start, end, demand)]
+    due: dict                        # work_order_id -> working minute
+    replaced_slots: list
+    unschedulable: list
+
+
+def _load(tenant, now, frozen_minutes, warm_start) -> _Problem:
+    from Tracker.models import (
+        DowntimeEvent, EquipmentStatus, Parts, ProcessStep, ScheduleSlot, Shift, WorkCenter, WorkOrder,
+    )
+    from Tracker.services.mes.parts import TERMINAL_PART_STATUSES
+
+    calendar = ShiftCalendar(Shift.objects.filter(is_active=True, is_current_version=True).active(), now)
+
+    work_orders = list(
+        WorkOrder.objects.active()
+        .filter(workorder_status__in=OPEN_WORK_ORDER_STATUSES, process__isnull=False)
+        .order_by('priority', 'created_at')
+    )
+    # tenant-safe: ProcessStep has no tenant; scoped by the WorkOrders' processes
+    routing = defaultdict(list)
+    for ps in (ProcessStep.objects.filter(process_id__in={wo.process_id for wo in work_orders})
+               .select_related('step').order_by('process_id', 'order')):
+        routing[ps.process_id].append(ps.step)
+
+    open_parts = defaultdict(int)
+    current_steps = defaultdict(set)
+    for wo_id, step_id in (Parts.objects.filter(tenant=tenant, work_order__in=work_orders)
+                           .exclude(part_status__in=TERMINAL_PART_STATUSES)
+                           .values_list('work_order_id', 'step_id')):
+        open_parts[wo_id] += 1
+        current_steps[wo_id].add(step_id)
+    has_parts = set(
+        Parts.objects.filter(tenant=tenant, work_order__in=work_orders)
+        .values_list('work_order_id', flat=True).distinct()
+    )
+
+    # Capacity from equipment in service and not down right now.
+    down_now = set(
+        DowntimeEvent.objects.active()
+        .filter(start_time__lte=now, end_time__isnull=True, equipment__isnull=False)
+        .values_list('equipment_id', flat=True)
+    )
+    wc_down_now = set(
+        DowntimeEvent.objects.active()
+        .filter(start_time__lte=now, end_time__isnull=True, equipment__isnull=True, work_center__isnull=False)
+        .values_list('work_center_id', flat=True)
+    )
+    capacity, wc_equipment, efficiency = {}, {}, {}
+    for wc in WorkCenter.objects.active().prefetch_related('equipment'):
+        equipment = list(wc.equipment.all())
+        up = {e.pk for e in equipment if e.status == EquipmentStatus.IN_SERVICE and e.pk not in down_now}
+        capacity[wc.pk] = 0 if wc.pk in wc_down_now else (len(up) if equipment else 1)
+        wc_equipment[wc.pk] = up
+        efficiency[wc.pk] = float(wc.default_efficiency or 100) or 100.0
+
+    default_minutes = settings.SCHEDULER_DEFAULT_STEP_MINUTES
+    tasks, unschedulable, due = [], [], {}
+    for wo in work_orders:
+        steps = [s for s in routing.get(wo.process_id, []) if s.work_center_id]
+        if wo.pk in has_parts:
+            if not open_parts[wo.pk]:
+                continue
+            positions = [i for i, s in enumerate(routing[wo.process_id]) if s.pk in current_steps[wo.pk]]
+            if positions:
+                first = routing[wo.process_id][min(positions)]
+                order = {s.pk: i for i, s in enumerate(routing[wo.process_id])}
+                steps = [s for s in steps if order[s.pk] >= order[first.pk]]
+        blocked = [s for s in steps if not capacity.get(s.work_center_id)]
+        if blocked:
+            unschedulable.append({
+                'work_order': str(wo.pk), 'erp_id': wo.ERP_id,
+                'reason': f"no capacity at work center for step {blocked[0].name}",
+            })
+            continue
+        quantity = open_parts[wo.pk] or wo.quantity or 1
+        for step in steps:
+            per_part = step.expected_duration.total_seconds() / 60 if step.expected_duration else default_minutes
+            duration = max(1, math.ceil(per_part * quantity * 100 / efficiency[step.work_center_id]))
+            tasks.append(_Task(wo, step, step.work_center_id, duration))
+        if steps and wo.expected_completion:
+            due_at = timezone.make_aware(
+                datetime.combine(wo.expected_completion + timedelta(days=1), datetime.min.time()),
+                timezone.get_current_timezone(),
+            )
+            due[wo.pk] = calendar.to_work(due_at)
+
+    # Existing slots: hints, pins, and capacity used by WorkOrders we don't schedule.
+    scheduled_wos = {t.work_order.pk for t in tasks}
+    by_step = {t.key: t for t in tasks}
+    first_at_wc = {}
+    for t in tasks:
+        first_at_wc.setdefault((t.work_order.pk, t.work_center_id), t)
+    frozen_until = now + timedelta(minutes=frozen_minutes)
+    busy = defaultdict(list)
+    pinned_spans = defaultdict(list)
+    replaced = []
+    slots = ScheduleSlot.objects.active().filter(
+        Q(scheduled_end__gt=now) | Q(work_order_id__in=scheduled_wos), status__in=OPEN_SLOT_STATUSES,
+    )
+    for slot in slots.order_by('scheduled_start'):
+        start, end = calendar.to_work(slot.scheduled_start), calendar.to_work(slot.scheduled_end)
+        if slot.work_order_id not in scheduled_wos:
+            if end > start:
+                busy[slot.work_center_id].append((start, end, 1))
+            continue
+        task = by_step.get((slot.work_order_id, slot.step_id)) or first_at_wc.get(
+            (slot.work_order_id, slot.work_center_id))
+        # A SCHEDULED slot that already ended never ran; re-plan its step
+        # rather than pin it at zero length.
+        stale = slot.status == 'SCHEDULED' and slot.scheduled_end <= now
+        if slot.status == 'IN_PROGRESS' or (slot.scheduled_start < frozen_until and not stale):
+            if task is not None and task.step.pk == slot.step_id:
+                pinned_spans[task.key].append((start, end))
+            elif end > start:
+                busy[slot.work_center_id].append((start, end, 1))
+            continue
+        replaced.append(slot)
+        if warm_start and not stale and task is not None and task.hint is None:
+            task.hint = start
+    for task in tasks:
+        spans = pinned_spans.get(task.key)
+        if spans:
+            start = min(s for s, _ in spans)
+            task.pinned = (start, max(start, max(e for _, e in spans)))
+
+    # Future downtime windows that are already known.
+    for event in DowntimeEvent.objects.active().filter(end_time__gt=now):
+        start, end = calendar.to_work(max(event.start_time, now)), calendar.to_work(event.end_time)
+        if end <= start:
+            continue
+        if event.equipment_id:
+            for wc_id, up in wc_equipment.items():
+                if event.equipment_id in up:
+                    busy[wc_id].append((start, end, 1))
+        elif event.work_center_id in capacity:
+            busy[event.work_center_id].append((start, end, capacity[event.work_center_id]))
+
+    return _Problem(calendar, tasks, capacity, busy, due, replaced, unschedulable)
+
+
+# ---------------------------------------------------------------------------
+# Model and solve
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Solution:
+    status: str
+    wall_time: float
+    objective: float | None = None
+    starts: dict | None = None
+    late: list = field(default_factory=list)
+
+
+def _solve(problem: _Problem, time_limit) -> _Solution:
+    model = cp_model.CpModel()
+    fixed_end = max(
+        [t.pinned[1] for t in problem.tasks if t.pinned]
+        + [end for spans in problem.busy.values() for _, end, _ in spans]
+        + [0]
+    )
+    # A serial plan after everything fixed always fits inside this bound.
+    horizon = fixed_end + sum(t.duration for t in problem.tasks if not t.pinned)
+
+    starts, ends = {}, {}
+    intervals, demands = defaultdict(list), defaultdict(list)
+    fixed = {wc_id: list(spans) for wc_id, spans in problem.busy.items()}
+    for t in problem.tasks:
+        name = f"{t.work_order.pk}_{t.step.pk}"
+        if t.pinned:
+            starts[t.key], ends[t.key] = (model.new_constant(v) for v in t.pinned)
+            fixed.setdefault(t.work_center_id, []).append((*t.pinned, 1))
+            continue
+        start = model.new_int_var(0, horizon - t.duration, f"s_{name}")
+        end = model.new_int_var(t.duration, horizon, f"e_{name}")
+        intervals[t.work_center_id].append(model.new_interval_var(start, t.duration, end, f"iv_{name}"))
+        demands[t.work_center_id].append(1)
+        starts[t.key], ends[t.key] = start, end
+        if t.hint is not None:
+            model.add_hint(start, min(max(t.hint, 0), horizon - t.duration))
+
+    for wc_id, ivs in intervals.items():
+        cap = problem.capacity[wc_id]
+        for i, (start, end, demand) in enumerate(_usage_profile(fixed.get(wc_id, []), cap)):
+            ivs.append(model.new_fixed_size_interval_var(start, end - start, f"fixed_{wc_id}_{i}"))
+            demands[wc_id].append(demand)
+        if cap == 1:
+            model.add_no_overlap(ivs)
+        else:
+            model.add_cumulative(ivs, demands[wc_id], cap)
+
+    # Routing order within each WorkOrder. Only free tasks are constrained:
+    # a pinned task is already running, whatever its predecessors show.
+    by_wo = defaultdict(list)
+    for t in problem.tasks:
+        by_wo[t.work_order.pk].append(t)
+    objective, lateness = [], {}
+    for wo_id, chain in by_wo.items():
+        for before, after in zip(chain, chain[1:]):
+            if not after.pinned:
+                model.add(starts[after.key] >= ends[before.key])
+        finish = ends[chain[-1].key]
+        objective.append(finish)
+        if wo_id in problem.due:
+            late = model.new_int_var(0, horizon, f"late_{wo_id}")
+            model.add(late >= finish - problem.due[wo_id])
+            lateness[wo_id] = late
+            objective.append(LATENESS_WEIGHTS.get(chain[0].work_order.priority, 10) * late)
+    model.minimize(sum(objective))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = float(time_limit)
+    solver.parameters.num_workers = settings.SCHEDULER_NUM_WORKERS
+    solver.parameters.relative_gap_limit = settings.SCHEDULER_RELATIVE_GAP
+    # Without enough LP workers CP-SAT stalls at FEASIBLE on these models
+    # and burns the whole time limit (Documents/OR_TOOLS_INTEGRATION.md).
+    solver.parameters.extra_subsolvers.extend(['default_lp', 'default_lp'])
+    solver.parameters.repair_hint = True
+    solver.parameters.random_seed = 0
+    started = time.perf_counter()
+    status = solver.solve(model)
+    wall_time = time.perf_counter() - started
+    name = solver.status_name(status)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return _Solution(name, wall_time)
+
+    work_orders = {t.work_order.pk: t.work_order for t in problem.tasks}
+    return _Solution(
+        name, wall_time, solver.objective_value,
+        starts={key: solver.value(var) for key, var in starts.items()},
+        late=[work_orders[wo_id].ERP_id for wo_id, var in lateness.items() if solver.value(var) > 0],
+    )
+
+
+def _usage_profile(spans, cap):
+    """Merge fixed (start, end, demand) spans into non-overlapping pieces.
+
+    Hand-placed slots and downtime can overlap each other; as separate
+    intervals they would make the model infeasible before any task is
+    placed. The summed profile, capped at `cap`, can't.
+    """
+    deltas = defaultdict(int)
+    for start, end, demand in spans:
+        if end > start:
+            deltas[start] += demand
+            deltas[end] -= demand
+    pieces, level, prev = [], 0, None
+    for point in sorted(deltas):
+        if prev is not None and level > 0 and point > prev:
+            used = min(level, cap)
+            if pieces and pieces[-1][1] == prev and pieces[-1][2] == used:
+                pieces[-1] = (pieces[-1][0], point, used)
+            else:
+                pieces.append((prev, point, used))
+        level += deltas[point]
+        prev = point
+    return pieces
+
+
+# ---------------------------------------------------------------------------
+# Write-back
+# ---------------------------------------------------------------------------
+
+def _write_slots(tenant, problem: _Problem, starts, actor) -> int:
+    from Tracker.models import ScheduleSlot
+
+    # Keep operator assignments where the new plan has a slot in the same
+    # WorkOrder / WorkCenter / shift / day.
+    operators = {
+        (s.work_order_id, s.work_center_id, s.shift_id, s.scheduled_date): s.assigned_operator_id
+        for s in problem.replaced_slots if s.assigned_operator_id
+    }
+    calendar = problem.calendar
+    new_slots = []
+    for t in problem.tasks:
+        if t.pinned:
+            continue
+        start = starts[t.key]
+        for begin, end, shift in calendar.segments(start, start + t.duration):
+            day = timezone.localtime(begin).date()
+            new_slots.append(ScheduleSlot(
+                tenant=tenant,
+                work_center_id=t.work_center_id,
+                shift=shift,
+                work_order=t.work_order,
+                step=t.step,
+                scheduled_date=day,
+                scheduled_start=begin,
+                scheduled_end=end,
+                assigned_operator_id=operators.get((t.work_order.pk, t.work_center_id, shift.pk, day)),
+            ))
+
+    with transaction.atomic():
+        if problem.replaced_slots:
+            replaced = ScheduleSlot.objects.filter(tenant=tenant, pk__in=[s.pk for s in problem.replaced_slots])
+            replaced.bulk_soft_delete(actor=actor, reason="rescheduled")
+        # tenant-safe: every new slot carries tenant=tenant
+        ScheduleSlot.objects.bulk_create(new_slots, batch_size=1000)
+    return len(new_slots)
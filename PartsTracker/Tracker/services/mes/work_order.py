@@ -23,6 +23,8 @@ from Tracker.models import (
     Parts, PartsStatus, WorkOrder, WorkOrderHold, WorkOrderHoldReason,
     WorkOrderSplitReason, WorkOrderStatus, OrdersStatus, ScheduleSlot,
 )
+from Tracker.services.core import scope_closure
+from Tracker.services.mes import work_queue
 
 logger = logging.getLogger(__name__)
 
@@ -80,6 +82,8 @@ def create_parts_batch(
 
     if parts_to_create:
         Parts.objects.bulk_create(parts_to_create)
+        if scope_closure.closure_enabled():
+            scope_closure.add_nodes(parts_to_create)
 
     fresh_parts = list(
         Parts.objects.filter(work_order=work_order, part_type=part_type, step=step)
@@ -442,6 +446,12 @@ def split_work_order(
             )
         else:
             update_qs.update(work_order=child, updated_at=now)
+        # Queryset updates skip the save signals that keep the queue and the
+        # scope closure current.
+        if scope_closure.closure_enabled():
+            scope_closure.refresh_moved(Parts, parent_wo.tenant_id, part_pks)
+        if work_queue.projection_enabled():
+            work_queue.schedule_refresh(parent_wo.tenant_id, parent_wo.pk, child.pk)
 
     return child
 
@@ -462,9 +472,13 @@ def undo_split(child_wo: WorkOrder, actor) -> WorkOrder:
 
     with transaction.atomic():
         now = timezone.now()
-        Parts.unscoped.filter(
-            tenant_id=child_wo.tenant_id, work_order=child_wo,
-        ).update(work_order=parent_wo, updated_at=now)
+        moved = Parts.unscoped.filter(tenant_id=child_wo.tenant_id, work_order=child_wo)
+        part_pks = list(moved.values_list('pk', flat=True))
+        moved.update(work_order=parent_wo, updated_at=now)
+        if scope_closure.closure_enabled():
+            scope_closure.refresh_moved(Parts, child_wo.tenant_id, part_pks)
+        if work_queue.projection_enabled():
+            work_queue.schedule_refresh(child_wo.tenant_id, parent_wo.pk, child_wo.pk)
 
         child_wo.archived = True
         child_wo.save(update_fields=['archived', 'updated_at'])
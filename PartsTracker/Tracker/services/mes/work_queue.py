@@ -0,0 +1,478 @@
+"""
+Operator work-queue projection.
+
+The work queue (WorkQueueViewSet) and the WIP summary
+(StepExecutionViewSet.wip_summary) both aggregate the open StepExecutions
+(PENDING / IN_PROGRESS, not exited) of a tenant. With every station polling
+them, the aggregate was recomputed from the executions, parts and work orders
+for each request. WorkQueueEntry keeps it instead: one row per work order,
+step and part type with open part executions, plus one `other:` row per step
+for open executions without a part, carrying everything the queue ranks,
+filters and shows.
+
+The unit of refresh is a *work order*: any change to its executions, parts,
+priority, due date or holds recomputes all of its rows in one aggregate query
+and writes only the rows that changed. `None` stands for the executions with
+no work order (no part, or a part without one).
+
+    schedule_refresh(tenant_id, *work_order_ids)   # from signals, on commit
+    refresh(tenant_id, work_order_ids)             # -> Diff
+    rebuild(tenant_id)                             # every work order -> Diff
+    check_consistency(tenant_id)                   # -> [EntryMismatch]
+
+Every refresh publishes its Diff through Tracker.utils.fanout on
+`channel(tenant_id)`, which /api/WorkQueue/stream/ relays to the stations as
+server-sent events. Writes that skip signals are picked up by the
+reconcile_work_queue beat task, which is a rebuild and publishes what it
+fixed.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Exists, Min, OuterRef, Q, Sum
+
+from Tracker.utils import fanout
+from Tracker.utils.tenant_context import tenant_context
+
+SOURCE_STORE = 'store'
+SOURCE_RAW = 'raw'
+
+OPEN_STATUSES = ('PENDING', 'IN_PROGRESS')
+
+# Columns a refresh computes and compares; the rest are bookkeeping.
+_ENTRY_FIELDS = (
+    'work_order_id', 'step_id', 'part_type_id', 'is_part_work', 'work_center_id',
+    'work_order_erp_id', 'step_name', 'part_type_name', 'work_center_kind', 'priority',
+    'expected_completion', 'search_text', 'qty_ready', 'pending_count', 'in_progress_count',
+    'earliest_entered_at', 'is_held',
+)
+
+# Queue rank: blocked rows sink last; then priority (1=Urgent .. 4=Low), due
+# date and aging. Shared by the raw and projected paths.
+RANK_ORDER = ('is_held', 'priority', 'expected_completion', 'earliest_entered_at')
+
+
+def projection_enabled() -> bool:
+    return getattr(settings, 'WORK_QUEUE_PROJECTION_ENABLED', False)
+
+
+def channel(tenant_id) -> str:
+    return f'work-queue:{tenant_id}'
+
+
+def row_key(work_order_id, step_id, part_type_id, is_part_work=True) -> str:
+    """Stable identity of a queue row; stream diffs refer to rows by it."""
+    if not is_part_work:
+        return f'other:{step_id}'
+    return f"{work_order_id or ''}:{step_id}:{part_type_id or ''}"
+
+
+def search_text(work_order_erp_id, step_name) -> str:
+    return f"{work_order_erp_id or ''}\n{step_name or ''}".lower()
+
+
+@dataclass
+class Diff:
+    upserted: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.upserted or self.removed)
+
+
+# -----------------------------------------------------------------------------
+# Compute
+# -----------------------------------------------------------------------------
+
+def _compute(tenant_id, work_order_ids: Optional[set] = None) -> dict[str, dict]:
+    """Entry columns by key for the given work orders (all when None), from the executions."""
+    from Tracker.models import StepExecution, WorkOrderHold
+
+    with tenant_context(tenant_id):
+        open_executions = StepExecution.objects.filter(
+            tenant_id=tenant_id, exited_at__isnull=True, status__in=OPEN_STATUSES,
+        )
+        unassigned = work_order_ids is None or None in work_order_ids
+        if work_order_ids is not None:
+            scope = Q(part__work_order_id__in=[w for w in work_order_ids if w is not None])
+            if unassigned:
+                scope |= Q(part__isnull=True) | Q(part__work_order__isnull=True)
+            open_executions = open_executions.filter(scope)
+
+        # Active hold: not cleared, not voided (WorkOrderHold's one-open-per-WO
+        # constraint condition).
+        active_holds = WorkOrderHold.objects.filter(
+            tenant_id=tenant_id, work_order=OuterRef('part__work_order_id'),
+            cleared_at__isnull=True, is_voided=False,
+        )
+        counts = dict(
+            pending_count=Count('id', filter=Q(status='PENDING')),
+            in_progress_count=Count('id', filter=Q(status='IN_PROGRESS')),
+            earliest_entered_at=Min('entered_at'),
+        )
+        entries = {}
+        part_rows = (
+            open_executions.filter(part__isnull=False)
+            .values(
+                'part__work_order_id', 'part__work_order__ERP_id', 'part__work_order__priority',
+                'part__work_order__expected_completion', 'part__part_type_id', 'part__part_type__name',
+                'step_id', 'step__name', 'step__work_center_id', 'step__work_center__kind',
+            )
+            .annotate(qty_ready=Count('part_id', distinct=True), is_held=Exists(active_holds), **counts)
+        )
+        for r in part_rows:
+            key = row_key(r['part__work_order_id'], r['step_id'], r['part__part_type_id'])
+            entries[key] = {
+                'work_order_id': r['part__work_order_id'],
+                'step_id': r['step_id'],
+                'part_type_id': r['part__part_type_id'],
+                'is_part_work': True,
+                'work_center_id': r['step__work_center_id'],
+                'work_order_erp_id': r['part__work_order__ERP_id'],
+                'step_name': r['step__name'],
+                'part_type_name': r['part__part_type__name'],
+                'work_center_kind': r['step__work_center__kind'],
+                'priority': r['part__work_order__priority'],
+                'expected_completion': r['part__work_order__expected_completion'],
+                'search_text': search_text(r['part__work_order__ERP_id'], r['step__name']),
+                'qty_ready': r['qty_ready'],
+                'pending_count': r['pending_count'],
+                'in_progress_count': r['in_progress_count'],
+                'earliest_entered_at': r['earliest_entered_at'],
+                'is_held': r['is_held'],
+            }
+
+        if unassigned:
+            other_rows = (
+                open_executions.filter(part__isnull=True)
+                .values('step_id', 'step__name', 'step__work_center_id', 'step__work_center__kind')
+                .annotate(**counts)
+            )
+            for r in other_rows:
+                entries[row_key(None, r['step_id'], None, is_part_work=False)] = {
+                    'work_order_id': None,
+                    'step_id': r['step_id'],
+                    'part_type_id': None,
+                    'is_part_work': False,
+                    'work_center_id': r['step__work_center_id'],
+                    'work_order_erp_id': None,
+                    'step_name': r['step__name'],
+                    'part_type_name': None,
+                    'work_center_kind': r['step__work_center__kind'],
+                    'priority': None,
+                    'expected_completion': None,
+                    'search_text': search_text(None, r['step__name']),
+                    'qty_ready': 0,
+                    'pending_count': r['pending_count'],
+                    'in_progress_count': r['in_progress_count'],
+                    'earliest_entered_at': r['earliest_entered_at'],
+                    'is_held': False,
+                }
+    return entries
+
+
+def _stored(tenant_id, work_order_ids: Optional[set] = None) -> dict[str, dict]:
+    from Tracker.models import WorkQueueEntry
+
+    stored = WorkQueueEntry.objects.filter(tenant_id=tenant_id)
+    if work_order_ids is not None:
+        scope = Q(work_order_id__in=[w for w in work_order_ids if w is not None])
+        if None in work_order_ids:
+            scope |= Q(work_order__isnull=True)
+        stored = stored.filter(scope)
+    with tenant_context(tenant_id):
+        return {r['key']: r for r in stored.values('key', *_ENTRY_FIELDS)}
+
+
+def _same(a: dict, b: dict) -> bool:
+    return all(a[f] == b[f] for f in _ENTRY_FIELDS)
+
+
+# -----------------------------------------------------------------------------
+# Maintenance
+# -----------------------------------------------------------------------------
+
+def refresh(tenant_id, work_order_ids: Optional[Iterable] = None) -> Diff:
+    """Recompute the rows of the given work orders (every row when None) and publish what changed."""
+    from Tracker.models import WorkQueueEntry
+
+    ids = None if work_order_ids is None else set(work_order_ids)
+    if ids is not None and not ids:
+        return Diff()
+    with transaction.atomic():
+        computed = _compute(tenant_id, ids)
+        stored = _stored(tenant_id, ids)
+        changed = {k: v for k, v in computed.items() if k not in stored or not _same(v, stored[k])}
+        removed = sorted(stored.keys() - computed.keys())
+        with tenant_context(tenant_id):
+            if removed:
+                WorkQueueEntry.objects.filter(tenant_id=tenant_id, key__in=removed).delete()
+            if changed:
+                WorkQueueEntry.objects.bulk_create(
+                    [WorkQueueEntry(tenant_id=tenant_id, key=k, **v) for k, v in changed.items()],
+                    update_conflicts=True, unique_fields=['tenant', 'key'],
+                    update_fields=[*_ENTRY_FIELDS, 'updated_at'],
+                )
+    diff = Diff(
+        upserted=[entry_row({'key': k, **v}) for k, v in changed.items() if v['is_part_work']],
+        removed=[k for k in removed if not k.startswith('other:')],
+    )
+    if diff:
+        transaction.on_commit(lambda: publish_diff(tenant_id, diff), robust=True)
+    return diff
+
+
+def rebuild(tenant_id) -> Diff:
+    """Recompute every row for a tenant. Doubles as the reconcile: only drifted rows are written."""
+    return refresh(tenant_id, None)
+
+
+@dataclass(frozen=True)
+class EntryMismatch:
+    key: str
+    stored: dict | None
+    computed: dict | None
+
+
+def check_consistency(tenant_id) -> list[EntryMismatch]:
+    """Compare every stored row against a recompute from the executions."""
+    computed = _compute(tenant_id)
+    stored = {k: {f: v[f] for f in _ENTRY_FIELDS} for k, v in _stored(tenant_id).items()}
+    return [
+        EntryMismatch(k, stored.get(k), computed.get(k))
+        for k in sorted(stored.keys() | computed.keys())
+        if k not in stored or k not in computed or not _same(stored[k], computed[k])
+    ]
+
+
+def publish_diff(tenant_id, diff: Diff) -> None:
+    fanout.publish(channel(tenant_id), {'upsert': diff.upserted, 'remove': diff.removed})
+
+
+# -----------------------------------------------------------------------------
+# Signal-driven refresh
+# -----------------------------------------------------------------------------
+
+# Work orders touched in the current transaction, refreshed once on commit. A
+# rolled-back transaction leaves its work orders here; they're refreshed with
+# the next commit, which only costs a recompute.
+_pending = threading.local()
+
+
+def schedule_refresh(tenant_id, *work_order_ids) -> None:
+    """Refresh the rows of `work_order_ids` (None: executions without one) after the transaction commits."""
+    if tenant_id is None or not work_order_ids:
+        return
+    pending = getattr(_pending, 'work_orders', None)
+    if pending is None:
+        pending = _pending.work_orders = defaultdict(set)
+    pending[tenant_id].update(work_order_ids)
+    transaction.on_commit(_flush, robust=True)
+
+
+def _flush() -> None:
+    pending, _pending.work_orders = getattr(_pending, 'work_orders', None) or {}, defaultdict(set)
+    for tenant_id, work_order_ids in pending.items():
+        refresh(tenant_id, work_order_ids)
+
+
+def _entry_work_orders(tenant_id, **filters) -> list:
+    """Work orders with rows matching `filters` (for renamed steps, part types, work centers)."""
+    from Tracker.models import WorkQueueEntry
+
+    with tenant_context(tenant_id):
+        return list(
+            WorkQueueEntry.objects.filter(tenant_id=tenant_id, **filters)
+            .values_list('work_order_id', flat=True).distinct()
+        )
+
+
+def remember_previous(instance) -> None:
+    """Before a part save: keep the work order its executions are counted under now."""
+    from Tracker.models import Parts
+
+    if instance._state.adding:
+        return
+    # tenant-safe: re-reads the row being saved
+    instance._work_queue_previous_work_order_id = (
+        Parts.unscoped.filter(pk=instance.pk).values_list('work_order_id', flat=True).first()
+    )
+
+
+def record_event(instance, created=False) -> None:
+    """Schedule a refresh for a saved or deleted source row (see Tracker/signals.py)."""
+    from Tracker.models import (
+        Parts, PartTypes, StepExecution, Steps, WorkCenter, WorkOrder, WorkOrderHold,
+    )
+
+    tenant_id = instance.tenant_id
+    if isinstance(instance, StepExecution):
+        if instance.part_id is None:
+            schedule_refresh(tenant_id, None)
+            return
+        # On a cascade the part may already be gone; its own delete
+        # schedules the work order.
+        # tenant-safe: the execution's own part
+        part = Parts.unscoped.filter(pk=instance.part_id).values('work_order_id').first()
+        if part:
+            schedule_refresh(tenant_id, part['work_order_id'])
+    elif isinstance(instance, Parts):
+        previous = getattr(instance, '_work_queue_previous_work_order_id', instance.work_order_id)
+        schedule_refresh(tenant_id, instance.work_order_id, previous)
+    elif isinstance(instance, WorkOrder):
+        if not created:
+            schedule_refresh(tenant_id, instance.pk)
+    elif isinstance(instance, WorkOrderHold):
+        schedule_refresh(tenant_id, instance.work_order_id)
+    elif not created and isinstance(instance, Steps):
+        schedule_refresh(tenant_id, *_entry_work_orders(tenant_id, step_id=instance.pk))
+    elif not created and isinstance(instance, PartTypes):
+        schedule_refresh(tenant_id, *_entry_work_orders(tenant_id, part_type_id=instance.pk))
+    elif not created and isinstance(instance, WorkCenter):
+        schedule_refresh(tenant_id, *_entry_work_orders(tenant_id, work_center_id=instance.pk))
+
+
+# -----------------------------------------------------------------------------
+# Queries
+# -----------------------------------------------------------------------------
+
+def entry_row(entry: dict) -> dict:
+    """A stored or computed entry as a work-queue row (WorkQueueRowSerializer's shape)."""
+    return {
+        'key': entry['key'],
+        'work_order': entry['work_order_id'],
+        'work_order_erp_id': entry['work_order_erp_id'],
+        'step': entry['step_id'],
+        'step_name': entry['step_name'],
+        'part_type_name': entry['part_type_name'],
+        'priority': entry['priority'],
+        'expected_completion': entry['expected_completion'],
+        'qty_ready': entry['qty_ready'],
+        'earliest_entered_at': entry['earliest_entered_at'],
+        'is_held': entry['is_held'],
+        'readiness': 'blocked' if entry['is_held'] else 'ready',
+        'work_center': entry['work_center_id'],
+        'work_center_kind': entry['work_center_kind'],
+    }
+
+
+def queue_entries(tenant_id, *, work_order=None, kind=None, work_center=None, work_centers=None, search=None,
+                  readiness=None):
+    """Ranked queue rows from the projection, filtered the way WorkQueueViewSet filters."""
+    from Tracker.models import WorkQueueEntry
+
+    entries = WorkQueueEntry.objects.filter(tenant_id=tenant_id, is_part_work=True)
+    if work_order:
+        entries = entries.filter(work_order_id=work_order)
+    if kind:
+        entries = entries.filter(work_center_kind=kind)
+    if work_center:
+        entries = entries.filter(work_center_id=work_center)
+    if work_centers:
+        entries = entries.filter(work_center_id__in=work_centers)
+    if search:
+        entries = entries.filter(search_text__contains=search.lower())
+    if readiness in ('ready', 'blocked'):
+        entries = entries.filter(is_held=readiness == 'blocked')
+    return entries.order_by(*RANK_ORDER).values('key', *_ENTRY_FIELDS)
+
+
+def row_matches(row: dict, *, work_order=None, kind=None, work_center=None, work_centers=None, search=None,
+                readiness=None) -> bool:
+    """`queue_entries`' filters applied to one published (JSON-decoded) row."""
+    def same_id(value, wanted):
+        return str(value).lower() == str(wanted).lower()
+
+    if work_order and not same_id(row['work_order'], work_order):
+        return False
+    if kind and row['work_center_kind'] != kind:
+        return False
+    if work_center and not same_id(row['work_center'], work_center):
+        return False
+    if work_centers and not any(same_id(row['work_center'], w) for w in work_centers):
+        return False
+    if search:
+        term = search.lower()
+        if term not in (row['work_order_erp_id'] or '').lower() and term not in (row['step_name'] or '').lower():
+            return False
+    if readiness in ('ready', 'blocked') and row['readiness'] != readiness:
+        return False
+    return True
+
+
+def wip_counts(tenant_id, step_ids) -> dict:
+    """{step_id: (pending, in_progress)} open execution counts from the projection."""
+    from Tracker.models import WorkQueueEntry
+
+    with tenant_context(tenant_id):
+        rows = (
+            WorkQueueEntry.objects.filter(tenant_id=tenant_id, step_id__in=list(step_ids))
+            .values('step_id')
+            .annotate(pending=Sum('pending_count'), in_progress=Sum('in_progress_count'))
+        )
+        return {r['step_id']: (r['pending'], r['in_progress']) for r in rows}
+
+
+# -----------------------------------------------------------------------------
+# Server-sent events
+# -----------------------------------------------------------------------------
+
+def sse_event(name: str, data, *, retry_ms: int = None) -> str:
+    lines = [f'retry: {retry_ms}'] if retry_ms is not None else []
+    lines += [f'event: {name}', f'data: {json.dumps(data, cls=DjangoJSONEncoder)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+def snapshot_stream(rows: list):
+    """A stream that is just the snapshot; the client's reconnect after `retry` is the next poll."""
+    yield sse_event('snapshot', rows, retry_ms=settings.WORK_QUEUE_STREAM_RETRY_MS)
+
+
+def _filter_diff(message: dict, filters: dict) -> dict:
+    upsert, remove = [], list(message.get('remove') or ())
+    for row in message.get('upsert') or ():
+        if row_matches(row, **filters):
+            upsert.append(row)
+        else:
+            # It may have matched before (a hold placed under readiness=ready).
+            remove.append(row['key'])
+    return {'upsert': upsert, 'remove': remove} if upsert or remove else {}
+
+
+async def live_stream(tenant_id, filters: dict, snapshot: Callable[[], list]):
+    """
+    Snapshot, then the tenant's diffs narrowed to `filters`, until
+    WORK_QUEUE_STREAM_MAX_SECONDS pass or the subscriber falls behind.
+
+    Subscribes before reading the snapshot, so nothing committed in between
+    is missed; a diff already in the snapshot is re-sent, which is harmless
+    since upserts and removes are idempotent.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.WORK_QUEUE_STREAM_MAX_SECONDS
+    heartbeat = settings.WORK_QUEUE_STREAM_HEARTBEAT_SECONDS
+    async with fanout.subscribe(channel(tenant_id)) as subscription:
+        rows = await sync_to_async(snapshot)()
+        yield sse_event('snapshot', rows, retry_ms=settings.WORK_QUEUE_STREAM_RETRY_MS)
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                message = await subscription.get(timeout=min(heartbeat, remaining))
+            except fanout.Overflow:
+                yield sse_event('resync', {})
+                return
+            if message is None:
+                yield ': keep-alive\n\n'
+                continue
+            diff = _filter_diff(message, filters)
+            if diff:
+                yield sse_event('diff', diff)
@@ -13,20 +13,32 @@ Processing pipeline:
     2. Load/convert to triangulated mesh
     3. Optimize (decimate if face count exceeds target)
     4. Export to GLB
+    5. Decimate a chain of coarser levels of detail (optional)
+    6. Quantize + meshopt-compress each GLB with gltfpack (optional)
+
+STEP tessellation can take gigabytes for a large assembly. With
+`convert_memory_limit_mb` set, it runs in a child process with that
+address-space cap, so a runaway conversion fails on its own instead of
+taking the worker down with it.
 
 Usage:
     from Tracker.services.model_processor import ModelProcessor, ProcessingConfig
 
-    processor = ModelProcessor(ProcessingConfig(target_faces=100_000))
+    processor = ModelProcessor(ProcessingConfig(target_faces=100_000, lod_faces=(5_000, 25_000)))
     result = processor.process('/path/to/model.step')
 
     if result.success:
         print(f"Saved to {result.output_path}")
         print(f"Faces: {result.face_count}, Size: {result.final_size} bytes")
+        for lod in result.lods:
+            print(f"LOD {lod.face_count} faces at {lod.output_path}")
     else:
         print(f"Error: {result.error}")
 """
 import logging
+import shutil
+import subprocess
+import sys
 import tempfile
 from dataclasses import dataclass, field
 from enum import Enum
@@ -51,6 +63,9 @@ except ImportError:
     CASCADIO_AVAILABLE = False
     logger.warning("cascadio not installed - STEP conversion disabled")
 
+# Optional dependency: gltfpack binary (meshoptimizer) for quantized/compressed GLB
+GLTFPACK_PATH = shutil.which('gltfpack')
+
 
 class FormatType(Enum):
     """Classification of 3D file formats by processing requirements."""
@@ -101,6 +116,30 @@ class ProcessingConfig:
     angular_deflection: float = 0.5
     """Maximum angular deviation in degrees for curved surfaces."""
 
+    convert_memory_limit_mb: Optional[int] = None
+    """Address-space cap for STEP tessellation, run in a child process. None converts in-process."""
+
+    convert_timeout: Optional[float] = None
+    """Seconds before a child-process STEP conversion is killed."""
+
+    # Levels of detail
+    lod_faces: tuple[int, ...] = ()
+    """Face budgets for coarser levels of detail, each decimated from the next finer one.
+    Budgets at or above the optimized mesh's face count are skipped."""
+
+    compress: bool = False
+    """Quantize and meshopt-compress every GLB with gltfpack (skipped if it isn't installed)."""
+
+
+@dataclass
+class LodLevel:
+    """One coarser level of detail written alongside the main GLB."""
+
+    output_path: str
+    face_count: int
+    vertex_count: int
+    size: int
+
 
 @dataclass
 class ProcessingResult:
@@ -127,6 +166,9 @@ class ProcessingResult:
     original_format: str = ""
     """Original file format (extension without dot)."""
 
+    lods: list[LodLevel] = field(default_factory=list)
+    """Coarser levels of detail, coarsest first. The main output is the finest level."""
+
     error: Optional[str] = None
     """Error message if processing failed."""
 
@@ -259,13 +301,18 @@ class ModelProcessor:
 
             # Step 3: Export to GLB
             mesh.export(str(output_path), file_type='glb')
+            self._compress(output_path)
             final_size = output_path.stat().st_size
 
+            # Steps 4-5: Coarser levels of detail
+            lods = self._export_lods(mesh, face_count, output_path)
+
             logger.info(
                 f"Processed {input_path.name}: {original_format}→glb, "
                 f"{original_faces:,}→{face_count:,} faces, "
                 f"{original_size:,}→{final_size:,} bytes "
                 f"({100 - (final_size / original_size * 100):.1f}% smaller)"
+                + (f", LODs {[lod.face_count for lod in lods]}" if lods else "")
             )
 
             return ProcessingResult(
@@ -276,6 +323,7 @@ class ModelProcessor:
                 original_size=original_size,
                 final_size=final_size,
                 original_format=original_format,
+                lods=lods,
             )
 
         except Exception as e:
@@ -312,12 +360,15 @@ class ModelProcessor:
 
         try:
             # Convert STEP to GLB using cascadio
-            cascadio.step_to_glb(
-                file_path,
-                tmp_path,
-                self.config.linear_deflection,
-                self.config.angular_deflection
-            )
+            if self.config.convert_memory_limit_mb:
+                self._convert_in_child(file_path, tmp_path)
+            else:
+                cascadio.step_to_glb(
+                    file_path,
+                    tmp_path,
+                    self.config.linear_deflection,
+                    self.config.angular_deflection
+                )
 
             # Load the resulting GLB with trimesh
             return trimesh.load(tmp_path)
@@ -326,6 +377,40 @@ class ModelProcessor:
             # Clean up temporary file
             Path(tmp_path).unlink(missing_ok=True)
 
+    def _convert_in_child(self, file_path: str, glb_path: str):
+        """
+        Run cascadio in a child process capped at `convert_memory_limit_mb`.
+
+        A fresh interpreter rather than multiprocessing: Celery's prefork
+        workers are daemonic and may not fork pool children of their own.
+
+        Raises:
+            RuntimeError: If the child fails, is killed, or times out.
+        """
+        limit_mb = self.config.convert_memory_limit_mb
+        try:
+            proc = subprocess.run(
+                [
+                    sys.executable, __file__, 'step-to-glb', file_path, glb_path,
+                    str(self.config.linear_deflection), str(self.config.angular_deflection),
+                    str(limit_mb),
+                ],
+                capture_output=True,
+                text=True,
+                timeout=self.config.convert_timeout,
+            )
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"STEP conversion timed out after {self.config.convert_timeout:g}s")
+
+        output = '\n'.join((proc.stdout, proc.stderr)).strip().splitlines()
+        if proc.returncode < 0:
+            raise RuntimeError(
+                f"STEP conversion killed by signal {-proc.returncode} (memory limit {limit_mb} MB)"
+            )
+        if proc.returncode != 0 or not Path(glb_path).stat().st_size:
+            detail = output[-1] if output else f"exit status {proc.returncode}"
+            raise RuntimeError(f"STEP conversion failed: {detail}")
+
     def _optimize_mesh(self, mesh):
         """
         Decimate mesh to target face count if needed.
@@ -346,23 +431,69 @@ class ModelProcessor:
         logger.info(
             f"Decimating mesh from {face_count:,} to ~{self.config.target_faces:,} faces"
         )
+        return self._decimate(mesh, face_count, self.config.target_faces)
 
+    def _decimate(self, mesh, face_count: int, target: int):
+        """Decimate a mesh or scene to about `target` faces."""
         # Handle Scene (multiple meshes/geometries)
         if isinstance(mesh, trimesh.Scene):
-            return self._optimize_scene(mesh, face_count)
+            return self._optimize_scene(mesh, face_count, target)
 
         # Single mesh - straightforward decimation
-        return mesh.simplify_quadric_decimation(
-            face_count=self.config.target_faces
-        )
+        return mesh.simplify_quadric_decimation(face_count=target)
+
+    def _export_lods(self, mesh, face_count: int, output_path: Path) -> list[LodLevel]:
+        """
+        Write the coarser levels of detail next to `output_path`.
+
+        Each level is decimated from the next finer one rather than from the
+        full mesh, which keeps every step small. Returns them coarsest first.
+        """
+        lods = []
+        for budget in sorted(self.config.lod_faces, reverse=True):
+            if budget >= face_count:
+                continue
+            if isinstance(mesh, trimesh.Scene):
+                mesh = mesh.copy()  # _optimize_scene edits the scene in place
+            mesh = self._decimate(mesh, face_count, budget)
+            face_count, vertex_count = self._get_metrics(mesh)
+
+            path = output_path.with_name(f"{output_path.stem}.lod{budget}.glb")
+            mesh.export(str(path), file_type='glb')
+            self._compress(path)
+            lods.append(LodLevel(
+                output_path=str(path),
+                face_count=face_count,
+                vertex_count=vertex_count,
+                size=path.stat().st_size,
+            ))
+        return lods[::-1]
+
+    def _compress(self, glb_path: Path):
+        """Quantize and meshopt-compress a GLB in place with gltfpack, if enabled."""
+        if not self.config.compress:
+            return
+        if GLTFPACK_PATH is None:
+            logger.warning("gltfpack not installed - GLB compression skipped")
+            return
+
+        packed = glb_path.with_name(glb_path.stem + '.packed.glb')
+        try:
+            subprocess.run(
+                [GLTFPACK_PATH, '-i', str(glb_path), '-o', str(packed), '-c'],
+                check=True, capture_output=True, timeout=300,
+            )
+            packed.replace(glb_path)
+        finally:
+            packed.unlink(missing_ok=True)
 
-    def _optimize_scene(self, scene: 'trimesh.Scene', total_faces: int):
+    def _optimize_scene(self, scene: 'trimesh.Scene', total_faces: int, target_faces: Optional[int] = None):
         """
         Optimize a scene with multiple geometries.
 
         Distributes the target face count proportionally across geometries.
         """
-        ratio = self.config.target_faces / total_faces
+        ratio = (target_faces or self.config.target_faces) / total_faces
 
         for name, geom in scene.geometry.items():
             if not hasattr(geom, 'faces') or len(geom.faces) < 100:
@@ -440,3 +571,21 @@ def process_model(
     config = ProcessingConfig(**config_kwargs)
     processor = ModelProcessor(config)
     return processor.process(input_path, output_path)
+
+
+# =============================================================================
+# Child-process entry point for memory-capped STEP conversion
+# =============================================================================
+
+def _step_to_glb_main(argv):
+    """`python model_processor.py step-to-glb IN OUT LINEAR ANGULAR LIMIT_MB`"""
+    import resource
+
+    src, dst, linear, angular, limit_mb = argv
+    limit = int(limit_mb) * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    cascadio.step_to_glb(src, dst, float(linear), float(angular))
+
+
+if __name__ == '__main__' and sys.argv[1:2] == ['step-to-glb']:
+    _step_to_glb_main(sys.argv[2:])
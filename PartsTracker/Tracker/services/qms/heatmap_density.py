@@ -0,0 +1,184 @@
+"""
+Spatial density of HeatMapAnnotations on a 3D model.
+
+Viewers used to download every annotation for a model and bin them in the
+browser. `density(annotations, model, ...)` bins them on the server and
+returns one columnar payload with one entry per non-empty bin:
+
+    mode='voxel'   a grid over the annotations' bounding box, `resolution`
+                   cells along its longest axis. Bins are grouped in SQL.
+    mode='face'    the nearest triangle of one of the model's levels of
+                   detail (coarsest by default), binned with NumPy. Face
+                   indices count the level's triangles in scene order,
+                   i.e. the order of `trimesh.load(path, force='mesh')`.
+
+Each bin carries `count`, `severity_weight` (sum of SEVERITY_WEIGHTS),
+`measurement_sum` (nulls contribute nothing) and `measurement_max`.
+
+`cached_density` keys results on the model, a per-model version, and a hash
+of the final scoped SQL. That SQL already encodes the request's filters and
+the user's visibility, so two users share an entry only when they would see
+the same rows. The receivers in Tracker/signals.py bump the model's version
+on every annotation save or delete. Queryset `.update()` skips those
+signals; CACHE_TTL_SECONDS bounds how long such a write can stay hidden.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Case, Count, F, IntegerField, Max, Min, Sum, Value, When
+from django.db.models.functions import Cast, Floor, Least
+
+from Tracker.utils import cache_versions
+
+SEVERITY_WEIGHTS = {'LOW': 1, 'MEDIUM': 2, 'HIGH': 4, 'CRITICAL': 8}
+# Annotations without a severity weigh the same as LOW.
+DEFAULT_SEVERITY_WEIGHT = 1
+
+DEFAULT_RESOLUTION = 32
+MAX_RESOLUTION = 128
+MODES = ('voxel', 'face')
+
+CACHE_TTL_SECONDS = 60 * 60
+# Points compared against every face centroid at once in face mode.
+_FACE_CHUNK = 2048
+
+
+def _version_key(model_id) -> str:
+    return f'heatmap:density:v:{model_id}'
+
+
+def density(annotations, model, *, mode='voxel', resolution=DEFAULT_RESOLUTION, level=0) -> dict:
+    """Bin `annotations` (already scoped and filtered to `model`)."""
+    annotations = annotations.order_by()
+    if mode == 'face':
+        return _face_density(annotations, model, level)
+    return _voxel_density(annotations, resolution)
+
+
+def cached_density(annotations, model, *, mode='voxel', resolution=DEFAULT_RESOLUTION, level=0) -> dict:
+    """`density`, cached per (model, filter hash) until the next annotation write."""
+    sql, params = annotations.order_by().values('pk').query.sql_with_params()
+    digest = hashlib.sha256(repr((sql, params, mode, resolution, level)).encode()).hexdigest()[:32]
+    key = f'heatmap:density:{model.pk}:{cache_versions.version(_version_key(model.pk))}:{digest}'
+
+    payload = cache.get(key)
+    if payload is None:
+        payload = density(annotations, model, mode=mode, resolution=resolution, level=level)
+        cache.set(key, payload, CACHE_TTL_SECONDS)
+    return payload
+
+
+def invalidate_model(model_id) -> None:
+    """Drop every cached density for this model by bumping its version."""
+    cache_versions.bump(_version_key(model_id))
+
+
+def _severity_weight():
+    return Case(
+        *[When(severity__iexact=name, then=Value(weight)) for name, weight in SEVERITY_WEIGHTS.items()],
+        default=Value(DEFAULT_SEVERITY_WEIGHT),
+        output_field=IntegerField(),
+    )
+
+
+def _voxel_density(annotations, resolution) -> dict:
+    bounds = annotations.aggregate(
+        total=Count('id'),
+        x0=Min('position_x'), y0=Min('position_y'), z0=Min('position_z'),
+        x1=Max('position_x'), y1=Max('position_y'), z1=Max('position_z'),
+    )
+    if not bounds['total']:
+        return _payload('voxel', 0, {}, origin=None, cell_size=None, dims=None)
+
+    origin = [bounds['x0'], bounds['y0'], bounds['z0']]
+    extent = [bounds['x1'] - bounds['x0'], bounds['y1'] - bounds['y0'], bounds['z1'] - bounds['z0']]
+    # Cubic cells; an axis with no spread gets a single layer.
+    cell = max(extent) / resolution or 1.0
+    dims = [max(1, math.ceil(e / cell)) for e in extent]
+
+    def axis(field, lo, n):
+        return Least(Cast(Floor((F(field) - Value(lo)) / Value(cell)), IntegerField()), Value(n - 1))
+
+    rows = (
+        annotations
+        .annotate(
+            ix=axis('position_x', origin[0], dims[0]),
+            iy=axis('position_y', origin[1], dims[1]),
+            iz=axis('position_z', origin[2], dims[2]),
+        )
+        .values('ix', 'iy', 'iz')
+        .annotate(
+            count=Count('id'),
+            severity_weight=Sum(_severity_weight()),
+            measurement_sum=Sum('measurement_value'),
+            measurement_max=Max('measurement_value'),
+        )
+        .order_by('iz', 'iy', 'ix')
+    )
+    bins = {'index': [], 'count': [], 'severity_weight': [], 'measurement_sum': [], 'measurement_max': []}
+    for row in rows:
+        bins['index'].append(row['ix'] + dims[0] * (row['iy'] + dims[1] * row['iz']))
+        bins['count'].append(row['count'])
+        bins['severity_weight'].append(row['severity_weight'])
+        bins['measurement_sum'].append(row['measurement_sum'] or 0.0)
+        bins['measurement_max'].append(row['measurement_max'])
+    return _payload('voxel', bounds['total'], bins, origin=origin, cell_size=cell, dims=dims)
+
+
+def _face_density(annotations, model, level) -> dict:
+    from Tracker.services.model_processor import TRIMESH_AVAILABLE
+
+    if not TRIMESH_AVAILABLE:
+        raise RuntimeError("trimesh library not installed; face density is unavailable")
+    import trimesh
+
+    levels = model.get_lod_levels()
+    if not 0 <= level < len(levels):
+        raise ValueError(f"level must be between 0 and {len(levels) - 1}")
+    with model.file.storage.open(levels[level]['file'], 'rb') as f:
+        mesh = trimesh.load(f, file_type='glb', force='mesh')
+    centroids = np.asarray(mesh.triangles_center, dtype=np.float32)
+
+    rows = list(annotations.values_list('position_x', 'position_y', 'position_z', 'severity', 'measurement_value'))
+    if not rows:
+        return _payload('face', 0, {}, level=level, face_count=len(centroids))
+
+    points = np.array([r[:3] for r in rows], dtype=np.float32)
+    weights = np.array(
+        [SEVERITY_WEIGHTS.get((r[3] or '').upper(), DEFAULT_SEVERITY_WEIGHT) for r in rows], dtype=np.float64,
+    )
+    measurements = np.array([np.nan if r[4] is None else r[4] for r in rows], dtype=np.float64)
+
+    # Nearest centroid, a chunk of points at a time: |p|^2 - 2 p.c + |c|^2.
+    faces = np.empty(len(points), dtype=np.int64)
+    c_sq = (centroids ** 2).sum(axis=1)
+    for start in range(0, len(points), _FACE_CHUNK):
+        chunk = points[start:start + _FACE_CHUNK]
+        faces[start:start + _FACE_CHUNK] = np.argmin(c_sq[None, :] - 2 * chunk @ centroids.T, axis=1)
+
+    index, inverse = np.unique(faces, return_inverse=True)
+    measured = ~np.isnan(measurements)
+    measurement_max = np.full(len(index), -np.inf)
+    np.maximum.at(measurement_max, inverse[measured], measurements[measured])
+
+    bins = {
+        'index': index.tolist(),
+        'count': np.bincount(inverse).tolist(),
+        'severity_weight': np.bincount(inverse, weights=weights).astype(int).tolist(),
+        'measurement_sum': np.bincount(inverse, weights=np.where(measured, measurements, 0.0)).tolist(),
+        'measurement_max': [None if np.isinf(m) else float(m) for m in measurement_max],
+    }
+    return _payload('face', len(rows), bins, level=level, face_count=len(centroids))
+
+
+def _payload(mode, total, bins, **grid) -> dict:
+    return {
+        'mode': mode,
+        'total': total,
+        **grid,
+        'bins': bins or {'index': [], 'count': [], 'severity_weight': [], 'measurement_sum': [], 'measurement_max': []},
+    }
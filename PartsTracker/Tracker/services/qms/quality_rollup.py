@@ -0,0 +1,396 @@
+"""Daily quality dashboard rollups (`QualityDailyRollup`, `DefectDailyRollup`).
+
+The FPY, Pareto, NCR-trend, NCR-aging and repeat-defect dashboard cards used
+to scan QualityReports, their defects and QuarantineDisposition on every load.
+This module keeps one row per tenant per local day with the counts those cards
+sum, plus one row per day / error type / part type / step for defects, so a
+card is a single indexed read whatever the date range.
+
+Day rules (shared by the rollup and the raw endpoints, so the two agree):
+  - a report, and its defects, belong to the day it was created;
+  - a closed disposition belongs to the day it was last updated, an open one
+    to the day it was created;
+  - days are local dates in the current time zone (`TruncDate`).
+
+The rolling "last N days" cards start mid-day; whole days come from the
+rollup and the partial first day is read from the records.
+
+Maintenance: the QualityReports / QualityReportDefect / QuarantineDisposition
+receivers in Tracker/signals.py collect the days a transaction touches and
+recompute them once on commit. `reconcile` (nightly) re-derives recent days
+to repair writes that bypass signals; `rebuild` recomputes everything. Every
+rewrite holds a per-tenant lock, so overlapping refreshes run one after the
+other.
+"""
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from Tracker.utils.locks import tenant_xact_lock
+from Tracker.utils.tenant_context import tenant_context
+
+SOURCE_STORE = 'store'
+SOURCE_RAW = 'raw'
+
+# Rewrites of a tenant's rows queue on this lock, so two refreshes can't
+# interleave their delete / insert (see Tracker.utils.locks).
+LOCK_NAME = 'quality_rollup'
+
+QUALITY_FIELDS = ('inspections', 'passed', 'failed', 'ncrs_closed', 'ncrs_open')
+
+# DefectDailyRollup lookups and the QualityReportDefect lookups that match
+# them, for reading the partial first day of a window from the records.
+_DEFECT_LOOKUPS = {
+    'error_type': 'error_type',
+    'error_type__error_name': 'error_type__error_name',
+    'part_type': 'report__part__part_type',
+    'part_type__name': 'report__part__part_type__name',
+    'step': 'report__step',
+    'step__name': 'report__step__name',
+}
+
+
+def rollup_enabled() -> bool:
+    return getattr(settings, 'QUALITY_ROLLUP_ENABLED', False)
+
+
+def local_day(ts: datetime) -> date:
+    return timezone.localdate(ts)
+
+
+def day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _runs(days: Iterable[date]):
+    """Sorted days -> (first, last) runs of consecutive days."""
+    first = last = None
+    for day in sorted(set(days)):
+        if last is not None and day == last + timedelta(days=1):
+            last = day
+            continue
+        if first is not None:
+            yield first, last
+        first = last = day
+    if first is not None:
+        yield first, last
+
+
+# -----------------------------------------------------------------------------
+# Computing days from the records
+# -----------------------------------------------------------------------------
+
+def _compute(tenant_id, first_day: date, last_day: date):
+    """({day: counts}, [defect rows]) from the records for [first_day, last_day]."""
+    from Tracker.models import QualityReportDefect, QualityReports, QuarantineDisposition
+
+    lo, hi = day_start(first_day), day_start(last_day + timedelta(days=1))
+    days = defaultdict(lambda: dict.fromkeys(QUALITY_FIELDS, 0))
+
+    reports = QualityReports.unscoped.filter(
+        tenant_id=tenant_id, archived=False, created_at__gte=lo, created_at__lt=hi,
+    ).annotate(day=TruncDate('created_at')).values('day').annotate(
+        inspections=Count('id'),
+        passed=Count('id', filter=Q(status='PASS')),
+        failed=Count('id', filter=Q(status='FAIL')),
+    ).order_by()
+    for row in reports:
+        days[row.pop('day')].update(row)
+
+    dispositions = QuarantineDisposition.unscoped.filter(tenant_id=tenant_id, archived=False)
+    closed = dispositions.filter(
+        current_state='CLOSED', updated_at__gte=lo, updated_at__lt=hi,
+    ).annotate(day=TruncDate('updated_at')).values('day').annotate(n=Count('id')).order_by()
+    for row in closed:
+        days[row['day']]['ncrs_closed'] = row['n']
+    still_open = dispositions.exclude(current_state='CLOSED').filter(
+        created_at__gte=lo, created_at__lt=hi,
+    ).annotate(day=TruncDate('created_at')).values('day').annotate(n=Count('id')).order_by()
+    for row in still_open:
+        days[row['day']]['ncrs_open'] = row['n']
+
+    defects = list(
+        QualityReportDefect.objects.filter(
+            report__tenant_id=tenant_id, report__status='FAIL',
+            report__created_at__gte=lo, report__created_at__lt=hi,
+        ).annotate(
+            day=TruncDate('report__created_at'),
+        ).values(
+            'day', 'error_type', part_type=F('report__part__part_type'), step=F('report__step'),
+        ).annotate(
+            defects=Count('id'),
+            active_defects=Count('id', filter=Q(report__archived=False)),
+        ).order_by()
+    )
+    return {day: counts for day, counts in days.items() if any(counts.values())}, defects
+
+
+def _write(tenant_id, first_day: date, last_day: date) -> int:
+    """Replace the rollup rows for [first_day, last_day]. Returns rows written."""
+    from Tracker.models import DefectDailyRollup, QualityDailyRollup
+
+    quality, defects = _compute(tenant_id, first_day, last_day)
+    QualityDailyRollup.objects.filter(tenant_id=tenant_id, day__gte=first_day, day__lte=last_day).delete()
+    DefectDailyRollup.objects.filter(tenant_id=tenant_id, day__gte=first_day, day__lte=last_day).delete()
+    written = len(QualityDailyRollup.objects.bulk_create([  # tenant-safe: rows carry tenant_id
+        QualityDailyRollup(tenant_id=tenant_id, day=day, **counts) for day, counts in quality.items()
+    ]))
+    written += len(DefectDailyRollup.objects.bulk_create([  # tenant-safe: rows carry tenant_id
+        DefectDailyRollup(
+            tenant_id=tenant_id, day=row['day'], error_type_id=row['error_type'],
+            part_type_id=row['part_type'], step_id=row['step'],
+            defects=row['defects'], active_defects=row['active_defects'],
+        )
+        for row in defects
+    ]))
+    return written
+
+
+def refresh_days(tenant_id, days: Iterable[date]) -> int:
+    """Recompute the given days for a tenant. Returns rows written."""
+    written = 0
+    with tenant_context(tenant_id), transaction.atomic():
+        tenant_xact_lock(LOCK_NAME, tenant_id)
+        for first, last in _runs(days):
+            written += _write(tenant_id, first, last)
+    return written
+
+
+def _earliest_day(tenant_id) -> Optional[date]:
+    from Tracker.models import QualityReports, QuarantineDisposition
+
+    with tenant_context(tenant_id):
+        earliest = [
+            model.unscoped.filter(tenant_id=tenant_id).order_by('created_at')
+            .values_list('created_at', flat=True).first()
+            for model in (QualityReports, QuarantineDisposition)
+        ]
+    earliest = [e for e in earliest if e is not None]
+    return local_day(min(earliest)) if earliest else None
+
+
+def rebuild(tenant_id, first_day: date = None, last_day: date = None) -> int:
+    """Recompute a tenant's rollups (from its first record when `first_day` is None)."""
+    from Tracker.models import DefectDailyRollup, QualityDailyRollup
+
+    whole = first_day is None and last_day is None
+    first_day = first_day or _earliest_day(tenant_id)
+    last_day = last_day or timezone.localdate()
+    written = 0
+    with tenant_context(tenant_id), transaction.atomic():
+        tenant_xact_lock(LOCK_NAME, tenant_id)
+        if whole:
+            QualityDailyRollup.objects.filter(tenant_id=tenant_id).delete()
+            DefectDailyRollup.objects.filter(tenant_id=tenant_id).delete()
+        if first_day is None:
+            return 0
+        # A month at a time keeps each aggregate small.
+        chunk = first_day
+        while chunk <= last_day:
+            chunk_end = min(chunk + timedelta(days=30), last_day)
+            written += _write(tenant_id, chunk, chunk_end)
+            chunk = chunk_end + timedelta(days=1)
+    return written
+
+
+@dataclass(frozen=True)
+class DayMismatch:
+    day: date
+    stored: Optional[dict]
+    computed: Optional[dict]
+
+
+def _snapshot(quality: dict, defects: Iterable[dict]) -> dict:
+    """{day: comparable counts} from quality counts by day and defect rows."""
+    days = defaultdict(lambda: {**dict.fromkeys(QUALITY_FIELDS, 0), 'defects': set()})
+    for day, counts in quality.items():
+        days[day].update(counts)
+    for row in defects:
+        days[row['day']]['defects'].add(
+            (row['error_type'], row['part_type'], row['step'], row['defects'], row['active_defects']),
+        )
+    return days
+
+
+def check_consistency(tenant_id, first_day: date, last_day: date) -> list[DayMismatch]:
+    """Compare stored rollup days against a recompute from the records."""
+    from Tracker.models import DefectDailyRollup, QualityDailyRollup
+
+    with tenant_context(tenant_id):
+        computed = _snapshot(*_compute(tenant_id, first_day, last_day))
+        stored_quality = {
+            row.pop('day'): row for row in QualityDailyRollup.objects.filter(
+                tenant_id=tenant_id, day__gte=first_day, day__lte=last_day,
+            ).values('day', *QUALITY_FIELDS)
+        }
+        stored_defects = DefectDailyRollup.objects.filter(
+            tenant_id=tenant_id, day__gte=first_day, day__lte=last_day,
+        ).values('day', 'error_type', 'part_type', 'step', 'defects', 'active_defects')
+        stored = _snapshot(stored_quality, stored_defects)
+
+    return [
+        DayMismatch(day, stored.get(day), computed.get(day))
+        for day in sorted(stored.keys() | computed.keys())
+        if stored.get(day) != computed.get(day)
+    ]
+
+
+def reconcile(tenant_id, days: int = None) -> list[date]:
+    """Re-derive the last `days` days where they drifted. Returns the repaired days."""
+    last_day = timezone.localdate()
+    first_day = last_day - timedelta(days=(days or settings.QUALITY_ROLLUP_RECONCILE_DAYS) - 1)
+    drifted = [m.day for m in check_consistency(tenant_id, first_day, last_day)]
+    if drifted:
+        refresh_days(tenant_id, drifted)
+    return drifted
+
+
+# -----------------------------------------------------------------------------
+# Signal-driven refresh
+# -----------------------------------------------------------------------------
+
+# Days touched in the current transaction, recomputed once on commit. A
+# rolled-back transaction leaves its days here; they're recomputed with the
+# next commit, which only costs a recompute.
+_pending = threading.local()
+
+
+def schedule_refresh(tenant_id, *moments: Optional[datetime]) -> None:
+    """Recompute the days of `moments` after the current transaction commits."""
+    days = {local_day(m) for m in moments if m is not None}
+    if tenant_id is None or not days:
+        return
+    pending = getattr(_pending, 'days', None)
+    if pending is None:
+        pending = _pending.days = defaultdict(set)
+    pending[tenant_id] |= days
+    transaction.on_commit(_flush, robust=True)
+
+
+def _flush() -> None:
+    pending, _pending.days = getattr(_pending, 'days', None) or {}, defaultdict(set)
+    for tenant_id, days in pending.items():
+        refresh_days(tenant_id, days)
+
+
+def remember_previous(instance) -> None:
+    """Before a disposition save: keep the day its closed count sits on now."""
+    from Tracker.models import QuarantineDisposition
+
+    if instance._state.adding:
+        return
+    # tenant-safe: re-reads the row being saved
+    instance._rollup_previous_updated_at = (
+        QuarantineDisposition.unscoped.filter(pk=instance.pk).values_list('updated_at', flat=True).first()
+    )
+
+
+def record_event(instance) -> None:
+    """Schedule a refresh for a saved or deleted source row (see Tracker/signals.py)."""
+    from Tracker.models import QualityReportDefect, QualityReports, QuarantineDisposition
+
+    if isinstance(instance, QualityReports):
+        schedule_refresh(instance.tenant_id, instance.created_at)
+    elif isinstance(instance, QualityReportDefect):
+        # On a cascade the report may already be gone; its own delete
+        # schedules the day.
+        # tenant-safe: the defect's own report, and its tenant comes back with it
+        report = QualityReports.unscoped.filter(pk=instance.report_id).values('tenant_id', 'created_at').first()
+        if report:
+            schedule_refresh(report['tenant_id'], report['created_at'])
+    elif isinstance(instance, QuarantineDisposition):
+        schedule_refresh(
+            instance.tenant_id, instance.created_at, instance.updated_at,
+            getattr(instance, '_rollup_previous_updated_at', None),
+        )
+
+
+def record_reports(report_ids) -> None:
+    """Schedule a refresh for reports changed in bulk (M2M edits, queryset updates)."""
+    from Tracker.models import QualityReports
+
+    # tenant-safe: each row carries its own tenant
+    for row in QualityReports.unscoped.filter(pk__in=list(report_ids)).values('tenant_id', 'created_at'):
+        schedule_refresh(row['tenant_id'], row['created_at'])
+
+
+# -----------------------------------------------------------------------------
+# Queries
+# -----------------------------------------------------------------------------
+
+def quality_by_day(tenant_id, first_day: date, last_day: date) -> dict[date, dict]:
+    """Stored counts for each day in [first_day, last_day] that has any."""
+    from Tracker.models import QualityDailyRollup
+
+    rows = QualityDailyRollup.objects.filter(
+        tenant_id=tenant_id, day__gte=first_day, day__lte=last_day,
+    ).values('day', *QUALITY_FIELDS)
+    return {row.pop('day'): row for row in rows}
+
+
+def quality_totals(tenant_id, first_day: date, last_day: date = None) -> dict:
+    """Summed counts for days from `first_day` (to `last_day` when given)."""
+    from Tracker.models import QualityDailyRollup
+
+    rows = QualityDailyRollup.objects.filter(tenant_id=tenant_id, day__gte=first_day)
+    if last_day is not None:
+        rows = rows.filter(day__lte=last_day)
+    totals = rows.aggregate(**{name: Sum(name) for name in QUALITY_FIELDS})
+    return {name: totals[name] or 0 for name in QUALITY_FIELDS}
+
+
+def open_ncrs_by_day(tenant_id) -> list[tuple[date, int]]:
+    """(created day, count) of the dispositions still open."""
+    from Tracker.models import QualityDailyRollup
+
+    return list(
+        QualityDailyRollup.objects.filter(tenant_id=tenant_id, ncrs_open__gt=0)
+        .order_by('day').values_list('day', 'ncrs_open')
+    )
+
+
+def defect_counts(tenant_id, since: datetime, group_by: tuple, *, active_only=False) -> dict[tuple, int]:
+    """Defects on FAIL reports created at or after `since`, keyed by `group_by`.
+
+    `group_by` names DefectDailyRollup lookups (see _DEFECT_LOOKUPS). Archived
+    error types are left out, as the dashboard's error-type queries do;
+    `active_only` counts only defects on active reports.
+    """
+    from Tracker.models import DefectDailyRollup, QualityReportDefect
+
+    first_full = local_day(since)
+    if day_start(first_full) != since:
+        first_full += timedelta(days=1)
+    field = 'active_defects' if active_only else 'defects'
+
+    counts = defaultdict(int)
+    stored = DefectDailyRollup.objects.filter(
+        tenant_id=tenant_id, day__gte=first_full, error_type__archived=False, **{f'{field}__gt': 0},
+    ).values(*group_by).annotate(n=Sum(field)).order_by()
+    for row in stored:
+        counts[tuple(row[g] for g in group_by)] += row['n']
+
+    head_end = day_start(first_full)
+    if since < head_end:
+        head = QualityReportDefect.objects.filter(
+            report__tenant_id=tenant_id, report__status='FAIL',
+            report__created_at__gte=since, report__created_at__lt=head_end,
+            error_type__archived=False,
+        )
+        if active_only:
+            head = head.filter(report__archived=False)
+        lookups = {g: F(_DEFECT_LOOKUPS[g]) for g in group_by}
+        for row in head.values(**{f'k{i}': lookup for i, lookup in enumerate(lookups.values())}) \
+                .annotate(n=Count('id')).order_by():
+            counts[tuple(row[f'k{i}'] for i in range(len(group_by)))] += row['n']
+    return dict(counts)
@@ -0,0 +1,429 @@
+"""Vectorized SPC engine.
+
+Control charts, Nelson run rules and capability indices computed with NumPy
+over columnar arrays instead of Python loops over `SpcRow` lists. Used by the
+SPC endpoints (`viewsets/spc.py`), the PDF adapter (`reports/adapters/spc.py`)
+and `SPCBaseline.limits`.
+
+    series = reading_series(...)                     # spc_ingest; or spc_columns(...).series()
+    summary = describe(series)
+    limits = i_mr(series.values)                     # or xbar_r / xbar_s / p_chart / np_chart
+    flags = nelson_rules(limits.points, limits.center, limits.sigma)
+    cap = capability(series.values, usl, lsl, 5, segments=series.days)
+
+Subgroups are consecutive readings; passing `segments` (e.g. the UTC day of
+each reading) keeps a subgroup from spanning a segment boundary and drops each
+segment's incomplete tail, matching `services.qms.spc_stats`.
+
+`benchmark_spc_engine` compares this module against the loop implementation
+it replaced.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Constants (AIAG SPC manual, subgroup sizes 2-25)
+# -----------------------------------------------------------------------------
+
+D2 = {
+    2: 1.128, 3: 1.693, 4: 2.059, 5: 2.326, 6: 2.534, 7: 2.704, 8: 2.847,
+    9: 2.970, 10: 3.078, 11: 3.173, 12: 3.258, 13: 3.336, 14: 3.407,
+    15: 3.472, 16: 3.532, 17: 3.588, 18: 3.640, 19: 3.689, 20: 3.735,
+    21: 3.778, 22: 3.819, 23: 3.858, 24: 3.895, 25: 3.931,
+}
+D3_SIGMA = {
+    2: 0.853, 3: 0.888, 4: 0.880, 5: 0.864, 6: 0.848, 7: 0.833, 8: 0.820,
+    9: 0.808, 10: 0.797, 11: 0.787, 12: 0.778, 13: 0.770, 14: 0.763,
+    15: 0.756, 16: 0.750, 17: 0.744, 18: 0.739, 19: 0.734, 20: 0.729,
+    21: 0.724, 22: 0.720, 23: 0.716, 24: 0.712, 25: 0.708,
+}
+DEFAULT_D2 = D2[5]
+
+
+def c4(n: int) -> float:
+    """Bias correction for the sample standard deviation."""
+    return math.sqrt(2 / (n - 1)) * math.exp(math.lgamma(n / 2) - math.lgamma((n - 1) / 2))
+
+
+CHART_XBAR_R = 'XBAR_R'
+CHART_XBAR_S = 'XBAR_S'
+CHART_I_MR = 'I_MR'
+CHART_P = 'P'
+CHART_NP = 'NP'
+
+
+# -----------------------------------------------------------------------------
+# Columnar input
+# -----------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Series:
+    """Readings as columns: value, in-spec flag, UTC day number."""
+    values: np.ndarray
+    within: np.ndarray
+    days: np.ndarray
+
+    def __len__(self):
+        return len(self.values)
+
+    def head(self, n: int) -> 'Series':
+        return Series(self.values[:n], self.within[:n], self.days[:n])
+
+
+def to_series(rows: Sequence) -> Series:
+    """Columns from `SpcRow`-like objects (timestamp, value, is_within_spec)."""
+    n = len(rows)
+    return Series(
+        values=np.fromiter((r.value for r in rows), dtype=np.float64, count=n),
+        within=np.fromiter((r.is_within_spec for r in rows), dtype=bool, count=n),
+        days=np.fromiter((r.timestamp.timestamp() // 86400 for r in rows), dtype=np.int64, count=n),
+    )
+
+
+def subgroups(values: np.ndarray, size: int, segments: Optional[np.ndarray] = None) -> np.ndarray:
+    """(k, size) matrix of complete consecutive subgroups.
+
+    With `segments`, subgroups restart at each change of segment value and
+    each segment's incomplete tail is dropped.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if size < 1 or not len(values):
+        return np.empty((0, max(size, 1)))
+    if segments is None:
+        k = len(values) // size
+        return values[:k * size].reshape(k, size)
+
+    boundary = np.empty(len(values), dtype=bool)
+    boundary[0] = True
+    np.not_equal(segments[1:], segments[:-1], out=boundary[1:])
+    starts = np.flatnonzero(boundary)
+    segment_of = np.cumsum(boundary) - 1
+    lengths = np.diff(np.append(starts, len(values)))
+    position = np.arange(len(values)) - starts[segment_of]
+    keep = position < (lengths // size * size)[segment_of]
+    return values[keep].reshape(-1, size)
+
+
+# -----------------------------------------------------------------------------
+# Descriptive statistics
+# -----------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Summary:
+    count: int
+    mean: Optional[float]
+    std_dev: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+    within_spec: int
+
+    @property
+    def out_of_spec(self) -> int:
+        return self.count - self.within_spec
+
+
+def describe(series: Series) -> Summary:
+    n = len(series)
+    if not n:
+        return Summary(0, None, None, None, None, 0)
+    values = series.values
+    return Summary(
+        count=n,
+        mean=float(values.mean()),
+        std_dev=float(values.std(ddof=1)) if n > 1 else 0.0,
+        min=float(values.min()),
+        max=float(values.max()),
+        within_spec=int(np.count_nonzero(series.within)),
+    )
+
+
+# -----------------------------------------------------------------------------
+# Control charts
+# -----------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class ControlLimits:
+    """Location chart limits plus the companion dispersion chart.
+
+    `points` / `dispersion` are the plotted statistics (subgroup means and
+    ranges/standard deviations, individuals and moving ranges, or
+    proportions/counts); they are empty for limits loaded from a baseline.
+    `ucl`/`lcl` are arrays for p charts with varying sample sizes.
+    """
+    chart_type: str
+    subgroup_size: int
+    center: Optional[float]
+    ucl: object
+    lcl: object
+    dispersion_center: Optional[float] = None
+    dispersion_ucl: Optional[float] = None
+    dispersion_lcl: Optional[float] = None
+    points: np.ndarray = field(default_factory=lambda: np.empty(0))
+    dispersion: np.ndarray = field(default_factory=lambda: np.empty(0))
+
+    @property
+    def sigma(self):
+        """One sigma of the plotted statistic, from the (upper) limit distance."""
+        if self.center is None or self.ucl is None:
+            return None
+        return (np.asarray(self.ucl) - self.center) / 3
+
+    def as_dict(self) -> dict:
+        """Frontend key shape (see SPCBaseline.control_limits)."""
+        def num(v):
+            return float(v) if v is not None and np.ndim(v) == 0 else None
+
+        if self.chart_type == CHART_I_MR:
+            return {
+                'individualUCL': num(self.ucl),
+                'individualLCL': num(self.lcl),
+                'individualCL': num(self.center),
+                'mrUCL': num(self.dispersion_ucl),
+                'mrCL': num(self.dispersion_center),
+            }
+        return {
+            'xBarUCL': num(self.ucl),
+            'xBarLCL': num(self.lcl),
+            'xBarCL': num(self.center),
+            'rangeUCL': num(self.dispersion_ucl),
+            'rangeLCL': num(self.dispersion_lcl),
+            'rangeCL': num(self.dispersion_center),
+        }
+
+
+def xbar_r(values, size: int, segments=None) -> ControlLimits:
+    groups = subgroups(values, size, segments)
+    if not len(groups):
+        return ControlLimits(CHART_XBAR_R, size, None, None, None)
+    means = groups.mean(axis=1)
+    ranges = np.ptp(groups, axis=1)
+    grand, r_bar = float(means.mean()), float(ranges.mean())
+    d2, d3 = D2.get(size, DEFAULT_D2), D3_SIGMA.get(size, D3_SIGMA[5])
+    a2 = 3 / (d2 * math.sqrt(size))
+    return ControlLimits(
+        CHART_XBAR_R, size, grand, grand + a2 * r_bar, grand - a2 * r_bar,
+        dispersion_center=r_bar,
+        dispersion_ucl=(1 + 3 * d3 / d2) * r_bar,
+        dispersion_lcl=max(0.0, 1 - 3 * d3 / d2) * r_bar,
+        points=means, dispersion=ranges,
+    )
+
+
+def xbar_s(values, size: int, segments=None) -> ControlLimits:
+    groups = subgroups(values, size, segments)
+    if not len(groups) or size < 2:
+        return ControlLimits(CHART_XBAR_S, size, None, None, None)
+    means = groups.mean(axis=1)
+    sds = groups.std(axis=1, ddof=1)
+    grand, s_bar = float(means.mean()), float(sds.mean())
+    c = c4(size)
+    a3 = 3 / (c * math.sqrt(size))
+    spread = 3 * math.sqrt(1 - c * c) / c
+    return ControlLimits(
+        CHART_XBAR_S, size, grand, grand + a3 * s_bar, grand - a3 * s_bar,
+        dispersion_center=s_bar,
+        dispersion_ucl=(1 + spread) * s_bar,
+        dispersion_lcl=max(0.0, 1 - spread) * s_bar,
+        points=means, dispersion=sds,
+    )
+
+
+def i_mr(values) -> ControlLimits:
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return ControlLimits(CHART_I_MR, 1, None, None, None, points=values)
+    moving = np.abs(np.diff(values))
+    center, mr_bar = float(values.mean()), float(moving.mean())
+    half_width = 3 * mr_bar / D2[2]
+    return ControlLimits(
+        CHART_I_MR, 1, center, center + half_width, center - half_width,
+        dispersion_center=mr_bar,
+        dispersion_ucl=(1 + 3 * D3_SIGMA[2] / D2[2]) * mr_bar,
+        dispersion_lcl=0.0,
+        points=values, dispersion=moving,
+    )
+
+
+def p_chart(defectives, sample_sizes) -> ControlLimits:
+    """Proportion defective; limits vary with each sample's size."""
+    d = np.asarray(defectives, dtype=np.float64)
+    n = np.asarray(sample_sizes, dtype=np.float64)
+    if not len(d) or not n.sum():
+        return ControlLimits(CHART_P, 0, None, None, None)
+    p_bar = float(d.sum() / n.sum())
+    half_width = 3 * np.sqrt(p_bar * (1 - p_bar) / n)
+    return ControlLimits(
+        CHART_P, 0, p_bar, np.minimum(1.0, p_bar + half_width), np.maximum(0.0, p_bar - half_width),
+        points=d / n,
+    )
+
+
+def np_chart(defectives, sample_size: int) -> ControlLimits:
+    """Number defective for a constant sample size."""
+    d = np.asarray(defectives, dtype=np.float64)
+    if not len(d) or sample_size < 1:
+        return ControlLimits(CHART_NP, sample_size, None, None, None)
+    p_bar = float(d.mean() / sample_size)
+    center = sample_size * p_bar
+    half_width = 3 * math.sqrt(center * (1 - p_bar))
+    return ControlLimits(
+        CHART_NP, sample_size, center, center + half_width, max(0.0, center - half_width),
+        points=d,
+    )
+
+
+# -----------------------------------------------------------------------------
+# Nelson rules
+# -----------------------------------------------------------------------------
+
+NELSON_RULES = {
+    1: 'One point beyond 3σ',
+    2: 'Nine points in a row on the same side of the center line',
+    3: 'Six points in a row steadily increasing or decreasing',
+    4: 'Fourteen points in a row alternating up and down',
+    5: 'Two of three points beyond 2σ on the same side',
+    6: 'Four of five points beyond 1σ on the same side',
+    7: 'Fifteen points in a row within 1σ',
+    8: 'Eight points in a row beyond 1σ on either side',
+}
+
+
+def _window_ends(mask: np.ndarray, width: int, at_least: Optional[int] = None) -> np.ndarray:
+    """Indices ending a window of `width` with all (or `at_least`) True."""
+    if len(mask) < width:
+        return np.empty(0, dtype=np.intp)
+    running = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    counts = running[width:] - running[:-width]
+    hits = counts >= (width if at_least is None else at_least)
+    return np.flatnonzero(hits) + width - 1
+
+
+def nelson_rules(points, center, sigma) -> dict[int, np.ndarray]:
+    """Indices (into `points`) where each Nelson rule fires.
+
+    Each hit is reported at the last point of the run that triggered it.
+    `sigma` may be an array (p charts); rules that need a sigma are skipped
+    when it is missing or zero.
+    """
+    x = np.asarray(points, dtype=np.float64)
+    empty = np.empty(0, dtype=np.intp)
+    if center is None or not len(x):
+        return {rule: empty for rule in NELSON_RULES}
+
+    above, below = x > center, x < center
+    rising = np.diff(x) > 0
+    falling = np.diff(x) < 0
+    step = np.sign(np.diff(x))
+    alternating = (step[1:] * step[:-1]) < 0
+
+    flags = {
+        2: np.union1d(_window_ends(above, 9), _window_ends(below, 9)),
+        # 6 points => 5 successive moves; a move ending at point i is diff[i-1]
+        3: np.union1d(_window_ends(rising, 5), _window_ends(falling, 5)) + 1,
+        # 14 points => 12 successive sign flips; a flip ending at point i is alternating[i-2]
+        4: _window_ends(alternating, 12) + 2,
+    }
+
+    sigma = None if sigma is None else np.asarray(sigma, dtype=np.float64)
+    if sigma is None or not np.all(sigma > 0):
+        flags.update({rule: empty for rule in (1, 5, 6, 7, 8)})
+    else:
+        z = (x - center) / sigma
+        flags[1] = np.flatnonzero(np.abs(z) > 3)
+        flags[5] = np.union1d(_window_ends(z > 2, 3, at_least=2), _window_ends(z < -2, 3, at_least=2))
+        flags[6] = np.union1d(_window_ends(z > 1, 5, at_least=4), _window_ends(z < -1, 5, at_least=4))
+        flags[7] = _window_ends(np.abs(z) < 1, 15)
+        flags[8] = _window_ends(np.abs(z) > 1, 8)
+    return {rule: flags[rule].astype(np.intp) for rule in NELSON_RULES}
+
+
+def violations(points, center, sigma) -> list[dict]:
+    """`nelson_rules` flattened to [{'rule', 'index'}] sorted by index."""
+    out = [
+        {'rule': rule, 'index': int(i)}
+        for rule, hits in nelson_rules(points, center, sigma).items()
+        for i in hits
+    ]
+    out.sort(key=lambda v: (v['index'], v['rule']))
+    return out
+
+
+# -----------------------------------------------------------------------------
+# Capability
+# -----------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Capability:
+    sample_size: int
+    subgroup_size: int
+    num_subgroups: int
+    mean: float
+    std_dev_within: float
+    std_dev_overall: float
+    cp: Optional[float]
+    cpk: Optional[float]
+    pp: Optional[float]
+    ppk: Optional[float]
+
+
+def capability_from(*, sample_size: int, mean: float, std_dev_overall: float,
+                    r_bar: Optional[float], num_subgroups: int,
+                    usl: float, lsl: float, subgroup_size: int) -> Capability:
+    """Capability indices from summary moments (shared with the stats store)."""
+    if r_bar is not None:
+        std_within = r_bar / D2.get(subgroup_size, DEFAULT_D2)
+    else:
+        std_within = std_dev_overall
+
+    def indices(sigma):
+        if sigma <= 0:
+            return None, None
+        return (usl - lsl) / (6 * sigma), min((usl - mean) / (3 * sigma), (mean - lsl) / (3 * sigma))
+
+    cp, cpk = indices(std_within)
+    pp, ppk = indices(std_dev_overall)
+    return Capability(
+        sample_size=sample_size, subgroup_size=subgroup_size, num_subgroups=num_subgroups,
+        mean=mean, std_dev_within=std_within, std_dev_overall=std_dev_overall,
+        cp=cp, cpk=cpk, pp=pp, ppk=ppk,
+    )
+
+
+def capability(values, usl: float, lsl: float, subgroup_size: int, segments=None) -> Capability:
+    """Cp/Cpk from R-bar/d2 (within) and Pp/Ppk from the sample σ (overall).
+
+    Needs at least two values. Indices are None when their σ is zero; with
+    no complete subgroup the within σ falls back to the overall σ.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    groups = subgroups(values, subgroup_size, segments)
+    return capability_from(
+        sample_size=len(values),
+        mean=float(values.mean()),
+        std_dev_overall=float(values.std(ddof=1)),
+        r_bar=float(np.ptp(groups, axis=1).mean()) if len(groups) else None,
+        num_subgroups=len(groups),
+        usl=usl, lsl=lsl, subgroup_size=subgroup_size,
+    )
+
+
+def interpret(cp: Optional[float], cpk: Optional[float]) -> str:
+    """Plain-language reading of Cpk (and centering from Cp - Cpk)."""
+    if cpk is None:
+        return "Insufficient data for capability analysis."
+    if cpk >= 1.33:
+        text = "Process is capable and well-centered."
+    elif cpk >= 1.0:
+        text = "Process is marginally capable - monitor closely."
+    elif cpk >= 0.67:
+        text = "Process needs improvement - high defect risk."
+    else:
+        text = "Process is not capable - immediate action required."
+    if cp is not None and cp > cpk + 0.2:
+        text += " Process is not centered (Cp > Cpk)."
+    return text
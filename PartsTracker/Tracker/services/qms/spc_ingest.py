@@ -26,9 +26,14 @@ load, not one part.
 """
 from __future__ import annotations
 
+import heapq
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, Optional
+
+import numpy as np
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Q, Value, Variance
+from django.db.models.functions import Cast
 
 
 @dataclass(frozen=True)
@@ -48,12 +53,14 @@ def _display_name(user) -> Optional[str]:
     return full.strip() or getattr(user, "email", None) or getattr(user, "username", None)
 
 
-def collect_spc_rows(*, tenant, measurement_id, start: datetime, end: datetime) -> list[SpcRow]:
-    """Read both measurement tiers for the window, dedup, normalize, sort.
+def _tier_querysets(*, tenant, measurement_id, start: datetime, end: datetime):
+    """The two tier querysets for a window, filtered but not yet loaded.
 
-    Tenant filter is explicit on both queries (defense-in-depth). Rows whose
-    spec evaluation didn't run (``is_within_spec is None``) are dropped — they
-    indicate partial-state seed/test data, not a real reading.
+    Shared by `collect_spc_rows` (full rows for charts and reports) and
+    `iter_spc_readings` (bare values for the statistics store) so both read
+    exactly the same points. Each is ordered by (timestamp, id); with the
+    inspection tier ahead of the process tier on equal timestamps that gives
+    every reading a stable position in the series.
     """
     from Tracker.models import MeasurementResult, StepExecutionMeasurement
 
@@ -66,8 +73,9 @@ def collect_spc_rows(*, tenant, measurement_id, start: datetime, end: datetime)
             report__created_at__gte=start,
             report__created_at__lte=end,
             archived=False,
+            report__archived=False,
         )
-        .select_related("report", "report__part", "created_by")
+        .order_by("report__created_at", "id")
     )
 
     # Process data: exclude inspection-point SEMs — those are the same physical
@@ -86,33 +94,202 @@ def collect_spc_rows(*, tenant, measurement_id, start: datetime, end: datetime)
             archived=False,
         )
         .exclude(substep__is_inspection_point=True)
-        .select_related(
-            "step_execution",
-            "step_execution__part",
-            "recorded_by",
+        .order_by("recorded_at", "id")
+    )
+    return inspection_rows, process_rows
+
+
+# Position of each tier among readings that share a timestamp.
+INSPECTION_RANK = 0
+PROCESS_RANK = 1
+
+
+def iter_spc_readings(*, tenant, measurement_id, start: datetime, end: datetime):
+    """Yield ``(timestamp, rank, id, value, is_within_spec)`` in series order.
+
+    Values only — no report/part/user joins — streamed from both tiers and
+    merged on (timestamp, rank, id), the same order `collect_spc_rows`
+    returns.
+    """
+    inspection_rows, process_rows = _tier_querysets(
+        tenant=tenant, measurement_id=measurement_id, start=start, end=end,
+    )
+    inspection = (
+        (ts, INSPECTION_RANK, pk, float(value), bool(within))
+        for ts, pk, value, within in inspection_rows.values_list(
+            "report__created_at", "id", "value_numeric", "is_within_spec",
+        ).iterator(chunk_size=2000)
+    )
+    process = (
+        (ts, PROCESS_RANK, pk, float(value), bool(within))
+        for ts, pk, value, within in process_rows.values_list(
+            "recorded_at", "id", "value", "is_within_spec",
+        ).iterator(chunk_size=2000)
+    )
+    yield from heapq.merge(inspection, process, key=lambda r: r[:3])
+
+
+@dataclass(frozen=True)
+class SpcColumns:
+    """A window of chart points as columns, in series order.
+
+    `values` / `within` are NumPy arrays for the engine; part and operator
+    columns stay plain lists for the response payload.
+    """
+    timestamps: list[datetime]
+    values: np.ndarray
+    within: np.ndarray
+    part_erp_ids: list[str]
+    operator_names: list[Optional[str]]
+
+    def __len__(self):
+        return len(self.values)
+
+    def series(self):
+        from Tracker.services.qms.spc_engine import Series
+
+        days = np.fromiter(
+            (ts.timestamp() // 86400 for ts in self.timestamps), dtype=np.int64, count=len(self),
         )
+        return Series(self.values, self.within, days)
+
+    def rows(self) -> Iterator[SpcRow]:
+        for ts, value, within, part, operator in zip(
+            self.timestamps, self.values.tolist(), self.within.tolist(),
+            self.part_erp_ids, self.operator_names,
+        ):
+            yield SpcRow(ts, value, within, part, operator)
+
+
+_UNION_COLUMNS = ("spc_ts", "spc_rank", "spc_id", "spc_value", "spc_within", "spc_part", "spc_operator")
+
+
+def _union_queryset(*, tenant, measurement_id, start: datetime, end: datetime):
+    """Both tiers as one UNION ALL, ordered (timestamp, rank, id) in SQL.
+
+    Each arm selects only the chart columns through aliased annotations so the
+    two SELECT lists line up. Ordering and any slice run in the database.
+    """
+    inspection_rows, process_rows = _tier_querysets(
+        tenant=tenant, measurement_id=measurement_id, start=start, end=end,
     )
+    inspection = inspection_rows.order_by().annotate(
+        spc_ts=F("report__created_at"),
+        spc_rank=Value(INSPECTION_RANK),
+        spc_id=F("id"),
+        spc_value=F("value_numeric"),
+        spc_within=F("is_within_spec"),
+        spc_part=F("report__part__ERP_id"),
+        spc_operator=F("created_by_id"),
+    ).values(*_UNION_COLUMNS)
+    process = process_rows.order_by().annotate(
+        spc_ts=F("recorded_at"),
+        spc_rank=Value(PROCESS_RANK),
+        spc_id=F("id"),
+        spc_value=Cast("value", FloatField()),
+        spc_within=F("is_within_spec"),
+        spc_part=F("step_execution__part__ERP_id"),
+        spc_operator=F("recorded_by_id"),
+    ).values(*_UNION_COLUMNS)
+    return inspection.union(process, all=True).order_by("spc_ts", "spc_rank", "spc_id")
 
-    rows: list[SpcRow] = []
-    for mr in inspection_rows:
-        rows.append(SpcRow(
-            timestamp=mr.report.created_at,
-            value=float(mr.value_numeric),
-            is_within_spec=bool(mr.is_within_spec),
-            part_erp_id=(mr.report.part.ERP_id if mr.report.part else "") or "",
-            operator_name=_display_name(mr.created_by),
-        ))
-    for sem in process_rows:
-        rows.append(SpcRow(
-            timestamp=sem.recorded_at,
-            value=float(sem.value),
-            is_within_spec=bool(sem.is_within_spec),
-            part_erp_id=(
-                sem.step_execution.part.ERP_id
-                if sem.step_execution and sem.step_execution.part
-                else ""
-            ) or "",
-            operator_name=_display_name(sem.recorded_by),
-        ))
-    rows.sort(key=lambda r: r.timestamp)
-    return rows
+
+def _operator_names(user_ids) -> dict:
+    """One query for every operator in the window: id -> display name."""
+    from Tracker.models import User
+
+    if not user_ids:
+        return {}
+    users = User.objects.filter(pk__in=user_ids).only(  # tenant-safe: ids come from tenant-filtered rows
+        "first_name", "last_name", "email", "username",
+    )
+    return {user.pk: _display_name(user) for user in users}
+
+
+def spc_columns(*, tenant, measurement_id, start: datetime, end: datetime,
+                limit: Optional[int] = None) -> SpcColumns:
+    """The first `limit` points of the window (all when None), as columns.
+
+    Ordering and the limit are pushed into SQL, so the cost follows `limit`
+    rather than the window size. Operator names are resolved in one batched
+    user lookup instead of a join per row.
+    """
+    queryset = _union_queryset(tenant=tenant, measurement_id=measurement_id, start=start, end=end)
+    if limit is not None:
+        queryset = queryset[:limit]
+
+    timestamps, values, within, parts, operator_ids = [], [], [], [], []
+    for row in queryset:
+        timestamps.append(row["spc_ts"])
+        values.append(row["spc_value"])
+        within.append(row["spc_within"])
+        parts.append(row["spc_part"] or "")
+        operator_ids.append(row["spc_operator"])
+
+    names = _operator_names({pk for pk in operator_ids if pk is not None})
+    return SpcColumns(
+        timestamps=timestamps,
+        values=np.asarray(values, dtype=np.float64),
+        within=np.asarray(within, dtype=bool),
+        part_erp_ids=parts,
+        operator_names=[names.get(pk) for pk in operator_ids],
+    )
+
+
+def reading_series(*, tenant, measurement_id, start: datetime, end: datetime):
+    """Every value in the window as an `spc_engine.Series`, without joins.
+
+    For whole-window statistics and capability, which need all the values
+    but none of the part/operator columns.
+    """
+    from Tracker.services.qms.spc_engine import Series
+
+    values, within, days = [], [], []
+    for ts, _rank, _pk, value, ok in iter_spc_readings(
+        tenant=tenant, measurement_id=measurement_id, start=start, end=end,
+    ):
+        values.append(value)
+        within.append(ok)
+        days.append(ts.timestamp() // 86400)
+    return Series(
+        np.asarray(values, dtype=np.float64),
+        np.asarray(within, dtype=bool),
+        np.asarray(days, dtype=np.int64),
+    )
+
+
+def window_aggregates(*, tenant, measurement_id, start: datetime, end: datetime) -> list[dict]:
+    """Count, mean, population variance, min, max and in-spec count per tier.
+
+    Computed in SQL, one aggregate query per tier, so whole-window statistics
+    cost the same whatever the window holds. Keys: n, mean, var, lo, hi, within.
+    """
+    inspection_rows, process_rows = _tier_querysets(
+        tenant=tenant, measurement_id=measurement_id, start=start, end=end,
+    )
+    tiers = [
+        inspection_rows.order_by().annotate(spc_value=F("value_numeric")),
+        process_rows.order_by().annotate(spc_value=Cast("value", FloatField())),
+    ]
+    return [
+        tier.aggregate(
+            n=Count("id"),
+            mean=Avg("spc_value"),
+            var=Variance("spc_value"),
+            lo=Min("spc_value"),
+            hi=Max("spc_value"),
+            within=Count("id", filter=Q(is_within_spec=True)),
+        )
+        for tier in tiers
+    ]
+
+
+def collect_spc_rows(*, tenant, measurement_id, start: datetime, end: datetime) -> list[SpcRow]:
+    """Read both measurement tiers for the window, dedup, normalize, sort.
+
+    Tenant filter is explicit on both queries (defense-in-depth). Rows whose
+    spec evaluation didn't run (``is_within_spec is None``) are dropped — they
+    indicate partial-state seed/test data, not a real reading. Callers that
+    only chart a prefix should use `spc_columns(limit=...)` instead.
+    """
+    return list(spc_columns(tenant=tenant, measurement_id=measurement_id, start=start, end=end).rows())
@@ -0,0 +1,509 @@
+"""Incremental SPC statistics store (`SPCStatsBucket`).
+
+The chart and capability endpoints need count, mean, standard deviation,
+min/max, in-spec count and average subgroup range over a window. Reading the
+points for that is O(points); this module keeps one bucket per measurement
+definition per UTC day and answers a window from ~one row per day plus the two
+partial edge days read raw.
+
+Series rules (shared by the store and the raw verification path, so the two
+agree exactly):
+  - readings come from `spc_ingest.iter_spc_readings` in (timestamp, tier, id)
+    order — the same points `collect_spc_rows` charts;
+  - variance uses Welford's update within a day and Chan's merge across days;
+  - subgroups are consecutive readings *within a day* (rational subgroups
+    never span midnight); a day's incomplete trailing subgroup is dropped.
+
+Maintenance: `record_reading` is called from the MeasurementResult /
+StepExecutionMeasurement post_save receivers. A new reading that lands after a
+day's last reading is folded in in O(1); edits, archives, deletes and
+back-dated readings recompute that day, and an edit that moves a reading to
+another day (`remember_previous` keeps the old timestamp) recomputes both.
+`record_report` does the same for a QualityReports row whose created_at or
+archived flag changes. `rebuild` recomputes everything.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from itertools import groupby
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from Tracker.services.qms.spc_ingest import INSPECTION_RANK, PROCESS_RANK, iter_spc_readings, window_aggregates
+from Tracker.utils.tenant_context import tenant_context
+
+# Subgroup sizes tracked per bucket — the d2 table used by capability.
+SUBGROUP_SIZES = range(2, 11)
+
+SOURCE_STORE = 'store'
+SOURCE_RAW = 'raw'
+
+
+def stats_enabled() -> bool:
+    return getattr(settings, 'SPC_STATS_ENABLED', False)
+
+
+def utc_day(ts: datetime) -> date:
+    return ts.astimezone(dt_timezone.utc).date()
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+# -----------------------------------------------------------------------------
+# Running statistics
+# -----------------------------------------------------------------------------
+
+@dataclass
+class RunningStats:
+    """Mergeable summary of a run of readings.
+
+    `subgroups` maps size -> [ranges, range_sum, open_n, open_min, open_max].
+    The open subgroup only matters while readings are still being added to
+    the same day; `merge` keeps closed subgroups only.
+    """
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    within_spec: int = 0
+    subgroups: dict = field(default_factory=dict)
+    sizes: tuple = tuple(SUBGROUP_SIZES)
+
+    def add(self, value: float, is_within_spec: bool) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+        if is_within_spec:
+            self.within_spec += 1
+
+        for size in self.sizes:
+            state = self.subgroups.setdefault(size, [0, 0.0, 0, None, None])
+            if state[2] == 0:
+                state[2:] = [1, value, value]
+            else:
+                state[2] += 1
+                state[3] = min(state[3], value)
+                state[4] = max(state[4], value)
+            if state[2] == size:
+                state[0] += 1
+                state[1] += state[4] - state[3]
+                state[2:] = [0, None, None]
+
+    def merge(self, other: 'RunningStats') -> None:
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+        else:
+            total = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / total
+            self.m2 += other.m2 + delta * delta * self.count * other.count / total
+            self.count = total
+        self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+        self.max_value = other.max_value if self.max_value is None else max(self.max_value, other.max_value)
+        self.within_spec += other.within_spec
+        for size, (ranges, range_sum, *_open) in other.subgroups.items():
+            state = self.subgroups.setdefault(size, [0, 0.0, 0, None, None])
+            state[0] += ranges
+            state[1] += range_sum
+            state[2:] = [0, None, None]
+
+    @property
+    def std_dev(self) -> float:
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+
+    def num_subgroups(self, size: int) -> int:
+        return self.subgroups.get(size, [0])[0]
+
+    def r_bar(self, size: int) -> Optional[float]:
+        ranges, range_sum = self.subgroups.get(size, [0, 0.0])[:2]
+        return range_sum / ranges if ranges else None
+
+    def summary(self):
+        """As an `spc_engine.Summary`, the shape the endpoints render."""
+        from Tracker.services.qms.spc_engine import Summary
+        if not self.count:
+            return Summary(0, None, None, None, None, 0)
+        return Summary(self.count, self.mean, self.std_dev, self.min_value, self.max_value, self.within_spec)
+
+    def capability(self, usl: float, lsl: float, subgroup_size: int):
+        """As an `spc_engine.Capability` for the given spec limits."""
+        from Tracker.services.qms.spc_engine import capability_from
+        return capability_from(
+            sample_size=self.count, mean=self.mean, std_dev_overall=self.std_dev,
+            r_bar=self.r_bar(subgroup_size), num_subgroups=self.num_subgroups(subgroup_size),
+            usl=usl, lsl=lsl, subgroup_size=subgroup_size,
+        )
+
+    # Bucket (de)serialization. JSON object keys are strings.
+
+    @classmethod
+    def from_bucket(cls, bucket) -> 'RunningStats':
+        return cls(
+            count=bucket.count,
+            mean=bucket.mean,
+            m2=bucket.m2,
+            min_value=bucket.min_value,
+            max_value=bucket.max_value,
+            within_spec=bucket.within_spec_count,
+            subgroups={int(size): list(state) for size, state in (bucket.subgroups or {}).items()},
+        )
+
+    def to_bucket(self, bucket) -> None:
+        bucket.count = self.count
+        bucket.mean = self.mean
+        bucket.m2 = self.m2
+        bucket.min_value = self.min_value
+        bucket.max_value = self.max_value
+        bucket.within_spec_count = self.within_spec
+        bucket.subgroups = {str(size): state for size, state in self.subgroups.items()}
+
+
+def summarize(readings: Iterable, sizes=tuple(SUBGROUP_SIZES)) -> RunningStats:
+    """Summarize ``(timestamp, value, is_within_spec, ...)`` tuples in series order."""
+    total = RunningStats(sizes=tuple(sizes))
+    for _day, day_readings in groupby(readings, key=lambda r: utc_day(r[0])):
+        day = RunningStats(sizes=tuple(sizes))
+        for reading in day_readings:
+            day.add(reading[1], reading[2])
+        total.merge(day)
+    return total
+
+
+def _values(readings):
+    """iter_spc_readings tuples -> (timestamp, value, is_within_spec)."""
+    return ((ts, value, within) for ts, _rank, _pk, value, within in readings)
+
+
+# -----------------------------------------------------------------------------
+# Window queries
+# -----------------------------------------------------------------------------
+
+def window_stats(*, tenant, measurement_id, start: datetime, end: datetime) -> RunningStats:
+    """Statistics for [start, end] from the stored buckets.
+
+    Whole days inside the window come from SPCStatsBucket; the partial days
+    at either edge are read raw (at most two days of points).
+    """
+    from Tracker.models import SPCStatsBucket
+
+    first_full = utc_day(start) if day_start(utc_day(start)) == start else utc_day(start) + timedelta(days=1)
+    after_last_full = utc_day(end)   # `end`'s own day is partial (or a single instant)
+
+    if first_full >= after_last_full:
+        return summarize(_values(iter_spc_readings(
+            tenant=tenant, measurement_id=measurement_id, start=start, end=end,
+        )))
+
+    head_end = day_start(first_full)
+    head = (
+        r for r in iter_spc_readings(
+            tenant=tenant, measurement_id=measurement_id, start=start, end=head_end,
+        ) if r[0] < head_end
+    )
+    tail = iter_spc_readings(
+        tenant=tenant, measurement_id=measurement_id,
+        start=day_start(after_last_full), end=end,
+    )
+
+    total = summarize(_values(head))
+    buckets = SPCStatsBucket.objects.filter(
+        tenant=tenant,
+        measurement_definition_id=measurement_id,
+        day__gte=first_full,
+        day__lt=after_last_full,
+    ).order_by('day')
+    for bucket in buckets:
+        total.merge(RunningStats.from_bucket(bucket))
+    total.merge(summarize(_values(tail)))
+    return total
+
+
+# -----------------------------------------------------------------------------
+# Maintenance
+# -----------------------------------------------------------------------------
+
+def raw_window_stats(*, tenant, measurement_id, start: datetime, end: datetime) -> RunningStats:
+    """Window statistics from SQL aggregates over the readings, without the store.
+
+    Each tier's count / mean / variance comes back from the database and the
+    two are combined with `merge`. No subgroup ranges: callers that need
+    R-bar (capability) read the series instead.
+    """
+    stats = RunningStats()
+    for tier in window_aggregates(tenant=tenant, measurement_id=measurement_id, start=start, end=end):
+        if tier['n']:
+            stats.merge(RunningStats(
+                count=tier['n'], mean=tier['mean'], m2=tier['var'] * tier['n'],
+                min_value=tier['lo'], max_value=tier['hi'], within_spec=tier['within'],
+            ))
+    return stats
+
+
+def _reading_of(instance):
+    """(tenant_id, definition_id, timestamp, rank, included, value, within) for a measurement row."""
+    from Tracker.models import MeasurementResult
+
+    if isinstance(instance, MeasurementResult):
+        included = instance.value_numeric is not None and not instance.archived
+        return (
+            instance.tenant_id, instance.definition_id, instance.report.created_at,
+            INSPECTION_RANK, included, instance.value_numeric, instance.is_within_spec,
+        )
+
+    included = (
+        instance.value is not None
+        and instance.is_within_spec is not None
+        and not instance.archived
+        and not (instance.substep_id and instance.substep.is_inspection_point)
+    )
+    return (
+        instance.tenant_id, instance.measurement_definition_id, instance.recorded_at,
+        PROCESS_RANK, included, instance.value, instance.is_within_spec,
+    )
+
+
+def remember_previous(instance) -> None:
+    """Before a measurement or report save: keep where its readings sit now.
+
+    Stores the previous (definition id, timestamp) of a measurement row, or
+    the previous (created_at, archived) of a QualityReports row, so the
+    post_save side can also rebuild the day a reading moved away from.
+    """
+    from Tracker.models import MeasurementResult, QualityReports
+
+    if instance._state.adding:
+        return
+    if isinstance(instance, QualityReports):
+        # tenant-safe: re-reads the row being saved
+        previous = QualityReports.unscoped.filter(pk=instance.pk).values_list('created_at', 'archived').first()
+    elif isinstance(instance, MeasurementResult):
+        # tenant-safe: re-reads the row being saved
+        previous = MeasurementResult.unscoped.filter(pk=instance.pk).values_list(
+            'definition_id', 'report__created_at',
+        ).first()
+    else:
+        # tenant-safe: re-reads the row being saved
+        previous = type(instance).unscoped.filter(pk=instance.pk).values_list(
+            'measurement_definition_id', 'recorded_at',
+        ).first()
+    instance._spc_previous = previous
+
+
+def record_reading(instance, created: bool) -> None:
+    """Fold a saved MeasurementResult / StepExecutionMeasurement into its day."""
+    tenant_id, definition_id, ts, rank, included, value, within = _reading_of(instance)
+    if tenant_id is None or ts is None or (created and not included):
+        return
+    with tenant_context(tenant_id):
+        if created:
+            _append(tenant_id, definition_id, ts, rank, instance.pk, value, within)
+            return
+        days = {(definition_id, utc_day(ts))}
+        previous = getattr(instance, '_spc_previous', None)
+        if previous and previous[1] is not None:
+            days.add((previous[0], utc_day(previous[1])))
+        for day_definition_id, day in days:
+            rebuild_day(tenant_id, day_definition_id, day)
+
+
+def record_report(report, created: bool) -> None:
+    """Rebuild the days of a report's results when its created_at or archived flag changes."""
+    from Tracker.models import MeasurementResult
+
+    previous = getattr(report, '_spc_previous', None)
+    if created or report.tenant_id is None or previous is None:
+        return
+    previous_created_at, previous_archived = previous
+    if (previous_created_at, previous_archived) == (report.created_at, report.archived):
+        return
+
+    with tenant_context(report.tenant_id):
+        definition_ids = set(
+            MeasurementResult.objects.filter(
+                tenant_id=report.tenant_id, report=report, value_numeric__isnull=False,
+            ).values_list('definition_id', flat=True)
+        )
+        days = {utc_day(ts) for ts in (report.created_at, previous_created_at) if ts is not None}
+        for definition_id in definition_ids:
+            for day in days:
+                rebuild_day(report.tenant_id, definition_id, day)
+
+
+def forget_reading(instance) -> None:
+    """Recompute the day of a hard-deleted measurement row."""
+    tenant_id, definition_id, ts, *_ = _reading_of(instance)
+    if tenant_id is not None and ts is not None:
+        with tenant_context(tenant_id):
+            rebuild_day(tenant_id, definition_id, utc_day(ts))
+
+
+def _append(tenant_id, definition_id, ts, rank, pk, value, within) -> None:
+    from Tracker.models import SPCStatsBucket
+
+    with transaction.atomic():
+        bucket, _ = SPCStatsBucket.objects.select_for_update().get_or_create(
+            tenant_id=tenant_id,
+            measurement_definition_id=definition_id,
+            day=utc_day(ts),
+        )
+        if bucket.last_timestamp is not None and (
+            (ts, rank, pk) <= (bucket.last_timestamp, bucket.last_rank, bucket.last_reading_id)
+        ):
+            # Back-dated or out of order: it lands mid-day, which shifts every
+            # later subgroup boundary, so the day is recomputed instead.
+            rebuild_day(tenant_id, definition_id, bucket.day)
+            return
+
+        stats = RunningStats.from_bucket(bucket)
+        stats.add(float(value), bool(within))
+        stats.to_bucket(bucket)
+        bucket.last_timestamp, bucket.last_rank, bucket.last_reading_id = ts, rank, pk
+        bucket.save()
+
+
+def _write_day(bucket_model, tenant_id, definition_id, day, readings) -> Optional[object]:
+    stats = RunningStats()
+    last = None
+    for last in readings:
+        stats.add(last[3], last[4])
+    if last is None:
+        return None
+    bucket = bucket_model(
+        tenant_id=tenant_id, measurement_definition_id=definition_id, day=day,
+        last_timestamp=last[0], last_rank=last[1], last_reading_id=last[2],
+    )
+    stats.to_bucket(bucket)
+    return bucket
+
+
+def rebuild_day(tenant_id, definition_id, day: date) -> None:
+    """Recompute one definition-day from the rows (drops it when empty)."""
+    from Tracker.models import SPCStatsBucket
+
+    start = day_start(day)
+    end = start + timedelta(days=1)
+    readings = (
+        r for r in iter_spc_readings(
+            tenant=tenant_id, measurement_id=definition_id, start=start, end=end,
+        ) if r[0] < end
+    )
+    with transaction.atomic():
+        SPCStatsBucket.objects.filter(
+            tenant_id=tenant_id, measurement_definition_id=definition_id, day=day,
+        ).delete()
+        bucket = _write_day(SPCStatsBucket, tenant_id, definition_id, day, readings)
+        if bucket is not None:
+            bucket.save()
+
+
+def _definitions_with_readings(tenant_id):
+    """Ids of definitions with at least one candidate reading in the tenant."""
+    from Tracker.models import MeasurementResult, StepExecutionMeasurement
+
+    inspection = MeasurementResult.objects.filter(
+        tenant_id=tenant_id, value_numeric__isnull=False, archived=False, report__archived=False,
+    ).values_list('definition_id', flat=True).distinct()
+    process = StepExecutionMeasurement.objects.filter(
+        tenant_id=tenant_id, value__isnull=False, archived=False,
+    ).values_list('measurement_definition_id', flat=True).distinct()
+    return set(inspection) | set(process)
+
+
+def _computed_buckets(tenant_id, definition_id):
+    """Yield unsaved buckets for every day of a definition, from the rows."""
+    from Tracker.models import SPCStatsBucket
+
+    readings = iter_spc_readings(
+        tenant=tenant_id, measurement_id=definition_id,
+        start=datetime.min.replace(tzinfo=dt_timezone.utc),
+        end=datetime.max.replace(tzinfo=dt_timezone.utc),
+    )
+    for day, day_readings in groupby(readings, key=lambda r: utc_day(r[0])):
+        yield _write_day(SPCStatsBucket, tenant_id, definition_id, day, day_readings)
+
+
+def rebuild(tenant_id, definition_id=None) -> int:
+    """Recompute every bucket for a tenant (or one definition). Returns rows written."""
+    from Tracker.models import SPCStatsBucket
+
+    written = 0
+    with tenant_context(tenant_id), transaction.atomic():
+        stale = SPCStatsBucket.objects.filter(tenant_id=tenant_id)
+        definition_ids = [definition_id] if definition_id else _definitions_with_readings(tenant_id)
+        if definition_id:
+            stale = stale.filter(measurement_definition_id=definition_id)
+        stale.delete()
+
+        for def_id in definition_ids:
+            batch = []
+            for bucket in _computed_buckets(tenant_id, def_id):
+                batch.append(bucket)
+                if len(batch) >= 500:
+                    written += len(SPCStatsBucket.objects.bulk_create(batch))  # tenant-safe: rows carry tenant_id
+                    batch = []
+            written += len(SPCStatsBucket.objects.bulk_create(batch))  # tenant-safe: rows carry tenant_id
+    return written
+
+
+@dataclass(frozen=True)
+class BucketMismatch:
+    definition_id: object
+    day: date
+    stored: Optional[RunningStats]
+    computed: Optional[RunningStats]
+
+
+def _same(a: Optional[RunningStats], b: Optional[RunningStats], tol=1e-9) -> bool:
+    if a is None or b is None:
+        return a is b
+    close = lambda x, y: abs(x - y) <= tol * max(1.0, abs(x), abs(y))  # noqa: E731
+    return (
+        a.count == b.count
+        and a.within_spec == b.within_spec
+        and a.min_value == b.min_value
+        and a.max_value == b.max_value
+        and close(a.mean, b.mean)
+        and close(a.m2, b.m2)
+        and all(
+            a.num_subgroups(size) == b.num_subgroups(size)
+            and close(a.subgroups.get(size, [0, 0.0])[1], b.subgroups.get(size, [0, 0.0])[1])
+            for size in SUBGROUP_SIZES
+        )
+    )
+
+
+def check_consistency(tenant_id, definition_id=None) -> list[BucketMismatch]:
+    """Compare stored buckets against a recompute from the rows."""
+    from Tracker.models import SPCStatsBucket
+
+    mismatches = []
+    with tenant_context(tenant_id):
+        stored_rows = SPCStatsBucket.objects.filter(tenant_id=tenant_id)
+        if definition_id:
+            stored_rows = stored_rows.filter(measurement_definition_id=definition_id)
+        stored = {
+            (b.measurement_definition_id, b.day): RunningStats.from_bucket(b) for b in stored_rows
+        }
+        definition_ids = [definition_id] if definition_id else (
+            _definitions_with_readings(tenant_id) | {key[0] for key in stored}
+        )
+        for def_id in definition_ids:
+            for bucket in _computed_buckets(tenant_id, def_id):
+                computed = RunningStats.from_bucket(bucket)
+                have = stored.pop((def_id, bucket.day), None)
+                if not _same(have, computed):
+                    mismatches.append(BucketMismatch(def_id, bucket.day, have, computed))
+        for (def_id, day), have in stored.items():
+            mismatches.append(BucketMismatch(def_id, day, have, None))
+    return mismatches
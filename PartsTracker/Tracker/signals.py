@@ -2,14 +2,14 @@ import logging
 from pathlib import Path
 
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
 from .signals_versioning import revision_created
 
 from .models import (
-    QualityReports, QuarantineDisposition, ThreeDModel, Documents,
+    QualityReports, QuarantineDisposition, ThreeDModel, HeatMapAnnotations, Documents,
     ApprovalRequest, ApprovalResponse,
     CAPA, CapaTasks, CapaVerification,
     Tenant,
@@ -140,6 +140,14 @@ def queue_3d_model_processing(sender, instance, created, **kwargs):
         logger.warning(f"Unsupported 3D model format {file_ext} for {instance.id}")
 
 
+@receiver(post_save, sender=HeatMapAnnotations)
+@receiver(post_delete, sender=HeatMapAnnotations)
+def invalidate_heatmap_density(sender, instance, **kwargs):
+    """Drop cached density grids for the annotation's model."""
+    from Tracker.services.qms.heatmap_density import invalidate_model
+    invalidate_model(instance.model_id)
+
+
 @receiver(post_save, sender=Documents)
 def auto_embed_document(sender, instance, created, **kwargs):
     """
@@ -441,9 +449,6 @@ def seed_tenant_defaults(sender, instance, created, **kwargs):
 # PERMISSION CACHE INVALIDATION
 # =============================================================================
 
-from django.db.models.signals import m2m_changed, post_delete
-
-
 @receiver(m2m_changed, sender='Tracker.TenantGroup_permissions')
 def clear_group_permission_cache(sender, instance, action, **kwargs):
     """
@@ -471,6 +476,33 @@ def clear_user_permission_cache_on_role_delete(sender, instance, **kwargs):
     instance.user.clear_permission_cache(tenant)
 
 
+@receiver(post_save, sender=User)
+def invalidate_permission_memo_on_user_save(sender, instance, **kwargs):
+    """Superuser/staff flags and export-control attributes feed memoized
+    decisions; drop this user's entries for the rest of the request."""
+    from Tracker.utils.permission_memo import invalidate
+    invalidate(user_id=instance.id)
+
+
+# =============================================================================
+# TENANT CACHE INVALIDATION
+# =============================================================================
+
+@receiver(post_save, sender='Tracker.Tenant')
+@receiver(post_delete, sender='Tracker.Tenant')
+@receiver(post_save, sender='Tracker.TenantMembership')
+@receiver(post_delete, sender='Tracker.TenantMembership')
+@receiver(post_save, sender='Tracker.UserRole')
+@receiver(post_delete, sender='Tracker.UserRole')
+def bump_tenant_cache(sender, instance, raw=False, **kwargs):
+    """Tenant rows and membership answers are cached per worker by
+    TenantMiddleware; any change to them invalidates every worker."""
+    if raw:
+        return
+    from Tracker.utils import tenant_cache
+    tenant_cache.bump()
+
+
 # =============================================================================
 # CALIBRATION SIGNALS
 # =============================================================================
@@ -503,4 +535,206 @@ def cascade_schedule_slots_on_workorder_complete(sender, instance, **kwargs):
         return
 
     from Tracker.services.mes.work_order import cascade_schedule_slots
-    cascade_schedule_slots(instance)
\ No newline at end of file
+    cascade_schedule_slots(instance)
+
+# =============================================================================
+# SCOPE CLOSURE MAINTENANCE
+# =============================================================================
+# Keep the materialized order-hierarchy index (ScopeClosure) in step with the
+# FK columns it is derived from. Off unless SCOPE_CLOSURE_ENABLED; bulk_create
+# call sites index their rows via scope_closure.add_nodes directly.
+
+@receiver(post_save, sender='Tracker.Orders')
+@receiver(post_save, sender='Tracker.WorkOrder')
+@receiver(post_save, sender='Tracker.Parts')
+@receiver(post_save, sender='Tracker.StepExecution')
+@receiver(post_save, sender='Tracker.QualityReports')
+def refresh_scope_closure(sender, instance, created, raw=False, **kwargs):
+    from Tracker.services.core import scope_closure
+    if raw or not scope_closure.closure_enabled():
+        return
+    scope_closure.refresh_node(instance, created=created)
+
+
+@receiver(post_delete, sender='Tracker.Orders')
+@receiver(post_delete, sender='Tracker.WorkOrder')
+@receiver(post_delete, sender='Tracker.Parts')
+@receiver(post_delete, sender='Tracker.StepExecution')
+@receiver(post_delete, sender='Tracker.QualityReports')
+def remove_from_scope_closure(sender, instance, **kwargs):
+    from Tracker.services.core import scope_closure
+    if not scope_closure.closure_enabled():
+        return
+    scope_closure.remove_node(instance)
+
+
+# =============================================================================
+# SPC STATISTICS MAINTENANCE
+# =============================================================================
+# Fold measurement writes into the per-day SPCStatsBucket rows the SPC chart
+# and capability endpoints read. Off unless SPC_STATS_ENABLED.
+
+@receiver(pre_save, sender='Tracker.MeasurementResult')
+@receiver(pre_save, sender='Tracker.StepExecutionMeasurement')
+@receiver(pre_save, sender='Tracker.QualityReports')
+def remember_spc_reading_day(sender, instance, raw=False, **kwargs):
+    from Tracker.services.qms import spc_stats
+    if raw or not spc_stats.stats_enabled():
+        return
+    spc_stats.remember_previous(instance)
+
+
+@receiver(post_save, sender='Tracker.MeasurementResult')
+@receiver(post_save, sender='Tracker.StepExecutionMeasurement')
+def record_spc_reading(sender, instance, created, raw=False, **kwargs):
+    from Tracker.services.qms import spc_stats
+    if raw or not spc_stats.stats_enabled():
+        return
+    spc_stats.record_reading(instance, created=created)
+
+
+@receiver(post_save, sender='Tracker.QualityReports')
+def record_spc_report(sender, instance, created, raw=False, **kwargs):
+    from Tracker.services.qms import spc_stats
+    if raw or not spc_stats.stats_enabled():
+        return
+    spc_stats.record_report(instance, created=created)
+
+
+@receiver(post_delete, sender='Tracker.MeasurementResult')
+@receiver(post_delete, sender='Tracker.StepExecutionMeasurement')
+def forget_spc_reading(sender, instance, **kwargs):
+    from Tracker.services.qms import spc_stats
+    if not spc_stats.stats_enabled():
+        return
+    spc_stats.forget_reading(instance)
+
+
+# =============================================================================
+# OEE ROLLUP MAINTENANCE
+# =============================================================================
+# Refresh the OEEBucket rows of the shift windows a saved or deleted source
+# row touches (before and after an edit), once per transaction on commit. Off unless OEE_ROLLUP_ENABLED.
+
+@receiver(pre_save, sender='Tracker.DowntimeEvent')
+@receiver(pre_save, sender='Tracker.TimeEntry')
+@receiver(pre_save, sender='Tracker.StepExecution')
+@receiver(pre_save, sender='Tracker.EquipmentUsage')
+def remember_oee_span(sender, instance, raw=False, **kwargs):
+    from Tracker.services.mes import oee
+    if raw or not oee.rollup_enabled():
+        return
+    oee.remember_previous(instance)
+
+
+@receiver(post_save, sender='Tracker.DowntimeEvent')
+@receiver(post_save, sender='Tracker.TimeEntry')
+@receiver(post_save, sender='Tracker.StepExecution')
+@receiver(post_save, sender='Tracker.EquipmentUsage')
+@receiver(post_save, sender='Tracker.QualityReports')
+def refresh_oee_rollup(sender, instance, raw=False, **kwargs):
+    from Tracker.services.mes import oee
+    if raw or not oee.rollup_enabled():
+        return
+    oee.record_event(instance)
+
+
+@receiver(post_delete, sender='Tracker.DowntimeEvent')
+@receiver(post_delete, sender='Tracker.TimeEntry')
+@receiver(post_delete, sender='Tracker.StepExecution')
+@receiver(post_delete, sender='Tracker.EquipmentUsage')
+@receiver(post_delete, sender='Tracker.QualityReports')
+def forget_oee_event(sender, instance, **kwargs):
+    from Tracker.services.mes import oee
+    if not oee.rollup_enabled():
+        return
+    oee.record_event(instance)
+
+
+# =============================================================================
+# QUALITY DASHBOARD ROLLUP MAINTENANCE
+# =============================================================================
+# Recompute the QualityDailyRollup / DefectDailyRollup days a saved or deleted
+# report, defect or disposition touches, once per transaction on commit. Off
+# unless QUALITY_ROLLUP_ENABLED.
+
+@receiver(pre_save, sender='Tracker.QuarantineDisposition')
+def remember_disposition_rollup_day(sender, instance, raw=False, **kwargs):
+    from Tracker.services.qms import quality_rollup
+    if raw or not quality_rollup.rollup_enabled():
+        return
+    quality_rollup.remember_previous(instance)
+
+
+@receiver(post_save, sender='Tracker.QualityReports')
+@receiver(post_save, sender='Tracker.QualityReportDefect')
+@receiver(post_save, sender='Tracker.QuarantineDisposition')
+def refresh_quality_rollup(sender, instance, raw=False, **kwargs):
+    from Tracker.services.qms import quality_rollup
+    if raw or not quality_rollup.rollup_enabled():
+        return
+    quality_rollup.record_event(instance)
+
+
+@receiver(post_delete, sender='Tracker.QualityReports')
+@receiver(post_delete, sender='Tracker.QualityReportDefect')
+@receiver(post_delete, sender='Tracker.QuarantineDisposition')
+def forget_quality_rollup_row(sender, instance, **kwargs):
+    from Tracker.services.qms import quality_rollup
+    if not quality_rollup.rollup_enabled():
+        return
+    quality_rollup.record_event(instance)
+
+
+@receiver(m2m_changed, sender=QualityReports.errors.through)
+def refresh_quality_rollup_defects(sender, instance, action, reverse, pk_set, **kwargs):
+    """`report.errors.add/set/remove` writes QualityReportDefect rows without save signals."""
+    from Tracker.services.qms import quality_rollup
+    if action not in ('post_add', 'post_remove', 'pre_clear') or not quality_rollup.rollup_enabled():
+        return
+    if not reverse:
+        quality_rollup.record_event(instance)
+    elif action == 'pre_clear':
+        quality_rollup.record_reports(instance.report_instances.values_list('report_id', flat=True))
+    else:
+        quality_rollup.record_reports(pk_set or ())
+
+
+# =============================================================================
+# WORK QUEUE PROJECTION MAINTENANCE
+# =============================================================================
+# Recompute the WorkQueueEntry rows of the work orders a saved or deleted
+# execution, part, work order or hold touches, once per transaction on commit,
+# and push the changed rows to the work-queue streams. Off unless
+# WORK_QUEUE_PROJECTION_ENABLED.
+
+@receiver(pre_save, sender='Tracker.Parts')
+def remember_part_work_queue_order(sender, instance, raw=False, **kwargs):
+    from Tracker.services.mes import work_queue
+    if raw or not work_queue.projection_enabled():
+        return
+    work_queue.remember_previous(instance)
+
+
+@receiver(post_save, sender='Tracker.StepExecution')
+@receiver(post_save, sender='Tracker.Parts')
+@receiver(post_save, sender='Tracker.WorkOrder')
+@receiver(post_save, sender='Tracker.WorkOrderHold')
+@receiver(post_save, sender='Tracker.Steps')
+@receiver(post_save, sender='Tracker.PartTypes')
+@receiver(post_save, sender='Tracker.WorkCenter')
+def refresh_work_queue(sender, instance, created=False, raw=False, **kwargs):
+    from Tracker.services.mes import work_queue
+    if raw or not work_queue.projection_enabled():
+        return
+    work_queue.record_event(instance, created=created)
+
+
+@receiver(post_delete, sender='Tracker.StepExecution')
+@receiver(post_delete, sender='Tracker.Parts')
+@receiver(post_delete, sender='Tracker.WorkOrderHold')
+def forget_work_queue_row(sender, instance, **kwargs):
+    from Tracker.services.mes import work_queue
+    if not work_queue.projection_enabled():
+        return
+    work_queue.record_event(instance)
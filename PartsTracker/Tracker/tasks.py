@@ -117,7 +117,9 @@ def process_3d_model(self, model_id: str):
     Process uploaded 3D model asynchronously.
 
     Converts CAD formats (STEP) and mesh formats (STL, OBJ, PLY) to optimized GLB.
-    Applies mesh decimation to keep face count under target threshold.
+    Applies mesh decimation to keep face count under the largest of
+    settings.MODEL_LOD_FACES, and writes a coarser GLB for each smaller budget
+    so viewers can show the model before the full mesh arrives.
 
     Uses RetryableFileTask for automatic retry on transient failures.
 
@@ -128,6 +130,7 @@ def process_3d_model(self, model_id: str):
         dict with status and processing metrics.
     """
     from pathlib import Path
+    from django.conf import settings
     from django.core.files.base import ContentFile
     from django.utils import timezone
     from Tracker.models import ThreeDModel, ModelProcessingStatus
@@ -158,12 +161,17 @@ def process_3d_model(self, model_id: str):
             model.original_format = original_ext.lstrip('.')
             model.original_size_bytes = model.file.size
 
-            # Process the model (convert + optimize)
+            # Process the model (convert + optimize + levels of detail)
+            budgets = sorted(settings.MODEL_LOD_FACES) or [100_000]
             processor = ModelProcessor(ProcessingConfig(
-                target_faces=100_000,
+                target_faces=budgets[-1],
                 min_faces=5_000,
                 linear_deflection=0.1,
                 angular_deflection=0.5,
+                convert_memory_limit_mb=settings.MODEL_CONVERT_MEMORY_MB,
+                convert_timeout=settings.MODEL_CONVERT_TIMEOUT,
+                lod_faces=tuple(budgets[:-1]),
+                compress=settings.MODEL_LOD_COMPRESS,
             ))
 
             result = processor.process(original_path)
@@ -187,7 +195,29 @@ def process_3d_model(self, model_id: str):
                     except Exception as e:
                         logger.warning(f"Could not delete original file {original_path}: {e}")
 
+            # Store coarser levels next to the main GLB
+            storage = model.file.storage
+            lod_levels = []
+            stem = str(Path(model.file.name).with_suffix(''))
+            for lod in result.lods:
+                with open(lod.output_path, 'rb') as f:
+                    name = storage.save(f'{stem}.lod{lod.face_count}.glb', ContentFile(f.read()))
+                Path(lod.output_path).unlink(missing_ok=True)
+                lod_levels.append({
+                    'file': name,
+                    'face_count': lod.face_count,
+                    'vertex_count': lod.vertex_count,
+                    'size_bytes': lod.size,
+                })
+            lod_levels.append({
+                'file': model.file.name,
+                'face_count': result.face_count,
+                'vertex_count': result.vertex_count,
+                'size_bytes': result.final_size,
+            })
+
             # Update model with results
+            model.lod_levels = lod_levels
             model.file_type = 'glb'
             model.face_count = result.face_count
             model.vertex_count = result.vertex_count
@@ -214,6 +244,7 @@ def process_3d_model(self, model_id: str):
                 'original_size': model.original_size_bytes,
                 'final_size': result.final_size,
                 'compression_ratio': result.compression_ratio,
+                'lod_faces': [level['face_count'] for level in lod_levels],
             }
 
         except Exception as e:
@@ -448,50 +479,71 @@ def send_invitation_email_task(self, invitation_id: int):
     }
 
 
+# Schedule ids per fire_schedule_batch message.
+SCHEDULE_FIRE_BATCH_SIZE = 100
+
+
 @shared_task
 def tick_notification_schedules():
     """
-    Celery Beat task: scan enabled NotificationSchedules and queue fires
-    for any that are due. Runs every 5 minutes via beat_schedule (matches
-    the existing notification-dispatch cadence).
+    Celery Beat task: queue fires for every enabled NotificationSchedule
+    whose `next_fire_at` has passed. Runs every 5 minutes via beat_schedule
+    (matches the existing notification-dispatch cadence).
 
-    Cross-tenant via `.all_tenants`. Each queued fire re-enters its own
-    tenant_context inside `fire_one_schedule`.
+    Due rows come from one range query on the partial `next_fire_at` index,
+    so the tick's cost follows the number of due schedules, not the total.
+    Rows still missing `next_fire_at` (created before the column, or by a
+    path that skipped save()) are filled first so they aren't stranded.
+
+    Cross-tenant via `.all_tenants`. Each fire re-enters its own
+    tenant_context inside `fire_schedule`.
 
-    Returns a summary dict for observability — total scanned, queued.
+    Returns a summary dict for observability — backfilled, queued.
     """
     from django.utils import timezone
     from Tracker.models import NotificationSchedule
-    from Tracker.services.core.notifications.schedule import compute_next_fire
+    from Tracker.services.core.notifications.schedule import (
+        backfill_next_fire,
+        due_schedule_ids,
+    )
 
     now = timezone.now()
-    queued = 0
-    scanned = 0
+    backfilled = backfill_next_fire(
+        NotificationSchedule.all_tenants.filter(  # tenant-safe: beat tick spans every tenant
+            enabled=True, archived=False, next_fire_at__isnull=True,
+        )
+    )
 
-    for sched in (
-        NotificationSchedule.all_tenants
-        .filter(enabled=True, archived=False)
-        .iterator()
-    ):
-        scanned += 1
-        anchor = sched.last_fired_at or sched.created_at
-        try:
-            next_fire = compute_next_fire(sched, after=anchor)
-        except Exception:
-            logger.exception(
-                "tick_notification_schedules: compute_next_fire failed for %s",
-                sched.id,
-            )
-            continue
-        if next_fire <= now:
-            fire_one_schedule.delay(str(sched.id))
-            queued += 1
+    due = [str(pk) for pk in due_schedule_ids(now)]
+    for start in range(0, len(due), SCHEDULE_FIRE_BATCH_SIZE):
+        fire_schedule_batch.delay(due[start:start + SCHEDULE_FIRE_BATCH_SIZE])
 
     logger.info(
-        "tick_notification_schedules: scanned=%d queued=%d",
-        scanned, queued,
+        "tick_notification_schedules: backfilled=%d queued=%d",
+        backfilled, len(due),
     )
-    return {'status': 'success', 'scanned': scanned, 'queued': queued}
+    return {'status': 'success', 'backfilled': backfilled, 'queued': len(due)}
+
+
+@shared_task
+def fire_schedule_batch(schedule_ids):
+    """Worker task: fire a chunk of due NotificationSchedules.
+
+    Each fire runs on its own, as in `fire_one_schedule`; one that raises
+    is re-queued on `fire_one_schedule`, which owns the retry policy, and
+    the rest of the chunk carries on.
+    """
+    from Tracker.services.core.notifications.schedule import fire_schedule
+
+    failed = 0
+    for schedule_id in schedule_ids:
+        try:
+            fire_schedule(schedule_id)
+        except Exception:
+            logger.exception("fire_schedule_batch: schedule=%s failed", schedule_id)
+            fire_one_schedule.apply_async((schedule_id,), countdown=60)
+            failed += 1
+    return {'status': 'success', 'processed': len(schedule_ids) - failed, 'retrying': failed}
 
 
 @shared_task(bind=True, max_retries=3)
@@ -537,6 +589,22 @@ def tick_escalations():
     return {'status': 'success', 'queued': len(due_ids)}
 
 
+@shared_task
+def drain_email_outbox():
+    """Celery Beat task: send queued notification emails in batches.
+
+    Picks up email retries that are due and digests whose window has closed
+    (NOTIFICATION_EMAIL_DIGEST_SECONDS). Fresh fan-outs are sent straight
+    from `dispatch_outbox_batch`; this is the sweep behind it. Batches claim
+    rows with SKIP LOCKED, so overlapping runs don't double-send.
+    """
+    from Tracker.services.core.notifications.email_batch import drain
+
+    totals = drain()
+    logger.info("drain_email_outbox: %s", totals)
+    return {'status': 'success', **totals}
+
+
 @shared_task(bind=True, max_retries=3)
 def fire_one_escalation(self, instance_id):
     """Worker task: process one EscalationInstance by ID.
@@ -1274,30 +1342,21 @@ def process_import_task(self, rows: List[Dict[str, Any]], model_name: str, mode:
         progress_interval = max(1, len(rows) // 20)  # ~5% increments
 
         with transaction.atomic():
-            for i, row in enumerate(rows, start=1):
-                serializer = serializer_class(
-                    data=row,
-                    tenant=tenant,
-                    user=user,
-                    mode=mode,
-                )
-
-                try:
-                    instance, was_created, warnings = serializer.import_row(row)
-                    if was_created:
+            for outcome in serializer_class.import_rows(rows, tenant=tenant, user=user, mode=mode):
+                i = outcome.row
+                if outcome.instance is None:
+                    errors += 1
+                    results.append({'row': i, 'status': 'error', 'errors': outcome.errors})
+                else:
+                    if outcome.created:
                         created += 1
-                        results.append({'row': i, 'status': 'created', 'id': str(instance.id)})
+                        results.append({'row': i, 'status': 'created', 'id': str(outcome.instance.id)})
                     else:
                         updated += 1
-                        results.append({'row': i, 'status': 'updated', 'id': str(instance.id)})
+                        results.append({'row': i, 'status': 'updated', 'id': str(outcome.instance.id)})
 
-                    if warnings:
-                        results[-1]['warnings'] = warnings
-
-                except Exception as e:
-                    errors += 1
-                    error_detail = e.detail if hasattr(e, 'detail') else str(e)
-                    results.append({'row': i, 'status': 'error', 'errors': error_detail})
+                    if outcome.warnings:
+                        results[-1]['warnings'] = outcome.warnings
 
                 # Update task state for progress tracking
                 if i % progress_interval == 0 or i == len(rows):
@@ -1415,6 +1474,146 @@ def bulk_reconcile_users_task(self, rows: List[Dict[str, Any]], tenant_id: str,
     return {"summary": summary, "results": results}
 
 
+@shared_task(bind=True)
+def solve_schedule_task(self, tenant_id: str, acting_user_id: int = None, time_limit: int = None,
+                        warm_start: bool = True):
+    """Background CP-SAT re-plan of a tenant's open WorkOrders.
+
+    One solve per tenant at a time: a second request while one is running
+    is answered with status 'busy' instead of racing it on the same slots.
+    """
+    from django.conf import settings
+    from django.core.cache import cache
+    from Tracker.models import Tenant, User
+    from Tracker.services.mes.scheduler import SchedulingError, solve_schedule
+
+    try:
+        tenant = Tenant.objects.get(id=tenant_id)
+        actor = User.objects.get(id=acting_user_id) if acting_user_id else None
+    except (Tenant.DoesNotExist, User.DoesNotExist) as e:
+        logger.error(f"solve_schedule_task failed lookup: {e}")
+        return {"status": "error", "message": str(e)}
+
+    lock_key = f"scheduler:solve:{tenant_id}"
+    limit = time_limit or settings.SCHEDULER_TIME_LIMIT_SECONDS
+    if not cache.add(lock_key, self.request.id or "local", timeout=limit + 300):
+        return {"status": "busy", "message": "A schedule solve is already running for this tenant"}
+    try:
+        with tenant_context(tenant):
+            result = solve_schedule(tenant, time_limit=time_limit, warm_start=warm_start, actor=actor)
+    except SchedulingError as e:
+        logger.warning(f"solve_schedule_task for tenant {tenant_id}: {e}")
+        return {"status": "error", "message": str(e)}
+    finally:
+        cache.delete(lock_key)
+
+    return result.to_dict()
+
+
+@shared_task
+def roll_up_oee():
+    """
+    Celery Beat task: store the OEE buckets of shift windows that ended in
+    the last day. Runs every 15 minutes via beat_schedule.
+
+    Event saves already refresh the windows they touch; this tick covers
+    windows in which nothing happened, so the rollup never depends on a
+    late event arriving. Windows are rewritten whole under a per-tenant lock,
+    so a tick that overlaps an event flush waits for it rather than
+    interleaving with it.
+
+    Cross-tenant: only tenants with an active shift have windows.
+    """
+    from datetime import timedelta
+    from django.utils import timezone
+    from Tracker.models import Shift
+    from Tracker.services.mes import oee
+
+    if not oee.rollup_enabled():
+        return {"status": "disabled"}
+
+    now = timezone.now()
+    tenant_ids = set(
+        Shift.all_tenants.filter(  # tenant-safe: beat tick spans every tenant
+            is_active=True, is_current_version=True, archived=False,
+        ).values_list('tenant_id', flat=True)
+    )
+    written = 0
+    for tenant_id in tenant_ids:
+        try:
+            written += oee.refresh(tenant_id, now - timedelta(days=1), now, now=now)
+        except Exception:
+            logger.exception(f"roll_up_oee failed for tenant {tenant_id}")
+    return {"tenants": len(tenant_ids), "buckets": written}
+
+
+@shared_task
+def reconcile_quality_rollups():
+    """
+    Celery Beat task: re-derive the last QUALITY_ROLLUP_RECONCILE_DAYS of the
+    quality dashboard rollups and rewrite the days that drifted. Runs nightly
+    via beat_schedule.
+
+    Save signals keep the rollups current; this catches writes that skip them
+    (queryset updates, imports, seeds) and rows whose dimensions moved (a
+    part retyped). Drift is logged, since it points at such a write path.
+
+    Cross-tenant: walks every tenant.
+    """
+    from Tracker.models import Tenant
+    from Tracker.services.qms import quality_rollup
+
+    if not quality_rollup.rollup_enabled():
+        return {"status": "disabled"}
+
+    tenant_ids = list(Tenant.objects.values_list('id', flat=True))
+    repaired = 0
+    for tenant_id in tenant_ids:
+        try:
+            drifted = quality_rollup.reconcile(tenant_id)
+        except Exception:
+            logger.exception(f"reconcile_quality_rollups failed for tenant {tenant_id}")
+            continue
+        if drifted:
+            logger.warning(f"Quality rollup drift for tenant {tenant_id}: {len(drifted)} day(s) repaired")
+            repaired += len(drifted)
+    return {"tenants": len(tenant_ids), "days_repaired": repaired}
+
+
+@shared_task
+def reconcile_work_queue():
+    """
+    Celery Beat task: recompute the work-queue projection of every tenant and
+    rewrite (and push to the streams) the rows that drifted. Runs every five
+    minutes via beat_schedule.
+
+    Save signals keep the projection current; this catches writes that skip
+    them (queryset updates, imports, seeds). Drift is logged, since it points
+    at such a write path.
+
+    Cross-tenant: walks every tenant.
+    """
+    from Tracker.models import Tenant
+    from Tracker.services.mes import work_queue
+
+    if not work_queue.projection_enabled():
+        return {"status": "disabled"}
+
+    tenant_ids = list(Tenant.objects.values_list('id', flat=True))
+    repaired = 0
+    for tenant_id in tenant_ids:
+        try:
+            diff = work_queue.rebuild(tenant_id)
+        except Exception:
+            logger.exception(f"reconcile_work_queue failed for tenant {tenant_id}")
+            continue
+        if diff:
+            changed = len(diff.upserted) + len(diff.removed)
+            logger.warning(f"Work queue drift for tenant {tenant_id}: {changed} row(s) repaired")
+            repaired += changed
+    return {"tenants": len(tenant_ids), "rows_repaired": repaired}
+
+
 @shared_task
 def scan_work_order_holds_and_overdue():
     """Hourly scan: emit WORK_ORDER_HELD_TOO_LONG for stale holds and WORK_ORDER_OVERDUE for late WOs.
@@ -8,6 +8,7 @@ Covers:
   - `min_gap_seconds` cooldown suppresses repeat fires.
   - Channel preferences (Phase 2) intersect with rule.channels.
   - (recipient, channel) dedup across rules.
+  - Batched fan-out: one insert, one render per channel, one dispatch task.
 
 Replaces the Phase 2 `test_dispatcher_phase2.py` which tested the
 `default_recipient_groups` stub that Phase 3 retired.
@@ -15,9 +16,12 @@ Replaces the Phase 2 `test_dispatcher_phase2.py` which tested the
 from __future__ import annotations
 
 from datetime import timedelta
+from unittest.mock import patch
 
 from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from Tracker.models import (
@@ -355,3 +359,91 @@ class DispatcherScopePrecedenceTests(TenantContextMixin, TestCase):
         channels = set(NotificationOutbox.objects.filter(user=self.user)
                                                   .values_list('channel', flat=True))
         self.assertEqual(channels, {'in_app', 'email'})
+
+
+class DispatcherBatchingTests(TenantContextMixin, TestCase):
+    """A broadcast costs the same number of queries and tasks for any group size."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.tenant = Tenant.objects.create(name='Batch Tenant', slug='batch-tenant')
+        self.set_tenant_context(self.tenant)
+        self.qa_group = make_tenant_group(self.tenant, 'QA Manager')
+        make_user_in_groups(self.tenant, self.qa_group)
+        self.rule = make_tenant_rule(
+            self.tenant, 'ncr.opened',
+            recipient_groups=[self.qa_group],
+            channels=['in_app', 'email'],
+            min_gap_seconds=3600,
+        )
+
+    def _emit(self):
+        emit('ncr.opened', tenant=self.tenant,
+             payload=make_event_payload('ncr.opened', tenant_id=str(self.tenant.id)))
+
+    def _outbox_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self._emit()
+        return [q['sql'] for q in ctx.captured_queries
+                if 'notificationoutbox' in q['sql'] or 'notificationtemplate' in q['sql']]
+
+    def test_query_count_does_not_follow_group_size(self):
+        small = self._outbox_queries()
+        for _ in range(5):
+            make_user_in_groups(self.tenant, self.qa_group)
+        NotificationOutbox.objects.all().delete()    # clear the cooldown
+
+        large = self._outbox_queries()
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(len([q for q in large if q.startswith('INSERT')]), 1)
+        self.assertEqual(NotificationOutbox.objects.count(), 12)
+
+        # All six recipients are now in cooldown; one lookup says so.
+        self.assertEqual(len([q for q in self._outbox_queries() if q.startswith('INSERT')]), 0)
+        self.assertEqual(NotificationOutbox.objects.count(), 12)
+
+    def test_rows_render_per_channel_and_queue_as_one_batch(self):
+        make_user_in_groups(self.tenant, self.qa_group)
+        with patch('Tracker.services.core.notifications.tasks.dispatch_outbox_batch.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._emit()
+
+        rows = list(NotificationOutbox.objects.all())
+        self.assertEqual(len(rows), 4)
+        delay.assert_called_once()
+        self.assertEqual(sorted(delay.call_args.args[0]), sorted(str(r.id) for r in rows))
+        for channel in ('in_app', 'email'):
+            subjects = {r.rendered_subject for r in rows if r.channel == channel}
+            self.assertEqual(len(subjects), 1)
+            self.assertTrue(subjects.pop())
+
+    def test_edited_condition_takes_effect_on_next_event(self):
+        self.rule.conditions_source = "payload.severity == 'nonexistent'"
+        self.rule.save()
+        self._emit()
+        self.assertEqual(NotificationOutbox.objects.count(), 0)
+
+        self.rule.conditions_source = ''
+        self.rule.save()
+        self._emit()
+        self.assertEqual(NotificationOutbox.objects.count(), 2)
+
+    def test_batch_task_hands_failed_rows_to_the_retrying_task(self):
+        from Tracker.models import NotificationStatus
+        from Tracker.services.core.notifications.channels.base import CHANNEL_REGISTRY
+        from Tracker.services.core.notifications.tasks import dispatch_outbox_batch
+
+        self._emit()
+        ids = [str(pk) for pk in NotificationOutbox.objects.values_list('id', flat=True)]
+        in_app = CHANNEL_REGISTRY._channels['in_app']
+        with patch.object(in_app, 'send', side_effect=RuntimeError('push down')), \
+                patch('Tracker.services.core.notifications.tasks.dispatch_outbox_row.apply_async') as retry, \
+                self.settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            counts = dispatch_outbox_batch(ids)
+
+        self.assertEqual(counts, {'sent': 1, 'retrying': 1})
+        failed = NotificationOutbox.objects.get(channel='in_app')
+        retry.assert_called_once()
+        self.assertEqual(retry.call_args.args[0], (str(failed.id),))
+        self.assertEqual(NotificationOutbox.objects.get(channel='email').status, NotificationStatus.SENT)
@@ -0,0 +1,134 @@
+"""Batched email delivery tests — claim, one connection, per-row outcomes, digests."""
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from Tracker.models import (
+    NotificationOutbox,
+    NotificationStatus,
+    Tenant,
+    TenantNotificationBranding,
+)
+from Tracker.services.core.notifications.email_batch import MAX_EMAIL_ATTEMPTS, drain, send_email_batch
+from Tracker.services.core.notifications.tasks import dispatch_outbox_batch
+from Tracker.tests.base import TenantContextMixin
+
+User = get_user_model()
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    DEFAULT_FROM_EMAIL='noreply@example.com',
+    NOTIFICATION_EMAIL_DIGEST_SECONDS=0,
+)
+class EmailBatchTests(TenantContextMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tenant = Tenant.objects.create(name='Batch Mail', slug='batch-mail')
+        self.other = Tenant.objects.create(name='Other Mail', slug='other-mail')
+        self.set_tenant_context(self.tenant)
+        TenantNotificationBranding.objects.create(tenant=self.tenant, email_from_name='Acme QA')
+        self.alice = User.objects.create_user(email='alice@example.com', username='alice@example.com', tenant=self.tenant)
+        self.bob = User.objects.create_user(email='bob@example.com', username='bob@example.com', tenant=self.tenant)
+        self.carol = User.objects.create_user(email='carol@example.com', username='carol@example.com', tenant=self.other)
+        self.n = 0
+        mail.outbox = []
+
+    def _row(self, user, *, tenant=None, age=0, **overrides):
+        self.n += 1
+        fields = dict(
+            tenant=tenant or self.tenant, user=user, event_code='ncr.opened', channel='email',
+            rendered_subject=f'NCR {self.n}', rendered_body_text=f'Body {self.n}',
+            idempotency_key=f'batch-{self.n}', status=NotificationStatus.PENDING,
+        )
+        row = NotificationOutbox.all_tenants.create(**{**fields, **overrides})
+        if age:
+            NotificationOutbox.all_tenants.filter(pk=row.pk).update(created_at=timezone.now() - timedelta(seconds=age))
+        return row
+
+    def test_batch_sends_every_tenant_over_one_connection(self):
+        rows = [self._row(self.alice), self._row(self.bob), self._row(self.carol, tenant=self.other)]
+
+        with patch.object(EmailBackend, 'open', autospec=True, side_effect=EmailBackend.open) as opened:
+            result = send_email_batch()
+
+        self.assertEqual(result.sent, 3)
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        senders = {m.to[0]: m.from_email for m in mail.outbox}
+        self.assertIn('Acme QA', senders['alice@example.com'])
+        self.assertNotIn('Acme QA', senders['carol@example.com'])
+        self.assertEqual(
+            set(NotificationOutbox.all_tenants.filter(id__in=[r.id for r in rows]).values_list('status', flat=True)),
+            {NotificationStatus.SENT},
+        )
+        self.assertEqual(send_email_batch(), (0, 0, 0, 0))
+
+    def test_claim_skips_rows_locked_by_other_workers(self):
+        self._row(self.alice)
+        with CaptureQueriesContext(connection) as ctx:
+            send_email_batch()
+        claim = next(q['sql'] for q in ctx.captured_queries if 'FOR UPDATE' in q['sql'])
+        self.assertIn('SKIP LOCKED', claim)
+
+    def test_failed_message_only_retries_its_own_row(self):
+        self._row(self.alice)
+        bad = self._row(self.bob)
+        User.objects.filter(pk=self.bob.pk).update(email='')
+
+        result = send_email_batch()
+
+        self.assertEqual((result.sent, result.retrying), (1, 1))
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.retry_count), (NotificationStatus.RETRYING, 1))
+        self.assertIn('no email address', bad.error)
+
+        # Not reclaimed until the retry delay has passed; gives up at the limit.
+        self.assertEqual(send_email_batch().retrying, 0)
+        NotificationOutbox.all_tenants.filter(pk=bad.pk).update(retry_count=MAX_EMAIL_ATTEMPTS - 1)
+        later = timezone.now() + timedelta(minutes=5)
+        self.assertEqual(send_email_batch(now=later).failed, 1)
+        bad.refresh_from_db()
+        self.assertEqual(bad.status, NotificationStatus.FAILED)
+
+    def test_digest_merges_a_recipients_rows_once_the_window_closes(self):
+        self._row(self.alice, age=600)
+        self._row(self.alice, age=30)
+        self._row(self.bob, age=30)
+
+        result = send_email_batch(digest=300)
+
+        self.assertEqual((result.sent, result.held), (2, 1))
+        self.assertEqual(len(mail.outbox), 1)
+        digest = mail.outbox[0]
+        self.assertEqual(digest.to, ['alice@example.com'])
+        self.assertTrue(digest.subject.startswith('2 notifications'))
+        self.assertLess(digest.body.index('NCR 1'), digest.body.index('NCR 2'))
+        self.assertEqual(
+            NotificationOutbox.all_tenants.get(user=self.bob).status, NotificationStatus.PENDING,
+        )
+
+    def test_fan_out_task_sends_email_rows_as_one_batch(self):
+        email = self._row(self.alice)
+        in_app = self._row(self.alice, channel='in_app')
+
+        counts = dispatch_outbox_batch([str(email.id), str(in_app.id)])
+
+        self.assertEqual(counts, {'sent': 2})
+        self.assertEqual(len(mail.outbox), 1)
+
+        with override_settings(NOTIFICATION_EMAIL_DIGEST_SECONDS=300):
+            held = self._row(self.bob)
+            self.assertEqual(dispatch_outbox_batch([str(held.id)]), {'held': 1})
+            self.assertEqual(drain()['held'], 1)
+        self.assertEqual(len(mail.outbox), 1)
@@ -12,7 +12,10 @@ from django.core.cache import cache
 from django.test import TestCase
 
 from Tracker.models import Tenant
-from Tracker.services.core.notifications.resolver import resolve_default_channels
+from Tracker.services.core.notifications.resolver import (
+    resolve_channels_for_users,
+    resolve_default_channels,
+)
 from Tracker.tests.base import TenantContextMixin
 from Tracker.tests.notifications.factories import (
     make_tenant_group,
@@ -97,11 +100,63 @@ class ResolverPrecedenceTests(TenantContextMixin, TestCase):
         resolved = resolve_default_channels(self.user, 'ncr.opened')
         self.assertTrue(resolved['email'])
 
-    def test_cache_returns_same_dict_on_repeat_calls(self):
-        """Second call hits cache — mutating DB between calls is invisible until invalidation/TTL."""
+    def test_repeat_call_is_served_from_cache(self):
         first = resolve_default_channels(self.user, 'ncr.opened')
-        # Mutate underlying state — cache should mask it.
+        with self.assertNumQueries(0):
+            second = resolve_default_channels(self.user, 'ncr.opened')
+        self.assertEqual(first, second)
+
+
+class ResolverBulkAndInvalidationTests(TenantContextMixin, TestCase):
+    """Many recipients in one call; edits to any layer show up on the next resolve."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.tenant = Tenant.objects.create(name='Bulk Resolver', slug='bulk-resolver')
+        self.set_tenant_context(self.tenant)
+        self.qa_group = make_tenant_group(self.tenant, 'QA Inspector')
+        self.user = make_user_in_groups(self.tenant, self.qa_group)
+
+    def test_cold_resolve_uses_a_fixed_number_of_queries(self):
+        other = make_tenant_group(self.tenant, 'Engineer')
+        users = [make_user_in_groups(self.tenant, self.qa_group) for _ in range(10)]
+        users += [make_user_in_groups(self.tenant, other) for _ in range(10)]
         set_tenant_default(self.tenant, 'ncr.opened', 'email', enabled=False)
-        second = resolve_default_channels(self.user, 'ncr.opened')
+        set_tenant_default(self.tenant, 'ncr.opened', 'email', enabled=True, role=other)
+        set_user_preference(users[0], 'ncr.opened', 'in_app', enabled=False)
+        cache.clear()
 
-        self.assertEqual(first, second)
+        with self.assertNumQueries(3):
+            resolved = resolve_channels_for_users(users, 'ncr.opened')
+
+        self.assertEqual(len(resolved), 20)
+        self.assertEqual(resolved[users[0].id], {'in_app': False, 'email': False})
+        self.assertEqual(resolved[users[1].id], {'in_app': True, 'email': False})
+        self.assertEqual(resolved[users[-1].id], {'in_app': True, 'email': True})
+        self.assertEqual(
+            resolved[users[5].id], resolve_default_channels(users[5], 'ncr.opened'),
+        )
+        with self.assertNumQueries(0):
+            resolve_channels_for_users(users, 'ncr.opened')
+
+    def test_user_preference_edit_applies_immediately(self):
+        self.assertTrue(resolve_default_channels(self.user, 'ncr.opened')['email'])
+        set_user_preference(self.user, 'ncr.opened', 'email', enabled=False)
+        self.assertFalse(resolve_default_channels(self.user, 'ncr.opened')['email'])
+
+    def test_tenant_default_edit_applies_immediately(self):
+        self.assertTrue(resolve_default_channels(self.user, 'ncr.opened')['email'])
+        set_tenant_default(self.tenant, 'ncr.opened', 'email', enabled=False)
+        self.assertFalse(resolve_default_channels(self.user, 'ncr.opened')['email'])
+
+    def test_role_assignment_change_applies_immediately(self):
+        from Tracker.models import UserRole
+
+        manager = make_tenant_group(self.tenant, 'QA Manager')
+        set_tenant_default(self.tenant, 'ncr.opened', 'email', enabled=False)
+        set_tenant_default(self.tenant, 'ncr.opened', 'email', enabled=True, role=manager)
+        self.assertFalse(resolve_default_channels(self.user, 'ncr.opened')['email'])
+
+        UserRole.objects.create(user=self.user, group=manager)
+        self.assertTrue(resolve_default_channels(self.user, 'ncr.opened')['email'])
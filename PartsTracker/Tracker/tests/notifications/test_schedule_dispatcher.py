@@ -309,3 +309,85 @@ class FireScheduleRecipientDedupTests(TenantContextMixin, TestCase):
         self.assertEqual(
             NotificationOutbox.objects.filter(user=self.user).count(), 1,
         )
+
+
+# =============================================================================
+# next_fire_at — persisted due time and the beat tick's range query
+# =============================================================================
+
+class ScheduleDueIndexTests(TenantContextMixin, TestCase):
+    """`next_fire_at` follows save() and fires; the tick reads only due rows."""
+
+    def setUp(self):
+        super().setUp()
+        self.tenant = Tenant.objects.create(name='Due Tenant', slug='due-tenant')
+        self.set_tenant_context(self.tenant)
+        self.customer = Companies.objects.create(name='Acme', description='')
+        self.user = make_user_in_groups(self.tenant, make_tenant_group(self.tenant, 'Buyer'))
+
+    def _due(self, sched):
+        sched.last_fired_at = timezone.now() - timedelta(days=365)
+        sched.save(update_fields=['last_fired_at'])
+        return sched
+
+    def test_save_and_edits_maintain_next_fire_at(self):
+        sched = make_tenant_schedule(self.tenant, day_of_week=4)
+        self.assertEqual(sched.next_fire_at, compute_next_fire(sched, after=sched.created_at))
+
+        sched.day_of_week = 1
+        sched.save(update_fields=['day_of_week'])
+        sched.refresh_from_db()
+        self.assertEqual(sched.next_fire_at.weekday(), 1)
+
+        self._due(sched)
+        sched.refresh_from_db()
+        self.assertLess(sched.next_fire_at, timezone.now())
+
+    @patch(
+        'Tracker.services.core.notifications.scheduled_content.customer_active_orders.'
+        'CustomerActiveOrdersProvider.build_content',
+        return_value=RenderedContent(subject='S', html='<p>x</p>', text='x'),
+    )
+    def test_fire_advances_next_fire_at_past_now(self, _content):
+        sched = self._due(make_customer_schedule(self.tenant, self.customer, recipient_users=[self.user]))
+        fire_schedule(sched.id)
+        sched.refresh_from_db()
+        self.assertEqual(sched.next_fire_at, compute_next_fire(sched, after=sched.last_fired_at))
+        self.assertGreater(sched.next_fire_at, timezone.now())
+
+    @patch('Tracker.tasks.fire_schedule_batch.delay')
+    def test_tick_queues_only_due_rows_with_a_fixed_number_of_queries(self, delay):
+        from Tracker.tasks import tick_notification_schedules
+
+        due = self._due(make_tenant_schedule(self.tenant))
+        for _ in range(20):
+            make_tenant_schedule(self.tenant)
+        disabled = self._due(make_tenant_schedule(self.tenant))
+        disabled.enabled = False
+        disabled.save(update_fields=['enabled'])
+
+        with self.assertNumQueries(2):
+            result = tick_notification_schedules()
+
+        self.assertEqual(result['queued'], 1)
+        delay.assert_called_once_with([str(due.id)])
+
+    @patch('Tracker.tasks.fire_schedule_batch.delay')
+    def test_tick_and_command_backfill_rows_without_next_fire_at(self, delay):
+        from io import StringIO
+
+        from django.core.management import call_command
+        from Tracker.tasks import tick_notification_schedules
+
+        stale = self._due(make_tenant_schedule(self.tenant))
+        fresh = make_tenant_schedule(self.tenant)
+        NotificationSchedule.objects.filter(tenant=self.tenant).update(next_fire_at=None)
+
+        call_command('backfill_schedule_next_fire', '--tenant', self.tenant.slug, stdout=StringIO())
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.next_fire_at, compute_next_fire(fresh, after=fresh.created_at))
+
+        NotificationSchedule.objects.filter(tenant=self.tenant, pk=stale.pk).update(next_fire_at=None)
+        result = tick_notification_schedules()
+        self.assertEqual((result['backfilled'], result['queued']), (1, 1))
+        delay.assert_called_once_with([str(stale.id)])
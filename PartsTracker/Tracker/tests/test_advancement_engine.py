@@ -464,3 +464,73 @@ class TryAdvanceLotTests(AdvancementEngineBase):
         for p in lot['parts']:
             p.refresh_from_db()
             self.assertEqual(p.step_id, step_b.id)
+
+
+# ============================================================================
+# Group 2 — set-based cohort gate
+# ============================================================================
+
+
+class CohortGateTests(AdvancementEngineBase):
+    """`Steps.can_advance_cohort_from_step` must agree with the per-part
+    `can_advance_from_step` and cost a fixed number of queries."""
+
+    def _gate_both_ways(self, lot):
+        step = lot['steps'][0]
+        wo = lot['wo']
+        execs = [StepExecution.get_current_execution(p) for p in lot['parts']]
+        per_part = {se.id: step.can_advance_from_step(se, wo) for se in execs}
+        cohort = step.can_advance_cohort_from_step(execs, wo)
+        return per_part, cohort
+
+    def test_cohort_gate_matches_per_part_gate(self):
+        lot = _build_lot(
+            tenant=self.tenant, user=self.user, part_type=self.part_type,
+            num_steps=2, num_parts=4, substeps_per_step=2,
+            wo_erp_id="WO-GATE-EQ",
+        )
+        subs = lot['substeps_by_step'][0]
+        # Part 0 fully complete, part 1 half complete, parts 2-3 untouched;
+        # part 3 is also quarantined on a quarantine-blocking step.
+        _complete_substeps_for_part(
+            tenant=self.tenant, user=self.user, part=lot['parts'][0], substeps=subs,
+        )
+        _complete_substeps_for_part(
+            tenant=self.tenant, user=self.user, part=lot['parts'][1], substeps=subs[:1],
+        )
+        from Tracker.models import PartsStatus
+        Parts.objects.filter(id=lot['parts'][3].id).update(
+            part_status=PartsStatus.QUARANTINED,
+        )
+        Steps.objects.filter(id=lot['steps'][0].id).update(block_on_quarantine=True)
+        lot['steps'][0].refresh_from_db()
+
+        per_part, cohort = self._gate_both_ways(lot)
+        self.assertEqual(per_part, cohort)
+        self.assertTrue(cohort[lot['execs'][0].id][0])
+        self.assertFalse(cohort[lot['execs'][1].id][0])
+
+    def test_cohort_gate_query_count_is_independent_of_lot_size(self):
+        small = _build_lot(
+            tenant=self.tenant, user=self.user, part_type=self.part_type,
+            num_steps=2, num_parts=2, substeps_per_step=1,
+            wo_erp_id="WO-GATE-SMALL",
+        )
+        large = _build_lot(
+            tenant=self.tenant, user=self.user, part_type=self.part_type,
+            num_steps=2, num_parts=12, substeps_per_step=1,
+            wo_erp_id="WO-GATE-LARGE",
+        )
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        counts = []
+        for lot in (small, large):
+            execs = list(
+                StepExecution.objects.filter(part__in=lot['parts'])
+                .select_related('part', 'assigned_to')
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                lot['steps'][0].can_advance_cohort_from_step(execs, lot['wo'])
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
@@ -45,6 +45,7 @@ from Tracker.serializers.csv_import import (
     PartTypesCSVImportSerializer,
     PartsCSVImportSerializer,
     OrdersCSVImportSerializer,
+    EquipmentCSVImportSerializer,
     get_csv_import_serializer,
     get_or_create_import_serializer,
     create_import_serializer_for_model,
@@ -569,3 +570,108 @@ class ForeignKeyResolutionTests(TenantContextMixin, TestCase):
         )
 
         self.assertIsNone(resolved)
+
+
+class BatchedImportTests(TenantContextMixin, TestCase):
+    """Tests for import_rows: bulk FK resolution and bulk writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from Tracker.models import EquipmentType, PartTypes, Tenant
+
+        cls.tenant = Tenant.objects.create(name="Batch Import Tenant", slug="batch-import")
+        cls.set_tenant_context_class(cls.tenant)
+        cls.user = User.objects.create_user(
+            username="batchuser",
+            email="batch@example.com",
+            password="testpass123",
+            tenant=cls.tenant,
+        )
+        cls.part_type = PartTypes.objects.create(name="Widget", ERP_id="PT-WIDGET")
+        cls.equipment_types = [EquipmentType.objects.create(name=f"Type {i}") for i in range(3)]
+
+    def _import(self, serializer_class, rows, **kwargs):
+        return list(serializer_class.import_rows(
+            rows, tenant=self.tenant, user=self.user, mode=kwargs.pop('mode', ImportMode.UPSERT), **kwargs,
+        ))
+
+    def _equipment_rows(self, count, start=0):
+        return [
+            {"name": f"Gauge {i}", "serial_number": f"SN-{i}", "equipment_type": f"type {i % 3}"}
+            for i in range(start, start + count)
+        ]
+
+    def test_query_count_does_not_follow_row_count(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def count(rows):
+            with CaptureQueriesContext(connection) as ctx:
+                outcomes = self._import(EquipmentCSVImportSerializer, rows)
+            self.assertTrue(all(o.created for o in outcomes))
+            return len(ctx.captured_queries)
+
+        self.assertEqual(count(self._equipment_rows(5)), count(self._equipment_rows(40, start=100)))
+
+    def test_bulk_rows_resolve_fks_and_are_audited(self):
+        from auditlog.models import LogEntry
+        from Tracker.models import Equipments
+
+        outcomes = self._import(EquipmentCSVImportSerializer, self._equipment_rows(4))
+
+        self.assertEqual([o.row for o in outcomes], [1, 2, 3, 4])
+        gauge = Equipments.objects.get(tenant=self.tenant, serial_number="SN-1")
+        self.assertEqual(gauge.equipment_type, self.equipment_types[1])
+        entry = LogEntry.objects.get_for_object(gauge).get()
+        self.assertEqual(entry.action, LogEntry.Action.CREATE)
+        self.assertEqual(entry.actor, self.user)
+        self.assertEqual(entry.changes['name'][1], "Gauge 1")
+
+    def test_repeated_key_updates_the_row_created_earlier(self):
+        from auditlog.models import LogEntry
+        from Tracker.models import PartTypes
+
+        outcomes = self._import(PartTypesCSVImportSerializer, [
+            {"name": "Bracket", "ERP_id": "PT-BR"},
+            {"name": "widget", "ID_prefix": "WG-"},
+            {"name": "Bracket v2", "ERP_id": "pt-br"},
+        ])
+
+        self.assertEqual([o.created for o in outcomes], [True, False, False])
+        self.assertEqual(outcomes[0].instance.id, outcomes[2].instance.id)
+        self.assertEqual(outcomes[1].instance.id, self.part_type.id)
+        bracket = PartTypes.objects.get(tenant=self.tenant, id=outcomes[0].instance.id)
+        self.assertEqual(bracket.name, "Bracket v2")
+
+        self.part_type.refresh_from_db()
+        self.assertEqual(self.part_type.ID_prefix, "WG-")
+        update = LogEntry.objects.get_for_object(self.part_type).get(action=LogEntry.Action.UPDATE)
+        self.assertEqual(update.changes['ID_prefix'], ["None", "WG-"])
+
+    def test_database_error_is_reported_against_its_row(self):
+        from Tracker.models import PartTypes
+
+        outcomes = self._import(PartTypesCSVImportSerializer, [
+            {"name": "Short"},
+            {"name": "x" * 80},
+            {"name": "Also short"},
+        ])
+
+        self.assertEqual([o.instance is None for o in outcomes], [False, True, False])
+        self.assertTrue(outcomes[1].errors)
+        names = PartTypes.objects.filter(tenant=self.tenant).values_list('name', flat=True)
+        self.assertEqual(set(names), {"Widget", "Short", "Also short"})
+
+    def test_per_row_models_share_the_lookup_cache(self):
+        serializer_class = PartsCSVImportSerializer
+        self.assertFalse(serializer_class(user=self.user).supports_bulk_write())
+
+        outcomes = self._import(serializer_class, [
+            {"ERP_id": "P-1", "part_type": "WIDGET"},
+            {"ERP_id": "P-2", "part_type": str(self.part_type.id)},
+            {"ERP_id": "P-1", "part_type": "pt-widget"},
+        ])
+
+        self.assertEqual([o.created for o in outcomes], [True, True, False])
+        self.assertEqual({o.instance.part_type_id for o in outcomes}, {self.part_type.id})
+        self.assertEqual(outcomes[0].instance.id, outcomes[2].instance.id)
@@ -0,0 +1,72 @@
+"""
+Tests for the streaming export endpoints (DataExportMixin).
+
+Related lookups must resolve in the export query itself, CSV must stream,
+and the write-only workbook must keep the reference sheets, formulas and
+validation of the in-memory one.
+"""
+import csv
+import io
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from openpyxl import load_workbook
+
+from Tracker.tests.base import TenantTestCase
+
+
+class DataExportTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from Tracker.models import Parts, PartTypes
+
+        self.part_types = [
+            self.create_for_tenant(PartTypes, self.tenant_a, name=f"Type {i}", ID_prefix=f"T{i}")
+            for i in range(3)
+        ]
+        for i, part_type in enumerate(self.part_types):
+            self.create_for_tenant(Parts, self.tenant_a, ERP_id=f"P-{i}", part_type=part_type)
+        self.authenticate_superuser(self.tenant_a)
+
+    def _csv(self, response):
+        body = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(io.StringIO(body)))
+
+    def test_csv_streams_with_related_lookups_in_one_query(self):
+        url = '/api/Parts/export/csv/?fields=ERP_id,part_type__name,part_type__ID_prefix'
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+            rows = self._csv(response)
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(rows[0], ['Erp Id', 'Part Type Name', 'Part Type Id Prefix'])
+        self.assertEqual(
+            sorted(rows[1:]),
+            [[f"P-{i}", f"Type {i}", f"T{i}"] for i in range(3)],
+        )
+        export_queries = [q for q in ctx.captured_queries if 'FROM "Tracker_parts"' in q['sql'] and 'JOIN' in q['sql']]
+        self.assertEqual(len(export_queries), 1)
+
+    def test_non_lookup_field_exports_empty(self):
+        response = self.client.get('/api/PartTypes/export/csv/?fields=name,not_a_field')
+        rows = self._csv(response)
+        self.assertEqual(rows[0], ['Name', 'Not A Field'])
+        self.assertEqual(sorted(rows[1:]), [[f"Type {i}", ''] for i in range(3)])
+
+    def test_xlsx_keeps_reference_sheets_and_validation(self):
+        response = self.client.get('/api/Parts/export/xlsx/?fields=ERP_id,part_type,part_type__name')
+        self.assertIn('spreadsheet', response['Content-Type'])
+        self.assertIn('attachment', response['Content-Disposition'])
+
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(workbook.sheetnames[:2], ['Instructions', 'Data'])
+        self.assertIn('PartTypes', workbook.sheetnames)
+
+        data = workbook['Data']
+        self.assertEqual(data.max_row, 4)
+        self.assertEqual(data.freeze_panes, 'A2')
+        self.assertTrue(str(data['B2'].value).startswith('=IF(C2=""'))
+        self.assertTrue(data.data_validations.dataValidation)
+        self.assertEqual(workbook['Instructions']['A1'].value, 'Parts Import/Export Guide')
@@ -0,0 +1,149 @@
+"""
+Tests for DocChunk search (Tracker.services.core.doc_search).
+
+The search_vector column is filled by a database trigger, vector results are
+scoped by `for_user` before the LIMIT on both the exact and HNSW paths, and
+hybrid search fuses the two legs by reciprocal rank.
+"""
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from Tracker.models import DocChunk, Documents
+from Tracker.services.core import doc_search
+from Tracker.tests.base import TenantTestCase
+
+
+def _vec(*head):
+    """A unit-ish vector whose first components are `head`."""
+    return list(head) + [0.0] * (settings.AI_EMBED_DIM - len(head))
+
+
+class DocSearchTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.doc = self.create_for_tenant(
+            Documents, self.tenant_a, file_name='own.pdf', file='parts_docs/a/own.pdf', classification='PUBLIC',
+        )
+        self.other_doc = self.create_for_tenant(
+            Documents, self.tenant_b, file_name='other.pdf', file='parts_docs/b/other.pdf', classification='PUBLIC',
+        )
+        self.grant_tenant_permissions(
+            self.user_a, self.tenant_a, ['view_documents', 'view_docchunk', 'full_tenant_access'],
+        )
+
+    def _chunk(self, text, embedding, doc=None):
+        return DocChunk.objects.create(
+            doc=doc or self.doc, embedding=embedding, full_text=text, preview_text=text[:20],
+        )
+
+    def test_trigger_maintains_search_vector(self):
+        chunk = self._chunk('Torque the flange bolts', _vec(1.0))
+        visible = DocChunk.objects.for_user(self.user_a)
+
+        self.assertEqual([c.id for c in doc_search.keyword_search(visible, 'bolt', limit=5)], [chunk.id])
+
+        DocChunk.objects.filter(pk=chunk.pk).update(full_text='Replace the spindle bearing')
+        self.assertEqual(doc_search.keyword_search(visible, 'bolt', limit=5), [])
+        self.assertEqual([c.id for c in doc_search.keyword_search(visible, 'bearings', limit=5)], [chunk.id])
+
+    def test_vector_threshold_is_a_minimum_similarity(self):
+        near = self._chunk('near', _vec(1.0, 0.1))
+        mid = self._chunk('mid', _vec(1.0, 1.0))
+        self._chunk('far', _vec(0.0, 1.0))
+
+        results = doc_search.vector_search(
+            DocChunk.objects.for_user(self.user_a), _vec(1.0), limit=10, threshold=0.5,
+        )
+
+        self.assertEqual([c.id for c in results], [near.id, mid.id])
+        self.assertGreater(results[0].similarity, results[1].similarity)
+        self.assertAlmostEqual(results[1].similarity, 2 ** -0.5, places=5)
+
+    def test_scoping_applies_before_limit_on_both_paths(self):
+        # Other tenant's chunks are all closer to the query than ours.
+        for i in range(30):
+            self._chunk(f'other {i}', _vec(1.0, 0.001 * i), doc=self.other_doc)
+        own = [self._chunk(f'own {i}', _vec(1.0, 0.5 + i)) for i in range(3)]
+        visible = DocChunk.objects.for_user(self.user_a)
+
+        exact = doc_search.vector_search(visible, _vec(1.0), limit=3)
+        with mock.patch.object(doc_search, 'EXACT_SEARCH_MAX_CHUNKS', 0), \
+                mock.patch.object(doc_search, '_indexed_chunks', return_value=33), \
+                CaptureQueriesContext(connection) as ctx:
+            ann = doc_search.vector_search(visible, _vec(1.0), limit=3)
+
+        self.assertEqual([c.id for c in exact], [c.id for c in own])
+        self.assertEqual([c.id for c in ann], [c.id for c in own])
+        self.assertTrue(any('hnsw.ef_search' in q['sql'] for q in ctx.captured_queries))
+
+    def test_small_visible_share_still_returns_k_hits(self):
+        # 200 closer chunks the user can't see, 5 they can: a fixed ef_search
+        # would leave no visible candidates after the filter.
+        for i in range(200):
+            self._chunk(f'other {i}', _vec(1.0, 0.001 * i), doc=self.other_doc)
+        own = [self._chunk(f'own {i}', _vec(1.0, 0.5 + i)) for i in range(5)]
+        visible = DocChunk.objects.for_user(self.user_a)
+
+        with mock.patch.object(doc_search, 'EXACT_SEARCH_MAX_CHUNKS', 0), \
+                mock.patch.object(doc_search, '_indexed_chunks', return_value=205):
+            with CaptureQueriesContext(connection) as ctx:
+                exact = doc_search.vector_search(visible, _vec(1.0), limit=5)
+            # 40 candidates * 205 / 5 visible = 1640, over pgvector's cap.
+            with mock.patch.object(doc_search, 'HNSW_EF_SEARCH_MAX', 2000):
+                with CaptureQueriesContext(connection) as ef_ctx:
+                    ann = doc_search.vector_search(visible, _vec(1.0), limit=5)
+
+        self.assertEqual([c.id for c in exact], [c.id for c in own])
+        self.assertFalse(any('hnsw.ef_search' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual([c.id for c in ann], [c.id for c in own])
+        self.assertTrue(any("'1640'" in q['sql'] for q in ef_ctx.captured_queries))
+
+    def test_visible_count_is_reused_across_queries(self):
+        for i in range(3):
+            self._chunk(f'own {i}', _vec(1.0, 0.5 + i))
+        visible = DocChunk.objects.for_user(self.user_a)
+
+        with mock.patch.object(doc_search, 'EXACT_SEARCH_MAX_CHUNKS', 0), \
+                mock.patch.object(doc_search, '_indexed_chunks', return_value=3), \
+                mock.patch.object(type(visible), 'count', autospec=True, return_value=3) as count:
+            doc_search.vector_search(visible, _vec(1.0), limit=3)
+            doc_search.vector_search(visible, _vec(1.0), limit=3)
+
+        # `_visible_count_at_most` counts through a sliced queryset each time;
+        # the full count behind ef_search runs once.
+        full_counts = [c for c in count.call_args_list if c.args[0].query.high_mark is None]
+        self.assertEqual(len(full_counts), 1)
+
+    def test_hybrid_ranks_chunks_found_by_both_legs_first(self):
+        vector_only = self._chunk('spindle coolant', _vec(1.0, 0.0))
+        both = self._chunk('torque the gasket', _vec(1.0, 0.2))
+        keyword_only = self._chunk('torque wrench calibration', _vec(0.0, 1.0))
+
+        results = doc_search.hybrid_search(
+            DocChunk.objects.for_user(self.user_a), query='torque', embedding=_vec(1.0), limit=10, threshold=0.5,
+        )
+
+        self.assertEqual(results[0].id, both.id)
+        self.assertEqual((results[0].vector_rank, results[0].keyword_rank), (2, 1))
+        self.assertEqual({c.id for c in results[1:]}, {vector_only.id, keyword_only.id})
+        self.assertAlmostEqual(results[0].score, 1 / 62 + 1 / 61)
+
+    def test_hybrid_endpoint_returns_fused_results(self):
+        chunk = self._chunk('inspect the weld bead', _vec(1.0))
+        self._chunk('hidden weld', _vec(1.0), doc=self.other_doc)
+        self.authenticate_as(self.user_a, self.tenant_a)
+
+        resp = self.client.post(
+            '/api/ai/search/hybrid_search/', {'query': 'weld', 'embedding': _vec(1.0)}, format='json',
+        )
+
+        self.assertEqual(resp.status_code, 200, resp.content)
+        results = resp.json()['results']
+        self.assertEqual([r['id'] for r in results], [chunk.id])
+        self.assertEqual(
+            (results[0]['score_type'], results[0]['vector_rank'], results[0]['keyword_rank']), ('rrf', 1, 1),
+        )
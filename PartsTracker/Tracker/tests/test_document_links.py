@@ -194,6 +194,40 @@ class DocumentLinkAccessFilterTests(TenantTestCase):
         )
         self.assertNotIn(tenant_b_doc.id, self._visible_ids())
 
+    def test_primary_attachment_to_accessible_part_and_part_type(self):
+        from Tracker.models import Documents, Parts, PartTypes
+
+        part_type = self.create_for_tenant(PartTypes, self.tenant_a, name="Bracket")
+        part = self.create_for_tenant(
+            Parts, self.tenant_a, ERP_id="BRK-1", order=self.order_mine, part_type=part_type,
+        )
+        on_part = self.create_for_tenant(
+            Documents, self.tenant_a, file_name="part.pdf", file="parts_docs/a/part.pdf",
+            classification="PUBLIC", content_type=ContentType.objects.get_for_model(Parts),
+            object_id=str(part.id),
+        )
+        on_type = self.create_for_tenant(
+            Documents, self.tenant_a, file_name="type.pdf", file="parts_docs/a/type.pdf",
+            classification="PUBLIC", content_type=ContentType.objects.get_for_model(PartTypes),
+            object_id=str(part_type.id),
+        )
+        self.assertTrue({on_part.id, on_type.id} <= self._visible_ids())
+
+    def test_access_filter_does_not_inline_accessible_ids(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from Tracker.models import Documents
+
+        # The order set stays a subquery: building the queryset runs no SQL,
+        # and the final statement does not carry the customer's order ids.
+        with CaptureQueriesContext(connection) as ctx:
+            qs = Documents.objects.for_user(self.user_a)
+            building = len(ctx.captured_queries)
+            ids = set(qs.values_list('id', flat=True))
+        self.assertEqual(len(ctx.captured_queries), building + 1)
+        self.assertIn(self.doc_linked.id, ids)
+        self.assertNotIn(str(self.order_mine.id), ctx.captured_queries[-1]['sql'])
+
 
 class DocumentListFilterLinkAwarenessTests(TenantTestCase):
     """The list endpoint's content_type+object_id filter must be link-aware."""
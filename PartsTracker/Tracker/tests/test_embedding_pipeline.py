@@ -0,0 +1,174 @@
+"""
+Tests for the embedding pipeline (Tracker.ai_embed, embed_document_inline).
+
+Runs against a stand-in for Ollama's `/api/embed` on a local port: texts go
+out in batches with bounded concurrency, unchanged chunks keep their rows
+across re-embeds, and vectors are shared through the tenant's EmbeddingCache.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.conf import settings
+from django.test import override_settings
+
+from Tracker.ai_embed import embed_texts
+from Tracker.models import DocChunk, Documents, EmbeddingCache
+from Tracker.tests.base import TenantTestCase
+
+
+class StandInEmbedServer:
+    """Local `/api/embed` that records every request it serves."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self.inflight = 0
+        self.max_inflight = 0
+        self.fail = False
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with server.lock:
+                    server.requests.append(body['input'])
+                    server.inflight += 1
+                    server.max_inflight = max(server.max_inflight, server.inflight)
+                time.sleep(server.delay)
+                with server.lock:
+                    server.inflight -= 1
+                if server.fail or self.path != '/api/embed':
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                payload = json.dumps({'embeddings': [server.vector(t) for t in body['input']]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def vector(text):
+        seed = hashlib.sha256(text.encode()).digest()
+        return [seed[i % len(seed)] / 255 for i in range(settings.AI_EMBED_DIM)]
+
+    @property
+    def texts_embedded(self):
+        return [t for batch in self.requests for t in batch]
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class EmbeddingPipelineTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.server = StandInEmbedServer()
+        self.addCleanup(self.server.stop)
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.settings = override_settings(
+            OLLAMA_URL=self.server.url, MEDIA_ROOT=self.media, AI_EMBED_ENABLED=True,
+            AI_EMBED_BATCH_SIZE=8, AI_EMBED_CONCURRENCY=4,
+            AI_EMBED_CHUNK_CHARS=50, AI_EMBED_MAX_CHUNKS=40,
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def _sop(self, name, lines, tenant=None):
+        os.makedirs(os.path.join(self.media, 'docs'), exist_ok=True)
+        with open(os.path.join(self.media, 'docs', name), 'w') as f:
+            f.write('placeholder')
+        doc = self.create_for_tenant(Documents, tenant or self.tenant_a, file_name=name, file=f'docs/{name}')
+        doc._text = '\n'.join(lines)
+        return doc
+
+    def _embed(self, doc):
+        with mock.patch.object(Documents, '_extract_text_from_file', lambda d: doc._text):
+            return doc.embed_inline()
+
+    @staticmethod
+    def _steps(n=40, revised=()):
+        # One 40-char line per chunk at AI_EMBED_CHUNK_CHARS=50.
+        return [f'Step {i:02d}: {"REVISED" if i in revised else "torque to spec"}'.ljust(40, '.') for i in range(n)]
+
+    def test_texts_are_batched_deduplicated_and_concurrency_bounded(self):
+        self.server.delay = 0.05
+        texts = [f'text {i}' for i in range(30)] + ['text 0', 'text 1']
+
+        with override_settings(AI_EMBED_CONCURRENCY=2):
+            vectors = embed_texts(texts)
+
+        self.assertEqual(vectors, [self.server.vector(t) for t in texts])
+        self.assertEqual([len(batch) for batch in self.server.requests], [8, 8, 8, 6])
+        self.assertEqual(self.server.max_inflight, 2)
+
+    def test_revised_sop_only_embeds_changed_chunks(self):
+        doc = self._sop('sop.txt', self._steps())
+        self.assertTrue(self._embed(doc))
+        self.assertEqual(len(self.server.texts_embedded), 40)
+        before = dict(DocChunk.objects.filter(doc=doc).values_list('content_hash', 'id'))
+
+        self.server.requests.clear()
+        doc._text = '\n'.join(self._steps(revised={3, 17, 31}))
+        self.assertTrue(self._embed(doc))
+
+        self.assertEqual(len(self.server.texts_embedded), 3)
+        self.assertTrue(all('REVISED' in t for t in self.server.texts_embedded))
+        chunks = list(DocChunk.objects.filter(doc=doc).order_by('span_meta__i'))
+        self.assertEqual(len(chunks), 40)
+        kept = [c for c in chunks if before.get(c.content_hash) == c.id]
+        self.assertEqual(len(kept), 37)
+        self.assertEqual([c.span_meta['i'] for c in chunks], list(range(40)))
+
+    def test_vectors_are_shared_across_documents(self):
+        self._embed(self._sop('v1.txt', self._steps()))
+        self.server.requests.clear()
+
+        v2 = self._sop('v2.txt', self._steps(revised={5}))
+        self._embed(v2)
+
+        self.assertEqual(len(self.server.texts_embedded), 1)
+        self.assertEqual(DocChunk.objects.filter(doc=v2).count(), 40)
+        self.assertEqual(EmbeddingCache.objects.count(), 41)
+
+    def test_vectors_are_not_shared_across_tenants(self):
+        self._embed(self._sop('sop-a.txt', self._steps(5)))
+        self.server.requests.clear()
+
+        self.switch_tenant_context(self.tenant_b)
+        self._embed(self._sop('sop-b.txt', self._steps(5), tenant=self.tenant_b))
+
+        self.assertEqual(len(self.server.texts_embedded), 5)
+        self.assertEqual(EmbeddingCache.objects.filter(tenant=self.tenant_a).count(), 5)
+        self.assertEqual(EmbeddingCache.objects.filter(tenant=self.tenant_b).count(), 5)
+
+    def test_failed_embed_leaves_existing_chunks(self):
+        doc = self._sop('sop.txt', self._steps(5))
+        self._embed(doc)
+        ids = set(DocChunk.objects.filter(doc=doc).values_list('id', flat=True))
+
+        self.server.fail = True
+        doc._text = '\n'.join(self._steps(5, revised={0}))
+        with self.assertRaises(Exception):
+            self._embed(doc)
+
+        self.assertEqual(set(DocChunk.objects.filter(doc=doc).values_list('id', flat=True)), ids)
@@ -0,0 +1,119 @@
+"""
+Tests for HeatMapAnnotations density aggregation (Tracker.services.qms.heatmap_density)
+and the `density` action on the annotations viewset.
+"""
+import shutil
+import tempfile
+
+import numpy as np
+import trimesh
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from Tracker.models import HeatMapAnnotations, Parts, PartTypes, ThreeDModel
+from Tracker.tests.base import TenantTestCase
+
+URL = '/api/HeatMapAnnotation/density/'
+
+
+class HeatMapDensityTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        part_type = self.create_for_tenant(PartTypes, self.tenant_a, name='Cube')
+        self.part = self.create_for_tenant(Parts, self.tenant_a, ERP_id='CUBE-1', part_type=part_type)
+        self.box = trimesh.creation.box()
+        self.model = self.create_for_tenant(
+            ThreeDModel, self.tenant_a, name='Cube', part_type=part_type,
+            file=ContentFile(self.box.export(file_type='glb'), name='cube.glb'),
+            processing_status='COMPLETED',
+        )
+        self.grant_tenant_permissions(
+            self.user_a, self.tenant_a, ['view_heatmapannotations', 'view_threedmodel', 'full_tenant_access'],
+        )
+        self.authenticate_as(self.user_a, self.tenant_a)
+
+    def _annotate(self, x, y, z, severity=None, measurement=None):
+        return self.create_for_tenant(
+            HeatMapAnnotations, self.tenant_a, model=self.model, part=self.part,
+            position_x=x, position_y=y, position_z=z, severity=severity, measurement_value=measurement,
+        )
+
+    def _density(self, **params):
+        resp = self.client.get(URL, {'model': str(self.model.id), **params})
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.json()
+
+    def test_voxel_bins_are_weighted_and_columnar(self):
+        self._annotate(0.0, 0.0, 0.0, 'CRITICAL', 2.0)
+        self._annotate(0.1, 0.1, 0.1, 'LOW', 5.0)
+        self._annotate(4.0, 2.0, 0.0, 'HIGH')
+
+        data = self._density(resolution=4)
+
+        self.assertEqual((data['mode'], data['total']), ('voxel', 3))
+        self.assertEqual(data['origin'], [0.0, 0.0, 0.0])
+        self.assertEqual((data['cell_size'], data['dims']), (1.0, [4, 2, 1]))
+        self.assertEqual(data['bins'], {
+            'index': [0, 7],
+            'count': [2, 1],
+            'severity_weight': [9, 4],
+            'measurement_sum': [7.0, 0.0],
+            'measurement_max': [5.0, None],
+        })
+
+    def test_list_filters_apply(self):
+        self._annotate(0.0, 0.0, 0.0, 'CRITICAL')
+        self._annotate(1.0, 0.0, 0.0, 'LOW')
+
+        data = self._density(severity='CRITICAL')
+
+        self.assertEqual((data['total'], data['bins']['severity_weight']), (1, [8]))
+
+    def test_cached_until_an_annotation_is_written(self):
+        self._annotate(0.0, 0.0, 0.0)
+        self.assertEqual(self._density()['total'], 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self._density()['total'], 1)
+        self.assertFalse(any('GROUP BY' in q['sql'] for q in ctx.captured_queries))
+
+        annotation = self._annotate(1.0, 1.0, 1.0)
+        self.assertEqual(self._density()['total'], 2)
+        annotation.delete()
+        self.assertEqual(self._density()['total'], 1)
+
+    def test_face_mode_buckets_by_nearest_triangle(self):
+        points = [(0.5, 0.1, 0.1), (0.5, 0.1, 0.12), (-0.1, 0.5, 0.0)]
+        for p in points:
+            self._annotate(*p, severity='MEDIUM', measurement=1.5)
+
+        data = self._density(mode='face')
+
+        nearest = np.argmin(
+            ((self.box.triangles_center[None, :, :] - np.array(points)[:, None, :]) ** 2).sum(axis=2), axis=1,
+        )
+        expected, counts = np.unique(nearest, return_counts=True)
+        self.assertEqual((data['level'], data['face_count']), (0, 12))
+        self.assertEqual(data['bins']['index'], expected.tolist())
+        self.assertEqual(data['bins']['count'], counts.tolist())
+        self.assertEqual(data['bins']['severity_weight'], (counts * 2).tolist())
+        self.assertEqual(data['bins']['measurement_max'], [1.5] * len(expected))
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get(URL).status_code, 400)
+        self.assertEqual(self.client.get(URL, {'model': str(self.model.id), 'mode': 'splat'}).status_code, 400)
+        self.assertEqual(self.client.get(URL, {'model': str(self.model.id), 'resolution': 0}).status_code, 400)
+        self.assertEqual(
+            self.client.get(URL, {'model': str(self.model.id), 'mode': 'face', 'level': 3}).status_code, 400,
+        )
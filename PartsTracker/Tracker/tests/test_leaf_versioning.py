@@ -7,9 +7,11 @@ Each test class mirrors the pattern in `DocumentTypeSerializerRoutingTestCase`
 while non-versioning field updates (archived, operational state) go through
 a plain save.
 """
+import shutil
 import tempfile
 
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
 from rest_framework.test import APIRequestFactory
 
 from django.contrib.contenttypes.models import ContentType
@@ -241,6 +243,13 @@ class ThreeDModelSerializerRoutingTestCase(TenantTestCase):
 
     def setUp(self):
         super().setUp()
+        # Uploaded stub files go to a scratch MEDIA_ROOT, not the tree.
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media)
+        media.enable()
+        self.addCleanup(media.disable)
+
         self.part_type = PartTypes.objects.create(
             name='Turbine Blade',
         )
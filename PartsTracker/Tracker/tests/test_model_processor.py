@@ -0,0 +1,107 @@
+"""
+Tests for 3D model processing: the level-of-detail chain written by
+ModelProcessor, memory-capped STEP conversion, and progressive loading via
+the ThreeDModels `lod` action.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import trimesh
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, override_settings
+
+from Tracker.models import ModelProcessingStatus, PartTypes, ThreeDModel
+from Tracker.services.model_processor import ModelProcessor, ProcessingConfig
+from Tracker.tasks import process_3d_model
+from Tracker.tests.base import TenantTestCase
+
+
+def _sphere_stl(directory):
+    """An 81,920-face sphere written as STL."""
+    path = os.path.join(directory, 'sphere.stl')
+    trimesh.creation.icosphere(subdivisions=6).export(path)
+    return path
+
+
+class ModelProcessorLodTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def test_levels_are_chained_coarsest_first(self):
+        processor = ModelProcessor(ProcessingConfig(target_faces=40_000, lod_faces=(2_000, 10_000, 500_000)))
+
+        result = processor.process(_sphere_stl(self.tmp))
+
+        self.assertTrue(result.success, result.error)
+        self.assertLessEqual(result.face_count, 40_000)
+        # The 500k budget is above the optimized mesh and is skipped.
+        self.assertEqual(len(result.lods), 2)
+        faces = [lod.face_count for lod in result.lods]
+        self.assertEqual(faces, sorted(faces))
+        self.assertLessEqual(faces[0], 2_000)
+        self.assertLess(faces[-1], result.face_count)
+        for lod in result.lods:
+            self.assertEqual(len(trimesh.load(lod.output_path, force='mesh').faces), lod.face_count)
+            self.assertEqual(os.path.getsize(lod.output_path), lod.size)
+
+    def test_step_conversion_failure_in_child_is_reported(self):
+        bad = os.path.join(self.tmp, 'bad.step')
+        Path(bad).write_text('not a STEP file')
+        processor = ModelProcessor(ProcessingConfig(convert_memory_limit_mb=2048, convert_timeout=60))
+
+        result = processor.process(bad)
+
+        self.assertFalse(result.success)
+        self.assertIn('STEP conversion failed', result.error)
+
+
+class ThreeDModelLodEndpointTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=self.media, MODEL_LOD_FACES=[2_000, 10_000, 40_000])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        part_type = self.create_for_tenant(PartTypes, self.tenant_a, name='Sphere')
+        with open(_sphere_stl(self.media), 'rb') as f:
+            self.model = self.create_for_tenant(
+                ThreeDModel, self.tenant_a, name='Sphere', part_type=part_type,
+                file=ContentFile(f.read(), name='sphere.stl'),
+            )
+        self.grant_tenant_permissions(self.user_a, self.tenant_a, ['view_threedmodel', 'full_tenant_access'])
+        self.authenticate_as(self.user_a, self.tenant_a)
+        self.url = f'/api/ThreeDModels/{self.model.id}/lod/'
+
+    def test_processing_stores_levels_and_serves_coarsest_first(self):
+        self.assertEqual(self.client.get(self.url).status_code, 409)
+
+        outcome = process_3d_model(str(self.model.id))
+        self.assertEqual(outcome['status'], 'success', outcome)
+        self.model.refresh_from_db()
+        self.assertEqual(self.model.processing_status, ModelProcessingStatus.COMPLETED)
+        self.assertEqual(len(self.model.lod_levels), 3)
+        self.assertEqual(self.model.lod_levels[-1]['file'], self.model.file.name)
+
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual((first['X-LOD-Level'], first['X-LOD-Levels']), ('0', '3'))
+        self.assertIn('level=1', first['Link'])
+        coarse = b''.join(first.streaming_content)
+        self.assertEqual(len(coarse), self.model.lod_levels[0]['size_bytes'])
+
+        last = self.client.get(self.url, {'level': 2})
+        self.assertEqual(last.status_code, 200)
+        self.assertNotIn('Link', last)
+        self.assertGreater(len(b''.join(last.streaming_content)), len(coarse))
+        self.assertEqual(self.client.get(self.url, {'level': 3}).status_code, 400)
+
+        detail = self.client.get(f'/api/ThreeDModels/{self.model.id}/').json()
+        self.assertEqual([lvl['level'] for lvl in detail['lod_levels']], [0, 1, 2])
+        self.assertNotIn('file', detail['lod_levels'][0])
@@ -0,0 +1,252 @@
+"""
+Tests for the OEE engine and rollup (Tracker.services.mes.oee) and the
+`oee` action on the work center viewset.
+
+The scenario is one Monday 08:00-16:00 UTC shift at a two-machine work
+center: 90 minutes of unplanned loss on one machine (a downtime event and an
+overlapping downtime time entry), a 30-minute planned stop for the whole
+work center, and 30 ten-minute completions of which 3 failed inspection.
+"""
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from Tracker.models import (
+    DowntimeEvent, Equipments, OEEBucket, Parts, PartTypes, Processes, ProcessStep, QualityReports, Shift,
+    StepExecution, Steps, TimeEntry, WorkCenter, WorkOrder, WorkOrderStatus,
+)
+from Tracker.services.mes import oee
+from Tracker.tests.base import TenantTestCase
+
+URL = '/api/WorkCenters/oee/'
+DAY = date(2026, 3, 2)  # a Monday
+NOW = datetime(2026, 3, 2, 18, 0, tzinfo=dt_timezone.utc)
+
+
+def at(hour, minute=0):
+    return datetime.combine(DAY, time(hour, minute), tzinfo=dt_timezone.utc)
+
+
+class OEETotalsTests(SimpleTestCase):
+
+    def test_ratios(self):
+        totals = oee.OEETotals(
+            machines=2, planned_seconds=57600, planned_stop_seconds=3600, downtime_seconds=5400,
+            ideal_seconds=18000, total_count=30, reject_count=3,
+        )
+
+        self.assertEqual(totals.loading_seconds, 54000)
+        self.assertAlmostEqual(totals.availability, 0.9)
+        self.assertAlmostEqual(totals.performance, 18000 / 48600)
+        self.assertAlmostEqual(totals.quality, 0.9)
+        self.assertAlmostEqual(totals.oee, 0.9 * 0.9 * 18000 / 48600)
+
+    def test_no_output_leaves_ratios_undefined(self):
+        totals = oee.OEETotals()
+        totals.add({'planned_seconds': 3600, 'downtime_seconds': 3600})
+
+        self.assertEqual(totals.availability, 0)
+        self.assertIsNone(totals.performance)
+        self.assertIsNone(totals.quality)
+        self.assertIsNone(totals.to_dict()['oee'])
+
+
+class OEEScenarioMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.shift = Shift.objects.create(name='Day', code='DAY', start_time=time(8), end_time=time(16))
+        self.work_center = WorkCenter.objects.create(name='Mill', code='MILL')
+        self.machines = [Equipments.objects.create(name=f'Mill {i}') for i in range(2)]
+        self.work_center.equipment.set(self.machines)
+
+        part_type = PartTypes.objects.create(name='OEE Widget', ID_prefix='OW')
+        self.step = Steps.objects.create(
+            name='Mill op', part_type=part_type, work_center=self.work_center,
+            expected_duration=timedelta(minutes=10),
+        )
+        process = Processes.objects.create(name='P-OEE', part_type=part_type)
+        ProcessStep.objects.create(process=process, step=self.step, order=1)
+        work_order = WorkOrder.objects.create(
+            ERP_id='WO-OEE', process=process, quantity=1, workorder_status=WorkOrderStatus.IN_PROGRESS,
+        )
+        self.part = Parts.objects.create(ERP_id='P-OEE-1', part_type=part_type, work_order=work_order, step=self.step)
+
+    def _losses(self):
+        DowntimeEvent.objects.create(
+            equipment=self.machines[0], category='UNPLANNED', reason='Spindle', reported_by=self.user_a,
+            start_time=at(10), end_time=at(11),
+        )
+        TimeEntry.objects.create(
+            entry_type='DOWNTIME', user=self.user_a, equipment=self.machines[0],
+            start_time=at(10, 30), end_time=at(11, 30),
+        )
+        DowntimeEvent.objects.create(
+            work_center=self.work_center, category='PLANNED', reason='PM', reported_by=self.user_a,
+            start_time=at(12), end_time=at(12, 30),
+        )
+
+    def _output(self):
+        executions = [
+            StepExecution.objects.create(
+                part=self.part, step=self.step, visit_number=i, status='COMPLETED',
+                exited_at=at(9) + timedelta(minutes=10 * i),
+            )
+            for i in range(1, 31)
+        ]
+        for execution in executions[:2]:
+            QualityReports.objects.create(
+                part=self.part, step=self.step, step_execution=execution, status='FAIL', detected_by=self.user_a,
+            )
+        # Logged by hand against the part while its last visit was open.
+        QualityReports.objects.create(part=self.part, step=self.step, status='FAIL', detected_by=self.user_a)
+        return executions
+
+
+class EngineTests(OEEScenarioMixin, TenantTestCase):
+
+    def test_availability_performance_quality(self):
+        self._losses()
+        self._output()
+
+        [row] = oee.summarize(self.tenant_a.id, DAY, DAY, source=oee.SOURCE_RAW, now=NOW)
+
+        self.assertEqual(row['work_center'], self.work_center.id)
+        self.assertEqual(
+            (row['planned_seconds'], row['planned_stop_seconds'], row['downtime_seconds']), (57600, 3600, 5400),
+        )
+        self.assertEqual((row['total_count'], row['reject_count'], row['ideal_seconds']), (30, 3, 18000))
+        self.assertEqual(row['availability'], 0.9)
+        self.assertEqual(row['performance'], round(18000 / 48600, 4))
+        self.assertEqual(row['quality'], 0.9)
+
+    def test_machine_rows_carry_their_own_losses(self):
+        self._losses()
+
+        rows = oee.summarize(self.tenant_a.id, DAY, DAY, group_by=('equipment',), source=oee.SOURCE_RAW, now=NOW)
+
+        by_machine = {r['equipment']: r for r in rows}
+        self.assertEqual(by_machine[self.machines[0].id]['downtime_seconds'], 5400)
+        self.assertEqual(by_machine[self.machines[1].id]['downtime_seconds'], 0)
+        self.assertEqual(by_machine[self.machines[1].id]['planned_stop_seconds'], 1800)
+
+    def test_open_window_is_clipped_to_now(self):
+        [row] = oee.compute_windows(self.tenant_a.id, DAY, DAY, now=at(12), machine_rows=False)
+
+        self.assertEqual(row['planned_seconds'], 2 * 4 * 3600)
+
+    def test_live_tail_reads_one_day_back(self):
+        self._losses()
+        after = at(15)
+
+        with mock.patch.object(oee, '_engine_query', wraps=oee._engine_query) as engine_query:
+            rows = oee.compute_windows(self.tenant_a.id, DAY - timedelta(days=90), DAY, now=NOW, after=after)
+
+        kwargs = engine_query.call_args.kwargs
+        self.assertEqual(kwargs['range_start'], after - timedelta(days=1))
+        self.assertGreaterEqual(kwargs['first_day'], DAY - timedelta(days=1))
+        # Only DAY's window ends after 15:00, and it still sees the whole morning.
+        self.assertEqual(rows, oee.compute_windows(self.tenant_a.id, DAY, DAY, now=NOW))
+
+    def test_rollup_matches_raw(self):
+        self._losses()
+        self._output()
+
+        written = oee.rebuild(self.tenant_a.id, DAY, DAY, now=NOW)
+
+        self.assertEqual(written, 3)  # two machines and the work center
+        self.assertEqual(oee.check_consistency(self.tenant_a.id, DAY, DAY, now=NOW), [])
+        self.assertEqual(
+            oee.summarize(self.tenant_a.id, DAY, DAY, now=NOW),
+            oee.summarize(self.tenant_a.id, DAY, DAY, source=oee.SOURCE_RAW, now=NOW),
+        )
+
+    def test_check_reports_drift(self):
+        oee.rebuild(self.tenant_a.id, DAY, DAY, now=NOW)
+        OEEBucket.objects.filter(equipment__isnull=True).update(downtime_seconds=1)
+
+        [mismatch] = oee.check_consistency(self.tenant_a.id, DAY, DAY, now=NOW)
+
+        self.assertEqual(mismatch.key, (self.work_center.id, None, self.shift.id, DAY))
+
+    def test_buckets_are_tenant_scoped(self):
+        oee.rebuild(self.tenant_a.id, DAY, DAY, now=NOW)
+
+        self.assertEqual(oee.rebuild(self.tenant_b.id, DAY, DAY, now=NOW), 0)
+        self.assertEqual(OEEBucket.objects.filter(tenant=self.tenant_b).count(), 0)
+
+
+@override_settings(OEE_ROLLUP_ENABLED=True)
+class RollupSignalTests(OEEScenarioMixin, TenantTestCase):
+
+    def test_saved_events_refresh_ended_windows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._losses()
+
+        bucket = OEEBucket.objects.get(equipment=self.machines[0])
+        self.assertEqual((bucket.downtime_seconds, bucket.planned_stop_seconds), (5400, 1800))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DowntimeEvent.objects.filter(category='PLANNED').get().delete()
+
+        # Refreshed buckets are rewritten, not updated in place.
+        bucket = OEEBucket.objects.get(equipment=self.machines[0])
+        self.assertEqual(bucket.planned_stop_seconds, 0)
+
+    def test_moving_an_event_refreshes_the_window_it_left(self):
+        week_before = at(10) - timedelta(days=7)
+        with self.captureOnCommitCallbacks(execute=True):
+            event = DowntimeEvent.objects.create(
+                equipment=self.machines[0], category='UNPLANNED', reason='Spindle', reported_by=self.user_a,
+                start_time=week_before, end_time=week_before + timedelta(hours=1),
+            )
+        self.assertEqual(OEEBucket.objects.get(equipment=self.machines[0], day=DAY - timedelta(days=7))
+                         .downtime_seconds, 3600)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.start_time, event.end_time = at(10), at(10, 30)
+            event.save()
+
+        self.assertEqual(OEEBucket.objects.get(equipment=self.machines[0], day=DAY - timedelta(days=7))
+                         .downtime_seconds, 0)
+        self.assertEqual(OEEBucket.objects.get(equipment=self.machines[0], day=DAY).downtime_seconds, 1800)
+
+    def test_disabled_rollup_writes_nothing(self):
+        with override_settings(OEE_ROLLUP_ENABLED=False), self.captureOnCommitCallbacks(execute=True):
+            self._losses()
+
+        self.assertFalse(OEEBucket.objects.exists())
+
+
+class OEEEndpointTests(OEEScenarioMixin, TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.grant_tenant_permissions(
+            self.user_a, self.tenant_a, ['view_workcenter', 'view_downtimeevent', 'full_tenant_access'],
+        )
+        self.authenticate_as(self.user_a, self.tenant_a)
+
+    def test_groups_by_work_center_and_shift(self):
+        self._losses()
+
+        resp = self.client.get(URL, {'start': '2026-03-02', 'end': '2026-03-02', 'group_by': 'work_center,shift'})
+
+        self.assertEqual(resp.status_code, 200, resp.content)
+        body = resp.json()
+        self.assertEqual((body['group_by'], body['source']), (['work_center', 'shift'], oee.SOURCE_RAW))
+        [row] = body['results']
+        self.assertEqual((row['work_center_code'], row['shift_name']), ('MILL', 'Day'))
+        self.assertEqual(row['availability'], 0.9)
+
+    def test_rejects_bad_parameters(self):
+        for params in ({'start': '03/02/2026'}, {'start': '2026-03-05', 'end': '2026-03-02'},
+                       {'group_by': 'operator'}, {'work_center': 'nope'}):
+            self.assertEqual(self.client.get(URL, params).status_code, 400, params)
+
+    def test_requires_downtime_view_permission(self):
+        self.grant_tenant_permissions(self.user_b, self.tenant_a, ['view_workcenter', 'full_tenant_access'])
+        self.authenticate_as(self.user_b, self.tenant_a)
+
+        self.assertEqual(self.client.get(URL).status_code, 403)
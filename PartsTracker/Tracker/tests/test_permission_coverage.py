@@ -46,6 +46,31 @@ ADMIN_ONLY_MODELS = {
     # role/user perms, and suspend/reactivate by the User viewset's
     # bulk-activate action — never by membership CRUD perms.
     'tenantmembership',
+    # Derived order-hierarchy index (services.core.scope_closure), written
+    # only by signals and rebuild_scope_closure; no endpoint exposes it.
+    'scopeclosure',
+    # Per-day SPC statistics (services.qms.spc_stats), same story: derived,
+    # maintained by measurement signals and rebuild_spc_stats.
+    'spcstatsbucket',
+    # Per-shift-window OEE rollup (services.mes.oee): derived, maintained by
+    # event signals, the roll_up_oee tick and rebuild_oee.
+    'oeebucket',
+    # Daily dashboard rollups (services.qms.quality_rollup): derived,
+    # maintained by quality report / disposition signals, the nightly
+    # reconcile and rebuild_quality_rollups.
+    'qualitydailyrollup',
+    'defectdailyrollup',
+    # Operator work-queue projection (services.mes.work_queue): derived,
+    # maintained by execution / work order signals, the reconcile tick and
+    # rebuild_work_queue; served through the WorkQueue endpoints.
+    'workqueueentry',
+    # Document-number counters (utils.sequences): advanced by the allocator
+    # and seed_sequence_counters only.
+    'sequencecounter',
+    # Per-tenant content-addressed embedding vectors
+    # (ai_embed.embed_texts_cached); written by the embedding pipeline, no
+    # endpoint exposes them.
+    'embeddingcache',
 }
 
 # change_/delete_ never granted to ANY role — append-only audit/evidence
@@ -0,0 +1,106 @@
+"""
+Tests for the request-scoped permission memo (Tracker.utils.permission_memo).
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.test import RequestFactory, TestCase
+
+from Tracker.middleware import TenantMiddleware
+from Tracker.models import Orders, Parts, Tenant, TenantGroup
+from Tracker.services.core.user import add_user_to_tenant_group
+from Tracker.services.export_control import ExportControlService
+from Tracker.utils.permission_memo import current_memo, permission_memo
+from Tracker.utils.tenant_context import tenant_context
+
+User = get_user_model()
+
+
+class PermissionMemoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Memo Tenant", slug="memo-tenant")
+        cls.user = User.objects.create_user(
+            username='memo_user',
+            email='memo@example.com',
+            password='testpass',
+            tenant=cls.tenant,
+        )
+
+    def setUp(self):
+        self.user.clear_permission_cache(self.tenant)
+        self.user._current_tenant = self.tenant
+
+    def _count_loads(self):
+        return mock.patch.object(
+            User, '_load_tenant_permissions', autospec=True,
+            side_effect=User._load_tenant_permissions,
+        )
+
+    def test_without_scope_every_check_loads(self):
+        with self._count_loads() as load:
+            self.user.has_tenant_perm('view_orders')
+            self.user.has_tenant_perm('full_tenant_access')
+        self.assertEqual(load.call_count, 2)
+
+    def test_scope_loads_once_per_tenant(self):
+        with self._count_loads() as load, permission_memo() as memo:
+            for _ in range(5):
+                self.user.has_tenant_perm('view_orders')
+                self.user.has_tenant_perms(['view_parts', 'view_orders'])
+            with tenant_context(self.tenant.id):
+                Orders.objects.for_user(self.user)
+                Parts.objects.for_user(self.user)
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(memo.misses, 1)
+        self.assertGreaterEqual(memo.hits, 10)
+
+    def test_get_tenant_permissions_returns_private_copy(self):
+        with permission_memo():
+            perms = self.user.get_tenant_permissions(self.tenant)
+            perms.add('not_a_real_perm')
+            self.assertFalse(self.user.has_tenant_perm('not_a_real_perm'))
+
+    def test_role_change_invalidates_scope(self):
+        group = TenantGroup.objects.create(tenant=self.tenant, name='Memo Viewers')
+        group.permissions.add(Permission.objects.get(codename='view_orders'))
+        with permission_memo():
+            self.assertFalse(self.user.has_tenant_perm('view_orders'))
+            add_user_to_tenant_group(self.user, group, tenant=self.tenant)
+            self.assertTrue(self.user.has_tenant_perm('view_orders'))
+
+    def test_user_save_invalidates_export_control(self):
+        self.user.us_person = False
+        self.user.save()
+        with permission_memo():
+            self.assertFalse(ExportControlService.can_access_itar_data(self.user)[0])
+            self.user.us_person = True
+            self.user.save()
+            self.assertTrue(ExportControlService.can_access_itar_data(self.user)[0])
+
+    def test_classification_levels_memoized(self):
+        with permission_memo() as memo:
+            first = ExportControlService.get_accessible_classification_levels(self.user)
+            misses = memo.misses
+            first.append('SCRIBBLE')
+            second = ExportControlService.get_accessible_classification_levels(self.user)
+        self.assertNotIn('SCRIBBLE', second)
+        self.assertEqual(memo.misses, misses)
+
+    def test_middleware_opens_scope_per_request(self):
+        seen = []
+
+        def view(request):
+            request.user.has_tenant_perm('view_orders')
+            request.user.has_tenant_perm('view_parts')
+            seen.append((current_memo().hits, current_memo().misses))
+            return {}
+
+        request = RequestFactory().get('/api/Orders/')
+        request.user = self.user
+        TenantMiddleware(view)(request)
+
+        self.assertEqual(seen, [(1, 1)])
+        self.assertIsNone(current_memo())
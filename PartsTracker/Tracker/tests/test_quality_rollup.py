@@ -0,0 +1,212 @@
+"""
+Tests for the daily quality dashboard rollups (Tracker.services.qms.quality_rollup)
+and the dashboard endpoints that read them.
+
+The seeded history spreads passing and failing reports, defects and
+dispositions over the last six weeks, including an archived failure and
+reports either side of the 30-day Pareto boundary, so the rollup path and the
+raw path (`?source=raw`) must agree on every card.
+"""
+from datetime import timedelta
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from Tracker.models import (
+    DefectDailyRollup, Parts, PartTypes, Processes, ProcessStep, QualityDailyRollup, QualityErrorsList,
+    QualityReportDefect, QualityReports, QuarantineDisposition, Steps, WorkOrder, WorkOrderStatus,
+)
+from Tracker.services.qms import quality_rollup
+from Tracker.tests.base import TenantTestCase
+
+DASHBOARD_PERMISSIONS = [
+    'view_qualityreports', 'view_quarantinedisposition', 'view_qualityerrorslist', 'view_capa',
+    'full_tenant_access',
+]
+CARDS = ['kpis', 'fpy-trend', 'defect-pareto', 'ncr-trend', 'ncr-aging', 'repeat-defects']
+
+
+class QualityHistoryMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.housing = PartTypes.objects.create(name='Housing', ID_prefix='HS')
+        self.bracket = PartTypes.objects.create(name='Bracket', ID_prefix='BR')
+        self.scratch = QualityErrorsList.objects.create(error_name='Scratch', error_example='Surface mark')
+        self.bore = QualityErrorsList.objects.create(error_name='Bore oversize', error_example='Out of tolerance')
+        self.parts = {pt: self._part(pt) for pt in (self.housing, self.bracket)}
+
+    def _part(self, part_type):
+        step = Steps.objects.create(name=f'{part_type.name} machining', part_type=part_type)
+        process = Processes.objects.create(name=f'P-{part_type.name}', part_type=part_type)
+        ProcessStep.objects.create(process=process, step=step, order=1)
+        work_order = WorkOrder.objects.create(
+            ERP_id=f'WO-{part_type.ID_prefix}', process=process, quantity=1,
+            workorder_status=WorkOrderStatus.IN_PROGRESS,
+        )
+        return Parts.objects.create(
+            ERP_id=f'P-{part_type.ID_prefix}', part_type=part_type, work_order=work_order, step=step,
+        )
+
+    def _report(self, ago, status, part_type=None, errors=(), archived=False):
+        part = self.parts[part_type or self.housing]
+        report = QualityReports.objects.create(
+            part=part, step=part.step, status=status, detected_by=self.user_a, archived=archived,
+            created_at=self.now - ago,
+        )
+        for error in errors:
+            QualityReportDefect.objects.create(report=report, error_type=error)
+        return report
+
+    def _seed(self):
+        for days in (0, 1, 3, 10):
+            self._report(timedelta(days=days), 'PASS')
+            self._report(timedelta(days=days), 'PASS', self.bracket)
+        for days, part_type in ((0, self.housing), (1, self.bracket), (3, self.housing), (10, self.bracket)):
+            self._report(timedelta(days=days), 'FAIL', part_type, errors=(self.scratch,))
+        self._report(timedelta(days=2), 'FAIL', errors=(self.scratch, self.bore))
+        self._report(timedelta(days=5), 'FAIL', errors=(self.bore,), archived=True)
+        # Either side of the rolling 30-day window start.
+        self._report(timedelta(days=30) - timedelta(minutes=5), 'FAIL', errors=(self.bore,))
+        self._report(timedelta(days=30, minutes=5), 'FAIL', errors=(self.bore,))
+
+        # Age the auto-created dispositions and close some of them.
+        for i, disposition in enumerate(QuarantineDisposition.objects.order_by('created_at')):
+            fields = {'created_at': self.now - timedelta(days=2 * i)}
+            if i % 3 == 0:
+                fields.update(current_state='CLOSED', updated_at=self.now - timedelta(days=i))
+            QuarantineDisposition.objects.filter(pk=disposition.pk).update(**fields)
+
+
+class RollupMaintenanceTests(QualityHistoryMixin, TenantTestCase):
+
+    def test_rebuild_matches_records(self):
+        self._seed()
+
+        written = quality_rollup.rebuild(self.tenant_a.id)
+
+        self.assertGreater(written, 0)
+        first = self.now.date() - timedelta(days=60)
+        self.assertEqual(quality_rollup.check_consistency(self.tenant_a.id, first, self.now.date()), [])
+        today = QualityDailyRollup.objects.get(tenant=self.tenant_a, day=timezone.localdate(self.now))
+        self.assertEqual((today.passed, today.failed), (2, 1))
+
+    def test_check_and_reconcile_repair_bypassed_writes(self):
+        self._seed()
+        quality_rollup.rebuild(self.tenant_a.id)
+        report = QualityReports.objects.filter(status='PASS').order_by('created_at').last()
+        QualityReports.objects.filter(pk=report.pk).update(status='FAIL')
+
+        [mismatch] = quality_rollup.check_consistency(self.tenant_a.id, self.now.date() - timedelta(days=60),
+                                                      self.now.date())
+        self.assertEqual(mismatch.day, timezone.localdate(report.created_at))
+
+        self.assertEqual(quality_rollup.reconcile(self.tenant_a.id), [mismatch.day])
+        self.assertEqual(quality_rollup.reconcile(self.tenant_a.id), [])
+
+    def test_refresh_takes_the_tenant_lock_before_rewriting(self):
+        self._seed()
+
+        with CaptureQueriesContext(connection) as ctx:
+            quality_rollup.refresh_days(self.tenant_a.id, [timezone.localdate(self.now)])
+
+        sql = [q['sql'] for q in ctx.captured_queries]
+        lock = next(i for i, q in enumerate(sql) if 'pg_advisory_xact_lock' in q)
+        first_delete = next(i for i, q in enumerate(sql) if q.startswith('DELETE'))
+        self.assertLess(lock, first_delete)
+
+    def test_rollups_are_tenant_scoped(self):
+        self._seed()
+        quality_rollup.rebuild(self.tenant_a.id)
+
+        self.assertEqual(quality_rollup.rebuild(self.tenant_b.id), 0)
+        self.assertFalse(QualityDailyRollup.objects.filter(tenant=self.tenant_b).exists())
+        self.assertFalse(DefectDailyRollup.objects.filter(tenant=self.tenant_b).exists())
+
+
+@override_settings(QUALITY_ROLLUP_ENABLED=True)
+class RollupSignalTests(QualityHistoryMixin, TenantTestCase):
+
+    def _day(self):
+        return QualityDailyRollup.objects.get(tenant=self.tenant_a, day=timezone.localdate(self.now))
+
+    def test_saves_refresh_their_day_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._report(timedelta(0), 'PASS')
+            failed = self._report(timedelta(0), 'FAIL', errors=(self.scratch,))
+
+        self.assertEqual((self._day().inspections, self._day().failed, self._day().ncrs_open), (2, 1, 1))
+        self.assertEqual(DefectDailyRollup.objects.get(tenant=self.tenant_a).defects, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            failed.errors.add(self.bore)
+            disposition = failed.dispositions.get()
+            disposition.current_state = 'CLOSED'
+            disposition.save()
+
+        self.assertEqual((self._day().ncrs_open, self._day().ncrs_closed), (0, 1))
+        self.assertEqual(DefectDailyRollup.objects.filter(tenant=self.tenant_a).count(), 2)
+        today = self.now.date()
+        self.assertEqual(quality_rollup.check_consistency(self.tenant_a.id, today - timedelta(days=1), today), [])
+
+    def test_disabled_rollup_writes_nothing(self):
+        with override_settings(QUALITY_ROLLUP_ENABLED=False), self.captureOnCommitCallbacks(execute=True):
+            self._report(timedelta(0), 'FAIL', errors=(self.scratch,))
+
+        self.assertFalse(QualityDailyRollup.objects.exists())
+
+
+@override_settings(QUALITY_ROLLUP_ENABLED=True)
+class DashboardRollupEndpointTests(QualityHistoryMixin, TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._seed()
+        quality_rollup.rebuild(self.tenant_a.id)
+        self.grant_tenant_permissions(self.user_a, self.tenant_a, DASHBOARD_PERMISSIONS)
+        self.authenticate_as(self.user_a, self.tenant_a)
+
+    def _get(self, card, **params):
+        resp = self.client.get(f'/api/dashboard/{card}/', params)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.json()
+
+    def test_rollup_answers_match_raw(self):
+        for card in CARDS:
+            with self.subTest(card=card):
+                self.assertEqual(self._get(card), self._get(card, source='raw'))
+
+        for params in ({'days': 3}, {'days': 90, 'min_occurrences': 1, 'limit': 1}):
+            with self.subTest(params=params):
+                for card in ('fpy-trend', 'defect-pareto', 'ncr-trend', 'repeat-defects'):
+                    self.assertEqual(self._get(card, **params), self._get(card, source='raw', **params))
+
+    def test_pareto_counts_archived_failures_and_respects_window_start(self):
+        pareto = self._get('defect-pareto')
+
+        self.assertEqual(
+            {row['errorType']: row['count'] for row in pareto['data']},
+            {'Scratch': 5, 'Bore oversize': 3},
+        )
+
+    def test_query_count_does_not_grow_with_range(self):
+        for card in ('fpy-trend', 'defect-pareto', 'ncr-trend', 'repeat-defects'):
+            with self.subTest(card=card):
+                counts = []
+                for days in (7, 365):
+                    with CaptureQueriesContext(connection) as ctx:
+                        self._get(card, days=days, min_occurrences=1)
+                    counts.append(len(ctx.captured_queries))
+                self.assertEqual(counts[0], counts[1])
+
+    def test_order_scoped_users_read_the_records(self):
+        customer_perms = [p for p in DASHBOARD_PERMISSIONS if p != 'full_tenant_access']
+        self.grant_tenant_permissions(self.user_b, self.tenant_a, customer_perms)
+        self.authenticate_as(self.user_b, self.tenant_a)
+
+        # No orders of theirs: nothing, even though the rollup holds the tenant's counts.
+        self.assertEqual(self._get('fpy-trend')['total_inspections'], 0)
+        self.assertEqual(self._get('defect-pareto')['total'], 0)
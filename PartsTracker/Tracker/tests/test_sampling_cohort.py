@@ -0,0 +1,149 @@
+"""
+Tests for SamplingCohortEvaluator: for every rule type, the batch path must
+reach the same decisions and write the same audit rows as evaluating each
+part with SamplingFallbackApplier.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from Tracker.models import (
+    Orders, OrdersStatus, Parts, PartsStatus, PartTypes, Processes, ProcessStep,
+    SamplingAuditLog, SamplingRule, SamplingRuleSet, SamplingTriggerState, Steps,
+    WorkOrder, WorkOrderStatus,
+)
+from Tracker.services.mes.sampling_applier import SamplingCohortEvaluator, SamplingFallbackApplier
+from Tracker.tests.base import TenantTestCase
+
+User = get_user_model()
+
+
+class SamplingCohortEvaluatorTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.part_type = PartTypes.objects.create(name='Cohort Widget', ID_prefix='CW')
+        self.process = Processes.objects.create(name='Cohort Process', part_type=self.part_type)
+        self.step = Steps.objects.create(name='Inspect', part_type=self.part_type)
+        self.other_step = Steps.objects.create(name='Machine', part_type=self.part_type)
+        ProcessStep.objects.create(process=self.process, step=self.step, order=1)
+        ProcessStep.objects.create(process=self.process, step=self.other_step, order=2)
+        customer = User.objects.create_user(username='cohort_customer', password='pw')
+        self.order = Orders.objects.create(name='Order', customer=customer, order_status=OrdersStatus.IN_PROGRESS)
+        self.work_order = WorkOrder.objects.create(
+            ERP_id='WO-COHORT', related_order=self.order, workorder_status=WorkOrderStatus.IN_PROGRESS, quantity=13,
+        )
+        self._seen_audit = set()
+        self.ruleset = SamplingRuleSet.objects.create(
+            name='Primary', part_type=self.part_type, process=self.process, step=self.step, active=True,
+        )
+
+        # Twelve parts at the step, with created_at ties at positions 3-5,
+        # plus one part elsewhere that is evaluated but not in the cohort.
+        base = timezone.now() - timedelta(hours=1)
+        self.parts = []
+        for i in range(12):
+            part = Parts.objects.create(
+                ERP_id=f'CW{i:04d}', part_type=self.part_type, step=self.step, work_order=self.work_order,
+                order=self.order, part_status=PartsStatus.PENDING,
+            )
+            created = base + timedelta(minutes=3 if 3 <= i <= 5 else i)
+            Parts.objects.filter(pk=part.pk).update(created_at=created)
+            self.parts.append(part)
+        self.outsider = Parts.objects.create(
+            ERP_id='CW9999', part_type=self.part_type, step=self.other_step, work_order=self.work_order,
+            order=self.order, part_status=PartsStatus.PENDING,
+        )
+
+    def _rules(self, *rules):
+        SamplingRule.objects.filter(ruleset=self.ruleset).delete()
+        for order, (rule_type, value) in enumerate(rules, start=1):
+            SamplingRule.objects.create(ruleset=self.ruleset, rule_type=rule_type, value=value, order=order)
+
+    def _batch(self):
+        """Fresh instances with the cohort step, the outsider moved onto it in memory."""
+        parts = list(Parts.objects.filter(pk__in=[p.pk for p in self.parts + [self.outsider]]).order_by('-ERP_id'))
+        for part in parts:
+            part.step = self.step
+        return parts
+
+    def _audit_rows(self):
+        """Audit rows written since the last call, in write order."""
+        rows = list(
+            SamplingAuditLog.objects.exclude(id__in=self._seen_audit).order_by('id')
+            .values_list('id', 'part_id', 'rule_id', 'sampling_decision', 'ruleset_type')
+        )
+        self._seen_audit.update(row[0] for row in rows)
+        return [row[1:] for row in rows]
+
+    @staticmethod
+    def _comparable(result):
+        return (
+            result.get('requires_sampling'),
+            getattr(result.get('rule'), 'pk', None),
+            getattr(result.get('ruleset'), 'pk', None),
+            result.get('context'),
+        )
+
+    def assertMatchesPerPart(self):
+        self._audit_rows()
+        expected = {p.pk: self._comparable(SamplingFallbackApplier(p).evaluate()) for p in self._batch()}
+        expected_audit = self._audit_rows()
+
+        results = SamplingCohortEvaluator(self._batch()).evaluate()
+
+        self.assertEqual({pk: self._comparable(r) for pk, r in results.items()}, expected)
+        self.assertEqual(self._audit_rows(), expected_audit)
+        return results
+
+    def test_every_rule_type_matches_per_part_path(self):
+        cases = [
+            [('EVERY_NTH_PART', 3)],
+            [('PERCENTAGE', 40)],
+            [('RANDOM', 50)],
+            [('FIRST_N_PARTS', 4)],
+            [('LAST_N_PARTS', 5)],
+            [('EXACT_COUNT', 5)],
+            [('EXACT_COUNT', 20)],
+            [('EXACT_COUNT', 0)],
+            [('PERCENTAGE', 25), ('EVERY_NTH_PART', 4)],
+            [('EVERY_NTH_PART', 5), ('LAST_N_PARTS', 2), ('RANDOM', 90)],
+            [('PERCENTAGE', None), ('EVERY_NTH_PART', 7)],
+        ]
+        for rules in cases:
+            with self.subTest(rules=rules):
+                self._rules(*rules)
+                results = self.assertMatchesPerPart()
+                self.assertEqual(len(results), 13)
+
+    def test_fallback_trigger_and_missing_ruleset_match(self):
+        self._rules(('EVERY_NTH_PART', 2))
+        fallback = SamplingRuleSet.objects.create(
+            name='Fallback', part_type=self.part_type, process=self.process, step=self.step,
+            active=False, is_fallback=True,
+        )
+        SamplingRule.objects.create(ruleset=fallback, rule_type='PERCENTAGE', value=100, order=1)
+        SamplingTriggerState.objects.create(ruleset=fallback, work_order=self.work_order, step=self.step)
+
+        results = self.assertMatchesPerPart()
+        self.assertTrue(all(r['ruleset'] == fallback for r in results.values() if r['requires_sampling']))
+
+        SamplingTriggerState.objects.filter(work_order=self.work_order).update(active=False)
+        SamplingRuleSet.objects.filter(step=self.step).update(active=False)
+        results = self.assertMatchesPerPart()
+        self.assertEqual(list(results.values()), [{'requires_sampling': False}] * 13)
+
+    def test_apply_writes_one_update_per_outcome(self):
+        self._rules(('EVERY_NTH_PART', 3))
+        parts = list(Parts.objects.filter(step=self.step).order_by('created_at', 'id'))
+
+        # Ruleset lookup (2), rules, cohort, audit insert, one UPDATE each
+        # for the sampled and the unsampled outcome.
+        with self.assertNumQueries(7):
+            SamplingCohortEvaluator(parts).apply()
+
+        sampled = list(
+            Parts.objects.filter(step=self.step).order_by('created_at', 'id').values_list('requires_sampling', flat=True)
+        )
+        self.assertEqual(sampled, [(i + 1) % 3 == 0 for i in range(12)])
@@ -0,0 +1,206 @@
+"""
+Tests for the CP-SAT scheduler (Tracker.services.mes.scheduler) and the
+`solve` action on the schedule slot viewset.
+
+All solves start on a fixed Monday 15:00 UTC against one 08:00-16:00
+weekday shift, so one working hour is left on day one.
+"""
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from Tracker.models import (
+    DowntimeEvent, Equipments, EquipmentStatus, PartTypes, Processes, ProcessStep, ScheduleSlot, Shift,
+    Steps, WorkCenter, WorkOrder, WorkOrderStatus,
+)
+from Tracker.services.mes.scheduler import ShiftCalendar, solve_schedule
+from Tracker.tasks import solve_schedule_task
+from Tracker.tests.base import TenantTestCase
+
+URL = '/api/ScheduleSlots/solve/'
+NOW = datetime(2026, 3, 2, 15, 0, tzinfo=dt_timezone.utc)  # a Monday
+
+
+def at(day_offset, hour, minute=0):
+    return NOW.replace(hour=hour, minute=minute) + timedelta(days=day_offset)
+
+
+class ShiftCalendarTests(TenantTestCase):
+
+    def test_working_minutes_skip_off_shift_time(self):
+        day = Shift.objects.create(name='Day', code='DAY', start_time=time(8), end_time=time(16))
+        calendar = ShiftCalendar([day], NOW)
+
+        self.assertEqual(calendar.to_work(at(0, 16)), 60)
+        self.assertEqual(calendar.to_work(at(1, 9)), 120)
+        # Friday 16:00 to Monday 08:00 is not working time.
+        self.assertEqual(calendar.to_work(at(7, 8)), 60 + 4 * 480)
+        self.assertEqual(calendar.segments(30, 150), [
+            (at(0, 15, 30), at(0, 16), day),
+            (at(1, 8), at(1, 9, 30), day),
+        ])
+
+    def test_overnight_shift_started_the_day_before(self):
+        night = Shift.objects.create(
+            name='Night', code='NGT', start_time=time(22), end_time=time(6), days_of_week='0,1,2,3,4,5,6',
+        )
+        calendar = ShiftCalendar([night], NOW.replace(hour=3))
+
+        self.assertEqual(calendar.to_work(NOW.replace(hour=5)), 120)
+        self.assertEqual(calendar.segments(0, 240), [
+            (NOW.replace(hour=3), NOW.replace(hour=6), night),
+            (at(0, 22), at(0, 23), night),
+        ])
+
+
+class SolveScheduleTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.shift = Shift.objects.create(name='Day', code='DAY', start_time=time(8), end_time=time(16))
+        self.part_type = PartTypes.objects.create(name='Sched Widget', ID_prefix='SW')
+        self.mill = WorkCenter.objects.create(name='Mill', code='MILL')
+        self.cmm = WorkCenter.objects.create(name='CMM', code='CMM')
+
+    def _work_order(self, erp, steps, *, priority=3, due=None, quantity=1):
+        """A WorkOrder routed through (work_center, minutes per part) steps."""
+        process = Processes.objects.create(name=f'P-{erp}', part_type=self.part_type)
+        for i, (work_center, minutes) in enumerate(steps, start=1):
+            step = Steps.objects.create(
+                name=f'{erp} op{i}', part_type=self.part_type, work_center=work_center,
+                expected_duration=timedelta(minutes=minutes),
+            )
+            ProcessStep.objects.create(process=process, step=step, order=i)
+        return WorkOrder.objects.create(
+            ERP_id=erp, process=process, priority=priority, quantity=quantity, expected_completion=due,
+            workorder_status=WorkOrderStatus.PENDING,
+        )
+
+    def _solve(self, **kwargs):
+        return solve_schedule(self.tenant_a, time_limit=10, now=NOW, **kwargs)
+
+    def _slots(self, work_order):
+        return list(ScheduleSlot.objects.active().filter(work_order=work_order).order_by('scheduled_start'))
+
+    def test_tasks_share_a_work_center_without_overlap_and_urgent_first(self):
+        relaxed = self._work_order('WO-RELAXED', [(self.mill, 60)])
+        urgent = self._work_order('WO-URGENT', [(self.mill, 60)], priority=1, due=NOW.date())
+
+        result = self._solve()
+
+        self.assertIn(result.status, ('OPTIMAL', 'FEASIBLE'))
+        self.assertEqual((result.tasks, result.slots_written, result.late_work_orders), (2, 2, []))
+        [first], [second] = self._slots(urgent), self._slots(relaxed)
+        self.assertEqual((first.scheduled_start, first.scheduled_end), (at(0, 15), at(0, 16)))
+        self.assertEqual((second.scheduled_start, second.scheduled_end), (at(1, 8), at(1, 9)))
+        self.assertEqual((first.shift, first.scheduled_date), (self.shift, NOW.date()))
+        self.assertEqual(first.step.work_center, self.mill)
+
+    def test_routing_order_and_shift_split(self):
+        wo = self._work_order('WO-CHAIN', [(self.mill, 90), (self.cmm, 30)], due=date(2026, 3, 20))
+
+        self._solve()
+
+        slots = self._slots(wo)
+        # 90 minutes of milling split over Monday and Tuesday, then inspection.
+        self.assertEqual(
+            [(s.work_center, s.scheduled_start, s.scheduled_end) for s in slots],
+            [(self.mill, at(0, 15), at(0, 16)), (self.mill, at(1, 8), at(1, 8, 30)), (self.cmm, at(1, 8, 30), at(1, 9))],
+        )
+
+    def test_in_progress_slot_is_pinned_and_resolve_is_warm(self):
+        running = self._work_order('WO-RUNNING', [(self.mill, 60)])
+        waiting = self._work_order('WO-WAITING', [(self.mill, 30)], priority=1, due=NOW.date())
+        step = running.process.process_steps.get().step
+        pinned = ScheduleSlot.objects.create(
+            work_center=self.mill, shift=self.shift, work_order=running, step=step, scheduled_date=NOW.date(),
+            scheduled_start=at(0, 14, 30), scheduled_end=at(0, 15, 30), status='IN_PROGRESS',
+        )
+
+        first = self._solve()
+
+        self.assertEqual((first.pinned, first.slots_written), (1, 1))
+        self.assertEqual(first.late_work_orders, [])
+        self.assertEqual(self._slots(running), [pinned])
+        [slot] = self._slots(waiting)
+        self.assertEqual((slot.scheduled_start, slot.scheduled_end), (at(0, 15, 30), at(0, 16)))
+
+        second = self._solve()
+
+        self.assertEqual((second.hinted, second.slots_written), (1, 1))
+        [moved] = self._slots(waiting)
+        self.assertNotEqual(moved.pk, slot.pk)
+        self.assertEqual(moved.scheduled_start, slot.scheduled_start)
+        self.assertTrue(ScheduleSlot.objects.filter(pk=slot.pk, archived=True).exists())
+
+    def test_missed_scheduled_slot_is_replanned(self):
+        wo = self._work_order('WO-MISSED', [(self.mill, 30), (self.cmm, 30)])
+        first_step, second_step = [ps.step for ps in wo.process.process_steps.order_by('order')]
+        # The solver placed op1 this morning; it never started.
+        missed = ScheduleSlot.objects.create(
+            work_center=self.mill, shift=self.shift, work_order=wo, step=first_step, scheduled_date=NOW.date(),
+            scheduled_start=at(0, 9), scheduled_end=at(0, 9, 30),
+        )
+
+        result = self._solve()
+
+        self.assertEqual((result.pinned, result.tasks, result.slots_written), (0, 2, 2))
+        self.assertTrue(ScheduleSlot.objects.filter(pk=missed.pk, archived=True).exists())
+        self.assertEqual(
+            [(s.step, s.scheduled_start, s.scheduled_end) for s in self._slots(wo)],
+            [(first_step, at(0, 15), at(0, 15, 30)), (second_step, at(0, 15, 30), at(0, 16))],
+        )
+
+    def test_lost_equipment_reduces_capacity(self):
+        machines = [Equipments.objects.create(name=f'Mill {i}') for i in range(2)]
+        self.mill.equipment.set(machines)
+        a = self._work_order('WO-A', [(self.mill, 60)])
+        b = self._work_order('WO-B', [(self.mill, 60)])
+
+        self._solve()
+        self.assertEqual(self._slots(a)[0].scheduled_start, self._slots(b)[0].scheduled_start)
+
+        DowntimeEvent.objects.create(equipment=machines[0], category='UNPLANNED', reason='Spindle', start_time=NOW,
+                                     reported_by=self.user_a)
+        self._solve()
+        starts = sorted(self._slots(wo)[0].scheduled_start for wo in (a, b))
+        self.assertEqual(starts, [at(0, 15), at(1, 8)])
+
+        Equipments.objects.filter(pk=machines[1].pk).update(status=EquipmentStatus.OUT_OF_SERVICE)
+        result = self._solve()
+        self.assertEqual(result.tasks, 0)
+        self.assertEqual({u['erp_id'] for u in result.unschedulable}, {'WO-A', 'WO-B'})
+
+
+class SolveEndpointTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.grant_tenant_permissions(
+            self.user_a, self.tenant_a,
+            ['add_scheduleslot', 'change_scheduleslot', 'delete_scheduleslot', 'full_tenant_access'],
+        )
+        self.authenticate_as(self.user_a, self.tenant_a)
+
+    def test_solve_is_queued_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            resp = self.client.post(URL, {'time_limit': 5}, format='json')
+
+        self.assertEqual(resp.status_code, 202, resp.content)
+        self.assertEqual(resp.json()['status'], 'queued')
+        self.assertEqual(len(callbacks), 1)
+
+    def test_time_limit_is_bounded(self):
+        self.assertEqual(self.client.post(URL, {'time_limit': 0}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(URL, {'time_limit': 10_000}, format='json').status_code, 400)
+
+    def test_requires_change_and_delete_permission(self):
+        self.grant_tenant_permissions(self.user_b, self.tenant_a, ['add_scheduleslot', 'full_tenant_access'])
+        self.authenticate_as(self.user_b, self.tenant_a)
+
+        self.assertEqual(self.client.post(URL, {}, format='json').status_code, 403)
+
+    def test_task_reports_empty_plan(self):
+        Shift.objects.create(name='Day', code='DAY', start_time=time(8), end_time=time(16))
+
+        result = solve_schedule_task.apply(kwargs={'tenant_id': str(self.tenant_a.id), 'time_limit': 5}).get()
+
+        self.assertEqual((result['status'], result['tasks']), ('EMPTY', 0))
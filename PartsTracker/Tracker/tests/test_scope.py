@@ -6,6 +6,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
 from django.db import connection
+from django.test import override_settings
 from unittest import skipIf
 
 from Tracker.scope import (
@@ -34,7 +35,9 @@ from Tracker.models import (
     Tenant,
     TenantGroup,
     UserRole,
+    ScopeClosure,
 )
+from Tracker.services.core import scope_closure
 from Tracker.tests.base import VectorTestCase, TenantContextMixin
 
 
@@ -1050,3 +1053,293 @@ class BatchingPerformanceTestCase(_ScopeTenantBase):
         self.assertLess(query_count, max_expected,
             f"Possible N+1 detected: {query_count} queries for {parts_count} parts. "
             f"With batching, expect fewer than {max_expected} queries.")
+
+
+@skipIf(not is_vector_extension_available(), "Vector extension not available")
+class TraversalStrategyTestCase(_ScopeTenantBase):
+    """The column-only and CTE strategies must return exactly what the
+    instance walk returns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.company = Companies.objects.create(name="Strategy Company")
+        cls.user = User.objects.create_user(
+            username="strategyuser",
+            email="strategy@test.com",
+            password="testpass",
+        )
+        add_user_to_tenant_group(cls.user, 'Manager', tenant=cls.tenant)
+        cls.part_type = PartTypes.objects.create(name="Strategy Part Type")
+        cls.process = Processes.objects.create(name="Strategy Process", part_type=cls.part_type)
+        cls.step = Steps.objects.create(name="Strategy Step", part_type=cls.part_type, step_type='TASK')
+        ProcessStep.objects.create(process=cls.process, step=cls.step, order=1, is_entry_point=True)
+        cls.order = Orders.objects.create(name="Strategy Order", company=cls.company, customer=cls.user)
+        cls.work_order = WorkOrder.objects.create(ERP_id="WO-STRAT", related_order=cls.order)
+        cls.parts = [
+            Parts.objects.create(
+                ERP_id=f"STRAT-{i}",
+                order=cls.order,
+                work_order=cls.work_order,
+                part_type=cls.part_type,
+                step=cls.step,
+            )
+            for i in range(8)
+        ]
+        cls.reports = [QualityReports.objects.create(part=p, step=cls.step) for p in cls.parts[:4]]
+
+    def _assert_strategies_agree(self, fn, obj, **kwargs):
+        expected = fn(obj, strategy='instances', **kwargs)
+        self.assertEqual(fn(obj, strategy='columns', **kwargs), expected)
+        self.assertEqual(fn(obj, strategy='cte', **kwargs), expected)
+
+    def test_descendants_agree(self):
+        self._assert_strategies_agree(get_descendants, self.order)
+        self._assert_strategies_agree(get_descendants, self.work_order)
+
+    def test_descendants_agree_with_depth_and_type_filters(self):
+        self._assert_strategies_agree(get_descendants, self.order, max_depth=1)
+        self._assert_strategies_agree(get_descendants, self.order, max_depth=0)
+        self._assert_strategies_agree(
+            get_descendants, self.order, include_types=[WorkOrder, Parts, QualityReports],
+        )
+        self._assert_strategies_agree(get_descendants, self.order, exclude_types=[Parts])
+
+    def test_ancestors_agree(self):
+        self._assert_strategies_agree(get_ancestors, self.reports[0])
+        self._assert_strategies_agree(get_ancestors, self.reports[0], max_depth=2)
+
+    def test_user_filtered_walk_agrees(self):
+        expected = get_descendants(self.order, user=self.user, strategy='instances')
+        self.assertEqual(get_descendants(self.order, user=self.user, strategy='columns'), expected)
+        # 'cte' can't inline for_user() and falls back to the column walk.
+        self.assertEqual(get_descendants(self.order, user=self.user, strategy='cte'), expected)
+
+    def test_cte_is_one_query(self):
+        from django.test.utils import CaptureQueriesContext
+
+        get_descendants(self.order, strategy='cte')  # warm content-type cache
+        with CaptureQueriesContext(connection) as ctx:
+            get_descendants(self.order, strategy='cte')
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_unknown_strategy_rejected(self):
+        with self.assertRaises(ValueError):
+            get_descendants(self.order, strategy='bogus')
+
+
+@skipIf(not is_vector_extension_available(), "Vector extension not available")
+@override_settings(SCOPE_CLOSURE_ENABLED=True)
+class ScopeClosureTestCase(_ScopeTenantBase):
+    """The ScopeClosure index, maintained from signals, must answer exactly
+    what live traversal over the covered types returns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.company = Companies.objects.create(name="Closure Company")
+        cls.user = User.objects.create_user(
+            username="closureuser",
+            email="closure@test.com",
+            password="testpass",
+        )
+        cls.part_type = PartTypes.objects.create(name="Closure Part Type")
+        cls.step = Steps.objects.create(name="Closure Step", part_type=cls.part_type, step_type='TASK')
+        cls.order = Orders.objects.create(name="Closure Order", company=cls.company, customer=cls.user)
+        cls.work_order = WorkOrder.objects.create(ERP_id="WO-CLOSURE", related_order=cls.order)
+        cls.other_work_order = WorkOrder.objects.create(ERP_id="WO-CLOSURE-2", related_order=cls.order)
+        cls.parts = [
+            Parts.objects.create(
+                ERP_id=f"CLOSURE-{i}",
+                order=cls.order,
+                work_order=cls.work_order,
+                part_type=cls.part_type,
+                step=cls.step,
+            )
+            for i in range(4)
+        ]
+        cls.reports = [QualityReports.objects.create(part=p, step=cls.step) for p in cls.parts[:2]]
+        cls.part_doc = Documents.objects.create(
+            file_name="closure_part.pdf",
+            content_type=ContentType.objects.get_for_model(Parts),
+            object_id=cls.parts[0].pk,
+            uploaded_by=cls.user,
+            classification='PUBLIC',
+        )
+        cls.report_doc = Documents.objects.create(
+            file_name="closure_report.pdf",
+            content_type=ContentType.objects.get_for_model(QualityReports),
+            object_id=cls.reports[1].pk,
+            uploaded_by=cls.user,
+            classification='PUBLIC',
+        )
+
+    def _live(self, root):
+        return get_descendants(root, include_types=scope_closure.closure_models(), strategy='columns')
+
+    def _stored(self, root):
+        return get_descendants(root, include_types=scope_closure.closure_models(), strategy='closure')
+
+    def _rows(self):
+        return set(
+            ScopeClosure.objects.filter(tenant_id=self.tenant.id).values_list(
+                'ancestor_type_id', 'ancestor_id', 'descendant_type_id', 'descendant_id', 'depth',
+            )
+        )
+
+    def test_signals_maintain_closure(self):
+        for root in (self.order, self.work_order, self.parts[0]):
+            self.assertEqual(self._stored(root), self._live(root))
+        self.assertEqual(scope_closure.check_consistency(self.tenant.id), [])
+
+    def test_incremental_matches_rebuild(self):
+        incremental = self._rows()
+        scope_closure.rebuild(self.tenant.id)
+        self.assertEqual(self._rows(), incremental)
+
+    def test_reparent_moves_subtree(self):
+        part = self.parts[0]
+        part.work_order = self.other_work_order
+        part.save()
+
+        self.assertEqual(self._stored(self.other_work_order), self._live(self.other_work_order))
+        self.assertEqual(self._stored(self.work_order), self._live(self.work_order))
+        self.assertIn(self.reports[0].pk, self._stored(self.other_work_order)[
+            ContentType.objects.get_for_model(QualityReports).id
+        ])
+        self.assertEqual(scope_closure.check_consistency(self.tenant.id), [])
+
+    def test_hard_delete_removes_node(self):
+        from django.db import models
+        report = self.reports[1]
+        # SecureModel.hard_delete is disabled; a cascaded Django delete is the
+        # path that still removes rows, so go through Model.delete directly.
+        models.Model.delete(report)
+        self.assertEqual(self._stored(self.order), self._live(self.order))
+        self.assertFalse(
+            ScopeClosure.objects.filter(tenant_id=self.tenant.id, descendant_id=str(report.pk)).exists()
+        )
+
+    def test_bulk_created_nodes_indexed(self):
+        new_parts = [
+            Parts(ERP_id=f"CLOSURE-BULK-{i}", order=self.order, work_order=self.work_order,
+                  part_type=self.part_type, step=self.step)
+            for i in range(3)
+        ]
+        Parts.objects.bulk_create(new_parts)
+        self.assertNotEqual(self._stored(self.order), self._live(self.order))
+        scope_closure.add_nodes(new_parts)
+        self.assertEqual(self._stored(self.order), self._live(self.order))
+
+    def test_split_and_undo_keep_closure_current(self):
+        from Tracker.models import WorkOrderSplitReason
+        from Tracker.services.mes.work_order import split_work_order, undo_split
+
+        child = split_work_order(
+            self.work_order, WorkOrderSplitReason.OPERATION, self.user,
+            new_erp_id="WO-CLOSURE-SPLIT", part_ids=[self.parts[0].pk],
+        )
+        for root in (self.work_order, child):
+            self.assertEqual(self._stored(root), self._live(root))
+        self.assertIn(self.reports[0].pk, self._stored(child)[
+            ContentType.objects.get_for_model(QualityReports).id
+        ])
+        self.assertEqual(scope_closure.check_consistency(self.tenant.id), [])
+
+        undo_split(child, self.user)
+        for root in (self.work_order, child):
+            self.assertEqual(self._stored(root), self._live(root))
+        self.assertEqual(scope_closure.check_consistency(self.tenant.id), [])
+
+    def test_order_bulk_add_and_remove_keep_closure_current(self):
+        added = self.order.bulk_add_parts(self.part_type, self.step, 3, erp_id_start=900)['parts']
+        stored = self._stored(self.order)[ContentType.objects.get_for_model(Parts).id]
+        self.assertTrue({p.pk for p in added} <= stored)
+        self.assertEqual(self._stored(self.order), self._live(self.order))
+
+        self.order.bulk_remove_parts([added[0].pk, self.parts[2].pk])
+        stored = self._stored(self.order)[ContentType.objects.get_for_model(Parts).id]
+        self.assertNotIn(added[0].pk, stored)
+        self.assertEqual(self._stored(self.order), self._live(self.order))
+        self.assertEqual(scope_closure.check_consistency(self.tenant.id), [])
+
+    def test_check_consistency_reports_drift(self):
+        ScopeClosure.objects.filter(tenant_id=self.tenant.id, descendant_id=str(self.parts[2].pk)).delete()
+        mismatches = scope_closure.check_consistency(self.tenant.id)
+        self.assertTrue(mismatches)
+        self.assertTrue(any(m.missing for m in mismatches))
+
+        scope_closure.rebuild(self.tenant.id)
+        self.assertEqual(scope_closure.check_consistency(self.tenant.id), [])
+
+    def test_related_to_answers_from_closure(self):
+        covered = scope_closure.closure_models()
+        expected = set(related_to(Documents, self.order, include_types=covered).values_list('id', flat=True))
+        self.assertEqual(expected, {self.part_doc.pk, self.report_doc.pk})
+
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            docs = set(related_to(
+                Documents, self.order, include_types=covered, strategy='closure',
+            ).values_list('id', flat=True))
+        self.assertEqual(docs, expected)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_closure_falls_back_when_it_cannot_answer(self):
+        self.assertEqual(
+            get_descendants(self.order, strategy='closure', max_depth=1),
+            get_descendants(self.order, strategy='columns', max_depth=1),
+        )
+        with self.settings(SCOPE_CLOSURE_ENABLED=False):
+            self.assertEqual(self._stored(self.order), self._live(self.order))
+
+    def test_closure_seeds_user_filtered_walk(self):
+        manager = User.objects.create_user(
+            username="closuremanager",
+            email="closuremanager@test.com",
+            password="testpass",
+        )
+        add_user_to_tenant_group(manager, 'Manager', tenant=self.tenant)
+        # Without include_types the walk reaches models outside the index too.
+        for user in (None, manager, self.user):
+            with self.subTest(user=user):
+                self.assertEqual(
+                    get_descendants(self.order, user=user, strategy='closure'),
+                    get_descendants(self.order, user=user, strategy='columns'),
+                )
+                self.assertEqual(
+                    set(related_to(Documents, self.order, user=user, strategy='closure').values_list('id', flat=True)),
+                    set(related_to(Documents, self.order, user=user, strategy='columns').values_list('id', flat=True)),
+                )
+
+        # The covered part of the answer comes from the index, not the FK columns.
+        ScopeClosure.objects.filter(tenant_id=self.tenant.id, descendant_id=str(self.reports[1].pk)).delete()
+        stored = get_descendants(self.order, user=manager, strategy='closure')
+        self.assertNotIn(self.reports[1].pk, stored[ContentType.objects.get_for_model(QualityReports).id])
+
+    def test_closure_seed_prunes_under_hidden_nodes(self):
+        from unittest import mock
+        from Tracker import scope as scope_module
+
+        manager = User.objects.create_user(
+            username="closurepruner",
+            email="closurepruner@test.com",
+            password="testpass",
+        )
+        add_user_to_tenant_group(manager, 'Manager', tenant=self.tenant)
+        hidden = self.parts[0]
+        scoped = scope_module._scoped_queryset
+
+        def hide_part(model, user):
+            queryset = scoped(model, user)
+            return queryset.exclude(pk=hidden.pk) if model is Parts else queryset
+
+        # The report under the hidden part is visible on its own, but neither
+        # strategy reaches it.
+        with mock.patch.object(scope_module, '_scoped_queryset', side_effect=hide_part):
+            columns = get_descendants(self.order, user=manager, strategy='columns')
+            closure = get_descendants(self.order, user=manager, strategy='closure')
+        self.assertEqual(closure, columns)
+        reports = closure.get(ContentType.objects.get_for_model(QualityReports).id, set())
+        self.assertNotIn(self.reports[0].pk, reports)
+        self.assertIn(self.reports[1].pk, reports)
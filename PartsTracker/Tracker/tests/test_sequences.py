@@ -0,0 +1,87 @@
+"""
+Tests for the counter-backed sequence allocator (Tracker.utils.sequences).
+
+Counters seed from existing numbers on first use, stay per tenant and
+prefix, hand out blocks in one statement, and give numbers back on rollback.
+"""
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from Tracker.models import Orders, PartTypes, SequenceCounter, Steps
+from Tracker.tests.base import TenantTestCase
+from Tracker.utils import sequences
+
+
+class SequenceAllocatorTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.prefix = f"ORD-{timezone.now().year}-"
+
+    def _order(self, tenant, **kwargs):
+        return self.create_for_tenant(Orders, tenant, name="Order", **kwargs)
+
+    def test_first_use_seeds_from_existing_numbers(self):
+        self._order(self.tenant_a, order_number=f"{self.prefix}0041")
+        self._order(self.tenant_a, order_number=f"{self.prefix}0007")
+
+        self.assertEqual(Orders.generate_order_number(self.tenant_a), f"{self.prefix}0042")
+        self.assertEqual(Orders.generate_order_number(self.tenant_a), f"{self.prefix}0043")
+        counter = SequenceCounter.objects.get(tenant_id=self.tenant_a.id, prefix=self.prefix)
+        self.assertEqual((counter.sequence, counter.value), ("Tracker.orders.order_number", 43))
+
+    def test_allocation_is_one_statement_once_seeded(self):
+        Orders.generate_order_number(self.tenant_a)
+        with CaptureQueriesContext(connection) as ctx:
+            Orders.generate_order_number(self.tenant_a)
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertIn('RETURNING', statements[0])
+
+    def test_counters_are_per_tenant(self):
+        self._order(self.tenant_a, order_number=f"{self.prefix}0010")
+
+        self.assertEqual(Orders.generate_order_number(self.tenant_a), f"{self.prefix}0011")
+        self.switch_tenant_context(self.tenant_b)
+        self.assertEqual(Orders.generate_order_number(self.tenant_b), f"{self.prefix}0001")
+
+    def test_saved_orders_get_consecutive_numbers(self):
+        first = self._order(self.tenant_a)
+        second = self._order(self.tenant_a)
+        self.assertEqual(first.order_number, f"{self.prefix}0001")
+        self.assertEqual(second.order_number, f"{self.prefix}0002")
+
+    def test_block_reservation_and_rollback(self):
+        block = sequences.reserve_sequence_block(Orders.objects, 'order_number', 'BLK-', 3, tenant=self.tenant_a)
+        self.assertEqual(block, ['BLK-0001', 'BLK-0002', 'BLK-0003'])
+
+        try:
+            with transaction.atomic():
+                sequences.reserve_sequence_block(Orders.objects, 'order_number', 'BLK-', 5, tenant=self.tenant_a)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(
+            sequences.generate_next_sequence(Orders.objects, 'order_number', 'BLK-', tenant=self.tenant_a),
+            'BLK-0004',
+        )
+
+    def test_seed_counters_only_raises(self):
+        Orders.generate_order_number(self.tenant_a)     # counter at 1
+        self._order(self.tenant_a, order_number=f"{self.prefix}0500")
+        self._order(self.tenant_a, order_number="LEGACY-12")
+
+        self.assertEqual(sequences.seed_counters(self.tenant_a), 2)
+        self.assertEqual(Orders.generate_order_number(self.tenant_a), f"{self.prefix}0501")
+        self.assertEqual(sequences.seed_counters(self.tenant_a), 0)
+
+    def test_bulk_add_parts_can_continue_the_prefix_counter(self):
+        part_type = self.create_for_tenant(PartTypes, self.tenant_a, name="Bolt", ID_prefix="BLT")
+        step = self.create_for_tenant(Steps, self.tenant_a, name="Cut", part_type=part_type)
+        order = self._order(self.tenant_a)
+
+        order.bulk_add_parts(part_type, step, 2)
+        result = order.bulk_add_parts(part_type, step, 2, erp_id_start=None)
+
+        self.assertEqual([p.ERP_id for p in result["parts"]], ["BLT0003", "BLT0004"])
@@ -0,0 +1,180 @@
+"""
+Tests for the vectorized SPC engine (Tracker.services.qms.spc_engine).
+
+Chart limits are checked against the AIAG constants, each Nelson rule against
+a series built to trip it, and capability against the loop implementation the
+engine replaced (kept in the benchmark_spc_engine command).
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from Tracker.management.commands.benchmark_spc_engine import _loop_statistics
+from Tracker.services.qms import spc_engine
+from Tracker.tests.base import TenantTestCase
+
+
+class SubgroupTests(SimpleTestCase):
+
+    def test_consecutive_groups_drop_the_tail(self):
+        groups = spc_engine.subgroups(np.arange(7.0), 3)
+        self.assertEqual(groups.tolist(), [[0, 1, 2], [3, 4, 5]])
+
+    def test_segments_restart_groups(self):
+        values = np.arange(7.0)
+        days = np.array([1, 1, 1, 2, 2, 2, 2])
+        groups = spc_engine.subgroups(values, 2, segments=days)
+        self.assertEqual(groups.tolist(), [[0, 1], [3, 4], [5, 6]])
+
+
+class ControlChartTests(SimpleTestCase):
+
+    def test_xbar_r_uses_a2_and_d3_d4(self):
+        values = np.array([10, 12, 11, 13, 9, 11, 10, 12, 14, 8], dtype=float)
+        limits = spc_engine.xbar_r(values, 5)
+        r_bar = (13 - 9 + 14 - 8) / 2
+        self.assertAlmostEqual(limits.center, 11.0)
+        self.assertAlmostEqual(limits.ucl - limits.center, 0.577 * r_bar, places=2)
+        self.assertAlmostEqual(limits.dispersion_ucl, 2.114 * r_bar, places=2)
+        self.assertEqual(limits.dispersion_lcl, 0.0)
+        self.assertEqual(limits.points.tolist(), [11.0, 11.0])
+
+    def test_xbar_s_uses_c4(self):
+        values = np.array([10, 12, 11, 13, 9, 11, 10, 12, 14, 8], dtype=float)
+        limits = spc_engine.xbar_s(values, 5)
+        s_bar = float(np.mean([np.std([10, 12, 11, 13, 9], ddof=1), np.std([11, 10, 12, 14, 8], ddof=1)]))
+        self.assertAlmostEqual(spc_engine.c4(5), 0.9400, places=4)
+        self.assertAlmostEqual(limits.ucl - limits.center, 1.427 * s_bar, places=2)
+        self.assertAlmostEqual(limits.dispersion_ucl, 2.089 * s_bar, places=2)
+
+    def test_i_mr(self):
+        limits = spc_engine.i_mr([5.0, 5.2, 4.9, 5.1])
+        mr_bar = (0.2 + 0.3 + 0.2) / 3
+        self.assertAlmostEqual(limits.ucl, 5.05 + 2.66 * mr_bar, places=2)
+        self.assertAlmostEqual(limits.dispersion_ucl, 3.267 * mr_bar, places=2)
+
+    def test_p_and_np(self):
+        p = spc_engine.p_chart([2, 5, 3], [100, 200, 100])
+        self.assertAlmostEqual(p.center, 10 / 400)
+        self.assertEqual(len(p.ucl), 3)
+        self.assertGreater(p.ucl[0], p.ucl[1])     # smaller sample, wider limits
+        self.assertTrue(np.all(p.lcl >= 0))
+
+        np_limits = spc_engine.np_chart([4, 6, 5], 100)
+        self.assertAlmostEqual(np_limits.center, 5.0)
+        self.assertAlmostEqual(np_limits.ucl, 5 + 3 * np.sqrt(5 * 0.95))
+
+
+class NelsonRuleTests(SimpleTestCase):
+
+    def _fires(self, points, rule, at):
+        hits = spc_engine.nelson_rules(np.asarray(points, dtype=float), 0.0, 1.0)
+        self.assertIn(at, hits[rule].tolist(), f'rule {rule}: {hits[rule].tolist()}')
+
+    def test_rule_1_beyond_three_sigma(self):
+        self._fires([0, 0.5, 3.5, 0], 1, 2)
+
+    def test_rule_2_nine_on_one_side(self):
+        self._fires([-0.5] + [0.2] * 9, 2, 9)
+
+    def test_rule_3_six_trending(self):
+        self._fires([0, 0.1, 0.2, 0.3, 0.4, 0.5], 3, 5)
+
+    def test_rule_4_fourteen_alternating(self):
+        self._fires([0.1 * (-1) ** i for i in range(14)], 4, 13)
+
+    def test_rule_5_two_of_three_beyond_two_sigma(self):
+        self._fires([0, 2.5, 0.5, 2.4], 5, 3)
+
+    def test_rule_6_four_of_five_beyond_one_sigma(self):
+        self._fires([-1.5, -1.2, 0, -1.1, -1.3], 6, 4)
+
+    def test_rule_7_fifteen_hugging_center(self):
+        self._fires([0.3 * (-1) ** i for i in range(15)], 7, 14)
+
+    def test_rule_8_eight_avoiding_center(self):
+        self._fires([1.5, -1.5] * 4, 8, 7)
+
+    def test_in_control_noise_is_quiet_on_the_sigma_rules(self):
+        hits = spc_engine.nelson_rules(np.array([0.1, -0.4, 0.6, -0.2, 0.3, -0.5]), 0.0, 1.0)
+        self.assertEqual(hits[1].tolist(), [])
+        self.assertEqual(hits[5].tolist(), [])
+
+    def test_zero_sigma_skips_sigma_rules(self):
+        hits = spc_engine.nelson_rules(np.ones(20), 1.0, 0.0)
+        self.assertEqual(sum(len(v) for v in hits.values()), 0)
+
+
+class CapabilityTests(SimpleTestCase):
+
+    def test_matches_loop_implementation(self):
+        values = np.random.default_rng(7).normal(25.0, 0.012, 10_003)
+        mean, std_overall, std_within, cp, cpk, mr_bar = _loop_statistics(values.tolist(), 25.05, 24.95, 5)
+
+        cap = spc_engine.capability(values, 25.05, 24.95, 5)
+        self.assertAlmostEqual(cap.mean, mean, places=9)
+        self.assertAlmostEqual(cap.std_dev_overall, std_overall, places=9)
+        self.assertAlmostEqual(cap.std_dev_within, std_within, places=9)
+        self.assertAlmostEqual(cap.cp, cp, places=9)
+        self.assertAlmostEqual(cap.cpk, cpk, places=9)
+        self.assertAlmostEqual(spc_engine.i_mr(values).dispersion_center, mr_bar, places=9)
+
+    def test_constant_process_has_no_indices(self):
+        cap = spc_engine.capability([5.0] * 10, 6.0, 4.0, 5)
+        self.assertIsNone(cap.cpk)
+        self.assertEqual(spc_engine.interpret(cap.cp, cap.cpk), "Insufficient data for capability analysis.")
+
+
+class EngineIntegrationTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from Tracker.models import MeasurementDefinition, PartTypes, Steps
+
+        part_type = self.create_for_tenant(PartTypes, self.tenant_a, name="Shaft", ID_prefix="SH")
+        self.step = self.create_for_tenant(Steps, self.tenant_a, name="Grind", part_type=part_type)
+        self.md = self.create_for_tenant(
+            MeasurementDefinition, self.tenant_a, label="OD", type="NUMERIC", unit="mm",
+            nominal=25.0, upper_tol=0.05, lower_tol=0.05, step=self.step,
+        )
+
+    def test_baseline_control_limits_shape_unchanged(self):
+        from Tracker.models import SPCBaseline
+
+        baseline = self.create_for_tenant(
+            SPCBaseline, self.tenant_a, measurement_definition=self.md, chart_type='XBAR_R',
+            subgroup_size=5, xbar_ucl='25.03', xbar_cl='25.00', xbar_lcl='24.97',
+            range_ucl='0.06', range_cl='0.03', range_lcl='0', frozen_by=self.user_a,
+        )
+        baseline.refresh_from_db()
+        # A zero limit reads as unset, as before the engine.
+        self.assertEqual(baseline.control_limits, {
+            'xBarUCL': 25.03, 'xBarLCL': 24.97, 'xBarCL': 25.0,
+            'rangeUCL': 0.06, 'rangeLCL': None, 'rangeCL': 0.03,
+        })
+
+    def test_data_endpoint_reports_rule_hits(self):
+        from django.utils import timezone
+        from Tracker.models import MeasurementResult, QualityReports
+
+        now = timezone.now()
+        values = [25.0, 25.01, 24.99, 25.0, 25.01, 24.99, 25.0, 25.09]     # last point far out
+        for i, v in enumerate(values):
+            report = self.create_for_tenant(
+                QualityReports, self.tenant_a, step=self.step, detected_by=self.user_a,
+                sampling_method="manual", status="PENDING",
+                created_at=now - timedelta(hours=len(values) - i),
+            )
+            self.create_for_tenant(
+                MeasurementResult, self.tenant_a, report=report, definition=self.md,
+                value_numeric=v, created_by=self.user_a,
+            )
+
+        self.authenticate_superuser(self.tenant_a)
+        response = self.client.get('/api/spc/data/', {'measurement_id': str(self.md.id), 'days': 2})
+        chart = response.json()['control_chart']
+
+        self.assertEqual(chart['chart_type'], 'I_MR')
+        self.assertEqual(chart['limits_source'], 'computed')
+        self.assertIn({'rule': 1, 'index': len(values) - 1}, chart['violations'])
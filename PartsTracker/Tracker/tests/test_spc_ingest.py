@@ -0,0 +1,100 @@
+"""
+Tests for the columnar SPC reader (Tracker.services.qms.spc_ingest.spc_columns).
+
+Ordering and the limit run in SQL over a UNION ALL of the two tiers; the
+chart endpoint's query count must not grow with the window.
+"""
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from Tracker.services.qms.spc_ingest import reading_series, spc_columns
+from Tracker.tests.base import TenantTestCase
+
+
+class SpcColumnsTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from Tracker.models import MeasurementDefinition, PartTypes, Steps
+
+        part_type = self.create_for_tenant(PartTypes, self.tenant_a, name="Shaft", ID_prefix="SH")
+        self.step = self.create_for_tenant(Steps, self.tenant_a, name="Grind", part_type=part_type)
+        self.md = self.create_for_tenant(
+            MeasurementDefinition, self.tenant_a, label="OD", type="NUMERIC", unit="mm",
+            nominal=25.0, upper_tol=0.05, lower_tol=0.05, step=self.step,
+        )
+        self.now = timezone.now()
+
+    def _batch(self):
+        from Tracker.models import BatchExecution, WorkOrder
+
+        if not hasattr(self, "batch"):
+            work_order = self.create_for_tenant(WorkOrder, self.tenant_a, ERP_id="WO-SPC", quantity=1)
+            self.batch = self.create_for_tenant(
+                BatchExecution, self.tenant_a, work_order=work_order, step=self.step, started_by=self.user_a,
+            )
+        return self.batch
+
+    def _inspection(self, hours_ago, value):
+        from Tracker.models import MeasurementResult, QualityReports
+
+        report = self.create_for_tenant(
+            QualityReports, self.tenant_a, step=self.step, detected_by=self.user_a,
+            sampling_method="manual", status="PENDING", created_at=self.now - timedelta(hours=hours_ago),
+        )
+        self.create_for_tenant(
+            MeasurementResult, self.tenant_a, report=report, definition=self.md,
+            value_numeric=value, created_by=self.user_a,
+        )
+
+    def _process(self, hours_ago, value):
+        from Tracker.models import StepExecutionMeasurement
+
+        sem = self.create_for_tenant(
+            StepExecutionMeasurement, self.tenant_a, batch_execution=self._batch(), measurement_definition=self.md,
+            value=value, recorded_by=self.user_a,
+        )
+        # recorded_at is auto_now_add; backdate it directly.
+        StepExecutionMeasurement.objects.filter(tenant=self.tenant_a, pk=sem.pk).update(
+            recorded_at=self.now - timedelta(hours=hours_ago),
+        )
+
+    def _window(self):
+        return dict(
+            tenant=self.tenant_a, measurement_id=self.md.id,
+            start=self.now - timedelta(days=2), end=self.now,
+        )
+
+    def test_tiers_interleave_in_time_order_and_limit_takes_the_prefix(self):
+        self._inspection(5, 25.01)
+        self._process(4, 25.02)
+        self._inspection(3, 25.03)
+        self._process(2, 25.04)
+
+        everything = spc_columns(**self._window())
+        self.assertEqual(everything.values.tolist(), [25.01, 25.02, 25.03, 25.04])
+        self.assertEqual(everything.timestamps, sorted(everything.timestamps))
+        self.assertEqual(set(everything.operator_names), {self.user_a.email})
+
+        first = spc_columns(**self._window(), limit=2)
+        self.assertEqual(first.values.tolist(), [25.01, 25.02])
+        self.assertEqual(reading_series(**self._window()).values.tolist(), everything.values.tolist())
+
+    def test_query_count_does_not_follow_window_size(self):
+        for i in range(3):
+            self._inspection(i + 1, 25.0)
+
+        def count():
+            with CaptureQueriesContext(connection) as ctx:
+                spc_columns(**self._window(), limit=2)
+            return len(ctx.captured_queries)
+
+        small = count()
+        for i in range(20):
+            self._inspection(i + 4, 25.0)
+            self._process(i + 4, 25.0)
+        self.assertEqual(count(), small)
+        self.assertEqual(small, 2)      # union + one operator lookup
@@ -0,0 +1,231 @@
+"""
+Tests for the incremental SPC statistics store (Tracker.services.qms.spc_stats).
+
+The store must give the same answer as the raw-row path: per-day buckets are
+maintained from measurement saves, merged across a window, and the partial
+edge days are read from the rows.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import SimpleTestCase, override_settings
+
+from Tracker.services.qms import spc_stats
+from Tracker.tests.base import TenantTestCase
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class RunningStatsTests(SimpleTestCase):
+
+    def test_daily_merge_matches_single_pass(self):
+        values = [25.01, 25.03, 24.98, 25.00, 25.02, 24.97, 25.05, 25.01]
+        whole = spc_stats.RunningStats()
+        for v in values:
+            whole.add(v, True)
+
+        merged = spc_stats.RunningStats()
+        for chunk in (values[:3], values[3:]):
+            part = spc_stats.RunningStats()
+            for v in chunk:
+                part.add(v, True)
+            merged.merge(part)
+
+        self.assertEqual(merged.count, whole.count)
+        self.assertAlmostEqual(merged.mean, whole.mean, places=12)
+        self.assertAlmostEqual(merged.std_dev, whole.std_dev, places=12)
+        self.assertEqual((merged.min_value, merged.max_value), (24.97, 25.05))
+
+    def test_subgroups_close_at_day_boundary(self):
+        readings = [
+            (_utc(2026, 3, 1, 8), 1.0, True),
+            (_utc(2026, 3, 1, 9), 3.0, True),
+            (_utc(2026, 3, 1, 10), 2.0, True),   # open pair, dropped at midnight
+            (_utc(2026, 3, 2, 8), 5.0, True),
+            (_utc(2026, 3, 2, 9), 4.0, False),
+        ]
+        stats = spc_stats.summarize(readings)
+        self.assertEqual(stats.num_subgroups(2), 2)
+        self.assertEqual(stats.r_bar(2), 1.5)
+        self.assertEqual(stats.within_spec, 4)
+
+    def test_large_offset_keeps_precision(self):
+        stats = spc_stats.RunningStats()
+        for v in (1e9 + 0.001, 1e9 + 0.002, 1e9 + 0.003):
+            stats.add(v, True)
+        self.assertAlmostEqual(stats.std_dev, 0.001, places=6)
+
+
+@override_settings(SPC_STATS_ENABLED=True)
+class SpcStatsStoreTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from Tracker.models import MeasurementDefinition, PartTypes, Steps
+
+        part_type = self.create_for_tenant(PartTypes, self.tenant_a, name="Shaft", ID_prefix="SH")
+        self.step = self.create_for_tenant(Steps, self.tenant_a, name="Grind", part_type=part_type)
+        self.md = self.create_for_tenant(
+            MeasurementDefinition, self.tenant_a, label="OD", type="NUMERIC", unit="mm",
+            nominal=25.0, upper_tol=0.05, lower_tol=0.05, step=self.step,
+        )
+
+    def _reading(self, ts, value):
+        from Tracker.models import MeasurementResult, QualityReports
+
+        report = self.create_for_tenant(
+            QualityReports, self.tenant_a, step=self.step, detected_by=self.user_a,
+            sampling_method="manual", status="PENDING", created_at=ts,
+        )
+        return self.create_for_tenant(
+            MeasurementResult, self.tenant_a, report=report, definition=self.md,
+            value_numeric=value, created_by=self.user_a,
+        )
+
+    def _raw(self, start, end, sizes=tuple(spc_stats.SUBGROUP_SIZES)):
+        from Tracker.services.qms.spc_ingest import collect_spc_rows
+        rows = collect_spc_rows(tenant=self.tenant_a, measurement_id=self.md.id, start=start, end=end)
+        return spc_stats.summarize(((r.timestamp, r.value, r.is_within_spec) for r in rows), sizes=sizes)
+
+    def _assert_same(self, store, raw):
+        self.assertEqual(store.count, raw.count)
+        self.assertEqual(store.within_spec, raw.within_spec)
+        self.assertEqual((store.min_value, store.max_value), (raw.min_value, raw.max_value))
+        self.assertAlmostEqual(store.mean, raw.mean, places=9)
+        self.assertAlmostEqual(store.std_dev, raw.std_dev, places=9)
+        for size in spc_stats.SUBGROUP_SIZES:
+            self.assertEqual(store.num_subgroups(size), raw.num_subgroups(size))
+            self.assertAlmostEqual(store.r_bar(size) or 0, raw.r_bar(size) or 0, places=9)
+
+    def _seed(self):
+        base = _utc(2026, 3, 1, 6)
+        values = [25.01, 24.99, 25.03, 25.00, 24.96, 25.02, 25.07, 24.98, 25.01, 25.00]
+        for day in range(4):
+            for i, v in enumerate(values):
+                self._reading(base + timedelta(days=day, hours=i), v + day * 0.001)
+
+    def test_window_matches_raw_rows(self):
+        from Tracker.models import SPCStatsBucket
+
+        self._seed()
+        self.assertEqual(SPCStatsBucket.objects.filter(tenant=self.tenant_a).count(), 4)
+
+        # Window starts and ends mid-day: two edge days read raw, two buckets.
+        start, end = _utc(2026, 3, 1, 10, 30), _utc(2026, 3, 4, 11, 30)
+        store = spc_stats.window_stats(tenant=self.tenant_a, measurement_id=self.md.id, start=start, end=end)
+        self._assert_same(store, self._raw(start, end))
+
+    def test_window_reads_one_query_per_edge_plus_buckets(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._seed()
+        start, end = _utc(2026, 3, 1, 10, 30), _utc(2026, 3, 4, 11, 30)
+        with CaptureQueriesContext(connection) as ctx:
+            spc_stats.window_stats(tenant=self.tenant_a, measurement_id=self.md.id, start=start, end=end)
+        # head (2 tiers) + buckets + tail (2 tiers), regardless of point count
+        self.assertEqual(len(ctx.captured_queries), 5)
+
+    def test_raw_window_aggregates_in_sql(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._seed()
+        start, end = _utc(2026, 3, 1, 10, 30), _utc(2026, 3, 4, 11, 30)
+        with CaptureQueriesContext(connection) as ctx:
+            raw = spc_stats.raw_window_stats(tenant=self.tenant_a, measurement_id=self.md.id, start=start, end=end)
+        # One aggregate per tier, regardless of point count.
+        self.assertEqual(len(ctx.captured_queries), 2)
+        expected = self._raw(start, end)
+        self.assertEqual((raw.count, raw.within_spec), (expected.count, expected.within_spec))
+        self.assertEqual((raw.min_value, raw.max_value), (expected.min_value, expected.max_value))
+        self.assertAlmostEqual(raw.mean, expected.mean, places=9)
+        self.assertAlmostEqual(raw.std_dev, expected.std_dev, places=9)
+
+    def test_backdated_edit_and_archive_stay_consistent(self):
+        self._seed()
+        late = self._reading(_utc(2026, 3, 2, 7, 30), 25.04)    # lands mid-day
+        late.value_numeric = 24.95
+        late.save()
+        self._reading(_utc(2026, 3, 3, 8), 25.00).delete()       # soft delete
+
+        self.assertEqual(spc_stats.check_consistency(self.tenant_a.id), [])
+
+    def test_moving_a_reading_rebuilds_both_days(self):
+        from Tracker.models import BatchExecution, StepExecutionMeasurement, WorkOrder
+
+        self._seed()
+        work_order = self.create_for_tenant(WorkOrder, self.tenant_a, ERP_id="WO-SPC", quantity=1)
+        batch = self.create_for_tenant(
+            BatchExecution, self.tenant_a, work_order=work_order, step=self.step, started_by=self.user_a,
+        )
+        sem = self.create_for_tenant(
+            StepExecutionMeasurement, self.tenant_a, batch_execution=batch, measurement_definition=self.md,
+            value=25.04, recorded_by=self.user_a,
+        )
+        sem.recorded_at = _utc(2026, 3, 2, 9, 30)
+        sem.save()
+        self.assertEqual(spc_stats.check_consistency(self.tenant_a.id), [])
+
+        sem.recorded_at = _utc(2026, 3, 3, 9, 30)
+        sem.save()
+        self.assertEqual(spc_stats.check_consistency(self.tenant_a.id), [])
+
+    def test_report_edits_rebuild_their_results_days(self):
+        self._seed()
+        report = self._reading(_utc(2026, 3, 2, 7, 30), 25.04).report
+
+        report.created_at = _utc(2026, 3, 4, 7, 30)
+        report.save()
+        self.assertEqual(spc_stats.check_consistency(self.tenant_a.id), [])
+
+        report.archive()
+        self.assertEqual(spc_stats.check_consistency(self.tenant_a.id), [])
+        day = spc_stats.window_stats(
+            tenant=self.tenant_a, measurement_id=self.md.id,
+            start=_utc(2026, 3, 4), end=_utc(2026, 3, 5),
+        )
+        self.assertEqual(day.count, 10)
+
+    def test_rebuild_reproduces_maintained_buckets(self):
+        from Tracker.models import SPCStatsBucket
+
+        self._seed()
+        maintained = {
+            b.day: spc_stats.RunningStats.from_bucket(b)
+            for b in SPCStatsBucket.objects.filter(tenant=self.tenant_a)
+        }
+        self.assertEqual(spc_stats.rebuild(self.tenant_a.id), 4)
+        for bucket in SPCStatsBucket.objects.filter(tenant=self.tenant_a):
+            self.assertTrue(spc_stats._same(maintained[bucket.day], spc_stats.RunningStats.from_bucket(bucket)))
+
+    @override_settings(SPC_STATS_ENABLED=False)
+    def test_disabled_writes_nothing(self):
+        from Tracker.models import SPCStatsBucket
+
+        self._reading(_utc(2026, 3, 1, 6), 25.0)
+        self.assertFalse(SPCStatsBucket.objects.filter(tenant=self.tenant_a).exists())
+
+    def test_endpoints_agree_between_store_and_raw(self):
+        from django.utils import timezone
+
+        now = timezone.now()
+        for i in range(30):
+            self._reading(now - timedelta(hours=7 * i + 1), 25.0 + ((i * 7) % 11 - 5) / 100)
+
+        self.authenticate_superuser(self.tenant_a)
+        params = {'measurement_id': str(self.md.id), 'days': 30, 'limit': 10}
+
+        store = self.client.get('/api/spc/data/', params).json()['statistics']
+        raw = self.client.get('/api/spc/data/', {**params, 'source': 'raw'}).json()['statistics']
+        self.assertEqual(store.pop('source'), 'store')
+        self.assertEqual(raw.pop('source'), 'raw')
+        self.assertEqual(store['count'], 30)     # the window, not the 10 plotted points
+        self.assertEqual(store, raw)
+
+        params = {'measurement_id': str(self.md.id), 'days': 30, 'subgroup_size': 3}
+        store = self.client.get('/api/spc/capability/', params).json()
+        raw = self.client.get('/api/spc/capability/', {**params, 'source': 'raw'}).json()
+        self.assertEqual(store, raw)
+        self.assertGreater(store['num_subgroups'], 0)
@@ -0,0 +1,79 @@
+"""
+Tests for the per-worker tenant and membership cache (Tracker.utils.tenant_cache).
+
+Once warm, TenantMiddleware resolves a tenant and checks membership without
+touching the database; Tenant, TenantMembership and UserRole writes are seen
+on the next request, and a broken cache backend falls back to queries.
+"""
+from unittest import mock
+
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from Tracker.middleware import TenantMiddleware
+from Tracker.tests.base import TenantTestCase
+from Tracker.utils import tenant_cache
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(TENANT_CACHE_ENABLED=True, DEDICATED_MODE=False, CACHES=LOCMEM)
+class TenantCacheMiddlewareTests(TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        tenant_cache._cache.reset()
+        self.seen = []
+        self.middleware = TenantMiddleware(self._view)
+
+    def tearDown(self):
+        tenant_cache._cache.reset()
+        super().tearDown()
+
+    def _view(self, request):
+        self.seen.append(request.tenant)
+        return HttpResponse()
+
+    def _get(self, user=None, tenant=None):
+        request = RequestFactory().get('/api/Parts/', HTTP_X_TENANT_ID=str((tenant or self.tenant_a).id))
+        request.user = user or self.user_a
+        return self.middleware(request)
+
+    def test_warm_request_skips_tenant_and_membership_queries(self):
+        self.assertEqual(self._get().status_code, 200)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self._get().status_code, 200)
+        self.assertEqual(ctx.captured_queries, [])
+        self.assertEqual(self.seen[-1].pk, self.tenant_a.pk)
+
+    def test_membership_suspension_applies_to_the_next_request(self):
+        from Tracker.services.core.tenant_membership import suspend_membership
+
+        self.assertEqual(self._get().status_code, 200)
+        suspend_membership(self.user_a, self.tenant_a)
+        self.assertEqual(self._get().status_code, 403)
+
+    def test_tenant_status_flip_applies_to_the_next_request(self):
+        from Tracker.models import Tenant
+
+        self._get()
+        self.seen[-1].name = 'mutated by the request'
+        self.tenant_a.status = Tenant.Status.SUSPENDED
+        self.tenant_a.save()
+
+        self._get()
+        self.assertEqual(self.seen[-1].status, Tenant.Status.SUSPENDED)
+        self.assertNotEqual(self.seen[-1].name, 'mutated by the request')
+
+        self.tenant_a.is_active = False
+        self.tenant_a.save()
+        self.assertEqual(self._get().status_code, 403)
+
+    def test_unreachable_backend_falls_back_to_queries(self):
+        self._get()
+        with mock.patch.object(tenant_cache.cache, 'get', side_effect=ConnectionError):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self._get().status_code, 200)
+        self.assertTrue(ctx.captured_queries)
@@ -0,0 +1,303 @@
+"""
+Tests for the operator work-queue projection (Tracker.services.mes.work_queue),
+its fan-out (Tracker.utils.fanout) and the endpoints that read it.
+
+The projected path and the raw aggregate (`?source=raw`) must agree on every
+row and filter; the stream tests drive `live_stream` directly since the test
+client is WSGI and only gets the snapshot.
+"""
+import asyncio
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from Tracker.models import (
+    Parts, PartTypes, Processes, ProcessStep, StepExecution, Steps, WorkCenter, WorkCenterKind,
+    WorkOrder, WorkOrderHold, WorkOrderHoldReason, WorkQueueEntry,
+)
+from Tracker.models.mes_lite import WorkOrderStatus
+from Tracker.services.mes import work_queue
+from Tracker.tests.base import TenantTestCase
+from Tracker.utils import fanout
+
+
+def _row(key, **overrides):
+    row = {
+        'key': key, 'work_order': 'a1b2', 'work_order_erp_id': 'WO-100', 'step': 1,
+        'step_name': 'Heat Treat', 'part_type_name': 'Housing', 'priority': 2,
+        'expected_completion': None, 'qty_ready': 3, 'earliest_entered_at': None,
+        'is_held': False, 'readiness': 'ready', 'work_center': None, 'work_center_kind': None,
+    }
+    row.update(overrides)
+    return row
+
+
+class LocalBrokerTests(SimpleTestCase):
+
+    def test_publish_from_another_thread_reaches_subscriber(self):
+        broker = fanout.LocalBroker()
+
+        async def run():
+            async with broker.subscribe('work-queue:t') as subscription:
+                thread = threading.Thread(target=broker.publish, args=('work-queue:t', {'remove': ['k']}))
+                thread.start()
+                thread.join()
+                return await subscription.get(timeout=1)
+
+        self.assertEqual(asyncio.run(run()), {'remove': ['k']})
+        self.assertEqual(broker.subscriber_count('work-queue:t'), 0)
+
+    def test_get_times_out_with_none(self):
+        broker = fanout.LocalBroker()
+
+        async def run():
+            async with broker.subscribe('c') as subscription:
+                return await subscription.get(timeout=0.01)
+
+        self.assertIsNone(asyncio.run(run()))
+
+    def test_slow_subscriber_overflows(self):
+        broker = fanout.LocalBroker(max_pending=2)
+
+        async def run():
+            async with broker.subscribe('c') as subscription:
+                for i in range(3):
+                    broker.publish('c', {'n': i})
+                await asyncio.sleep(0)
+                await subscription.get(timeout=1)
+
+        with self.assertRaises(fanout.Overflow):
+            asyncio.run(run())
+
+
+class StreamTests(SimpleTestCase):
+
+    def test_filter_diff_turns_non_matching_upserts_into_removes(self):
+        message = {'upsert': [_row('a'), _row('b', is_held=True, readiness='blocked')], 'remove': ['c']}
+
+        diff = work_queue._filter_diff(message, {'readiness': 'ready'})
+
+        self.assertEqual([r['key'] for r in diff['upsert']], ['a'])
+        self.assertEqual(diff['remove'], ['c', 'b'])
+        self.assertEqual(work_queue._filter_diff({'upsert': [], 'remove': []}, {}), {})
+
+    def test_row_matches_search_and_ids(self):
+        row = _row('a', work_center='C0FFEE')
+        self.assertTrue(work_queue.row_matches(row, search='heat', work_centers=['c0ffee', 'other']))
+        self.assertFalse(work_queue.row_matches(row, search='flow'))
+        self.assertFalse(work_queue.row_matches(row, work_order='zzzz'))
+
+    @override_settings(
+        FANOUT_BACKEND='local', WORK_QUEUE_STREAM_HEARTBEAT_SECONDS=0.05, WORK_QUEUE_STREAM_MAX_SECONDS=0.5,
+    )
+    def test_live_stream_sends_snapshot_then_filtered_diffs(self):
+        tenant_id = 'stream-tenant'
+
+        async def run():
+            events = []
+            stream = work_queue.live_stream(tenant_id, {'search': 'heat'}, lambda: [_row('a')])
+            events.append(await stream.__anext__())
+            fanout.publish(work_queue.channel(tenant_id), {
+                'upsert': [_row('b'), _row('c', step_name='Flow Test')], 'remove': [],
+            })
+            async for event in stream:
+                events.append(event)
+            return events
+
+        events = asyncio.run(run())
+
+        self.assertTrue(events[0].startswith('retry: '))
+        self.assertIn('event: snapshot', events[0])
+        diffs = [e for e in events if e.startswith('event: diff')]
+        self.assertEqual(len(diffs), 1)
+        self.assertIn('"remove": ["c"]', diffs[0])
+        self.assertIn(': keep-alive\n\n', events)
+        self.assertEqual(fanout.get_broker().subscriber_count(work_queue.channel(tenant_id)), 0)
+
+
+class WorkQueueFixtures:
+
+    def _make_wo(self, *, erp, priority=3, tenant=None):
+        tenant = tenant or self.tenant_a
+        pt = PartTypes.objects.create(tenant=tenant, name=f'PT-{erp}')
+        proc = Processes.objects.create(tenant=tenant, name=f'P-{erp}', part_type=pt)
+        return pt, proc, WorkOrder.objects.create(
+            tenant=tenant, ERP_id=erp, priority=priority, quantity=1,
+            workorder_status=WorkOrderStatus.IN_PROGRESS, process=proc,
+        )
+
+    def _step(self, *, name, part_type, process=None, order=1, work_center=None, tenant=None):
+        tenant = tenant or self.tenant_a
+        step = Steps.objects.create(
+            tenant=tenant, part_type=part_type, name=name, step_type='TASK', work_center=work_center,
+        )
+        if process is not None:
+            ProcessStep.objects.create(process=process, step=step, order=order)
+        return step
+
+    def _part_at_step(self, *, wo, part_type, step, erp, status='IN_PROGRESS', tenant=None):
+        tenant = tenant or self.tenant_a
+        part = Parts.objects.create(tenant=tenant, ERP_id=erp, part_type=part_type, work_order=wo, step=step)
+        StepExecution.objects.create(
+            tenant=tenant, part=part, step=step, status=status, entered_at=timezone.now(),
+        )
+        return part
+
+    def _seed(self):
+        self.cell = WorkCenter.objects.create(
+            tenant=self.tenant_a, name='Cell 1', code='C1', kind=WorkCenterKind.PRODUCTION,
+        )
+        pt, self.process, self.wo = self._make_wo(erp='WO-PROJ-1', priority=1)
+        self.heat = self._step(name='Heat Treat', part_type=pt, process=self.process, order=1,
+                               work_center=self.cell)
+        self.flow = self._step(name='Flow Test', part_type=pt, process=self.process, order=2)
+        for i in range(3):
+            self._part_at_step(wo=self.wo, part_type=pt, step=self.heat, erp=f'P-H-{i}')
+        self._part_at_step(wo=self.wo, part_type=pt, step=self.flow, erp='P-F-0', status='PENDING')
+
+        pt_b, _, self.held_wo = self._make_wo(erp='WO-PROJ-2', priority=4)
+        step_b = self._step(name='Assemble', part_type=pt_b)
+        self._part_at_step(wo=self.held_wo, part_type=pt_b, step=step_b, erp='P-B-0')
+        WorkOrderHold.objects.create(
+            tenant=self.tenant_a, work_order=self.held_wo, reason=WorkOrderHoldReason.OTHER, notes='hold',
+        )
+        # Work without a part: counted in WIP, never shown as a queue row.
+        StepExecution.objects.create(
+            tenant=self.tenant_a, step=self.heat, status='PENDING', entered_at=timezone.now(),
+        )
+
+
+class ProjectionTests(WorkQueueFixtures, TenantTestCase):
+
+    def test_rebuild_matches_the_open_executions(self):
+        self._seed()
+
+        diff = work_queue.rebuild(self.tenant_a.id)
+
+        self.assertEqual(len(diff.upserted), 3)
+        self.assertEqual(work_queue.check_consistency(self.tenant_a.id), [])
+        heat = WorkQueueEntry.objects.get(tenant=self.tenant_a, step=self.heat, is_part_work=True)
+        self.assertEqual((heat.qty_ready, heat.in_progress_count, heat.work_center_id), (3, 3, self.cell.id))
+        self.assertTrue(WorkQueueEntry.objects.get(tenant=self.tenant_a, work_order=self.held_wo).is_held)
+        other = WorkQueueEntry.objects.get(tenant=self.tenant_a, is_part_work=False)
+        self.assertEqual((other.step_id, other.pending_count), (self.heat.id, 1))
+
+        # A second rebuild has nothing to write.
+        self.assertFalse(work_queue.rebuild(self.tenant_a.id))
+
+    def test_check_consistency_reports_drift(self):
+        self._seed()
+        work_queue.rebuild(self.tenant_a.id)
+        StepExecution.objects.filter(tenant=self.tenant_a, step=self.flow).update(status='COMPLETED')
+
+        mismatches = work_queue.check_consistency(self.tenant_a.id)
+
+        self.assertEqual(len(mismatches), 1)
+        self.assertIsNone(mismatches[0].computed)
+        work_queue.rebuild(self.tenant_a.id)
+        self.assertEqual(work_queue.check_consistency(self.tenant_a.id), [])
+
+    def test_rows_are_tenant_scoped(self):
+        self._seed()
+        work_queue.rebuild(self.tenant_a.id)
+
+        self.assertFalse(work_queue.rebuild(self.tenant_b.id))
+        self.assertFalse(WorkQueueEntry.objects.filter(tenant=self.tenant_b).exists())
+        self.assertEqual(list(work_queue.queue_entries(self.tenant_b.id)), [])
+
+
+@override_settings(WORK_QUEUE_PROJECTION_ENABLED=True)
+class ProjectionSignalTests(WorkQueueFixtures, TenantTestCase):
+
+    def _entry(self, step):
+        return WorkQueueEntry.objects.get(tenant=self.tenant_a, step=step, is_part_work=True)
+
+    def test_saves_refresh_their_work_order_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._seed()
+        self.assertEqual(work_queue.check_consistency(self.tenant_a.id), [])
+        self.assertEqual(self._entry(self.heat).qty_ready, 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            execution = StepExecution.objects.filter(tenant=self.tenant_a, step=self.flow).get()
+            execution.status = 'COMPLETED'
+            execution.exited_at = timezone.now()
+            execution.save()
+            WorkOrderHold.objects.create(
+                tenant=self.tenant_a, work_order=self.wo, reason=WorkOrderHoldReason.OTHER, notes='hold',
+            )
+
+        self.assertFalse(WorkQueueEntry.objects.filter(tenant=self.tenant_a, step=self.flow).exists())
+        self.assertTrue(self._entry(self.heat).is_held)
+        self.assertEqual(work_queue.check_consistency(self.tenant_a.id), [])
+
+    def test_commit_publishes_the_diff(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._seed()
+
+        with mock.patch.object(fanout, 'publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            self.wo.priority = 2
+            self.wo.save()
+
+        self.assertEqual(publish.call_count, 1)
+        channel, message = publish.call_args.args
+        self.assertEqual(channel, work_queue.channel(self.tenant_a.id))
+        self.assertEqual({r['step_name'] for r in message['upsert']}, {'Heat Treat', 'Flow Test'})
+        self.assertEqual({r['priority'] for r in message['upsert']}, {2})
+
+    def test_disabled_projection_writes_nothing(self):
+        with override_settings(WORK_QUEUE_PROJECTION_ENABLED=False), self.captureOnCommitCallbacks(execute=True):
+            self._seed()
+
+        self.assertFalse(WorkQueueEntry.objects.exists())
+
+
+@override_settings(WORK_QUEUE_PROJECTION_ENABLED=True)
+class ProjectionEndpointTests(WorkQueueFixtures, TenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._seed()
+        work_queue.rebuild(self.tenant_a.id)
+        self.grant_tenant_permissions(
+            self.user_a, self.tenant_a, ['view_workorder', 'view_stepexecution', 'full_tenant_access'],
+        )
+        self.authenticate_as(self.user_a, self.tenant_a)
+
+    def _both(self, url, params=None):
+        params = params or {}
+        store = self.client.get(url, params)
+        raw = self.client.get(url, {**params, 'source': 'raw'})
+        self.assertEqual(store.status_code, 200, store.data)
+        self.assertEqual(raw.status_code, 200, raw.data)
+        return store.data, raw.data
+
+    def test_queue_matches_raw_aggregate(self):
+        for params in ({}, {'readiness': 'blocked'}, {'search': 'heat'}, {'kind': WorkCenterKind.PRODUCTION},
+                       {'work_order': str(self.wo.id)}):
+            with self.subTest(params=params):
+                store, raw = self._both('/api/WorkQueue/', params)
+                self.assertEqual(store['results'], raw['results'])
+
+        results = self.client.get('/api/WorkQueue/').data['results']
+        self.assertEqual([r['work_order_erp_id'] for r in results], ['WO-PROJ-1', 'WO-PROJ-1', 'WO-PROJ-2'])
+
+    def test_wip_summary_matches_raw_counts(self):
+        store, raw = self._both('/api/StepExecutions/wip_summary/', {'process': self.process.id})
+
+        self.assertEqual(store, raw)
+        heat = next(r for r in store if r['step_name'] == 'Heat Treat')
+        self.assertEqual((heat['pending_count'], heat['in_progress_count']), (1, 3))
+
+    def test_stream_under_wsgi_sends_one_snapshot(self):
+        resp = self.client.get('/api/WorkQueue/stream/', {'readiness': 'ready'}, HTTP_ACCEPT='text/event-stream')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        body = b''.join(resp.streaming_content).decode()
+        self.assertTrue(body.startswith('retry: '))
+        self.assertIn('event: snapshot', body)
+        self.assertIn('Heat Treat', body)
+        self.assertNotIn('WO-PROJ-2', body)
@@ -0,0 +1,55 @@
+"""
+Version counters for invalidating groups of Django cache entries.
+
+A cache that can't enumerate its entries (notification resolutions,
+heatmap densities) puts a version number in each key instead. Bumping the
+version makes every entry stored under the old one unreachable; they are
+never deleted and simply age out.
+
+A new (or evicted) counter starts at the current time in nanoseconds rather
+than 0, so it can't come back at a version older entries were stored under.
+
+Usage:
+
+    versions(keys)      # {key: version}, creating missing counters
+    bump(key)           # from save/delete receivers
+"""
+
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def versions(keys) -> dict:
+    """Current value of each counter in `keys`, creating missing ones."""
+    keys = set(keys)
+    current = cache.get_many(list(keys))
+    for key in keys - current.keys():
+        cache.add(key, time.time_ns(), timeout=None)
+        current[key] = cache.get(key)
+    return current
+
+
+def version(key: str):
+    """Current value of one counter, creating it if missing."""
+    return versions([key])[key]
+
+
+def bump(key: str) -> None:
+    """Bump now and again on commit, so a reader that saw the old rows while
+    the write was still open can't leave them cached under the current
+    version."""
+    _incr(key)
+    transaction.on_commit(lambda: _incr(key))
+
+
+def _incr(key: str) -> None:
+    try:
+        cache.add(key, time.time_ns(), timeout=None)
+        cache.incr(key)
+    except Exception as e:
+        logger.warning(f"Cache version bump failed for {key}: {e}")
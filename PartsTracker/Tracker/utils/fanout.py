@@ -0,0 +1,180 @@
+"""
+Publish/subscribe fan-out for server-sent event streams.
+
+Writers publish JSON-ready messages on a named channel from synchronous code
+(usually a `transaction.on_commit` callback); stream responses subscribe from
+the ASGI event loop and receive every message published after they
+subscribed. Delivery is best effort: a subscriber that falls more than
+`max_pending` messages behind is cut off with `Overflow`, and is expected to
+tell its client to reconnect and re-read a snapshot.
+
+Two backends, chosen by FANOUT_BACKEND:
+
+    'local'  in-process only. Enough for tests, `runserver` and a single
+             ASGI process that also does the writing; messages published by
+             another process (a Celery worker, a second web worker) are not
+             seen.
+    'redis'  Redis pub/sub on FANOUT_REDIS_URL, shared by every process.
+
+Usage:
+
+    publish('work-queue:<tenant>', {'upsert': [...], 'remove': [...]})
+
+    async with subscribe('work-queue:<tenant>') as subscription:
+        message = await subscription.get(timeout=15)   # None on timeout
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+
+class Overflow(Exception):
+    """The subscriber fell too far behind and missed messages."""
+
+
+class _LocalSubscription:
+
+    def __init__(self, loop, max_pending):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.max_pending = max_pending
+        self.overflowed = False
+
+    def deliver(self, message):
+        # Runs on the subscriber's loop.
+        if self.queue.qsize() >= self.max_pending:
+            self.overflowed = True
+            return
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        if self.overflowed:
+            raise Overflow()
+        try:
+            message = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if self.overflowed:
+            raise Overflow()
+        return message
+
+
+class LocalBroker:
+    """Fan-out between the threads and event loops of one process."""
+
+    def __init__(self, max_pending=1000):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, message):
+        data = json.loads(json.dumps(message, cls=DjangoJSONEncoder))
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, data)
+            except RuntimeError:
+                # The subscriber's loop has closed; its unsubscribe is pending.
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscription = _LocalSubscription(asyncio.get_running_loop(), self.max_pending)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+class _RedisSubscription:
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def get(self, timeout=None):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+
+class RedisBroker:
+    """Fan-out across processes over Redis pub/sub."""
+
+    def __init__(self, url):
+        self.url = url
+        self._client = None
+
+    def publish(self, channel, message):
+        import redis
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(channel, json.dumps(message, cls=DjangoJSONEncoder))
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            yield _RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker for the configured backend."""
+    backend = getattr(settings, 'FANOUT_BACKEND', 'local')
+    key = (backend, getattr(settings, 'FANOUT_REDIS_URL', None))
+    with _brokers_lock:
+        broker = _brokers.get(key)
+        if broker is None:
+            if backend == 'redis':
+                broker = RedisBroker(settings.FANOUT_REDIS_URL)
+            elif backend == 'local':
+                broker = LocalBroker()
+            else:
+                raise ValueError(f"Unknown FANOUT_BACKEND {backend!r}")
+            _brokers[key] = broker
+        return broker
+
+
+def publish(channel, message):
+    """Publish to every current subscriber of `channel`. Never raises."""
+    try:
+        get_broker().publish(channel, message)
+    except Exception:
+        logger.exception(f"fan-out publish to {channel} failed")
+
+
+def subscribe(channel):
+    return get_broker().subscribe(channel)
@@ -0,0 +1,34 @@
+"""
+Transaction-scoped advisory locks.
+
+A rollup that rewrites a tenant's rows (delete the range, compute, insert)
+must not interleave with another rewrite of the same rows: two writers that
+both delete before either inserts leave duplicates, and a writer that
+computed before the other committed can put back stale counts. Taking
+
+    with transaction.atomic():
+        tenant_xact_lock('quality_rollup', tenant_id)
+        ...
+
+first makes concurrent rewrites for one tenant queue behind each other
+until the holder's transaction ends. Other tenants, and other rollups of
+the same tenant, are not blocked. Taking the same lock again in the same
+transaction doesn't wait.
+"""
+
+from django.db import connection
+
+
+def tenant_xact_lock(name: str, tenant_id) -> None:
+    """Block until this transaction holds the `name` lock for `tenant_id`.
+
+    Must be called inside `transaction.atomic()`; the lock is released when
+    the outermost transaction commits or rolls back.
+    """
+    with connection.cursor() as cursor:
+        # Keys are hashed to the 32-bit int pair Postgres takes; a collision
+        # only makes two unrelated rewrites queue.
+        cursor.execute(
+            'SELECT pg_advisory_xact_lock(hashtext(%s), hashtext(%s))',
+            [name, str(tenant_id)],
+        )
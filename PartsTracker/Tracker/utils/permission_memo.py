@@ -0,0 +1,102 @@
+"""
+Request-scoped memo for permission and export-control decisions.
+
+`SecureQuerySet.for_user` and the export-control helpers ask the same
+questions many times per request (view perm, full_tenant_access,
+classification clearance, ITAR eligibility). Each permission lookup is a
+round-trip to the Django cache backend (Redis in production). Inside a
+`permission_memo()` scope the first answer is kept in process and reused.
+
+TenantMiddleware opens one scope per HTTP request. Outside a scope (Celery,
+shell, most tests) `memoized()` just calls through, so behaviour is
+unchanged.
+
+Usage:
+
+    with permission_memo() as memo:
+        ...                          # has_tenant_perm() hits the backend once
+        memo.hits, memo.misses       # per-scope counters
+
+    memoized(('perms', user.id, tenant.id), load)   # from the call sites
+    invalidate(user_id=user.id, tenant_id=tenant.id)
+
+Keys are tuples of (kind, user_id, *scope). `invalidate` drops every entry
+for a user (optionally only one tenant) and is called from
+`clear_user_permission_cache` and the User post_save receiver, so role,
+group-permission and user-attribute changes are seen by the rest of the
+request.
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PermissionMemo:
+    """Entries plus hit/miss counters for one scope."""
+
+    __slots__ = ('entries', 'hits', 'misses')
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        value = self.entries[key] = compute()
+        return value
+
+    def invalidate(self, user_id=None, tenant_id=None) -> None:
+        if user_id is None:
+            self.entries.clear()
+            return
+        for key in [k for k in self.entries if k[1] == user_id]:
+            # Tenant-specific kinds carry the tenant id third; user-wide kinds
+            # (e.g. ITAR eligibility) are dropped for any tenant.
+            if tenant_id is None or len(key) < 3 or key[2] == tenant_id:
+                del self.entries[key]
+
+
+_memo_var: ContextVar[Optional[PermissionMemo]] = ContextVar('permission_memo', default=None)
+
+
+@contextmanager
+def permission_memo():
+    """Open a memo scope; nested scopes share the outer memo."""
+    current = _memo_var.get()
+    if current is not None:
+        yield current
+        return
+
+    memo = PermissionMemo()
+    token = _memo_var.set(memo)
+    try:
+        yield memo
+    finally:
+        _memo_var.reset(token)
+
+
+def current_memo() -> Optional[PermissionMemo]:
+    return _memo_var.get()
+
+
+def memoized(key: Hashable, compute: Callable[[], Any]) -> Any:
+    """Return the scope's value for `key`, computing it once. No scope: compute."""
+    memo = _memo_var.get()
+    if memo is None:
+        return compute()
+    return memo.get_or_compute(key, compute)
+
+
+def invalidate(user_id=None, tenant_id=None) -> None:
+    """Drop memoized entries for a user (all users when user_id is None)."""
+    memo = _memo_var.get()
+    if memo is not None:
+        memo.invalidate(user_id=user_id, tenant_id=tenant_id)
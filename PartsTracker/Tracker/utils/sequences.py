@@ -1,30 +1,135 @@
 """
-Sequence number generation utilities with race condition protection.
-
-These utilities use SELECT FOR UPDATE to prevent duplicate sequence numbers
-when multiple requests try to generate numbers concurrently.
-
-IMPORTANT: The sequence number field MUST have a unique constraint to ensure
-duplicates cannot be created. The SELECT FOR UPDATE only protects against
-races when records already exist - for the first record or under high
-concurrency, the unique constraint is the final safeguard.
+Sequence number generation backed by per-tenant counter rows.
+
+Each (tenant, sequence, prefix) has one SequenceCounter row; allocating a
+number is a single `UPDATE ... RETURNING` on it. The numbered table is never
+scanned or locked, so allocation cost doesn't grow with the table and
+concurrent allocations only queue on the counter row for as long as the
+caller's transaction runs. A rolled-back transaction rolls its increment back
+too, so numbers stay gapless. Models call `generate_next_sequence` (or
+`generate_next_child_sequence` for numbers under a parent) and need no
+locking of their own.
+
+A counter is seeded from the highest existing number the first time its
+prefix is used (`manage.py seed_sequence_counters` seeds every sequence up
+front). Numbers written by hand after that are not seen by the counter.
+
+IMPORTANT: The sequence number field MUST still have a unique constraint so
+a hand-written number that collides with an allocated one is rejected.
 """
 
 import logging
-from django.db import transaction, IntegrityError
+import re
+
+from django.db import connection, transaction
 
 logger = logging.getLogger(__name__)
 
-# Maximum retry attempts when unique constraint violation occurs
-MAX_SEQUENCE_RETRIES = 3
+# Every (model, field) numbered through this module; seed_sequence_counters
+# walks this list.
+SEQUENCE_FIELDS = [
+    ('Tracker.ApprovalRequest', 'approval_number'),
+    ('Tracker.Orders', 'order_number'),
+    ('Tracker.OutsideProcessShipment', 'shipment_number'),
+    ('Tracker.QualityReports', 'report_number'),
+    ('Tracker.QuarantineDisposition', 'disposition_number'),
+    ('Tracker.SupplierQualification', 'qualification_number'),
+    ('Tracker.PartApproval', 'approval_number'),
+    ('Tracker.CAPA', 'capa_number'),
+    ('Tracker.CapaTasks', 'task_number'),
+]
+
+# Splits a number into (prefix, numeric suffix) when seeding from data.
+NUMBER_PATTERN = re.compile(r'^(.*?)(\d+)$')
+
+
+def sequence_name(model, number_field):
+    """Counter key for a model field, e.g. 'Tracker.orders.order_number'."""
+    return f"{model._meta.label_lower}.{number_field}"
+
+
+def _tenant_id(tenant):
+    if tenant is None:
+        from Tracker.utils.tenant_context import get_current_tenant_id
+        return get_current_tenant_id()
+    return getattr(tenant, 'pk', tenant)
+
+
+def _last_issued(queryset, number_field, prefix, tenant=None):
+    """Highest number already stored under `prefix` (0 if none)."""
+    qs = queryset.filter(**{f'{number_field}__startswith': prefix})
+    if tenant:
+        qs = qs.filter(tenant=tenant)
+
+    last = skipped = 0
+    for number in qs.values_list(number_field, flat=True).iterator():
+        try:
+            last = max(last, int(number[len(prefix):]))
+        except (ValueError, TypeError):
+            skipped += 1
+    if skipped:
+        logger.warning(f"Ignored {skipped} number(s) under prefix '{prefix}' without a numeric suffix")
+    return last
+
+
+def _advance(tenant_id, sequence, prefix, count):
+    """Add `count` to the counter and return its new value, or None if there is no counter yet."""
+    from Tracker.models import SequenceCounter
+
+    table = connection.ops.quote_name(SequenceCounter._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET value = value + %s '
+            f'WHERE tenant_id IS NOT DISTINCT FROM %s AND sequence = %s AND prefix = %s '
+            f'RETURNING value',
+            [count, tenant_id, sequence, prefix],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def allocate_sequence(queryset, number_field, prefix, count=1, tenant=None):
+    """
+    Claim `count` consecutive numbers under `prefix` and return the first.
 
+    The increment joins the caller's transaction: the counter row stays locked
+    until it commits, and a rollback hands the numbers back.
 
-def generate_next_sequence(queryset, number_field, prefix, padding=4, tenant=None):
+    Args:
+        queryset: QuerySet or manager of the numbered model (used to seed a new counter)
+        number_field: Field holding the number (e.g. 'order_number')
+        prefix: String prefix the number follows (e.g. 'ORD-2026-')
+        count: How many numbers to claim
+        tenant: Tenant (or id) the counter belongs to; defaults to the current tenant context
+
+    Returns:
+        int: The first number of the block
     """
-    Generate the next sequence number with race condition protection.
+    if count < 1:
+        raise ValueError("count must be >= 1")
+
+    from Tracker.models import SequenceCounter
+
+    tenant_id = _tenant_id(tenant)
+    sequence = sequence_name(queryset.model, number_field)
+
+    with transaction.atomic():
+        value = _advance(tenant_id, sequence, prefix, count)
+        if value is None:
+            last = _last_issued(queryset, number_field, prefix, tenant)
+            # A concurrent first use inserts the same row; the loser's insert
+            # is a no-op and its UPDATE below queues behind the winner.
+            SequenceCounter.objects.bulk_create(  # tenant-safe: tenant_id set explicitly on the row
+                [SequenceCounter(tenant_id=tenant_id, sequence=sequence, prefix=prefix, value=last)],
+                ignore_conflicts=True,
+            )
+            value = _advance(tenant_id, sequence, prefix, count)
+    return value - count + 1
+
 
-    Uses SELECT FOR UPDATE to lock the last record while generating the next number,
-    preventing duplicate numbers under concurrent load.
+def generate_next_sequence(queryset, number_field, prefix, padding=4, tenant=None):
+    """
+    Generate the next sequence number.
 
     IMPORTANT: The model's sequence number field MUST have a unique constraint.
     This function relies on the database to prevent duplicates as a final safeguard.
@@ -49,47 +154,29 @@ def generate_next_sequence(queryset, number_field, prefix, padding=4, tenant=Non
         ... )
         'APR-2025-0042'
     """
-    with transaction.atomic():
-        # Build the query
-        qs = queryset.filter(**{f'{number_field}__startswith': prefix})
-        if tenant:
-            qs = qs.filter(tenant=tenant)
-
-        # Lock the last record to prevent race conditions
-        # Using select_for_update() ensures only one transaction can read this at a time
-        last_record = (
-            qs
-            .select_for_update()
-            .order_by(f'-{number_field}')
-            .first()
-        )
+    next_seq = allocate_sequence(queryset, number_field, prefix, tenant=tenant)
+    return f"{prefix}{next_seq:0{padding}d}"
 
-        if last_record:
-            last_number = getattr(last_record, number_field)
-            try:
-                # Extract the numeric portion by removing the prefix
-                # This is more robust than split('-')[-1] which breaks on variable formats
-                suffix = last_number[len(prefix):]
-                last_seq = int(suffix)
-                next_seq = last_seq + 1
-            except (ValueError, IndexError):
-                logger.warning(
-                    f"Could not parse sequence number '{last_number}' with prefix '{prefix}', "
-                    f"falling back to 1"
-                )
-                next_seq = 1
-        else:
-            next_seq = 1
 
-        return f"{prefix}{next_seq:0{padding}d}"
+def reserve_sequence_block(queryset, number_field, prefix, count, padding=4, tenant=None):
+    """
+    Generate `count` consecutive sequence numbers in one round-trip.
+
+    For bulk paths that number many records at once. Arguments as for
+    generate_next_sequence.
+
+    Returns:
+        list[str]: The numbers, in order (e.g., ['P0007', 'P0008', 'P0009'])
+    """
+    first = allocate_sequence(queryset, number_field, prefix, count=count, tenant=tenant)
+    return [f"{prefix}{seq:0{padding}d}" for seq in range(first, first + count)]
 
 
 def generate_next_child_sequence(queryset, number_field, prefix, separator='-T', padding=3, tenant=None):
     """
     Generate the next child sequence number (e.g., CAPA-CA-2025-001-T001).
 
-    Similar to generate_next_sequence but handles child records where the
-    separator may differ from '-'.
+    Each parent prefix gets its own counter.
 
     IMPORTANT: The model's sequence number field MUST have a unique constraint.
     This function relies on the database to prevent duplicates as a final safeguard.
@@ -107,33 +194,40 @@ def generate_next_child_sequence(queryset, number_field, prefix, separator='-T',
     Returns:
         str: The next sequence number (e.g., 'CAPA-CA-2025-001-T002')
     """
-    with transaction.atomic():
-        qs = queryset.filter(**{f'{number_field}__startswith': prefix})
-        if tenant:
-            qs = qs.filter(tenant=tenant)
-
-        last_record = (
-            qs
-            .select_for_update()
-            .order_by(f'-{number_field}')
-            .first()
-        )
+    next_seq = allocate_sequence(queryset, number_field, prefix, tenant=tenant)
+    return f"{prefix}{next_seq:0{padding}d}"
 
-        if last_record:
-            last_number = getattr(last_record, number_field)
-            try:
-                # Extract the numeric portion by removing the prefix
-                # This is more robust than split(separator)[-1]
-                suffix = last_number[len(prefix):]
-                last_seq = int(suffix)
-                next_seq = last_seq + 1
-            except (ValueError, IndexError):
-                logger.warning(
-                    f"Could not parse child sequence number '{last_number}' with prefix '{prefix}', "
-                    f"falling back to 1"
-                )
-                next_seq = 1
-        else:
-            next_seq = 1
 
-        return f"{prefix}{next_seq:0{padding}d}"
+def seed_counters(tenant):
+    """
+    Raise `tenant`'s counters to the highest number stored for every
+    SEQUENCE_FIELDS entry and prefix found in the data. Counters are never
+    lowered. Returns the number of counters created or raised.
+    """
+    from django.apps import apps
+    from Tracker.models import SequenceCounter
+
+    changed = 0
+    for label, number_field in SEQUENCE_FIELDS:
+        model = apps.get_model(label)
+        highest = {}
+        numbers = model.unscoped.filter(tenant=tenant).values_list(number_field, flat=True)
+        for number in numbers.iterator():
+            match = NUMBER_PATTERN.match(number or '')
+            if match:
+                prefix, value = match.group(1), int(match.group(2))
+                highest[prefix] = max(highest.get(prefix, 0), value)
+
+        sequence = sequence_name(model, number_field)
+        with transaction.atomic():
+            for prefix, value in highest.items():
+                counter, created = SequenceCounter.objects.select_for_update().get_or_create(
+                    tenant_id=tenant.pk, sequence=sequence, prefix=prefix, defaults={'value': value},
+                )
+                if created:
+                    changed += 1
+                elif counter.value < value:
+                    counter.value = value
+                    counter.save(update_fields=['value'])
+                    changed += 1
+    return changed
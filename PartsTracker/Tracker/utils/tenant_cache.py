@@ -0,0 +1,180 @@
+"""
+Per-worker cache of tenant rows and tenant memberships for TenantMiddleware.
+
+Every tenant-scoped request resolves its tenant (by header id, slug,
+subdomain or the user's home tenant) and, for authenticated users, checks
+their TenantMembership. Both answers change rarely, so they are kept in a
+process-local LRU instead of being queried on every request.
+
+Staleness is bounded by a version counter in the Django cache (Redis in
+production). The middleware calls `sync()` once per request; if the shared
+version moved since this worker last looked, the whole local cache is
+dropped. `bump()` is called from the Tenant, TenantMembership and UserRole
+save/delete receivers, once right away (so the writing request and every
+other worker stop trusting their copies) and again on commit (so a worker
+that re-read the old row while the write was still open drops it too).
+A suspension or status flip is therefore visible on the next request of
+every worker.
+
+Writes that bypass signals (`QuerySet.update`, raw SQL) are only picked up
+when an entry ages out after TENANT_CACHE_TTL seconds.
+
+If the cache backend is unreachable the version can't be trusted, so the
+request falls through to the database as if caching were off.
+
+Usage:
+
+    sync()                                      # once per request
+    get_tenant(identifier)                      # active Tenant by id or slug
+    get_default_tenant(slug, load)              # dedicated mode's tenant
+    is_member(user, tenant, compute)            # memoized membership answer
+    bump()                                      # from the signal receivers
+
+Lookups return copies, so a request that mutates its tenant can't leak the
+change into other requests.
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'tenant_cache:version'
+
+# Sentinel for "not cached"; None is a cacheable answer (unknown slug).
+_MISSING = object()
+
+
+class TenantCache:
+    """Thread-safe LRU of (kind, *key) -> value, stamped with a shared version."""
+
+    def __init__(self, max_size=2048, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = None        # None: not synced, don't serve entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        with self.lock:
+            if self.version is None:
+                return _MISSING
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            value, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self.entries[key]
+                self.misses += 1
+                return _MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version) -> None:
+        with self.lock:
+            # A bump between load and put means `value` may predate it.
+            if self.version is None or version != self.version:
+                return
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def reset(self, version=None) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.version = version
+
+
+_cache = TenantCache(
+    max_size=getattr(settings, 'TENANT_CACHE_SIZE', 2048),
+    ttl=getattr(settings, 'TENANT_CACHE_TTL', 300),
+)
+
+
+def enabled() -> bool:
+    return getattr(settings, 'TENANT_CACHE_ENABLED', True)
+
+
+def sync() -> None:
+    """Compare the shared version with ours and drop local entries on change."""
+    if not enabled():
+        return
+    try:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Tenant cache version unavailable, bypassing cache: {e}")
+        version = None
+    if version is None or version != _cache.version:
+        _cache.reset(version)
+
+
+def _memoized(key: Hashable, load: Callable[[], Any], copy_value=False) -> Any:
+    if not enabled():
+        return load()
+    value = _cache.get(key)
+    if value is _MISSING:
+        version = _cache.version
+        value = load()
+        _cache.put(key, value, version)
+    return copy.copy(value) if copy_value and value is not None else value
+
+
+def _load_active_tenant(identifier):
+    from Tracker.models import Tenant
+    import uuid
+
+    try:
+        return Tenant.objects.filter(id=uuid.UUID(str(identifier)), is_active=True).first()
+    except (ValueError, TypeError):
+        return Tenant.objects.filter(slug=identifier, is_active=True).first()
+
+
+def get_tenant(identifier):
+    """Active tenant for a UUID or slug (None if there is none)."""
+    if identifier is None:
+        return None
+    return _memoized(('tenant', str(identifier)), lambda: _load_active_tenant(identifier), copy_value=True)
+
+
+def get_default_tenant(slug, load: Callable[[], Any]):
+    """Dedicated mode's tenant; `load` holds the middleware's fallback rules."""
+    return _memoized(('default', slug), load, copy_value=True)
+
+
+def is_member(user, tenant, compute: Callable[[], bool]) -> bool:
+    """Memoized membership answer for (user, tenant)."""
+    return _memoized(('member', user.pk, tenant.pk), compute)
+
+
+def bump() -> None:
+    """Invalidate every worker's cache, now and again when the transaction commits."""
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def _bump() -> None:
+    _cache.reset(None)
+    try:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        cache.incr(VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Tenant cache version bump failed: {e}")
+
+
+def stats():
+    """(hits, misses, size) for this worker."""
+    return _cache.hits, _cache.misses, len(_cache.entries)
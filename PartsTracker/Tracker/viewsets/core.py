@@ -2335,10 +2335,14 @@ class ScopeView(viewsets.ViewSet):
         # Get exclude types for performance (skip audit/log tables)
         exclude_types = self._get_exclude_types()
 
+        # Reads the ScopeClosure index when SCOPE_CLOSURE_ENABLED is on and
+        # the root is in the order hierarchy; otherwise a column walk.
+        strategy = 'closure'
+
         for include_type in include_types:
             if include_type == 'stats':
                 result['stats'] = count_descendants(
-                    root_obj, user=request.user, exclude_types=exclude_types
+                    root_obj, user=request.user, exclude_types=exclude_types, strategy=strategy
                 )
                 continue
 
@@ -2351,7 +2355,8 @@ class ScopeView(viewsets.ViewSet):
                 model, root_obj,
                 user=request.user,
                 direction=direction,
-                exclude_types=exclude_types
+                exclude_types=exclude_types,
+                strategy=strategy
             )
 
             # Apply filters
@@ -8,9 +8,13 @@ Provides comprehensive API endpoints for the Analysis/Dashboard page:
 - In-process actions list
 - Recent failed inspections
 - Open dispositions
+
+The FPY, Pareto, NCR and repeat-defect cards read the daily rollups in
+Tracker.services.qms.quality_rollup when QUALITY_ROLLUP_ENABLED is on and the
+user sees the whole tenant; `?source=raw` recomputes from the records.
 """
 from datetime import timedelta
-from collections import defaultdict
+from collections import Counter, defaultdict
 
 from django.db.models import Count, Q, F
 from django.db.models.functions import TruncDate
@@ -22,6 +26,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from Tracker.permissions import TenantAccessPermission
+from Tracker.services.qms import quality_rollup
 from Tracker.models import (
     CAPA,
     QualityReports,
@@ -49,7 +54,32 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
     """
     permission_classes = [IsAuthenticated, TenantAccessPermission]
 
+    def _rollup_source(self, *models):
+        """Whether this request can be answered from the daily rollups.
+
+        Rollups are tenant-wide, so they only serve users who would see every
+        row of `models` anyway (superusers, staff, or view + full_tenant_access);
+        anyone scoped to their orders gets the raw queries.
+        """
+        if (
+            self.request.query_params.get('source') == quality_rollup.SOURCE_RAW
+            or not quality_rollup.rollup_enabled()
+            or self.tenant is None
+        ):
+            return quality_rollup.SOURCE_RAW
+        user = self.request.user
+        if user.is_superuser or user.is_staff:
+            return quality_rollup.SOURCE_STORE
+        if user.has_tenant_perm('full_tenant_access') and all(
+            user.has_tenant_perm(f'view_{model._meta.model_name}') for model in models
+        ):
+            return quality_rollup.SOURCE_STORE
+        return quality_rollup.SOURCE_RAW
+
     @extend_schema(
+        parameters=[
+            OpenApiParameter(name='source', type=str, required=False, enum=['store', 'raw'], description='raw recomputes from the records instead of the daily rollups'),
+        ],
         responses={200: inline_serializer(
             name='DashboardKPIsResponse',
             fields={
@@ -78,12 +108,15 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
         today = timezone.now().date()
         seven_days_ago = today - timedelta(days=7)
 
-        # Active CAPAs (not closed)
-        active_capas = self.qs_for_user(CAPA).filter(
+        # Active CAPAs (not closed), and those past due, in one query
+        capa_counts = self.qs_for_user(CAPA).filter(
             archived=False
         ).exclude(
             status='CLOSED'
-        ).count()
+        ).aggregate(
+            active=Count('id'),
+            overdue=Count('id', filter=Q(due_date__lt=today)),
+        )
 
         # Open NCRs (Quality Reports with FAIL status awaiting disposition)
         # An NCR is a failed inspection that needs disposition
@@ -94,14 +127,6 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
             dispositions__current_state='CLOSED'
         ).count()
 
-        # Overdue CAPAs
-        overdue_capas = self.qs_for_user(CAPA).filter(
-            archived=False,
-            due_date__lt=today,
-        ).exclude(
-            status='CLOSED'
-        ).count()
-
         # Parts in quarantine (parts with open disposition)
         parts_in_quarantine = self.qs_for_user(QuarantineDisposition).filter(
             archived=False,
@@ -111,18 +136,21 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
         ).values('part').distinct().count()
 
         # Current FPY (7-day average)
-        recent_reports = self.qs_for_user(QualityReports).filter(
-            created_at__date__gte=seven_days_ago,
-            archived=False,
-        )
-        total_recent = recent_reports.count()
-        passed_recent = recent_reports.filter(status='PASS').count()
+        if self._rollup_source(QualityReports) == quality_rollup.SOURCE_STORE:
+            totals = quality_rollup.quality_totals(self.tenant.id, seven_days_ago)
+            total_recent, passed_recent = totals['inspections'], totals['passed']
+        else:
+            recent = self.qs_for_user(QualityReports).filter(
+                created_at__date__gte=seven_days_ago,
+                archived=False,
+            ).aggregate(total=Count('id'), passed=Count('id', filter=Q(status='PASS')))
+            total_recent, passed_recent = recent['total'], recent['passed']
         current_fpy = round((passed_recent / total_recent * 100), 1) if total_recent > 0 else 0
 
         return Response({
-            'active_capas': active_capas,
+            'active_capas': capa_counts['active'],
             'open_ncrs': open_ncrs,
-            'overdue_capas': overdue_capas,
+            'overdue_capas': capa_counts['overdue'],
             'parts_in_quarantine': parts_in_quarantine,
             'current_fpy': current_fpy,
         })
@@ -130,6 +158,7 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
     @extend_schema(
         parameters=[
             OpenApiParameter(name='days', type=int, required=False, default=30, description='Number of days to include'),
+            OpenApiParameter(name='source', type=str, required=False, enum=['store', 'raw'], description='raw recomputes from the records instead of the daily rollups'),
         ],
         responses={200: inline_serializer(
             name='FPYTrendResponse',
@@ -163,19 +192,25 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
         start_date = end_date - timedelta(days=days - 1)
 
         # Get daily counts
-        daily_stats = self.qs_for_user(QualityReports).filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date,
-            archived=False,
-        ).annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            total=Count('id'),
-            passed=Count('id', filter=Q(status='PASS'))
-        ).order_by('date')
-
-        # Convert to dict for easy lookup
-        stats_by_date = {s['date']: s for s in daily_stats}
+        if self._rollup_source(QualityReports) == quality_rollup.SOURCE_STORE:
+            stats_by_date = {
+                day: {'total': row['inspections'], 'passed': row['passed']}
+                for day, row in quality_rollup.quality_by_day(self.tenant.id, start_date, end_date).items()
+            }
+        else:
+            daily_stats = self.qs_for_user(QualityReports).filter(
+                created_at__date__gte=start_date,
+                created_at__date__lte=end_date,
+                archived=False,
+            ).annotate(
+                date=TruncDate('created_at')
+            ).values('date').annotate(
+                total=Count('id'),
+                passed=Count('id', filter=Q(status='PASS'))
+            ).order_by('date')
+
+            # Convert to dict for easy lookup
+            stats_by_date = {s['date']: s for s in daily_stats}
 
         # Build complete series (including days with no data)
         data = []
@@ -215,6 +250,7 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
         parameters=[
             OpenApiParameter(name='days', type=int, required=False, default=30, description='Number of days to include'),
             OpenApiParameter(name='limit', type=int, required=False, default=10, description='Max number of error types'),
+            OpenApiParameter(name='source', type=str, required=False, enum=['store', 'raw'], description='raw recomputes from the records instead of the daily rollups'),
         ],
         responses={200: inline_serializer(
             name='DefectParetoResponse',
@@ -247,20 +283,26 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
         limit = int(request.query_params.get('limit', 10))
         start_date = timezone.now() - timedelta(days=days)
 
-        # Get counts by error type through QualityReportDefect -> QualityReports
-        # Path: QualityErrorsList -> report_instances (QualityReportDefect) -> report (QualityReports)
-        error_counts = self.qs_for_user(QualityErrorsList).filter(
-            report_instances__report__created_at__gte=start_date,
-            report_instances__report__status='FAIL',
-            archived=False,
-        ).values(
-            'error_name'
-        ).annotate(
-            count=Count('report_instances')
-        ).order_by('-count')[:limit]
+        if self._rollup_source(QualityErrorsList) == quality_rollup.SOURCE_STORE:
+            counts = quality_rollup.defect_counts(self.tenant.id, start_date, ('error_type__error_name',))
+            data = [
+                {'error_name': name, 'count': count}
+                for (name,), count in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0][0] or ''))[:limit]
+            ]
+        else:
+            # Get counts by error type through QualityReportDefect -> QualityReports
+            # Path: QualityErrorsList -> report_instances (QualityReportDefect) -> report (QualityReports)
+            data = list(self.qs_for_user(QualityErrorsList).filter(
+                report_instances__report__created_at__gte=start_date,
+                report_instances__report__status='FAIL',
+                archived=False,
+            ).values(
+                'error_name'
+            ).annotate(
+                count=Count('report_instances')
+            ).order_by('-count', 'error_name')[:limit])
 
         # Calculate cumulative percentages
-        data = list(error_counts)
         total = sum(d['count'] for d in data)
 
         cumulative = 0
@@ -600,6 +642,7 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
     @extend_schema(
         parameters=[
             OpenApiParameter(name='days', type=int, required=False, default=30, description='Number of days to include'),
+            OpenApiParameter(name='source', type=str, required=False, enum=['store', 'raw'], description='raw recomputes from the records instead of the daily rollups'),
         ],
         responses={200: inline_serializer(
             name='NcrTrendResponse',
@@ -634,31 +677,36 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
         end_date = timezone.now().date()
         start_date = end_date - timedelta(days=days - 1)
 
-        # NCRs created per day (failed quality reports)
-        created_by_day = self.qs_for_user(QualityReports).filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date,
-            status='FAIL',
-            archived=False,
-        ).annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            count=Count('id')
-        )
-        created_dict = {c['date']: c['count'] for c in created_by_day}
-
-        # NCRs closed per day (dispositions closed)
-        closed_by_day = self.qs_for_user(QuarantineDisposition).filter(
-            updated_at__date__gte=start_date,
-            updated_at__date__lte=end_date,
-            current_state='CLOSED',
-            archived=False,
-        ).annotate(
-            date=TruncDate('updated_at')
-        ).values('date').annotate(
-            count=Count('id')
-        )
-        closed_dict = {c['date']: c['count'] for c in closed_by_day}
+        if self._rollup_source(QualityReports, QuarantineDisposition) == quality_rollup.SOURCE_STORE:
+            rollups = quality_rollup.quality_by_day(self.tenant.id, start_date, end_date)
+            created_dict = {day: row['failed'] for day, row in rollups.items()}
+            closed_dict = {day: row['ncrs_closed'] for day, row in rollups.items()}
+        else:
+            # NCRs created per day (failed quality reports)
+            created_by_day = self.qs_for_user(QualityReports).filter(
+                created_at__date__gte=start_date,
+                created_at__date__lte=end_date,
+                status='FAIL',
+                archived=False,
+            ).annotate(
+                date=TruncDate('created_at')
+            ).values('date').annotate(
+                count=Count('id')
+            )
+            created_dict = {c['date']: c['count'] for c in created_by_day}
+
+            # NCRs closed per day (dispositions closed)
+            closed_by_day = self.qs_for_user(QuarantineDisposition).filter(
+                updated_at__date__gte=start_date,
+                updated_at__date__lte=end_date,
+                current_state='CLOSED',
+                archived=False,
+            ).annotate(
+                date=TruncDate('updated_at')
+            ).values('date').annotate(
+                count=Count('id')
+            )
+            closed_dict = {c['date']: c['count'] for c in closed_by_day}
 
         # Build complete series
         data = []
@@ -759,6 +807,9 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
         })
 
     @extend_schema(
+        parameters=[
+            OpenApiParameter(name='source', type=str, required=False, enum=['store', 'raw'], description='raw recomputes from the records instead of the daily rollups'),
+        ],
         responses={200: inline_serializer(
             name='NcrAgingResponse',
             fields={
@@ -787,12 +838,17 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
         """
         today = timezone.now().date()
 
-        # Get open dispositions (NCRs not yet closed)
-        open_dispositions = self.qs_for_user(QuarantineDisposition).filter(
-            archived=False,
-        ).exclude(
-            current_state='CLOSED'
-        ).values_list('created_at', flat=True)
+        # Open dispositions (NCRs not yet closed) as (created day, count)
+        if self._rollup_source(QuarantineDisposition) == quality_rollup.SOURCE_STORE:
+            open_by_day = quality_rollup.open_ncrs_by_day(self.tenant.id)
+        else:
+            open_by_day = Counter(
+                created_at.date() for created_at in self.qs_for_user(QuarantineDisposition).filter(
+                    archived=False,
+                ).exclude(
+                    current_state='CLOSED'
+                ).values_list('created_at', flat=True)
+            ).items()
 
         # Calculate ages and bucket them
         buckets = {
@@ -804,24 +860,25 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
 
         total_age = 0
         overdue_count = 0
+        count = 0
 
-        for created_at in open_dispositions:
-            age = (today - created_at.date()).days
-            total_age += age
+        for created_day, n in open_by_day:
+            age = (today - created_day).days
+            total_age += age * n
+            count += n
 
             if age > 14:
-                buckets['>14 days'] += 1
+                buckets['>14 days'] += n
             elif age > 7:
-                buckets['8-14 days'] += 1
+                buckets['8-14 days'] += n
             elif age > 3:
-                buckets['4-7 days'] += 1
+                buckets['4-7 days'] += n
             else:
-                buckets['0-3 days'] += 1
+                buckets['0-3 days'] += n
 
             if age > 7:  # Consider >7 days as overdue
-                overdue_count += 1
+                overdue_count += n
 
-        count = len(open_dispositions)
         avg_age = round(total_age / count, 1) if count > 0 else 0
 
         data = [{'bucket': k, 'count': v} for k, v in buckets.items()]
@@ -1022,6 +1079,7 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
             OpenApiParameter(name='days', type=int, required=False, default=30, description='Number of days to include'),
             OpenApiParameter(name='min_occurrences', type=int, required=False, default=3, description='Min occurrences to be considered repeat'),
             OpenApiParameter(name='limit', type=int, required=False, default=10, description='Max number of items'),
+            OpenApiParameter(name='source', type=str, required=False, enum=['store', 'raw'], description='raw recomputes from the records instead of the daily rollups'),
         ],
         responses={200: inline_serializer(
             name='RepeatDefectsResponse',
@@ -1060,45 +1118,62 @@ class DashboardViewSet(TenantAwareMixin, viewsets.GenericViewSet):
         limit = int(request.query_params.get('limit', 10))
         start_date = timezone.now() - timedelta(days=days)
 
-        # Get error types with counts >= min_occurrences
-        # Path: QualityErrorsList -> report_instances (QualityReportDefect) -> report (QualityReports)
-        repeat_errors = self.qs_for_user(QualityErrorsList).filter(
-            report_instances__report__created_at__gte=start_date,
-            report_instances__report__status='FAIL',
-            archived=False,
-        ).annotate(
-            count=Count('report_instances')
-        ).filter(
-            count__gte=min_occurrences
-        ).order_by('-count')[:limit]
-
-        data = []
-        total_repeat = 0
+        # (error type id, name, count) with counts >= min_occurrences, and the
+        # part type / step names on the active reports behind each
+        part_types = defaultdict(set)
+        processes = defaultdict(set)
+        if self._rollup_source(QualityErrorsList, QualityReports) == quality_rollup.SOURCE_STORE:
+            tenant_id = self.tenant.id
+            counts = quality_rollup.defect_counts(tenant_id, start_date, ('error_type', 'error_type__error_name'))
+            repeat_errors = sorted(
+                ((error_id, name, count) for (error_id, name), count in counts.items() if count >= min_occurrences),
+                key=lambda e: (-e[2], e[1] or ''),
+            )[:limit]
+            affected = (
+                (part_types, quality_rollup.defect_counts(
+                    tenant_id, start_date, ('error_type', 'part_type__name'), active_only=True)),
+                (processes, quality_rollup.defect_counts(
+                    tenant_id, start_date, ('error_type', 'step__name'), active_only=True)),
+            )
+            for names, rows in affected:
+                for error_id, name in rows:
+                    if name:
+                        names[error_id].add(name)
+        else:
+            # Path: QualityErrorsList -> report_instances (QualityReportDefect) -> report (QualityReports)
+            repeat_errors = list(self.qs_for_user(QualityErrorsList).filter(
+                report_instances__report__created_at__gte=start_date,
+                report_instances__report__status='FAIL',
+                archived=False,
+            ).annotate(
+                count=Count('report_instances')
+            ).filter(
+                count__gte=min_occurrences
+            ).order_by('-count', 'error_name').values_list('id', 'error_name', 'count')[:limit])
 
-        for error in repeat_errors:
-            # Get related part types and processes
             # Path: QualityReports -> defects (QualityReportDefect) -> error_type (QualityErrorsList)
-            related_reports = self.qs_for_user(QualityReports).filter(
-                defects__error_type=error,
+            related = self.qs_for_user(QualityReports).filter(
+                defects__error_type__in=[error_id for error_id, _name, _count in repeat_errors],
                 created_at__gte=start_date,
                 status='FAIL',
-            ).select_related('part__part_type', 'step')
+            ).values_list('defects__error_type', 'part__part_type__name', 'step__name').distinct()
+            for error_id, part_type_name, step_name in related:
+                if part_type_name:
+                    part_types[error_id].add(part_type_name)
+                if step_name:
+                    processes[error_id].add(step_name)
 
-            part_types = set()
-            processes = set()
-            for r in related_reports:
-                if r.part and r.part.part_type:
-                    part_types.add(r.part.part_type.name)
-                if r.step:
-                    processes.add(r.step.name)
+        data = []
+        total_repeat = 0
 
+        for error_id, error_name, count in repeat_errors:
             data.append({
-                'error_type': error.error_name or 'Unknown',
-                'count': error.count,
-                'part_types_affected': list(part_types)[:5],
-                'processes_affected': list(processes)[:5],
+                'error_type': error_name or 'Unknown',
+                'count': count,
+                'part_types_affected': sorted(part_types[error_id])[:5],
+                'processes_affected': sorted(processes[error_id])[:5],
             })
-            total_repeat += error.count
+            total_repeat += count
 
         return Response({
             'data': data,
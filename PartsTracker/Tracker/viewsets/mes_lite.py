@@ -20,7 +20,7 @@ from Tracker.serializers.fields import TenantScopedPrimaryKeyRelatedField
 from Tracker.filters import PartFilter, OrderFilter
 from Tracker.models import (
     # MES Lite models
-    Orders, Parts, PartsStatus, WorkOrder, WorkOrderStatus, Steps, PartTypes, Processes,
+    Orders, Parts, PartsStatus, WorkOrder, WorkOrderStatus, Steps, PartTypes, Processes, ProcessStep,
     StepExecution, ProcessStatus, OutsideProcessShipment,
     # MES Standard models
     Equipments, EquipmentType,
@@ -45,7 +45,7 @@ from Tracker.serializers.qms import (
     StepSamplingRulesUpdateSerializer, StepWithResolvedRulesSerializer,
     QualityReportsSerializer, SamplePlanResponseSerializer,
 )
-from Tracker.services.mes import outside_process
+from Tracker.services.mes import outside_process, work_queue
 from Tracker.serializers.dms import DocumentsSerializer
 from .core import ExcelExportMixin, ListMetadataMixin, with_int_pk_schema
 from .base import TenantScopedMixin
@@ -1375,7 +1375,10 @@ class OrdersViewSet(TenantScopedMixin, ListMetadataMixin, CSVImportMixin, DataEx
         "quantity": serializers.IntegerField(),
         "part_status": serializers.ChoiceField(choices=PartsStatus.choices, default=PartsStatus.PENDING),
         "work_order": TenantScopedPrimaryKeyRelatedField(queryset=WorkOrder.unscoped.all(), required=False),
-        "erp_id_start": serializers.IntegerField(default=1)}), responses={201: dict})
+        "erp_id_start": serializers.IntegerField(
+            default=1, allow_null=True,
+            help_text="First ERP_id number; null continues the part type's sequence counter")}),
+        responses={201: dict})
     @action(detail=True, methods=["post"], url_path="parts/bulk-add")
     def bulk_add_parts(self, request, pk=None):
         order = self.get_object()
@@ -1400,7 +1403,7 @@ class OrdersViewSet(TenantScopedMixin, ListMetadataMixin, CSVImportMixin, DataEx
             # Use model method for bulk creation
             result = order.bulk_add_parts(part_type=part_type, step=step, quantity=int(quantity),
                                           part_status=part_status, work_order=work_order,
-                                          erp_id_start=int(erp_id_start))
+                                          erp_id_start=int(erp_id_start) if erp_id_start is not None else None)
             return Response(result, status=status.HTTP_201_CREATED)
 
         except (PartTypes.DoesNotExist, Steps.DoesNotExist, WorkOrder.DoesNotExist) as e:
@@ -2705,6 +2708,8 @@ class StepExecutionViewSet(TenantScopedMixin, ListMetadataMixin, SecondPersonMix
 
         Returns WIP counts grouped by step for monitoring dashboards.
         Shows how many parts are pending vs in-progress at each step.
+        Read from the work-queue projection when it is enabled (`?source=raw`
+        counts the executions).
         """
         from django.db.models import Count, Q
 
@@ -2715,19 +2720,29 @@ class StepExecutionViewSet(TenantScopedMixin, ListMetadataMixin, SecondPersonMix
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get steps via ProcessStep junction table with execution counts
-        process_steps = ProcessStep.objects.filter(
-            process_id=process_id
-        ).select_related('step').annotate(
-            pending_count=Count(
-                'step__executions',
-                filter=Q(step__executions__status='PENDING', step__executions__exited_at__isnull=True)
-            ),
-            in_progress_count=Count(
-                'step__executions',
-                filter=Q(step__executions__status='IN_PROGRESS', step__executions__exited_at__isnull=True)
-            ),
-        ).order_by('order')
+        if work_queue.projection_enabled() and request.query_params.get('source') != work_queue.SOURCE_RAW:
+            # Open-execution counts are kept per step by the work-queue
+            # projection; no scan of the steps' execution history.
+            process_steps = list(
+                ProcessStep.objects.filter(process_id=process_id).select_related('step').order_by('order')
+            )
+            counts = work_queue.wip_counts(self.tenant.id, [ps.step_id for ps in process_steps])
+            for ps in process_steps:
+                ps.pending_count, ps.in_progress_count = counts.get(ps.step_id, (0, 0))
+        else:
+            # Get steps via ProcessStep junction table with execution counts
+            process_steps = ProcessStep.objects.filter(
+                process_id=process_id
+            ).select_related('step').annotate(
+                pending_count=Count(
+                    'step__executions',
+                    filter=Q(step__executions__status='PENDING', step__executions__exited_at__isnull=True)
+                ),
+                in_progress_count=Count(
+                    'step__executions',
+                    filter=Q(step__executions__status='IN_PROGRESS', step__executions__exited_at__isnull=True)
+                ),
+            ).order_by('order')
 
         result = []
         for ps in process_steps:
@@ -2786,11 +2801,21 @@ class StepExecutionViewSet(TenantScopedMixin, ListMetadataMixin, SecondPersonMix
         (spectacular paginates list actions on a paginated viewset) and the rest
         of the list endpoints — the FE client expects the {results: [...]} shape.
         """
+        from django.db.models import OuterRef, Subquery
+
         queryset = self.get_queryset().filter(
             assigned_to=request.user,
             exited_at__isnull=True,
             status__in=['PENDING', 'IN_PROGRESS']
-        ).order_by('entered_at')
+        ).order_by('entered_at').annotate(
+            # One subquery instead of a ProcessStep lookup per row in
+            # StepExecutionListSerializer.get_step_order.
+            process_step_order=Subquery(
+                ProcessStep.objects.filter(
+                    process=OuterRef('part__work_order__process'), step=OuterRef('step'),
+                ).order_by('order').values('order')[:1]
+            ),
+        )
         # Run the viewset's filter backends so callers can narrow the surface —
         # e.g. `?step__work_center__kind=PRODUCTION` for the operator home's
         # In-progress tile. See Documents/WORK_CENTER_DESIGN.md.
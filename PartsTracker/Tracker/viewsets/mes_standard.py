@@ -6,9 +6,11 @@ ViewSets for MES Standard tier models:
 - Traceability: MaterialLot, MaterialUsage, BOM, BOMLine, AssemblyUsage
 - Labor: TimeEntry
 """
+from uuid import UUID
+
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, inline_serializer
+from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
 from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter, SearchFilter
@@ -59,6 +61,101 @@ class WorkCenterViewSet(TenantScopedMixin, ExcelExportMixin, viewsets.ModelViewS
     ordering_fields = ['name', 'code', 'created_at']
     ordering = ['code']
 
+    # OEE reads downtime as well as work centers.
+    action_permissions = {
+        'oee': ['view_downtimeevent'],
+    }
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='start', type=str, required=False,
+                             description='First shift day, YYYY-MM-DD (default: 30 days ago)'),
+            OpenApiParameter(name='end', type=str, required=False,
+                             description='Last shift day, YYYY-MM-DD (default: today)'),
+            OpenApiParameter(name='group_by', type=str, required=False,
+                             description='Comma-separated: work_center, equipment, shift, day. '
+                                         'Empty for one plant-wide row (default: work_center)'),
+            OpenApiParameter(name='work_center', type=str, required=False, description='Comma-separated ids'),
+            OpenApiParameter(name='equipment', type=str, required=False, description='Comma-separated ids'),
+            OpenApiParameter(name='shift', type=str, required=False, description='Comma-separated ids'),
+            OpenApiParameter(name='source', type=str, required=False, enum=['store', 'raw'],
+                             description='raw recomputes every window from the events'),
+        ],
+        responses={200: inline_serializer(name='OEEResponse', fields={
+            'start': serializers.DateField(),
+            'end': serializers.DateField(),
+            'group_by': serializers.ListField(child=serializers.CharField()),
+            'source': serializers.CharField(),
+            'results': serializers.ListField(child=serializers.DictField()),
+        })},
+        description=(
+            "Availability × performance × quality per group over the shift windows "
+            "starting between start and end. Each result carries its group keys "
+            "(with names), the summed seconds and counts, and the four ratios "
+            "(null where the denominator is zero or no step has an expected duration)."
+        ),
+    )
+    @action(detail=False, methods=['get'])
+    def oee(self, request):
+        """OEE by work center, machine, shift and/or day"""
+        from datetime import date, timedelta
+        from Tracker.models import Equipments
+        from Tracker.services.mes import oee
+
+        tenant = self.tenant
+        if tenant is None:
+            return Response({'detail': 'No tenant context'}, status=status.HTTP_400_BAD_REQUEST)
+
+        params = request.query_params
+        today = timezone.localdate()
+        try:
+            end = date.fromisoformat(params['end']) if params.get('end') else today
+            start = date.fromisoformat(params['start']) if params.get('start') else end - timedelta(days=29)
+        except ValueError:
+            return Response({'detail': 'start and end must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end or (end - start).days > 366:
+            return Response({'detail': 'start must be on or before end, at most 366 days apart'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        group_by = [g for g in params.get('group_by', 'work_center').split(',') if g]
+        unknown = set(group_by) - set(oee.GROUP_FIELDS)
+        if unknown:
+            return Response({'detail': f"Unknown group_by: {', '.join(sorted(unknown))}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        def ids(name):
+            values = [v for v in params.get(name, '').split(',') if v]
+            try:
+                return [UUID(v) for v in values]
+            except ValueError:
+                raise serializers.ValidationError({name: 'Expected comma-separated ids'})
+
+        source = oee.SOURCE_RAW if params.get('source') == oee.SOURCE_RAW or not oee.rollup_enabled() \
+            else oee.SOURCE_STORE
+        results = oee.summarize(
+            tenant.id, start, end, group_by=group_by, work_center_ids=ids('work_center'),
+            equipment_ids=ids('equipment'), shift_ids=ids('shift'), source=source,
+        )
+
+        # Names for the group keys, one query per dimension.
+        labels = {
+            'work_center': (WorkCenter, lambda wc: {'work_center_code': wc.code, 'work_center_name': wc.name}),
+            'equipment': (Equipments, lambda e: {'equipment_name': e.name}),
+            'shift': (Shift, lambda s: {'shift_name': s.name}),
+        }
+        for field, (model, describe) in labels.items():
+            if field not in group_by:
+                continue
+            rows = model.objects.filter(pk__in={r[field] for r in results})
+            names = {obj.pk: describe(obj) for obj in rows}
+            for r in results:
+                r.update(names.get(r[field], {}))
+
+        return Response({
+            'start': start, 'end': end, 'group_by': [g for g in oee.GROUP_FIELDS if g in group_by],
+            'source': source, 'results': results,
+        })
+
 
 class WorkCenterSelectViewSet(TenantScopedMixin, viewsets.ReadOnlyModelViewSet):
     """Lightweight work center endpoint for dropdowns"""
@@ -125,13 +222,70 @@ class ShiftViewSet(TenantScopedMixin, viewsets.ModelViewSet):
 
 class ScheduleSlotViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     """Production schedule management"""
-    queryset = ScheduleSlot.unscoped.select_related('work_center', 'shift', 'work_order')
+    queryset = ScheduleSlot.unscoped.select_related('work_center', 'shift', 'work_order', 'step')
     serializer_class = ScheduleSlotSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = ['work_center', 'shift', 'work_order', 'status', 'scheduled_date']
+    filterset_fields = ['work_center', 'shift', 'work_order', 'step', 'status', 'scheduled_date']
     ordering_fields = ['scheduled_date', 'scheduled_start']
     ordering = ['scheduled_date', 'scheduled_start']
 
+    # A solve creates, replaces and archives slots across the whole plan.
+    action_permissions = {
+        'solve': ['change_scheduleslot', 'delete_scheduleslot'],
+    }
+
+    @extend_schema(
+        request=inline_serializer(name="SolveScheduleInput", fields={
+            'time_limit': serializers.IntegerField(required=False, min_value=1),
+            'warm_start': serializers.BooleanField(required=False, default=True),
+        }),
+        responses={202: inline_serializer(name="SolveScheduleQueued", fields={
+            'task_id': serializers.CharField(),
+            'status': serializers.CharField(),
+        })},
+        description=(
+            "Re-plan every open work order onto schedule slots with the CP-SAT "
+            "scheduler. Replaces SCHEDULED slots of those work orders; IN_PROGRESS "
+            "slots stay where they are. Async via Celery; the task result carries "
+            "the solver status, objective and slot count."
+        ),
+    )
+    @action(detail=False, methods=['post'])
+    def solve(self, request):
+        """Queue a scheduler run for the current tenant"""
+        from uuid import uuid4
+        from django.conf import settings
+        from Tracker.tasks import solve_schedule_task
+
+        tenant = self.tenant
+        if tenant is None:
+            return Response({'detail': 'No tenant context'}, status=status.HTTP_400_BAD_REQUEST)
+
+        time_limit = request.data.get('time_limit')
+        if time_limit is not None:
+            try:
+                time_limit = int(time_limit)
+            except (TypeError, ValueError):
+                return Response({'detail': 'time_limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            if not 1 <= time_limit <= settings.SCHEDULER_MAX_TIME_LIMIT_SECONDS:
+                return Response(
+                    {'detail': f'time_limit must be between 1 and {settings.SCHEDULER_MAX_TIME_LIMIT_SECONDS}'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        warm_start = request.data.get('warm_start', True) not in (False, 'false', '0', 0)
+
+        task_id = str(uuid4())
+        transaction.on_commit(lambda: solve_schedule_task.apply_async(
+            kwargs={
+                'tenant_id': str(tenant.id),
+                'acting_user_id': request.user.id,
+                'time_limit': time_limit,
+                'warm_start': warm_start,
+            },
+            task_id=task_id,
+        ))
+        return Response({'task_id': task_id, 'status': 'queued'}, status=status.HTTP_202_ACCEPTED)
+
     @extend_schema(
         request=inline_serializer(name="StartSlotInput", fields={}),
         responses={200: ScheduleSlotSerializer}
@@ -424,27 +424,13 @@ class CSVImportMixin:
         result = ImportResult()
 
         with transaction.atomic():
-            for i, row in enumerate(rows, start=1):
-                serializer = serializer_class(
-                    data=row,
-                    tenant=tenant,
-                    user=user,
-                    mode=mode,
-                )
-
-                try:
-                    instance, created, warnings = serializer.import_row(row)
-                    if created:
-                        result.add_created(i, instance.id, warnings or None)
-                    else:
-                        result.add_updated(i, instance.id, warnings or None)
-
-                except Exception as e:
-                    if hasattr(e, 'detail'):
-                        errors = e.detail
-                    else:
-                        errors = str(e)
-                    result.add_error(i, errors)
+            for outcome in serializer_class.import_rows(rows, tenant=tenant, user=user, mode=mode):
+                if outcome.instance is None:
+                    result.add_error(outcome.row, outcome.errors)
+                elif outcome.created:
+                    result.add_created(outcome.row, outcome.instance.id, outcome.warnings or None)
+                else:
+                    result.add_updated(outcome.row, outcome.instance.id, outcome.warnings or None)
 
         return Response(result.to_response(), status=status.HTTP_207_MULTI_STATUS)
 
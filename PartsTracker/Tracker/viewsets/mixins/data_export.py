@@ -10,20 +10,30 @@ Excel exports include:
 - Data validation dropdowns for FK fields
 - Conditional formatting for required fields
 - Instructions sheet with field documentation
+
+Exports stream: rows come from one ``values_list()`` query (``field__subfield``
+lookups resolved as SQL joins) read through a server-side cursor, CSV is sent
+as it is produced, and Excel is built with a write-only workbook on disk.
 """
 
+import csv
 import io
 import re
-from typing import Dict, List, Optional, Tuple, Any
+import tempfile
+from itertools import islice
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 
 import pandas as pd
-from django.db import models
-from django.http import HttpResponse
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
+from django.http import FileResponse, StreamingHttpResponse
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework.decorators import action
 
 # openpyxl imports for advanced Excel features
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.worksheet.datavalidation import DataValidation
@@ -39,6 +49,12 @@ SKIP_EXPORT_FIELDS = {
 # Fields that are typically required
 COMMON_REQUIRED_FIELDS = {'id', 'name', 'ERP_id'}
 
+# Rows fetched per server-side cursor round trip
+EXPORT_CHUNK_SIZE = 2000
+
+# Data rows sampled for Excel column widths
+WIDTH_SAMPLE_ROWS = 100
+
 
 def get_exportable_fields(model) -> List[str]:
     """
@@ -181,6 +197,51 @@ def get_field_info(model) -> Dict[str, Dict[str, Any]]:
     return field_info
 
 
+def is_sql_lookup(model, path: str) -> bool:
+    """
+    Whether ``path`` (``field`` or ``fk__field``) can be selected with values().
+
+    Only forward single-valued relations are followed: reverse and
+    many-to-many hops would repeat the row once per related object.
+    """
+    current = model
+    parts = path.split('__')
+    for i, part in enumerate(parts):
+        try:
+            field = current._meta.get_field(part)
+        except FieldDoesNotExist:
+            return False
+        if field.many_to_many or field.one_to_many:
+            return False
+        if i < len(parts) - 1:
+            if not field.is_relation:
+                return False
+            current = field.related_model
+    return True
+
+
+def export_cell(value):
+    """Normalize a value for a CSV/Excel cell.
+
+    Aware datetimes become naive UTC (openpyxl rejects tz-aware values);
+    UUIDs, Decimals, dates and other objects become strings.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+        return value
+    return str(value)
+
+
+class _Echo:
+    """File-like sink that hands back what csv.writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
 def get_field_label(field_name: str) -> str:
     """Convert field name to human-readable label."""
     # Handle __ lookups
@@ -344,53 +405,30 @@ class DataExportMixin:
                 )
         return df
 
+    def iter_export_rows(self, queryset, fields: List[str]) -> Iterator[list]:
+        """
+        Yield one list of cell values per object, in ``fields`` order.
+
+        Related lookups (field__subfield) are joins in the same query, and the
+        rows are read through a server-side cursor in ``EXPORT_CHUNK_SIZE``
+        batches, so memory stays flat however many rows match. Fields that are
+        not database lookups (properties, reverse relations) export empty.
+        """
+        selected = list(dict.fromkeys(f for f in fields if is_sql_lookup(queryset.model, f)))
+        positions = [selected.index(f) if f in selected else None for f in fields]
+
+        rows = queryset.values_list(*(selected or ['pk'])).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        for values in rows:
+            yield [export_cell(values[i]) if i is not None else None for i in positions]
+
     def prepare_export_data(self, queryset, fields: List[str], apply_labels: bool = True) -> pd.DataFrame:
         """
         Prepare data for export as a DataFrame.
 
         Handles related field lookups (field__subfield) and applies labels.
+        Loads every row; the export endpoint streams via iter_export_rows.
         """
-        # Separate simple fields from related fields
-        simple_fields = []
-        related_lookups = {}
-
-        for field in fields:
-            if '__' in field:
-                # Related field lookup
-                parts = field.split('__')
-                related_lookups[field] = parts
-            else:
-                simple_fields.append(field)
-
-        # Get data using values()
-        if simple_fields:
-            data = list(queryset.values(*simple_fields))
-        else:
-            data = list(queryset.values('id'))
-
-        # Add related field values
-        if related_lookups:
-            # Re-fetch with related objects for lookups
-            for i, obj in enumerate(queryset):
-                for field_key, parts in related_lookups.items():
-                    value = obj
-                    for part in parts:
-                        value = getattr(value, part, None)
-                        if value is None:
-                            break
-                    if i < len(data):
-                        data[i][field_key] = value
-
-        # Create DataFrame
-        df = pd.DataFrame(data)
-
-        # Convert types for Excel compatibility
-        df = self._convert_df_for_excel(df)
-
-        # Reorder columns to match requested fields order
-        existing_cols = [f for f in fields if f in df.columns]
-        if existing_cols:
-            df = df[existing_cols]
+        df = pd.DataFrame(list(self.iter_export_rows(queryset, fields)), columns=fields)
 
         # Apply field labels for column names
         if apply_labels:
@@ -401,6 +439,25 @@ class DataExportMixin:
 
         return df
 
+    def _stream_csv(self, queryset, fields: List[str]) -> Iterator[str]:
+        """
+        CSV lines for the export, header first (with a UTF-8 BOM for Excel).
+
+        The generator runs after the view returns, outside the request's
+        transaction, so it re-enters the tenant context (RLS) and opens its
+        own transaction for the server-side cursor.
+        """
+        from Tracker.utils.tenant_context import get_current_tenant_id, tenant_context
+
+        labels = self.get_export_field_labels()
+        writer = csv.writer(_Echo(), lineterminator='\n')
+        tenant_id = get_current_tenant_id()
+
+        yield '\ufeff' + writer.writerow([labels.get(f, f) for f in fields])
+        with transaction.atomic(), tenant_context(tenant_id):
+            for row in self.iter_export_rows(queryset, fields):
+                yield writer.writerow(row)
+
     def _get_reference_data(self, fk_field: models.ForeignKey, limit: int = 1000) -> pd.DataFrame:
         """
         Get reference data for a foreign key field.
@@ -441,53 +498,59 @@ class DataExportMixin:
 
         return df
 
+    @staticmethod
+    def _cell(ws, value, font=None, fill=None, alignment=None) -> WriteOnlyCell:
+        """A styled cell for a write-only worksheet."""
+        cell = WriteOnlyCell(ws, value=value)
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if alignment is not None:
+            cell.alignment = alignment
+        return cell
+
     def _create_instructions_sheet(self, ws, model, field_info: Dict[str, Dict], fk_fields: Dict[str, models.ForeignKey]):
         """Create the instructions sheet with field documentation."""
         # Styles
-        header_font = Font(bold=True, size=12)
         header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
         header_font_white = Font(bold=True, color='FFFFFF')
         required_fill = PatternFill(start_color='FFEB9C', end_color='FFEB9C', fill_type='solid')
 
+        # Column widths (write-only sheets need them before the first row)
+        ws.column_dimensions['A'].width = 20
+        ws.column_dimensions['B'].width = 10
+        ws.column_dimensions['C'].width = 15
+        ws.column_dimensions['D'].width = 40
+        ws.column_dimensions['E'].width = 30
+
         # Title
-        ws['A1'] = f'{model.__name__} Import/Export Guide'
-        ws['A1'].font = Font(bold=True, size=16)
-        ws.merge_cells('A1:E1')
+        ws.append([self._cell(ws, f'{model.__name__} Import/Export Guide', font=Font(bold=True, size=16))])
+        ws.merged_cells.add('A1:E1')
+        ws.append([])
 
         # Headers
         headers = ['Field Name', 'Required', 'Type', 'Description', 'Valid Values / Reference']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=3, column=col, value=header)
-            cell.font = header_font_white
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center')
+        ws.append([
+            self._cell(ws, header, font=header_font_white, fill=header_fill, alignment=Alignment(horizontal='center'))
+            for header in headers
+        ])
 
         # Field rows
-        row = 4
         for field_name, info in field_info.items():
-            ws.cell(row=row, column=1, value=field_name)
-
-            required_cell = ws.cell(row=row, column=2, value='Yes' if info['required'] else 'No')
             if info['required']:
-                required_cell.fill = required_fill
-
-            ws.cell(row=row, column=3, value=info['type'])
-            ws.cell(row=row, column=4, value=info['description'])
+                required = self._cell(ws, 'Yes', fill=required_fill)
+            else:
+                required = 'No'
 
             # Valid values
+            valid = None
             if info['choices']:
-                ws.cell(row=row, column=5, value=', '.join(info['choices']))
+                valid = ', '.join(info['choices'])
             elif info['related_model']:
-                ws.cell(row=row, column=5, value=f"See '{info['related_model']}' sheet")
+                valid = f"See '{info['related_model']}' sheet"
 
-            row += 1
-
-        # Adjust column widths
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 10
-        ws.column_dimensions['C'].width = 15
-        ws.column_dimensions['D'].width = 40
-        ws.column_dimensions['E'].width = 30
+            ws.append([field_name, required, info['type'], info['description'], valid])
 
     def _create_reference_sheet(self, wb: Workbook, fk_name: str, fk_field: models.ForeignKey) -> Optional[Dict[str, Any]]:
         """
@@ -508,8 +571,7 @@ class DataExportMixin:
         sheet_name = sanitize_sheet_name(related_name)
 
         # Handle duplicate sheet names
-        existing_names = [ws.title for ws in wb.worksheets]
-        if sheet_name in existing_names:
+        if sheet_name in wb.sheetnames:
             sheet_name = sanitize_sheet_name(f"{fk_name}_{related_name}")[:31]
 
         ws = wb.create_sheet(title=sheet_name)
@@ -518,21 +580,18 @@ class DataExportMixin:
         header_fill = PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid')
         header_font = Font(bold=True, color='FFFFFF')
 
-        # Write headers
-        ws.cell(row=1, column=1, value='ID').font = header_font
-        ws.cell(row=1, column=1).fill = header_fill
-        ws.cell(row=1, column=2, value='Name').font = header_font
-        ws.cell(row=1, column=2).fill = header_fill
-
-        # Write data
-        for row_idx, row_data in enumerate(ref_df.values, 2):
-            for col_idx, value in enumerate(row_data, 1):
-                ws.cell(row=row_idx, column=col_idx, value=value)
-
         # Adjust column widths
         ws.column_dimensions['A'].width = 40  # UUID width
         ws.column_dimensions['B'].width = 30
 
+        # Write headers, then data
+        ws.append([
+            self._cell(ws, 'ID', font=header_font, fill=header_fill),
+            self._cell(ws, 'Name', font=header_font, fill=header_fill),
+        ])
+        for row_data in ref_df.values:
+            ws.append(list(row_data))
+
         # Create named range for the name column (for dropdowns)
         range_name = make_excel_safe_name(f"ref_{fk_name}")
         max_row = len(ref_df) + 1
@@ -566,7 +625,7 @@ class DataExportMixin:
 
         # Apply to column (rows 2 to max_row, skipping header)
         dv.add(f'{col_letter}2:{col_letter}{max_row}')
-        ws.add_data_validation(dv)
+        ws.data_validations.append(dv)
 
     def _add_inline_data_validation(self, ws, col_idx: int, values: List[str], max_row: int):
         """Add dropdown data validation with inline values (for small lists like enums)."""
@@ -587,13 +646,15 @@ class DataExportMixin:
         )
 
         dv.add(f'{col_letter}2:{col_letter}{max_row}')
-        ws.add_data_validation(dv)
+        ws.data_validations.append(dv)
 
-    def _create_excel_export(self, queryset, fields: List[str], include_references: bool = True) -> bytes:
+    def _write_excel_export(self, queryset, fields: List[str], output, include_references: bool = True):
         """
-        Create a full-featured Excel export with reference sheets.
+        Write a full-featured Excel export with reference sheets to ``output``.
 
-        Returns the Excel file as bytes.
+        Uses a write-only workbook: data rows go straight to the sheet's
+        temporary file as they are read, so memory does not grow with the
+        row count. Column widths come from the first WIDTH_SAMPLE_ROWS rows.
         """
         model = self._get_model()
         fk_fields = get_fk_fields(model) if model else {}
@@ -601,14 +662,11 @@ class DataExportMixin:
         boolean_fields = get_boolean_fields(model) if model else []
         field_info = get_field_info(model) if model else {}
 
-        # Create workbook
-        wb = Workbook()
-
-        # Remove default sheet
-        default_sheet = wb.active
+        # Create workbook (write-only mode starts with no sheets)
+        wb = Workbook(write_only=True)
 
         # Create Instructions sheet first
-        instructions_ws = wb.create_sheet(title='Instructions', index=0)
+        instructions_ws = wb.create_sheet(title='Instructions')
         if model:
             self._create_instructions_sheet(instructions_ws, model, field_info, fk_fields)
 
@@ -623,9 +681,6 @@ class DataExportMixin:
         # Create main data sheet
         data_ws = wb.create_sheet(title='Data', index=1)
 
-        # Prepare data (without labels for now, we'll add custom headers)
-        df = self.prepare_export_data(queryset, fields, apply_labels=False)
-
         # Style settings
         header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
         header_font = Font(bold=True, color='FFFFFF')
@@ -638,9 +693,10 @@ class DataExportMixin:
         choice_columns = {}   # col_idx -> list of choices (for enum dropdowns)
         boolean_columns = []  # col_idx (for True/False dropdowns)
 
-        # Write headers with formatting
+        # Header labels
         labels = self.get_export_field_labels()
-        for col_idx, field_name in enumerate(df.columns, 1):
+        header = []
+        for col_idx, field_name in enumerate(fields, 1):
             label = labels.get(field_name, get_field_label(field_name))
 
             # Mark required fields
@@ -653,10 +709,9 @@ class DataExportMixin:
             if is_fk_id:
                 label = f'{label} (auto)'  # Mark as auto-calculated
 
-            cell = data_ws.cell(row=1, column=col_idx, value=label)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center')
+            header.append(self._cell(
+                data_ws, label, font=header_font, fill=header_fill, alignment=Alignment(horizontal='center'),
+            ))
 
             # Track FK columns
             base_field = field_name.split('__')[0]
@@ -678,10 +733,10 @@ class DataExportMixin:
         for col_idx, fk_name in fk_name_columns.items():
             fk_name_col_letters[fk_name] = get_column_letter(col_idx)
 
-        # Write data rows
-        for row_idx, row_data in enumerate(df.values, 2):
+        def data_row(row_idx, row_data):
+            cells = []
             for col_idx, value in enumerate(row_data, 1):
-                field_name = df.columns[col_idx - 1]
+                field_name = fields[col_idx - 1]
 
                 # Check if this is an FK ID column that should have a formula
                 if col_idx in fk_id_columns:
@@ -699,19 +754,43 @@ class DataExportMixin:
                             f"INDEX('{sheet}'!$A$2:$A${max_ref_row},"
                             f"MATCH({name_col}{row_idx},'{sheet}'!$B$2:$B${max_ref_row},0)))"
                         )
-                        cell = data_ws.cell(row=row_idx, column=col_idx, value=formula)
-                        cell.fill = formula_fill  # Light green to indicate formula
+                        cells.append(self._cell(data_ws, formula, fill=formula_fill))  # Light green to indicate formula
                         continue
 
-                cell = data_ws.cell(row=row_idx, column=col_idx, value=value)
-
                 # Highlight required field cells that are empty
                 is_required = field_info.get(field_name, {}).get('required', False)
                 if is_required and (value is None or value == ''):
-                    cell.fill = required_fill
+                    cells.append(self._cell(data_ws, value, fill=required_fill))
+                else:
+                    cells.append(value)
+            return cells
+
+        # Widths are fixed before the first row is written, so size them from
+        # a sample of the leading rows.
+        rows = self.iter_export_rows(queryset, fields)
+        sample = [data_row(row_idx, row) for row_idx, row in enumerate(islice(rows, WIDTH_SAMPLE_ROWS), 2)]
+        for col_idx, field_name in enumerate(fields, 1):
+            max_length = len(labels.get(field_name, field_name)) + 2
+            for cells in sample:
+                cell_value = getattr(cells[col_idx - 1], 'value', cells[col_idx - 1])
+                if cell_value:
+                    max_length = max(max_length, min(len(str(cell_value)), 50))
+            data_ws.column_dimensions[get_column_letter(col_idx)].width = max_length + 2
 
-        # Add data validation for FK name columns
-        max_row = max(len(df) + 1, 100)  # At least 100 rows for new entries
+        # Freeze header row
+        data_ws.freeze_panes = 'A2'
+
+        # Write rows
+        data_ws.append(header)
+        for cells in sample:
+            data_ws.append(cells)
+        last_row = len(sample) + 1
+        for row_data in rows:
+            last_row += 1
+            data_ws.append(data_row(last_row, row_data))
+
+        # Data validation is written after the rows, so it can cover them all
+        max_row = max(last_row, 100)  # At least 100 rows for new entries
         for col_idx, fk_name in fk_name_columns.items():
             if fk_name in ref_sheet_info:
                 self._add_data_validation(data_ws, col_idx, ref_sheet_info[fk_name]['range_name'], max_row)
@@ -724,27 +803,16 @@ class DataExportMixin:
         for col_idx in boolean_columns:
             self._add_inline_data_validation(data_ws, col_idx, ['True', 'False'], max_row)
 
-        # Auto-adjust column widths
-        for col_idx, field_name in enumerate(df.columns, 1):
-            max_length = len(labels.get(field_name, field_name)) + 2
-            # Sample first 100 rows for width
-            for row_idx in range(2, min(len(df) + 2, 102)):
-                cell_value = data_ws.cell(row=row_idx, column=col_idx).value
-                if cell_value:
-                    max_length = max(max_length, min(len(str(cell_value)), 50))
-            data_ws.column_dimensions[get_column_letter(col_idx)].width = max_length + 2
-
-        # Freeze header row
-        data_ws.freeze_panes = 'A2'
+        wb.save(output)
 
-        # Remove the default empty sheet if it still exists
-        if default_sheet.title == 'Sheet' and default_sheet in wb.worksheets:
-            wb.remove(default_sheet)
+    def _create_excel_export(self, queryset, fields: List[str], include_references: bool = True) -> bytes:
+        """
+        Create a full-featured Excel export with reference sheets.
 
-        # Save to bytes
+        Returns the Excel file as bytes.
+        """
         output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
+        self._write_excel_export(queryset, fields, output, include_references=include_references)
         return output.getvalue()
 
     @extend_schema(
@@ -805,18 +873,21 @@ class DataExportMixin:
 
         # Create response
         if export_format == 'csv':
-            # Simple CSV export
-            df = self.prepare_export_data(queryset, fields)
-            output = io.StringIO()
-            df.to_csv(output, index=False)
-            content = output.getvalue().encode('utf-8-sig')
-            content_type = 'text/csv'
-        else:
-            # Full-featured Excel export
-            include_refs = request.query_params.get('include_references', 'true').lower() != 'false'
-            content = self._create_excel_export(queryset, fields, include_references=include_refs)
-            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-
-        response = HttpResponse(content, content_type=content_type)
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
+            # Simple CSV export, streamed as rows are read
+            response = StreamingHttpResponse(self._stream_csv(queryset, fields), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+
+        # Full-featured Excel export. The xlsx zip is only complete once the
+        # workbook is saved, so it is built in a temporary file and streamed
+        # from there.
+        include_refs = request.query_params.get('include_references', 'true').lower() != 'false'
+        output = tempfile.TemporaryFile()
+        self._write_excel_export(queryset, fields, output, include_references=include_refs)
+        output.seek(0)
+        return FileResponse(
+            output,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            filename=filename,
+        )
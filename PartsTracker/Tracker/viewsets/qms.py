@@ -1,9 +1,10 @@
 # viewsets/qms.py - QMS ViewSets (Quality, Sampling, CAPA, 3D Models, Heatmap Annotations)
 from django.db import models
+from django.http import FileResponse
 from django.utils import timezone
 import django_filters
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, inline_serializer, extend_schema_view, OpenApiParameter
+from drf_spectacular.utils import extend_schema, inline_serializer, extend_schema_view, OpenApiParameter, OpenApiTypes
 from rest_framework import viewsets, status, filters, serializers
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -36,6 +37,7 @@ from Tracker.serializers.qms import (
     FiveWhysSerializer, FishboneSerializer,
 )
 from Tracker.serializers.dms import ThreeDModelSerializer, HeatMapAnnotationsSerializer
+from Tracker.services.qms import heatmap_density
 from .core import ExcelExportMixin, ListMetadataMixin
 from .base import TenantScopedMixin
 from .mixins import SecondPersonMixin
@@ -1230,6 +1232,50 @@ class ThreeDModelViewSet(TenantScopedMixin, ListMetadataMixin, ExcelExportMixin,
         qs = super().get_queryset()
         return qs.select_related('part_type', 'step')
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='level', type=int, required=False,
+                             description='Level of detail index, 0 = coarsest (default: 0)'),
+        ],
+        responses={(200, 'model/gltf-binary'): OpenApiTypes.BINARY},
+    )
+    @action(detail=True, methods=['get'])
+    def lod(self, request, pk=None):
+        """
+        Serve one level of detail as GLB, the coarsest by default.
+
+        Viewers load level 0 first and then follow the `Link: rel="next"`
+        header to progressively finer meshes; `X-LOD-Level` / `X-LOD-Levels`
+        say where in the chain a response sits.
+        """
+        model = self.get_object()
+        if not model.is_ready:
+            return Response({"detail": "Model has not finished processing"}, status=status.HTTP_409_CONFLICT)
+
+        levels = model.get_lod_levels()
+        try:
+            index = int(request.query_params.get('level', 0))
+        except ValueError:
+            index = -1
+        if not 0 <= index < len(levels):
+            return Response(
+                {"detail": f"level must be between 0 and {len(levels) - 1}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        level = levels[index]
+        response = FileResponse(model.file.storage.open(level['file'], 'rb'), content_type='model/gltf-binary')
+        response['X-LOD-Level'] = str(index)
+        response['X-LOD-Levels'] = str(len(levels))
+        if level.get('face_count') is not None:
+            response['X-LOD-Faces'] = str(level['face_count'])
+        if index + 1 < len(levels):
+            next_url = request.build_absolute_uri(f"{request.path}?level={index + 1}")
+            response['Link'] = f'<{next_url}>; rel="next"'
+        # Level files are never rewritten in place, so clients may keep them.
+        response['Cache-Control'] = 'private, max-age=86400'
+        return response
+
 
 
 # ===== HEATMAP ANNOTATION VIEWSETS =====
@@ -1362,6 +1408,72 @@ class HeatMapAnnotationsViewSet(TenantScopedMixin, ListMetadataMixin, ExcelExpor
             'total_count': queryset.count(),
         })
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='model', type=str, required=True, description='3D model UUID'),
+            OpenApiParameter(name='mode', type=str, enum=list(heatmap_density.MODES),
+                             description="'voxel' grid (default) or 'face' buckets on a level of detail"),
+            OpenApiParameter(name='resolution', type=int,
+                             description=f'Voxel cells along the longest axis '
+                                         f'(default {heatmap_density.DEFAULT_RESOLUTION}, '
+                                         f'max {heatmap_density.MAX_RESOLUTION})'),
+            OpenApiParameter(name='level', type=int, description="Level of detail for 'face' mode (default 0)"),
+        ],
+        responses={
+            200: inline_serializer(
+                name='HeatMapDensityResponse',
+                fields={
+                    'mode': serializers.CharField(),
+                    'total': serializers.IntegerField(),
+                    'origin': serializers.ListField(child=serializers.FloatField(), required=False, allow_null=True),
+                    'cell_size': serializers.FloatField(required=False, allow_null=True),
+                    'dims': serializers.ListField(child=serializers.IntegerField(), required=False, allow_null=True),
+                    'level': serializers.IntegerField(required=False),
+                    'face_count': serializers.IntegerField(required=False),
+                    'bins': serializers.DictField(child=serializers.ListField()),
+                }
+            )
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def density(self, request):
+        """
+        Annotation density for one 3D model, binned on the server.
+
+        Accepts the same filter parameters as the list endpoint. `bins` is
+        columnar: parallel `index`, `count`, `severity_weight`,
+        `measurement_sum` and `measurement_max` lists, one entry per
+        non-empty voxel (index = x + dims[0] * (y + dims[1] * z)) or face.
+        """
+        model_id = request.query_params.get('model')
+        mode = request.query_params.get('mode', 'voxel')
+        if not model_id:
+            return Response({"detail": "model parameter required"}, status=status.HTTP_400_BAD_REQUEST)
+        if mode not in heatmap_density.MODES:
+            return Response({"detail": f"mode must be one of {', '.join(heatmap_density.MODES)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            resolution = int(request.query_params.get('resolution', heatmap_density.DEFAULT_RESOLUTION))
+            level = int(request.query_params.get('level', 0))
+        except ValueError:
+            return Response({"detail": "resolution and level must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= resolution <= heatmap_density.MAX_RESOLUTION:
+            return Response({"detail": f"resolution must be between 1 and {heatmap_density.MAX_RESOLUTION}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        model = ThreeDModel.objects.for_user(request.user).filter(pk=model_id).first()
+        if model is None:
+            return Response({"detail": "Model not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            payload = heatmap_density.cached_density(
+                queryset, model, mode=mode, resolution=resolution, level=level,
+            )
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(payload)
+
 
 # ===== STEP OVERRIDE VIEWSETS =====
 
@@ -7,7 +7,6 @@ Provides API endpoints for SPC data:
 - Process capability calculations (Cpk/Ppk)
 - SPC Baseline management (frozen control limits)
 """
-import math
 from datetime import timedelta
 
 from django.db.models import F, Avg, StdDev, Count, Min, Max
@@ -102,7 +101,7 @@ class MeasurementDataPointSerializer(serializers.Serializer):
     """Individual measurement data point for SPC charts.
 
     `id` / `report_id` are nullable: points now come from the merged two-tier
-    collector (spc_ingest.collect_spc_rows), where a point may originate from a
+    collector (spc_ingest.spc_columns), where a point may originate from a
     StepExecutionMeasurement (batch/process data) rather than a single
     MeasurementResult, so there is no one report id. The chart keys points by
     index, not by these ids.
@@ -123,6 +122,79 @@ class SPCDataResponseSerializer(serializers.Serializer):
     step_name = serializers.CharField()
     data_points = MeasurementDataPointSerializer(many=True)
     statistics = serializers.DictField()
+    control_chart = serializers.DictField(required=False)
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _stats_source(request):
+    """Where chart/capability statistics come from.
+
+    The SPCStatsBucket store when SPC_STATS_ENABLED, else the rows.
+    `?source=raw` always recomputes from the rows (verification mode).
+    """
+    from Tracker.services.qms import spc_stats
+    if request.query_params.get('source') == spc_stats.SOURCE_RAW or not spc_stats.stats_enabled():
+        return spc_stats.SOURCE_RAW
+    return spc_stats.SOURCE_STORE
+
+
+def _summary_statistics(summary, source):
+    """The `statistics` block of the SPC data response (an spc_engine.Summary)."""
+    if not summary.count:
+        return {
+            'count': 0,
+            'mean': None,
+            'std_dev': None,
+            'min': None,
+            'max': None,
+            'within_spec_count': 0,
+            'out_of_spec_count': 0,
+            'source': source,
+        }
+    return {
+        'count': summary.count,
+        'mean': round(summary.mean, 6),
+        'std_dev': round(summary.std_dev, 6),
+        'min': round(summary.min, 6),
+        'max': round(summary.max, 6),
+        'within_spec_count': summary.within_spec,
+        'out_of_spec_count': summary.out_of_spec,
+        'source': source,
+    }
+
+
+def _control_chart(values, baseline):
+    """Limits for the plotted points and the Nelson rule hits against them.
+
+    Uses the active baseline's frozen limits when there is one (monitoring
+    mode), else I-MR limits computed from the points themselves. For X-bar
+    baselines the rules run on consecutive subgroup means, so `index` is the
+    subgroup number.
+    """
+    from Tracker.services.qms import spc_engine
+
+    if baseline is not None:
+        limits = baseline.limits
+        if limits.chart_type == spc_engine.CHART_I_MR:
+            points = values
+        else:
+            points = spc_engine.subgroups(values, baseline.subgroup_size).mean(axis=1)
+        limits_source = 'baseline'
+    else:
+        limits = spc_engine.i_mr(values)
+        points = limits.points
+        limits_source = 'computed'
+
+    return {
+        'chart_type': limits.chart_type,
+        'subgroup_size': limits.subgroup_size,
+        'limits': limits.as_dict(),
+        'limits_source': limits_source,
+        'violations': spc_engine.violations(points, limits.center, limits.sigma),
+    }
 
 
 # =============================================================================
@@ -216,6 +288,7 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
             OpenApiParameter(name='measurement_id', type=str, required=True, description='UUID of the MeasurementDefinition'),
             OpenApiParameter(name='days', type=int, required=False, default=90, description='Number of days of data to return'),
             OpenApiParameter(name='limit', type=int, required=False, default=500, description='Max number of data points'),
+            OpenApiParameter(name='source', type=str, required=False, enum=['store', 'raw'], description='Statistics source; raw recomputes from the readings'),
         ],
         responses={200: SPCDataResponseSerializer}
     )
@@ -228,6 +301,8 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
             measurement_id (required): ID of the MeasurementDefinition
             days (optional): Number of days of data to return (default: 90)
             limit (optional): Max number of data points (default: 500)
+            source (optional): 'raw' recomputes statistics from the readings
+                instead of the SPCStatsBucket store
 
         Response:
         {
@@ -252,7 +327,15 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
                 "min": 24.95,
                 "max": 25.08,
                 "within_spec_count": 148,
-                "out_of_spec_count": 2
+                "out_of_spec_count": 2,
+                "source": "store"
+            },
+            "control_chart": {
+                "chart_type": "I_MR",
+                "subgroup_size": 1,
+                "limits": { "individualUCL": 25.1, ... },
+                "limits_source": "baseline",
+                "violations": [{"rule": 1, "index": 42}]
             }
         }
         """
@@ -285,11 +368,14 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
         # Two-tier read via the shared collector — same source as the PDF
         # report, so process parameters (batch cycle readings, routine-substep
         # captures) chart on screen, not just inspection-point measurements.
-        from Tracker.services.qms.spc_ingest import collect_spc_rows
-        rows = collect_spc_rows(
+        # Only the plotted prefix is read with part/operator columns; ordering
+        # and the limit run in SQL.
+        from Tracker.services.qms import spc_stats
+        from Tracker.services.qms.spc_ingest import spc_columns
+        columns = spc_columns(
             tenant=definition.tenant, measurement_id=measurement_id,
-            start=start_date, end=end_date,
-        )[:limit]
+            start=start_date, end=end_date, limit=limit,
+        )
 
         data_points = [{
             'id': None,
@@ -299,35 +385,20 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
             'part_erp_id': r.part_erp_id or 'N/A',
             'operator_name': r.operator_name,
             'is_within_spec': r.is_within_spec,
-        } for r in rows]
-
-        # Calculate statistics
-        if data_points:
-            values = [dp['value'] for dp in data_points]
-            mean = sum(values) / len(values)
-            variance = sum((v - mean) ** 2 for v in values) / (len(values) - 1) if len(values) > 1 else 0
-            std_dev = math.sqrt(variance)
-            within_spec = sum(1 for dp in data_points if dp['is_within_spec'])
-
-            statistics = {
-                'count': len(values),
-                'mean': round(mean, 6),
-                'std_dev': round(std_dev, 6),
-                'min': round(min(values), 6),
-                'max': round(max(values), 6),
-                'within_spec_count': within_spec,
-                'out_of_spec_count': len(values) - within_spec,
-            }
-        else:
-            statistics = {
-                'count': 0,
-                'mean': None,
-                'std_dev': None,
-                'min': None,
-                'max': None,
-                'within_spec_count': 0,
-                'out_of_spec_count': 0,
-            }
+        } for r in columns.rows()]
+
+        # Statistics describe the whole window, not just the plotted points:
+        # from the per-day store when enabled, else from SQL aggregates over
+        # the readings. Neither loads the window's points.
+        source = _stats_source(request)
+        window_stats = spc_stats.window_stats if source == spc_stats.SOURCE_STORE else spc_stats.raw_window_stats
+        summary = window_stats(
+            tenant=definition.tenant, measurement_id=measurement_id,
+            start=start_date, end=end_date,
+        ).summary()
+        statistics = _summary_statistics(summary, source)
+
+        control_chart = _control_chart(columns.values, SPCBaseline.get_active(definition.id))
 
         # Get process name from ProcessStep (step can be in multiple processes)
         process_name = None
@@ -343,6 +414,7 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
             'step_name': definition.step.name,
             'data_points': data_points,
             'statistics': statistics,
+            'control_chart': control_chart,
         })
 
     @extend_schema(
@@ -350,6 +422,7 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
             OpenApiParameter(name='measurement_id', type=str, required=True, description='UUID of the MeasurementDefinition'),
             OpenApiParameter(name='days', type=int, required=False, default=90, description='Number of days of data'),
             OpenApiParameter(name='subgroup_size', type=int, required=False, default=5, description='Size for subgroup calculations'),
+            OpenApiParameter(name='source', type=str, required=False, enum=['store', 'raw'], description='Statistics source; raw recomputes from the readings'),
         ],
         responses={200: inline_serializer(
             name='SPCCapabilityResponse',
@@ -380,6 +453,8 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
             measurement_id (required): ID of the MeasurementDefinition
             days (optional): Number of days of data (default: 90)
             subgroup_size (optional): Size for subgroup calculations (default: 5)
+            source (optional): 'raw' recomputes from the readings instead of
+                the SPCStatsBucket store
 
         Response:
         {
@@ -422,19 +497,29 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
         start_date = end_date - timedelta(days=days)
 
         # Two-tier read via the shared collector (same source as the chart and
-        # the PDF report) so capability reflects process parameters too.
-        from Tracker.services.qms.spc_ingest import collect_spc_rows
-        values = [
-            r.value for r in collect_spc_rows(
+        # the PDF report) so capability reflects process parameters too. The
+        # store tracks subgroup sizes 2-10; other sizes and `?source=raw` run
+        # the vectorized engine over the window's values.
+        from Tracker.services.qms import spc_engine, spc_stats
+        from Tracker.services.qms.spc_ingest import reading_series
+        stats = series = None
+        if _stats_source(request) == spc_stats.SOURCE_STORE and subgroup_size in spc_stats.SUBGROUP_SIZES:
+            stats = spc_stats.window_stats(
                 tenant=definition.tenant, measurement_id=measurement_id,
                 start=start_date, end=end_date,
             )
-        ]
+            n = stats.count
+        else:
+            series = reading_series(
+                tenant=definition.tenant, measurement_id=measurement_id,
+                start=start_date, end=end_date,
+            )
+            n = len(series)
 
-        if len(values) < 2:
+        if n < 2:
             return Response({
                 'definition': MeasurementDefinitionSPCSerializer(definition).data,
-                'sample_size': len(values),
+                'sample_size': n,
                 'subgroup_size': subgroup_size,
                 'num_subgroups': 0,
                 'usl': 0,
@@ -457,7 +542,7 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
         if nominal is None or upper_tol is None or lower_tol is None:
             return Response({
                 'definition': MeasurementDefinitionSPCSerializer(definition).data,
-                'sample_size': len(values),
+                'sample_size': n,
                 'subgroup_size': subgroup_size,
                 'num_subgroups': 0,
                 'usl': 0,
@@ -475,53 +560,15 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
         usl = nominal + upper_tol
         lsl = nominal - lower_tol
 
-        # Calculate statistics
-        n = len(values)
-        mean = sum(values) / n
-
-        # Overall standard deviation (for Pp/Ppk)
-        variance_overall = sum((v - mean) ** 2 for v in values) / (n - 1)
-        std_dev_overall = math.sqrt(variance_overall)
-
-        # Within-subgroup standard deviation (for Cp/Cpk)
-        # Using average range method with d2 factor
-        d2_factors = {2: 1.128, 3: 1.693, 4: 2.059, 5: 2.326, 6: 2.534, 7: 2.704, 8: 2.847, 9: 2.970, 10: 3.078}
-        d2 = d2_factors.get(subgroup_size, 2.326)  # Default to n=5
-
-        # Calculate ranges for subgroups
-        ranges = []
-        for i in range(0, n - subgroup_size + 1, subgroup_size):
-            subgroup = values[i:i + subgroup_size]
-            if len(subgroup) == subgroup_size:
-                ranges.append(max(subgroup) - min(subgroup))
-
-        if ranges:
-            r_bar = sum(ranges) / len(ranges)
-            std_dev_within = r_bar / d2
-        else:
-            std_dev_within = std_dev_overall  # Fallback
-
-        # Calculate capability indices
-        # Cp = (USL - LSL) / (6 * sigma_within)
-        # Cpk = min((USL - mean) / (3 * sigma_within), (mean - LSL) / (3 * sigma_within))
-        # Pp = (USL - LSL) / (6 * sigma_overall)
-        # Ppk = min((USL - mean) / (3 * sigma_overall), (mean - LSL) / (3 * sigma_overall))
-
-        if std_dev_within > 0:
-            cp = (usl - lsl) / (6 * std_dev_within)
-            cpu = (usl - mean) / (3 * std_dev_within)
-            cpl = (mean - lsl) / (3 * std_dev_within)
-            cpk = min(cpu, cpl)
-        else:
-            cp = cpk = float('inf')
-
-        if std_dev_overall > 0:
-            pp = (usl - lsl) / (6 * std_dev_overall)
-            ppu = (usl - mean) / (3 * std_dev_overall)
-            ppl = (mean - lsl) / (3 * std_dev_overall)
-            ppk = min(ppu, ppl)
+        # Cp/Cpk use sigma within (R-bar / d2 over consecutive subgroups within
+        # a UTC day), Pp/Ppk the overall sample sigma. Indices are None when
+        # their sigma is zero.
+        if stats is not None:
+            cap = stats.capability(usl, lsl, subgroup_size)
         else:
-            pp = ppk = float('inf')
+            cap = spc_engine.capability(series.values, usl, lsl, subgroup_size, segments=series.days)
+        cp = cap.cp if cap.cp is not None else float('inf')
+        cpk = cap.cpk if cap.cpk is not None else float('inf')
 
         # Interpretation
         if cpk >= 1.33:
@@ -540,16 +587,16 @@ class SPCViewSet(TenantScopedMixin, viewsets.GenericViewSet):
             'definition': MeasurementDefinitionSPCSerializer(definition).data,
             'sample_size': n,
             'subgroup_size': subgroup_size,
-            'num_subgroups': len(ranges),
+            'num_subgroups': cap.num_subgroups,
             'usl': round(usl, 6),
             'lsl': round(lsl, 6),
-            'mean': round(mean, 6),
-            'std_dev_within': round(std_dev_within, 6),
-            'std_dev_overall': round(std_dev_overall, 6),
-            'cp': round(cp, 3) if cp != float('inf') else None,
-            'cpk': round(cpk, 3) if cpk != float('inf') else None,
-            'pp': round(pp, 3) if pp != float('inf') else None,
-            'ppk': round(ppk, 3) if ppk != float('inf') else None,
+            'mean': round(cap.mean, 6),
+            'std_dev_within': round(cap.std_dev_within, 6),
+            'std_dev_overall': round(cap.std_dev_overall, 6),
+            'cp': round(cap.cp, 3) if cap.cp is not None else None,
+            'cpk': round(cap.cpk, 3) if cap.cpk is not None else None,
+            'pp': round(cap.pp, 3) if cap.pp is not None else None,
+            'ppk': round(cap.ppk, 3) if cap.ppk is not None else None,
             'interpretation': interpretation,
         })
 
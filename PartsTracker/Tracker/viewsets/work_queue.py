@@ -7,17 +7,40 @@ parts qty_ready + aging + a is_held flag. Ranked priority → due → aging.
 v1 readiness = 'blocked' when the WO has an active hold, else 'ready'. Upstream-
 done is implicit for open executions. Cert / calibration / downtime / manual-
 blocker predicates layer on later as those systems mature (see design doc §9).
+
+With WORK_QUEUE_PROJECTION_ENABLED the rows are read from WorkQueueEntry
+(Tracker.services.mes.work_queue) instead of aggregated per request, and
+`stream/` pushes row diffs to stations as server-sent events.
 """
+import json
+
+from django.core.handlers.asgi import ASGIRequest
 from django.db.models import Count, Exists, Min, OuterRef, Q
-from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import renderers, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from Tracker.models import StepExecution, WorkOrder, WorkOrderHold
 from Tracker.serializers.work_queue import WorkQueueRowSerializer
+from Tracker.services.mes import work_queue
+from Tracker.utils.tenant_context import tenant_context
 from Tracker.viewsets.base import TenantScopedMixin
 
 
+class EventStreamRenderer(renderers.BaseRenderer):
+    """Lets `Accept: text/event-stream` through negotiation; errors go out as an `error` event."""
+
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return f"event: error\ndata: {json.dumps(data)}\n\n".encode()
+
+
 class WorkQueueViewSet(TenantScopedMixin, viewsets.GenericViewSet):
     """Ranked ready-or-blocked work rows on the floor.
 
@@ -26,6 +49,7 @@ class WorkQueueViewSet(TenantScopedMixin, viewsets.GenericViewSet):
       - `readiness=ready|blocked` (default: both, blocked sunk last)
       - `wo=<uuid>` — rows for a single WO
       - `search=<term>` — matches WO ERP id or step name
+      - `source=raw` — aggregate from the executions even when the projection is on
       - standard `?limit=&offset=` pagination
     """
 
@@ -35,10 +59,33 @@ class WorkQueueViewSet(TenantScopedMixin, viewsets.GenericViewSet):
     # by _rows() below — no queryset filtering paths from DRF are used.
     queryset = WorkOrder.unscoped.none()
 
+    def _filters(self):
+        params = self.request.query_params
+        return {
+            "work_order": params.get("wo"),
+            "kind": params.get("kind"),
+            "work_center": params.get("work_center"),
+            "work_centers": [w for w in (params.get("work_center__in") or "").split(",") if w],
+            "search": (params.get("search") or "").strip(),
+            "readiness": params.get("readiness"),
+        }
+
+    def _source(self):
+        if self.request.query_params.get("source") == work_queue.SOURCE_RAW or not work_queue.projection_enabled():
+            return work_queue.SOURCE_RAW
+        return work_queue.SOURCE_STORE
+
+    def _entries(self):
+        """Ranked rows from the projection, as a lazy queryset of entry dicts."""
+        return work_queue.queue_entries(getattr(self.tenant, "id", None), **self._filters())
+
     def _rows(self):
         """Compute the ranked aggregate as a Python list of row dicts."""
+        if self._source() == work_queue.SOURCE_STORE:
+            return [work_queue.entry_row(e) for e in self._entries()]
+
         tenant = self.tenant
-        params = self.request.query_params
+        filters = self._filters()
 
         # Active-hold subquery: hold row exists, not cleared, not voided (matches
         # WorkOrderHold's unique-open-per-WO constraint condition).
@@ -63,6 +110,7 @@ class WorkQueueViewSet(TenantScopedMixin, viewsets.GenericViewSet):
                 "part__work_order__ERP_id",
                 "part__work_order__priority",
                 "part__work_order__expected_completion",
+                "part__part_type_id",
                 "part__part_type__name",
                 "step_id",
                 "step__name",
@@ -76,7 +124,7 @@ class WorkQueueViewSet(TenantScopedMixin, viewsets.GenericViewSet):
             )
         )
 
-        wo = params.get("wo")
+        wo = filters["work_order"]
         if wo:
             rows_qs = rows_qs.filter(part__work_order_id=wo)
 
@@ -85,19 +133,17 @@ class WorkQueueViewSet(TenantScopedMixin, viewsets.GenericViewSet):
         # set of work-centers (e.g. the current operator's memberships). Rows
         # with no work-center set (unmapped steps) drop out of the kind filter
         # but appear when no filter is set — see Documents/WORK_CENTER_DESIGN.md.
-        kind = params.get("kind")
+        kind = filters["kind"]
         if kind:
             rows_qs = rows_qs.filter(step__work_center__kind=kind)
-        wc = params.get("work_center")
+        wc = filters["work_center"]
         if wc:
             rows_qs = rows_qs.filter(step__work_center_id=wc)
-        wcs_csv = params.get("work_center__in")
-        if wcs_csv:
-            wc_ids = [w for w in wcs_csv.split(",") if w]
-            if wc_ids:
-                rows_qs = rows_qs.filter(step__work_center_id__in=wc_ids)
+        wc_ids = filters["work_centers"]
+        if wc_ids:
+            rows_qs = rows_qs.filter(step__work_center_id__in=wc_ids)
 
-        term = (params.get("search") or "").strip()
+        term = filters["search"]
         if term:
             rows_qs = rows_qs.filter(
                 Q(part__work_order__ERP_id__icontains=term)
@@ -115,6 +161,7 @@ class WorkQueueViewSet(TenantScopedMixin, viewsets.GenericViewSet):
 
         rows = [
             {
+                "key": work_queue.row_key(r["part__work_order_id"], r["step_id"], r["part__part_type_id"]),
                 "work_order": r["part__work_order_id"],
                 "work_order_erp_id": r["part__work_order__ERP_id"],
                 "step": r["step_id"],
@@ -132,7 +179,7 @@ class WorkQueueViewSet(TenantScopedMixin, viewsets.GenericViewSet):
             for r in rows_qs
         ]
 
-        readiness = params.get("readiness")
+        readiness = filters["readiness"]
         if readiness in ("ready", "blocked"):
             rows = [row for row in rows if row["readiness"] == readiness]
 
@@ -140,8 +187,57 @@ class WorkQueueViewSet(TenantScopedMixin, viewsets.GenericViewSet):
 
     @extend_schema(responses=WorkQueueRowSerializer(many=True))
     def list(self, request, *args, **kwargs):
+        if self._source() == work_queue.SOURCE_STORE:
+            # Filtered, ranked and paginated in SQL; only the page is read.
+            page = self.paginate_queryset(self._entries())
+            if page is not None:
+                rows = [work_queue.entry_row(e) for e in page]
+                return self.get_paginated_response(self.get_serializer(rows, many=True).data)
         rows = self._rows()
         page = self.paginate_queryset(rows)
         if page is not None:
             return self.get_paginated_response(self.get_serializer(page, many=True).data)
         return Response(self.get_serializer(rows, many=True).data)
+
+    @extend_schema(
+        description=(
+            "Server-sent events for the work queue, filtered like the list. Sends a `snapshot` "
+            "event with every matching row, then `diff` events ({upsert: [rows], remove: [keys]}) "
+            "as work moves; a row that stops matching the filters arrives as a remove. A `resync` "
+            "event, or the end of the stream, means reconnect for a fresh snapshot. Live only "
+            "under the ASGI server with the projection enabled; otherwise the stream is the "
+            "snapshot alone and the `retry` interval paces reconnects."
+        ),
+        parameters=[
+            OpenApiParameter("wo", OpenApiTypes.UUID),
+            OpenApiParameter("kind", OpenApiTypes.STR),
+            OpenApiParameter("work_center", OpenApiTypes.UUID),
+            OpenApiParameter("work_center__in", OpenApiTypes.STR),
+            OpenApiParameter("search", OpenApiTypes.STR),
+            OpenApiParameter("readiness", OpenApiTypes.STR, enum=["ready", "blocked"]),
+        ],
+        responses={(200, "text/event-stream"): OpenApiTypes.STR},
+    )
+    @action(detail=False, methods=["get"], renderer_classes=[EventStreamRenderer, renderers.JSONRenderer],
+            pagination_class=None)
+    def stream(self, request):
+        tenant_id = getattr(self.tenant, "id", None)
+
+        def snapshot():
+            with tenant_context(tenant_id):
+                return self._rows()
+
+        live = (
+            isinstance(request._request, ASGIRequest)
+            and work_queue.projection_enabled()
+            and request.query_params.get("source") != work_queue.SOURCE_RAW
+        )
+        if live:
+            events = work_queue.live_stream(tenant_id, self._filters(), snapshot)
+        else:
+            events = work_queue.snapshot_stream(snapshot())
+        response = StreamingHttpResponse(events, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Keep reverse proxies from buffering the stream.
+        response["X-Accel-Buffering"] = "no"
+        return response